@@ -8,20 +8,83 @@ import sys
 import json
 import io
 import csv
-from datetime import datetime
+import gzip
+import hashlib
+import hmac
+import mimetypes
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
 
 sys.path.insert(0, os.path.dirname(__file__))
 
-from flask import Flask, render_template, request, jsonify, Response
+from flask import (
+    Flask, render_template, request, jsonify, Response, make_response,
+    send_from_directory, url_for, g,
+)
+from markupsafe import Markup
+from werkzeug.security import safe_join
 from src.nutrition import get_nutrition_plan, NUTRITION_PLANS
-from src.exercise import get_exercise_plan
+from src.exercise import EXERCISE_CATALOGUE, get_exercise_plan
+from src.assets import DIST_DIR, IMMUTABLE_MAX_AGE, MANIFEST_PATH, load_manifest, srcset
+from src.admission import ENDPOINT_POOLS, Rejected, build_pools
+from src.audit import get_audit_log, get_audit_stats
+from src.history import (
+    TREND_POINTS, get_history_store, normalize_patient_id, parse_timestamp,
+)
+from src.traffic import record_request, traffic_report
 
 app = Flask(__name__)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-only-change-me')
 
-MODEL_DIR = os.path.join(os.path.dirname(__file__), 'models')
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(ROOT_DIR, 'models')
+STATS_PATH = os.path.join(ROOT_DIR, 'outputs', 'model_stats.json')
 MODEL_EXISTS = os.path.exists(os.path.join(MODEL_DIR, 'obesity_model.pkl'))
 
+# ── Fingerprinted static assets (built by `python -m src.assets`) ────────────
+# Reloaded when a rebuild rewrites the manifest, so running workers switch to
+# the new hashed URLs; its digest is part of the page ETags and cache keys.
+ASSET_MANIFEST_PATH = MANIFEST_PATH
+_asset_manifest = {'key': None, 'manifest': {}, 'digest': 'none'}
+_asset_manifest_lock = threading.Lock()
+
+
+def asset_manifest():
+    """(manifest, digest) of the current asset build."""
+    try:
+        st = os.stat(ASSET_MANIFEST_PATH)
+        key = (ASSET_MANIFEST_PATH, st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = None
+    with _asset_manifest_lock:
+        if _asset_manifest['key'] != key:
+            manifest = load_manifest(ASSET_MANIFEST_PATH) if key else {}
+            digest = hashlib.sha1(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+            _asset_manifest.update(key=key, manifest=manifest, digest=digest if manifest else 'none')
+        return _asset_manifest['manifest'], _asset_manifest['digest']
+
+
+def asset_url_for(endpoint, **values):
+    """
+    url_for for templates: static files that are in the build manifest
+    resolve to their content-hashed copy under /assets/.
+    """
+    if endpoint == 'static':
+        hashed = asset_manifest()[0].get(values.get('filename'))
+        if hashed:
+            endpoint, values['filename'] = 'assets', hashed
+    return url_for(endpoint, **values)
+
+
+app.jinja_env.globals['url_for'] = asset_url_for
+app.jinja_env.globals['srcset'] = lambda filename, ext: srcset(
+    asset_manifest()[0], filename, ext, lambda name: asset_url_for('static', filename=name)
+)
+
+
 VALID_GENDERS = {'Male', 'Female'}
 VALID_PHYSICAL_ACTIVITY = {
     'Sedentary', 'Light', 'Moderate', 'Active', 'Very Active'
@@ -79,6 +142,301 @@ def parse_prediction_form(form):
         'family_history': family_history,
     }
 
+
+DEFAULT_WEIGHT_TARGET = 'Normal_Weight'   # class the result pages solve the target weight for
+
+
+def wants_explanation():
+    """True when the request asks for per-feature attributions (explain=1)."""
+    return request.values.get('explain', '').strip().lower() in {'1', 'true', 'yes', 'on'}
+
+# ── Cached model_stats.json ──────────────────────────────────────────────────
+# Parsed once and re-read only when the file's mtime/size changes.
+_stats_cache = {'key': None, 'stats': None}
+_stats_lock = threading.Lock()
+
+
+def load_stats():
+    """
+    Return (stats, version, mtime) for outputs/model_stats.json.
+    stats is None when the file does not exist yet.
+    """
+    try:
+        st = os.stat(STATS_PATH)
+    except FileNotFoundError:
+        return None, 'none', None
+
+    key = (st.st_mtime_ns, st.st_size)
+    if _stats_cache['key'] != key:
+        with _stats_lock:
+            if _stats_cache['key'] != key:
+                with open(STATS_PATH, 'r') as f:
+                    _stats_cache['stats'] = json.load(f)
+                _stats_cache['key'] = key
+    return _stats_cache['stats'], f'{key[0]:x}-{key[1]:x}', st.st_mtime
+
+
+# ── Conditional GET (ETag / Last-Modified) ───────────────────────────────────
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _scan_templates():
+    """
+    (digest, newest mtime) over every file in templates/: pages extend
+    base.html and include partials, so any of them changes the page.
+    """
+    folder = os.path.join(app.root_path, app.template_folder)
+    entries = []
+    for dirpath, _, filenames in os.walk(folder):
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            entries.append((os.path.relpath(path, folder), _mtime(path) or 0.0))
+    entries.sort()
+    digest = hashlib.sha1(repr(entries).encode('utf-8')).hexdigest()[:16]
+    return digest, max((mtime for _, mtime in entries), default=None)
+
+
+_templates_version = _scan_templates()
+
+
+def templates_version():
+    """Scanned once at startup; rescanned per call while templates auto-reload (debug)."""
+    return _scan_templates() if app.jinja_env.auto_reload else _templates_version
+
+
+def page_validators(template_name, stats_version='none', stats_mtime=None):
+    """
+    ETag and Last-Modified for a page that only depends on the templates,
+    model_stats.json, the loaded model version and the asset build.
+    """
+    from src.predict import get_model_version, MODEL_PATH
+
+    templates_digest, template_mtime = templates_version()
+    fingerprint = '|'.join(map(str, [
+        template_name, templates_digest, stats_version, get_model_version(), MODEL_EXISTS,
+        asset_manifest()[1],
+    ]))
+    etag = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+
+    mtimes = [m for m in (stats_mtime, template_mtime, _mtime(MODEL_PATH)) if m is not None]
+    last_modified = datetime.fromtimestamp(int(max(mtimes, default=0)), tz=timezone.utc)
+    return etag, last_modified
+
+
+# ── Rendered page cache ───────────────────────────────────────────────────────
+# Pages that only depend on their template, the stats file and the model are
+# rendered once per ETag and kept as both plain and gzipped bytes.
+PAGE_CACHE_MAX_ENTRIES = 32
+_page_cache = OrderedDict()
+_page_cache_lock = threading.Lock()
+
+
+def _cached_page_body(etag, template_name, build_context):
+    key = (request.path, etag)
+    with _page_cache_lock:
+        entry = _page_cache.get(key)
+        if entry is not None:
+            _page_cache.move_to_end(key)
+            return entry
+
+    html = render_template(template_name, **build_context()).encode('utf-8')
+    entry = (html, gzip.compress(html, compresslevel=9))
+    with _page_cache_lock:
+        _page_cache[key] = entry
+        while len(_page_cache) > PAGE_CACHE_MAX_ENTRIES:
+            _page_cache.popitem(last=False)
+    return entry
+
+
+def render_cached_page(template_name, build_context, stats_version='none', stats_mtime=None):
+    """
+    Serve a cacheable page:
+      - 304 Not Modified when the client's ETag / If-Modified-Since still matches
+      - otherwise the cached render for this ETag (gzipped when accepted),
+        rendering with build_context() only on a cache miss
+    """
+    page_etag, last_modified = page_validators(template_name, stats_version, stats_mtime)
+    # The plain and gzipped renders are different representations: one ETag each
+    gzipped = 'gzip' in request.accept_encodings
+    etag = f'{page_etag}-gz' if gzipped else page_etag
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        not_modified = (request.if_modified_since is not None
+                        and last_modified <= request.if_modified_since)
+
+    if not_modified:
+        response = make_response('', 304)
+    else:
+        html, html_gz = _cached_page_body(page_etag, template_name, build_context)
+        if gzipped:
+            response = make_response(html_gz)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = make_response(html)
+        response.mimetype = 'text/html'
+    response.vary.add('Accept-Encoding')
+
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+
+# ── Fragment cache for the shared base.html chrome ───────────────────────────
+# Keyed by template and asset versions, so every edit or rebuild adds a key;
+# the oldest renders are evicted like the page cache's.
+FRAGMENT_CACHE_MAX_ENTRIES = 16
+_fragment_cache = OrderedDict()
+_fragment_cache_lock = threading.Lock()
+
+
+def cached_fragment(template_name):
+    """Render a static partial (navbar, footer) once per template version."""
+    key = (template_name, templates_version()[0], asset_manifest()[1])
+    with _fragment_cache_lock:
+        html = _fragment_cache.get(key)
+        if html is not None:
+            _fragment_cache.move_to_end(key)
+            return html
+
+    html = Markup(app.jinja_env.get_template(template_name).render(url_for=asset_url_for))
+    with _fragment_cache_lock:
+        _fragment_cache[key] = html
+        while len(_fragment_cache) > FRAGMENT_CACHE_MAX_ENTRIES:
+            _fragment_cache.popitem(last=False)
+    return html
+
+
+app.jinja_env.globals['cached_fragment'] = cached_fragment
+
+
+# ── Admission control for the expensive POST routes ──────────────────────────
+ADMISSION_POOLS = build_pools()
+
+
+@app.before_request
+def admit_request():
+    """Take a slot in the route's pool, or fail fast with 503 + Retry-After."""
+    pool_name = ENDPOINT_POOLS.get(request.endpoint)
+    if pool_name is None or request.method != 'POST':
+        return None
+
+    pool = ADMISSION_POOLS[pool_name]
+    try:
+        g.admission = (pool, pool.acquire())
+    except Rejected as rejected:
+        if pool_name == 'train':
+            response = jsonify({'success': False,
+                                'message': 'A training run is already in progress. Try again later.'})
+        else:
+            response = make_response('Server is busy — please retry shortly.')
+            response.mimetype = 'text/plain'
+        response.status_code = 503
+        response.headers['Retry-After'] = str(rejected.retry_after)
+        return response
+    return None
+
+
+@app.teardown_request
+def release_admission(exc=None):
+    admission = g.pop('admission', None)
+    if admission is not None:
+        pool, started = admission
+        pool.release(started)
+
+
+# ── On-the-fly compression for dynamic responses ─────────────────────────────
+COMPRESS_MIN_BYTES = 1024
+COMPRESS_MIMETYPES = {'text/html', 'text/csv', 'application/json'}
+
+
+@app.after_request
+def compress_response(response):
+    """Gzip dynamic HTML/CSV/JSON bodies above COMPRESS_MIN_BYTES."""
+    if (response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESS_MIMETYPES
+            or 'gzip' not in request.accept_encodings):
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+# ── Prediction audit log (queued; written by a background thread) ────────────
+
+def audit_prediction(inputs, result, started, mode='basic'):
+    """
+    Record one served prediction: counted in the live traffic analytics
+    (src/traffic.py) and queued for the audit log; never blocks on disk
+    (see src/audit.py).
+    """
+    record_request(result, mode)
+    audit_log = get_audit_log()
+    if audit_log is None:
+        return
+    audit_log.record({
+        'endpoint':      request.endpoint,
+        'model_version': result.get('model_version'),
+        'inputs':        {key: value for key, value in inputs.items() if key != 'history_token'},
+        'class_label':   result.get('class_label'),
+        'confidence':    result.get('confidence'),
+        'probabilities': result.get('all_probs'),
+        'bmi':           result.get('bmi'),
+        'latency_ms':    round((time.perf_counter() - started) * 1000, 2),
+    })
+
+
+# ── Per-patient assessment history (SQLite, see src/history.py) ──────────────
+HISTORY_PAGE_POINTS = 8   # trend points shown under a result
+
+# Token for reading or writing a patient's history: the IDs are easy to guess.
+# /api/history/<id>/trend takes it as a Bearer header, the forms as the
+# history_token field. History is off while it is unset.
+HISTORY_API_TOKEN = os.getenv('HISTORY_API_TOKEN', '')
+
+
+def history_token_valid(token):
+    """True when HISTORY_API_TOKEN is set and token matches it."""
+    return bool(HISTORY_API_TOKEN) and hmac.compare_digest(
+        str(token or '').strip().encode(), HISTORY_API_TOKEN.encode())
+
+
+def save_assessment(patient_id, result, nutrition, weight_kg):
+    """
+    Store the assessment for a patient ID; returns the patient's recent trend.
+    Without a valid history_token nothing is stored or shown: anyone could
+    otherwise read or pad a guessed patient's history through the form.
+    """
+    store = get_history_store() if patient_id else None
+    if store is None:
+        return None
+    if not history_token_valid(request.form.get('history_token')):
+        return {'patient_id': patient_id, 'denied': True}
+    try:
+        store.add(patient_id, result, nutrition, weight_kg=weight_kg, endpoint=request.endpoint)
+        return store.trend(patient_id, points=HISTORY_PAGE_POINTS)
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not save assessment history: {e}")
+        return None
+
+
 def update_model_status():
     global MODEL_EXISTS
     try:
@@ -91,26 +449,27 @@ def update_model_status():
 @app.route('/')
 def index():
     update_model_status()
-    obesity_classes = [
-        {'key': k, 'label': v['label'], 'emoji': v['emoji'], 'color': v['color'],
-         'calories': v['daily_calories']}
-        for k, v in NUTRITION_PLANS.items()
-    ]
-    
-    stats_path = os.path.join('outputs', 'model_stats.json')
-    stats = None
-    if os.path.exists(stats_path):
-        with open(stats_path, 'r') as f:
-            stats = json.load(f)
-            
-    return render_template('index.html', 
-                           obesity_classes=obesity_classes, 
-                           model_exists=MODEL_EXISTS,
-                           stats=stats)
+    stats, stats_version, stats_mtime = load_stats()
+
+    def build_context():
+        obesity_classes = [
+            {'key': k, 'label': v['label'], 'emoji': v['emoji'], 'color': v['color'],
+             'calories': v['daily_calories']}
+            for k, v in NUTRITION_PLANS.items()
+        ]
+        return {'obesity_classes': obesity_classes,
+                'model_exists': MODEL_EXISTS,
+                'stats': stats}
+
+    return render_cached_page('index.html', build_context, stats_version, stats_mtime)
 
 
 @app.route('/predict', methods=['GET', 'POST'])
 def predict_view():
+    if request.method == 'GET':
+        update_model_status()
+        return render_cached_page('predict.html', lambda: {'model_exists': MODEL_EXISTS})
+
     result = None
     nutrition = None
     exercise = None
@@ -124,15 +483,21 @@ def predict_view():
                 from src.predict import predict as run_predict
 
                 parsed = parse_prediction_form(request.form)
+                patient_id = normalize_patient_id(request.form.get('patient_id'))
 
+                started = time.perf_counter()
                 result = run_predict(
                     age=parsed['age'],
                     gender=parsed['gender'],
                     height_cm=parsed['height_cm'],
                     weight_kg=parsed['weight_kg'],
                     physical_activity=parsed['physical_activity'],
-                    family_history=parsed['family_history']
+                    family_history=parsed['family_history'],
+                    explain=wants_explanation(),
+                    weight_target=DEFAULT_WEIGHT_TARGET,
+                    record=True,
                 )
+                audit_prediction(parsed, result, started)
 
                 plan_meta = NUTRITION_PLANS.get(result['class_label'], {})
                 result['color'] = plan_meta.get('color', '#f97316')
@@ -156,6 +521,7 @@ def predict_view():
                 }
                 nutrition = get_nutrition_plan(result['class_label'], user_profile=user_profile_data)
                 exercise = get_exercise_plan(result['class_label'])
+                result['history'] = save_assessment(patient_id, result, nutrition, parsed['weight_kg'])
 
             except ValueError as e:
                 error = f"Invalid input values: {e}"
@@ -174,6 +540,10 @@ def predict_view():
 
 @app.route('/advance', methods=['GET', 'POST'])
 def advance_view():
+    if request.method == 'GET':
+        update_model_status()
+        return render_cached_page('advance.html', lambda: {'model_exists': MODEL_EXISTS})
+
     result = None
     nutrition = None
     exercise = None
@@ -187,7 +557,11 @@ def advance_view():
                 from src.predict import predict_advanced as run_predict_advanced
 
                 form_data = request.form.to_dict(flat=True)
-                result = run_predict_advanced(form_data)
+                patient_id = normalize_patient_id(form_data.get('patient_id'))
+                started = time.perf_counter()
+                result = run_predict_advanced(form_data, explain=wants_explanation(),
+                                              weight_target=DEFAULT_WEIGHT_TARGET, record=True)
+                audit_prediction(form_data, result, started, mode='advanced')
 
                 plan_meta = NUTRITION_PLANS.get(result['class_label'], {})
                 result['color'] = plan_meta.get('color', '#f97316')
@@ -211,6 +585,8 @@ def advance_view():
                 }
                 nutrition = get_nutrition_plan(result['class_label'], user_profile=user_profile_adv)
                 exercise = get_exercise_plan(result['class_label'])
+                result['history'] = save_assessment(patient_id, result, nutrition,
+                                                    user_profile_adv['weight'])
 
             except ValueError as e:
                 error = f"Invalid input values: {e}"
@@ -229,10 +605,168 @@ def advance_view():
 
 @app.route('/api/exercise')
 def api_exercise():
-    """Return exercise recommendations for a given obesity class."""
-    obesity_class = request.args.get('class', 'Normal_Weight')
-    plan = get_exercise_plan(obesity_class)
-    return jsonify(plan)
+    """
+    Return exercise recommendations for a given obesity class, from the
+    JSON serialized at startup; 304 when the client's ETag still matches.
+    """
+    entry = EXERCISE_CATALOGUE.entry(request.args.get('class', 'Normal_Weight'))
+    gzipped = 'gzip' in request.accept_encodings
+    etag = entry.etag_gz if gzipped else entry.etag
+
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    elif gzipped:
+        response = make_response(entry.body_gz)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = make_response(entry.body)
+    response.mimetype = 'application/json'
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+@app.route('/api/explain', methods=['POST'])
+def api_explain():
+    """
+    Prediction + per-feature attributions as JSON. Accepts the /predict
+    fields, or the full /advance field set, as a form or a JSON body.
+    """
+    if not MODEL_EXISTS:
+        return jsonify({'success': False, 'message': 'Model not found. Run python main.py first.'}), 503
+
+    data = request.get_json(silent=True) or request.form.to_dict(flat=True)
+    started = time.perf_counter()
+    try:
+        if 'favc' in data:
+            from src.predict import predict_advanced as run_predict_advanced
+            result = run_predict_advanced({k: str(v) for k, v in data.items()}, explain=True,
+                                          record=True)
+        else:
+            from src.predict import predict as run_predict
+            result = run_predict(**parse_prediction_form(data), explain=True, record=True)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Invalid input values: {e}'}), 400
+
+    audit_prediction(data, result, started, mode='advanced' if 'favc' in data else 'basic')
+
+    return jsonify({'success': True, **result})
+
+
+@app.route('/api/target-weight', methods=['POST'])
+def api_target_weight():
+    """
+    Class transition weights for one profile as JSON. Accepts the /predict
+    fields, or the full /advance field set, plus an optional target class.
+    """
+    if not MODEL_EXISTS:
+        return jsonify({'success': False, 'message': 'Model not found. Run python main.py first.'}), 503
+
+    data = request.get_json(silent=True) or request.form.to_dict(flat=True)
+    target = data.get('target', DEFAULT_WEIGHT_TARGET)
+    if target not in NUTRITION_PLANS:
+        return jsonify({'success': False, 'message': f'Unknown target class: {target}'}), 400
+    started = time.perf_counter()
+    try:
+        if 'favc' in data:
+            from src.predict import predict_advanced as run_predict_advanced
+            result = run_predict_advanced({k: str(v) for k, v in data.items()}, weight_target=target,
+                                          record=True)
+        else:
+            from src.predict import predict as run_predict
+            result = run_predict(**parse_prediction_form(data), weight_target=target, record=True)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Invalid input values: {e}'}), 400
+
+    audit_prediction(data, result, started, mode='advanced' if 'favc' in data else 'basic')
+
+    return jsonify({'success': True, **result})
+
+
+@app.route('/api/history/<patient_id>/trend')
+def api_history_trend(patient_id):
+    """
+    A patient's stored assessments as a downsampled time series: averages of
+    BMI, weight and nutrition targets per time bucket, plus the latest class.
+    Query parameters: points (default 100, max 1000), since, until (ISO dates).
+    Needs `Authorization: Bearer <HISTORY_API_TOKEN>`: the IDs are easy to guess.
+    """
+    if not HISTORY_API_TOKEN:
+        return jsonify({'success': False, 'message': 'History API is disabled (set HISTORY_API_TOKEN).'}), 403
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not history_token_valid(token):
+        response = jsonify({'success': False, 'message': 'Missing or invalid API token.'})
+        response.status_code = 401
+        response.headers['WWW-Authenticate'] = 'Bearer'
+        return response
+
+    store = get_history_store()
+    if store is None:
+        return jsonify({'success': False, 'message': 'History store is disabled (HISTORY_STORE=0).'}), 503
+    try:
+        patient_id = normalize_patient_id(patient_id)
+        since = parse_timestamp(request.args.get('since'))
+        until = parse_timestamp(request.args.get('until'))
+        points = request.args.get('points', TREND_POINTS, type=int)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Invalid query: {e}'}), 400
+    return jsonify({'success': True, **store.trend(patient_id, since, until, points)})
+
+
+@app.route('/metrics/batching')
+def batching_metrics():
+    """Micro-batching histograms: rows per ensemble call and time spent queued."""
+    from src.predict import get_batching_stats
+    return jsonify(get_batching_stats())
+
+
+@app.route('/metrics/admission')
+def admission_metrics():
+    """Per-route limits, queue depth and rejection counts."""
+    return jsonify({name: pool.stats() for name, pool in ADMISSION_POOLS.items()})
+
+
+@app.route('/metrics/memory')
+def memory_metrics():
+    """
+    Deep sizes of the loaded bundles and plan dicts plus this worker's pages.
+    The tracemalloc burst runs synthetic predictions in the worker, so it is
+    only available from the CLI (python -m src.memory --burst N).
+    """
+    from src.memory import memory_report
+    return jsonify(memory_report())
+
+
+@app.route('/metrics/audit')
+def audit_metrics():
+    """Audit log queue depth, written/dropped records and rotations."""
+    return jsonify(get_audit_stats())
+
+
+@app.route('/metrics/traffic')
+def traffic_metrics():
+    """
+    Live traffic of the prediction routes (all workers) over rolling
+    1m / 1h / 24h windows: requests per minute, class mix, basic/advanced
+    split and confidence distribution, read from shared-memory counters.
+    """
+    response = jsonify(traffic_report())
+    response.cache_control.no_store = True
+    return response
+
+
+@app.route('/drift')
+def drift():
+    """
+    Input drift of the predictions served so far (all workers) against the
+    training distribution: PSI per feature and for the predicted-class mix,
+    plus a binned KS for numeric features. No request data is stored.
+    """
+    if not MODEL_EXISTS:
+        return jsonify({'enabled': False, 'reason': 'no trained model'})
+    from src.predict import get_drift_report
+    return jsonify(get_drift_report())
 
 
 @app.route('/download-report', methods=['POST'])
@@ -247,9 +781,10 @@ def download_report():
         mode = request.form.get('mode', 'basic')
         parsed = parse_prediction_form(request.form)
 
+        started = time.perf_counter()
         if mode == 'advanced':
             from src.predict import predict_advanced as run_predict_advanced
-            result = run_predict_advanced(request.form.to_dict(flat=True))
+            result = run_predict_advanced(request.form.to_dict(flat=True), record=True)
         else:
             from src.predict import predict as run_predict
             result = run_predict(
@@ -258,8 +793,10 @@ def download_report():
                 parsed['height_cm'],
                 parsed['weight_kg'],
                 parsed['physical_activity'],
-                parsed['family_history']
+                parsed['family_history'],
+                record=True,
             )
+        audit_prediction(request.form.to_dict(flat=True), result, started, mode=mode)
 
         # Pass profile for AI-powered nutrition in the report
         faf_map = {
@@ -366,36 +903,64 @@ def download_report():
 
 
 
+@app.route('/assets/<path:filename>')
+def assets(filename):
+    """Serve fingerprinted build output: cached for a year, gzip when accepted."""
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    gz_path = safe_join(DIST_DIR, filename + '.gz')
+
+    if 'gzip' in request.accept_encodings and gz_path and os.path.exists(gz_path):
+        response = send_from_directory(DIST_DIR, filename + '.gz', mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = send_from_directory(DIST_DIR, filename, mimetype=mimetype)
+
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
 @app.route('/learn')
 def learn():
     """Formal obesity learning page with prevention and management guidance."""
-    return render_template('learn.html')
+    return render_cached_page('learn.html', dict)
 
 
 @app.route('/statistics')
 def statistics():
     update_model_status()
-    stats_path = os.path.join('outputs', 'model_stats.json')
-    stats = None
-    if os.path.exists(stats_path):
-        with open(stats_path, 'r') as f:
-            stats = json.load(f)
-    return render_template('statistics.html', stats=stats, model_exists=MODEL_EXISTS)
+    stats, stats_version, stats_mtime = load_stats()
+    return render_cached_page(
+        'statistics.html', lambda: {'stats': stats, 'model_exists': MODEL_EXISTS},
+        stats_version, stats_mtime
+    )
+
+
+# Cores a /train run may use inside a web worker; the rest stay free for inference
+TRAIN_WEB_N_JOBS = int(os.getenv('TRAIN_WEB_N_JOBS', str(max(1, (os.cpu_count() or 2) // 2))))
 
 
 @app.route('/train', methods=['POST'])
 def train_model():
     """
     Trigger the model training process and return the new stats.
-    Called via AJAX from the Dashboard.
+    Called via AJAX from the Dashboard. A model already trained from the
+    same data and settings is reused unless the request sends force=1.
+    Only one run at a time across all workers (see src/admission.py), capped
+    at TRAIN_WEB_N_JOBS cores.
     """
     try:
         from src.train import train
-        bundle, stats = train()
+        force = str(request.values.get('force', '')).strip().lower() in {'1', 'true', 'yes'}
+        bundle, stats, reused = train(force=force, n_jobs=TRAIN_WEB_N_JOBS)
         update_model_status()
         return jsonify({
             'success': True,
-            'message': 'Model trained successfully!',
+            'message': 'Model is up to date (reused the previous training run).' if reused
+                       else 'Model trained successfully!',
+            'reused': reused,
             'stats': stats
         })
     except Exception as e:
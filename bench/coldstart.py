@@ -0,0 +1,100 @@
+"""
+coldstart.py
+-------------
+Cold-start cost of a fresh worker: sklearn pickles vs the NumPy runtime.
+
+Each run starts a new interpreter that imports app.py, makes the first
+prediction (which loads the bundle) and the first AI nutrition plan, then
+reports the time of each step, the resulting RSS and whether pandas /
+scikit-learn ended up imported. Needs trained models and their runtime
+exports (python main.py, or python -m src.runtime.export).
+
+Run it:
+    python -m bench.coldstart --runs 5
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+_WORKER_SCRIPT = r'''
+import time, json, sys, warnings
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+warnings.simplefilter('ignore')
+import app
+t1 = time.perf_counter()
+from src.predict import predict
+result = predict(30, 'Male', 178.0, 92.0, 'Light', 'yes')
+t2 = time.perf_counter()
+from src.nutrition import get_nutrition_plan
+get_nutrition_plan(result['class_label'], user_profile={{
+    'age': 30, 'gender': 'Male', 'height': 178.0, 'weight': 92.0, 'activity': 0.75}})
+t3 = time.perf_counter()
+with open('/proc/self/status') as f:
+    rss = next((int(l.split()[1]) for l in f if l.startswith('VmRSS:')), None)
+print(json.dumps({{
+    'import_app_ms':     (t1 - t0) * 1000,
+    'first_predict_ms':  (t2 - t1) * 1000,
+    'first_nutrition_ms': (t3 - t2) * 1000,
+    'rss_mb':            rss / 1024 if rss else None,
+    'sklearn_imported':  'sklearn' in sys.modules,
+    'pandas_imported':   'pandas' in sys.modules,
+}}))
+'''
+
+
+def run_once(runtime):
+    env = {**os.environ, 'MODEL_RUNTIME': runtime, 'PREDICT_BATCHING': '0'}
+    env.pop('INFERENCE_SOCKET', None)
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', _WORKER_SCRIPT.format(root=ROOT_DIR)],
+                            cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    result['process_total_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def measure(runtime, runs):
+    results = [run_once(runtime) for _ in range(runs)]
+    summary = {}
+    for key in results[0]:
+        values = [r[key] for r in results]
+        if isinstance(values[0], bool):
+            summary[key] = all(values)
+        elif values[0] is not None:
+            summary[key] = round(float(np.median(values)), 1)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Worker cold-start benchmark.')
+    parser.add_argument('--runs', type=int, default=5, help='fresh processes per runtime (median reported)')
+    args = parser.parse_args(argv)
+
+    print("=" * 55)
+    print(f"  COLD START (median of {args.runs} fresh processes)")
+    print("=" * 55)
+
+    report = {runtime: measure(runtime, args.runs) for runtime in ('sklearn', 'numpy')}
+
+    keys = ['import_app_ms', 'first_predict_ms', 'first_nutrition_ms', 'process_total_ms', 'rss_mb']
+    print(f"  {'':<20}{'sklearn':>12}{'numpy':>12}")
+    for key in keys:
+        print(f"  {key:<20}{report['sklearn'].get(key, '-'):>12}{report['numpy'].get(key, '-'):>12}")
+    for key in ('sklearn_imported', 'pandas_imported'):
+        print(f"  {key:<20}{str(report['sklearn'][key]):>12}{str(report['numpy'][key]):>12}")
+    print()
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    main()
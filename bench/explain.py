@@ -0,0 +1,108 @@
+"""
+explain.py
+-----------
+Latency of predictions with and without explain=1.
+
+Runs dataset-sampled /advance profiles through predict_advanced() three
+ways — plain, explained with a cold explanation cache, and explained again
+(served from the cache). For each mode it prints p50/p95/p99 of the whole
+call and of the explanation step alone, plus the one-off cost of building
+the explainer for a model version. Needs a trained model (python main.py);
+compare MODEL_RUNTIME=numpy against the default sklearn bundle.
+
+Run it:
+    python -m bench.explain --profiles 300
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('PREDICT_BATCHING', '0')   # one caller: measure the request itself
+
+from bench.load import load_profiles
+import src.explain as explain_module
+import src.predict as predict_module
+
+P95_TARGET_MS = 20.0
+
+
+def percentiles(latencies):
+    return {f'p{q}_ms': round(float(np.percentile(latencies, q)), 2) for q in (50, 95, 99)}
+
+
+def time_calls(profiles, explain):
+    """Whole-call latencies, and the explanation step's own latencies."""
+    explain_row = explain_module.explain_row
+    step_latencies = []
+
+    def timed_explain_row(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return explain_row(*args, **kwargs)
+        finally:
+            step_latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies = []
+    explain_module.explain_row = timed_explain_row
+    try:
+        for _, advanced, _ in profiles:
+            form = {k: str(v) for k, v in advanced.items()}
+            start = time.perf_counter()
+            predict_module.predict_advanced(form, explain=explain)
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        explain_module.explain_row = explain_row
+
+    result = {'call': percentiles(latencies)}
+    if step_latencies:
+        result['explanation'] = percentiles(step_latencies)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Explanation latency benchmark.')
+    parser.add_argument('--profiles', type=int, default=300, help='dataset rows to sample')
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    profiles = load_profiles(limit=args.profiles)
+    bundle = predict_module.load_model()
+
+    start = time.perf_counter()
+    explain_module.get_explainer(bundle)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    report = {
+        'explainer_build_ms': round(build_ms, 1),
+        'predict':            time_calls(profiles, explain=False),
+        'explain_cold_cache': time_calls(profiles, explain=True),
+        'explain_warm_cache': time_calls(profiles, explain=True),
+        'cache':              explain_module.get_explain_stats(),
+    }
+
+    print("=" * 55)
+    print(f"  EXPLANATION LATENCY ({len(profiles)} profiles)")
+    print("=" * 55)
+    print(f"  Explainer build (once per model version): {report['explainer_build_ms']} ms")
+    print(f"  {'':<32}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for mode in ('predict', 'explain_cold_cache', 'explain_warm_cache'):
+        for part, row in report[mode].items():
+            label = f'{mode} ({part})'
+            print(f"  {label:<32}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}")
+    cold_p95 = report['explain_cold_cache']['explanation']['p95_ms']
+    verdict = 'OK' if cold_p95 < P95_TARGET_MS else 'OVER TARGET'
+    print(f"  Explanation p95 (cold cache) vs {P95_TARGET_MS:.0f} ms target: {verdict}")
+    print()
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+"""
+load.py
+--------
+Repeatable load test for the web app.
+
+Form payloads are sampled from real rows of data/obesity_dataset.csv
+(clipped to the ranges the forms accept) for the basic and advanced modes,
+then a weighted mix of requests is sent to:
+
+    POST /predict          basic 6-field form
+    POST /advance          advanced 16-field form
+    POST /download-report  CSV report (basic or advanced)
+    GET  /api/exercise     exercise plan JSON
+
+Two ways to drive traffic:
+  - closed loop (default): --concurrency clients send back-to-back requests
+  - open loop (--rate R):   requests ARRIVE at R per second regardless of how
+                            fast the server answers; latency is measured from
+                            the scheduled arrival time, so queueing delay is
+                            counted instead of hidden (no coordinated omission)
+
+By default a server is started locally (python app.py on a free port) and
+stopped afterwards; pass --url to target one that is already running.
+The report is JSON so runs can be diffed or compared by a script.
+
+Run it:
+    python -m bench.load --concurrency 16 --duration 30
+    python -m bench.load --rate 50 --duration 60 --output outputs/load.json
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import queue
+import random
+import socket
+import argparse
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+ROOT_DIR  = os.path.join(os.path.dirname(__file__), '..')
+DATA_PATH = os.path.join(ROOT_DIR, 'data', 'obesity_dataset.csv')
+
+DEFAULT_MIX = {'predict': 4, 'advance': 2, 'report': 1, 'exercise': 3}
+
+SERVER_START_TIMEOUT = 60   # seconds
+REQUEST_TIMEOUT      = 30   # seconds
+
+# FAF (0–3) → the activity labels the forms offer
+ACTIVITY_LEVELS = [(0.375, 'Sedentary'), (1.125, 'Light'), (1.875, 'Moderate'),
+                   (2.625, 'Active'), (float('inf'), 'Very Active')]
+
+
+# ── Payloads ──────────────────────────────────────────────────────────────────
+
+def _clip(value, low, high, digits=1):
+    return round(min(max(float(value), low), high), digits)
+
+
+def _activity_label(faf):
+    return next(label for upper, label in ACTIVITY_LEVELS if float(faf) < upper)
+
+
+def row_to_forms(row):
+    """One dataset row → (basic form, advanced form) as the browser would post them."""
+    basic = {
+        'age':               int(_clip(row['Age'], 10, 80, 0)),
+        'gender':            row['Gender'],
+        'height':            _clip(float(row['Height']) * 100, 100, 220),
+        'weight':            _clip(row['Weight'], 20, 250),
+        'physical_activity': _activity_label(row['FAF']),
+        'family_history':    'Yes' if row['family_history_with_overweight'] == 'yes' else 'No',
+    }
+    advanced = {
+        **basic,
+        'favc':   row['FAVC'],
+        'fcvc':   _clip(row['FCVC'], 1, 3),
+        'ncp':    _clip(row['NCP'], 1, 6),
+        'caec':   row['CAEC'],
+        'smoke':  row['SMOKE'],
+        'ch2o':   _clip(row['CH2O'], 0, 3),
+        'scc':    row['SCC'],
+        'tue':    _clip(row['TUE'], 0, 3),
+        'calc':   row['CALC'],
+        'mtrans': row['MTRANS'],
+    }
+    return basic, advanced, row['NObeyesdad']
+
+
+def load_profiles(path=None, limit=None, seed=42):
+    """Sampled (basic, advanced, class) tuples from the dataset."""
+    with open(path or DATA_PATH, newline='') as f:
+        rows = list(csv.DictReader(f))
+    random.Random(seed).shuffle(rows)
+    return [row_to_forms(row) for row in rows[:limit or len(rows)]]
+
+
+def make_request(scenario, profile, rng):
+    """(method, path, body) for one request of the given scenario."""
+    basic, advanced, obesity_class = profile
+    if scenario == 'predict':
+        return 'POST', '/predict', basic
+    if scenario == 'advance':
+        return 'POST', '/advance', advanced
+    if scenario == 'report':
+        if rng.random() < 0.5:
+            return 'POST', '/download-report', {**advanced, 'mode': 'advanced'}
+        return 'POST', '/download-report', {**basic, 'mode': 'basic'}
+    if scenario == 'exercise':
+        return 'GET', '/api/exercise?' + urlencode({'class': obesity_class}), None
+    raise ValueError(f'Unknown scenario: {scenario}')
+
+
+# ── Clients ───────────────────────────────────────────────────────────────────
+
+class Recorder:
+    """Thread-safe per-scenario latency and status collection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = {}
+
+    def record(self, scenario, latency_ms, status):
+        with self._lock:
+            self.latencies.setdefault(scenario, []).append(latency_ms)
+            counts = self.statuses.setdefault(scenario, {})
+            counts[status] = counts.get(status, 0) + 1
+            if not (isinstance(status, int) and status < 400):
+                self.errors[scenario] = self.errors.get(scenario, 0) + 1
+
+
+def _send(conn, method, path, body):
+    headers = {'Accept-Encoding': 'gzip'}
+    data = None
+    if body is not None:
+        data = urlencode(body)
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+    conn.request(method, path, body=data, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def _worker(base_url, jobs, recorder, profiles, mix, stop_at, seed):
+    """Runs requests until stop_at; jobs is a queue of arrival times (open loop) or None."""
+    rng = random.Random(seed)
+    parts = urlsplit(base_url)
+    conn = None
+    scenarios, weights = zip(*mix.items())
+
+    while True:
+        if jobs is None:
+            if time.perf_counter() >= stop_at:
+                break
+            scheduled = time.perf_counter()
+        else:
+            scheduled = jobs.get()
+            if scheduled is None:
+                break
+
+        scenario = rng.choices(scenarios, weights)[0]
+        method, path, body = make_request(scenario, rng.choice(profiles), rng)
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=REQUEST_TIMEOUT)
+            status = _send(conn, method, path, body)
+        except (OSError, http.client.HTTPException) as exc:
+            status = type(exc).__name__
+            if conn is not None:
+                conn.close()
+            conn = None
+        recorder.record(scenario, (time.perf_counter() - scheduled) * 1000, status)
+
+    if conn is not None:
+        conn.close()
+
+
+def _schedule(jobs, rate, duration, workers, seed):
+    """Open loop: enqueue Poisson arrivals at `rate` per second for `duration` seconds."""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    next_at = start
+    while next_at < start + duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        jobs.put(next_at)
+        next_at += rng.expovariate(rate)
+    for _ in range(workers):
+        jobs.put(None)
+
+
+# ── Report ────────────────────────────────────────────────────────────────────
+
+def summarize(latencies, statuses, errors, elapsed):
+    values = np.array(latencies or [0.0])
+    count = len(latencies)
+    return {
+        'requests':       count,
+        'throughput_rps': round(count / elapsed, 2) if elapsed else 0.0,
+        'errors':         errors,
+        'error_rate':     round(errors / count, 4) if count else 0.0,
+        'status_counts':  {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+        'latency_ms': {
+            'mean': round(float(values.mean()), 2),
+            'p50':  round(float(np.percentile(values, 50)), 2),
+            'p95':  round(float(np.percentile(values, 95)), 2),
+            'p99':  round(float(np.percentile(values, 99)), 2),
+            'max':  round(float(values.max()), 2),
+        },
+    }
+
+
+def run_load(base_url, concurrency=8, duration=10.0, rate=None, mix=None, profiles=None, seed=42):
+    """Drive the server and return the JSON-ready report."""
+    mix = mix or DEFAULT_MIX
+    profiles = profiles or load_profiles(seed=seed)
+    recorder = Recorder()
+
+    jobs = queue.Queue() if rate else None
+    start = time.perf_counter()
+    stop_at = start + duration
+    threads = [
+        threading.Thread(target=_worker, daemon=True,
+                         args=(base_url, jobs, recorder, profiles, mix, stop_at, seed + i))
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    if rate:
+        _schedule(jobs, rate, duration, concurrency, seed)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    all_latencies, all_statuses, all_errors = [], {}, 0
+    routes = {}
+    for scenario in sorted(recorder.latencies):
+        routes[scenario] = summarize(recorder.latencies[scenario], recorder.statuses[scenario],
+                                     recorder.errors.get(scenario, 0), elapsed)
+        all_latencies += recorder.latencies[scenario]
+        all_errors += recorder.errors.get(scenario, 0)
+        for status, n in recorder.statuses[scenario].items():
+            all_statuses[status] = all_statuses.get(status, 0) + n
+
+    return {
+        'config': {
+            'url': base_url, 'concurrency': concurrency, 'duration_s': duration,
+            'mode': 'open' if rate else 'closed', 'rate_rps': rate, 'mix': mix, 'seed': seed,
+        },
+        'elapsed_s': round(elapsed, 3),
+        'overall': summarize(all_latencies, all_statuses, all_errors, elapsed),
+        'routes': routes,
+    }
+
+
+# ── Local server ──────────────────────────────────────────────────────────────
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_local_server():
+    """Start python app.py on a free port; returns (process, base_url)."""
+    port = _free_port()
+    env = {**os.environ, 'FLASK_HOST': '127.0.0.1', 'FLASK_PORT': str(port), 'FLASK_DEBUG': '0'}
+    process = subprocess.Popen([sys.executable, 'app.py'], cwd=ROOT_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('app.py exited during startup')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            conn.close()
+            return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'app.py did not answer within {SERVER_START_TIMEOUT}s')
+
+
+def parse_mix(text):
+    """'predict=4,exercise=1' → {'predict': 4.0, 'exercise': 1.0}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f'unknown scenario {name!r}; choose from {sorted(DEFAULT_MIX)}')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the obesity detection web app.')
+    parser.add_argument('--url', help='target an already running server (default: start app.py locally)')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to generate load')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='open-loop arrival rate in requests/second (default: closed loop)')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='scenario weights, e.g. predict=4,advance=2,report=1,exercise=3')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args(argv)
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        process, base_url = start_local_server()
+    try:
+        report = run_load(base_url, concurrency=args.concurrency, duration=args.duration,
+                          rate=args.rate, mix=args.mix, seed=args.seed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    return report
+
+
+if __name__ == '__main__':
+    main()
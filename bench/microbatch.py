@@ -0,0 +1,122 @@
+"""
+microbatch.py
+--------------
+Load test for the micro-batching executor in src/predict.py.
+
+Runs the same set of /predict-style requests from N concurrent client
+threads twice — once with every request doing its own 1-row ensemble pass,
+once through the MicroBatcher — and prints throughput and latency for both.
+Needs a trained model (python main.py).
+
+Run it:
+    python -m bench.microbatch --clients 64 --requests 20
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import src.predict as predict_module
+
+ACTIVITY_LEVELS = sorted(predict_module.VALID_PHYSICAL_ACTIVITY)
+
+
+def sample_inputs(n, seed=42):
+    """Random but valid inputs for predict()."""
+    rng = random.Random(seed)
+    return [
+        dict(
+            age=rng.randint(14, 61),
+            gender=rng.choice(['Male', 'Female']),
+            height_cm=round(rng.uniform(145, 198), 1),
+            weight_kg=round(rng.uniform(39, 173), 1),
+            physical_activity=rng.choice(ACTIVITY_LEVELS),
+            family_history=rng.choice(['yes', 'no']),
+        )
+        for _ in range(n)
+    ]
+
+
+def run_clients(inputs, clients):
+    """Split inputs across `clients` threads, run them all at once, return timings."""
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients + 1)
+
+    def client(chunk):
+        barrier.wait()
+        local = []
+        for kwargs in chunk:
+            start = time.perf_counter()
+            predict_module.predict(**kwargs)
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(inputs[i::clients],)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests':   len(latencies),
+        'seconds':    round(elapsed, 3),
+        'throughput': round(len(latencies) / elapsed, 1),
+        'p50_ms':     round(float(np.percentile(latencies, 50)), 2),
+        'p99_ms':     round(float(np.percentile(latencies, 99)), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-batching load test.')
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=20, help='requests per client')
+    parser.add_argument('--batch-size', type=int, default=predict_module.BATCH_MAX_SIZE)
+    parser.add_argument('--wait-ms', type=float, default=predict_module.BATCH_MAX_WAIT_MS)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(predict_module.MODEL_PATH):
+        print("❌ Model not found. Run `python main.py` first.")
+        sys.exit(1)
+
+    predict_module.load_model()
+    inputs = sample_inputs(args.clients * args.requests)
+
+    print("=" * 55)
+    print(f"  MICRO-BATCHING LOAD TEST ({args.clients} clients)")
+    print("=" * 55)
+
+    predict_module.BATCHING_ENABLED = False
+    unbatched = run_clients(inputs, args.clients)
+
+    predict_module.BATCHING_ENABLED = True
+    predict_module._batcher = predict_module.MicroBatcher(
+        max_batch_size=args.batch_size, max_wait_ms=args.wait_ms
+    )
+    predict_module._batcher_pid = os.getpid()
+    batched = run_clients(inputs, args.clients)
+
+    for label, result in (('1-row calls', unbatched), ('micro-batched', batched)):
+        print(f"  {label:<14}: {result['throughput']:>8.1f} req/s   "
+              f"p50 {result['p50_ms']:>8.2f} ms   p99 {result['p99_ms']:>8.2f} ms")
+    print(f"  Speed-up      : {batched['throughput'] / unbatched['throughput']:.1f}×")
+
+    stats = predict_module.get_batching_stats()
+    print(f"  Mean batch    : {stats['batch_size']['mean']} rows")
+    print(f"  Mean queue    : {stats['queue_wait_ms']['mean']} ms\n")
+    return {'unbatched': unbatched, 'batched': batched, 'batching': stats}
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+target_weight.py
+-----------------
+Per-user latency of the target-weight solver (src/target_weight.py).
+
+Solves dataset-sampled /advance profiles and prints p50/p95/p99 per user
+together with the batched calls and rows each solve needed. A few profiles
+are also solved the naive way — one 1-row prediction per candidate weight
+on a 0.1 kg grid — for comparison. Needs a trained model (python main.py).
+
+Run it:
+    python -m bench.target_weight --profiles 200
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('PREDICT_BATCHING', '0')
+
+from bench.load import load_profiles
+import src.predict as predict_module
+from src.target_weight import DEFAULT_TARGET, solve_target_weight
+
+P95_TARGET_MS = 50.0
+
+
+def feature_rows(profiles):
+    """Raw feature rows for the profiles, built by the real prediction path."""
+    rows = []
+    original = predict_module._run_prediction
+
+    def capture(bundle, all_features, bmi, **kwargs):
+        rows.append(np.array([all_features.get(col, 0.0) for col in bundle['feature_cols']], dtype=float))
+        return original(bundle, all_features, bmi, **kwargs)
+
+    predict_module._run_prediction = capture
+    try:
+        for _, advanced, _ in profiles:
+            predict_module.predict_advanced({k: str(v) for k, v in advanced.items()})
+    finally:
+        predict_module._run_prediction = original
+    return rows
+
+
+def naive_solve(bundle, row, feature_cols):
+    """One predict call per candidate weight — what the solver replaces."""
+    weight_index, bmi_index = feature_cols.index('Weight'), feature_cols.index('BMI')
+    height_m = row[feature_cols.index('Height')]
+    for weight in np.arange(20.0, 250.0, 0.1):
+        candidate = row.copy()
+        candidate[weight_index] = weight
+        candidate[bmi_index] = weight / height_m ** 2
+        predict_module.predict_proba_rows(bundle, candidate.reshape(1, -1))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Target-weight solver benchmark.')
+    parser.add_argument('--profiles', type=int, default=200, help='dataset rows to solve')
+    parser.add_argument('--naive', type=int, default=2, help='profiles to also solve one prediction at a time')
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    bundle = predict_module.load_model()
+    feature_cols = list(bundle['feature_cols'])
+    rows = feature_rows(load_profiles(limit=args.profiles))
+
+    def predict_fn(X):
+        return predict_module.predict_proba_batch(bundle, X)
+
+    start = time.perf_counter()
+    predict_module.get_runtime_model(bundle)
+    setup_ms = (time.perf_counter() - start) * 1000
+
+    latencies, calls, batch_rows = [], [], []
+    for row in rows:
+        start = time.perf_counter()
+        result = solve_target_weight(row, feature_cols, predict_fn, DEFAULT_TARGET)
+        latencies.append((time.perf_counter() - start) * 1000)
+        calls.append(result['search']['calls'])
+        batch_rows.append(result['search']['rows'])
+
+    naive = []
+    for row in rows[:args.naive]:
+        start = time.perf_counter()
+        naive_solve(bundle, row, feature_cols)
+        naive.append((time.perf_counter() - start) * 1000)
+
+    report = {
+        'profiles':          len(rows),
+        'runtime_copy_ms':   round(setup_ms, 1),
+        'solver_ms':         {f'p{q}': round(float(np.percentile(latencies, q)), 2) for q in (50, 95, 99)},
+        'ensemble_calls':    {'mean': round(float(np.mean(calls)), 2), 'max': int(np.max(calls))},
+        'rows_per_user':     {'mean': round(float(np.mean(batch_rows)), 1), 'max': int(np.max(batch_rows))},
+        'naive_ms_per_user': round(float(np.mean(naive)), 1) if naive else None,
+    }
+
+    print("=" * 55)
+    print(f"  TARGET-WEIGHT SOLVER ({len(rows)} profiles)")
+    print("=" * 55)
+    print(f"  Runtime copy of the model (once per model): {report['runtime_copy_ms']} ms")
+    print(f"  Solver p50/p95/p99: {report['solver_ms']['p50']} / {report['solver_ms']['p95']} / "
+          f"{report['solver_ms']['p99']} ms")
+    print(f"  Ensemble calls per user: {report['ensemble_calls']['mean']} "
+          f"(max {report['ensemble_calls']['max']}), rows per user: {report['rows_per_user']['mean']}")
+    if naive:
+        print(f"  Naive 1-row loop (0.1 kg grid): {report['naive_ms_per_user']} ms per user")
+    verdict = 'OK' if report['solver_ms']['p95'] < P95_TARGET_MS else 'OVER TARGET'
+    print(f"  p95 vs {P95_TARGET_MS:.0f} ms target: {verdict}")
+    print()
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    main()
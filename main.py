@@ -3,10 +3,25 @@ main.py — Entry point for model training.
 
 Run this script FIRST before starting the Flask app:
     python main.py
+
+After appending new rows to data/obesity_dataset.csv:
+    python main.py --incremental
+
+For a CSV too large to load at once (streams it in chunks of N rows):
+    python main.py --chunk-rows 500000
+
+With unchanged data, settings and hyperparameters the saved model is
+reused; to retrain anyway:
+    python main.py --force
+
+The ensemble members come from ENSEMBLE_MEMBERS (default rf,lr,gb); to also
+fit the other model-zoo entries for the comparison table:
+    python main.py --compare-zoo
 """
 
 import sys
 import os
+import argparse
 
 # Ensure project root is on the path
 sys.path.insert(0, os.path.dirname(__file__))
@@ -14,11 +29,23 @@ sys.path.insert(0, os.path.dirname(__file__))
 from src.train import train
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train the obesity classification models.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only fit rows appended since the last run (falls back to full retrain)')
+    parser.add_argument('--chunk-rows', type=int, default=None,
+                        help='preprocess the CSV in streaming chunks of N rows (for very large exports)')
+    parser.add_argument('--force', action='store_true',
+                        help='retrain even when the saved model was trained from identical inputs')
+    parser.add_argument('--compare-zoo', action='store_true',
+                        help='also fit the model-zoo entries outside the ensemble for the comparison table')
+    args = parser.parse_args()
+
     print("=" * 60)
     print("  AI-Based Obesity Detection — Model Training")
     print("=" * 60)
     try:
-        bundle, stats = train()
+        bundle, stats, reused = train(incremental=args.incremental, chunk_rows=args.chunk_rows,
+                                      force=args.force, compare=True if args.compare_zoo else None)
         print("\n" + "=" * 60)
         print("✅ Training complete!")
         print(f"   Ensemble Accuracy : {stats['ensemble']['accuracy'] * 100:.2f}%")
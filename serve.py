@@ -0,0 +1,48 @@
+"""
+serve.py — Shared inference server for the web workers.
+
+Start ONE of these per machine, then point every web worker at it:
+    python serve.py --socket /tmp/obesity-inference.sock
+    INFERENCE_SOCKET=/tmp/obesity-inference.sock gunicorn -w 16 app:app
+
+The server owns the ensemble and nutrition models (reloading them when the
+.pkl files change); workers keep only the small encoding schema. If the
+server goes away, workers fall back to loading the models themselves.
+"""
+
+import sys
+import os
+import argparse
+
+# Ensure project root is on the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.inference_server import DEFAULT_SOCKET_PATH, InferenceServer
+from src.predict import MODEL_PATH
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve model inference over a Unix domain socket.')
+    parser.add_argument('--socket', default=os.getenv('INFERENCE_SOCKET', DEFAULT_SOCKET_PATH),
+                        help=f'socket path (default: $INFERENCE_SOCKET or {DEFAULT_SOCKET_PATH})')
+    args = parser.parse_args()
+
+    if not os.path.exists(MODEL_PATH):
+        print("❌ Model not found. Run `python main.py` first.")
+        sys.exit(1)
+
+    server = InferenceServer(args.socket)
+    _, nutrition, schema = server.current()
+
+    print("=" * 55)
+    print("  INFERENCE SERVER")
+    print("=" * 55)
+    print(f"  Socket          : {args.socket}")
+    print(f"  Model version   : {schema['model_version']}")
+    print(f"  Nutrition model : {'loaded' if nutrition else 'not trained'}")
+    print(f"\n  Start the web workers with INFERENCE_SOCKET={args.socket}\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n  Shutting down.")
+    finally:
+        server.server_close()
@@ -0,0 +1,218 @@
+"""
+admission.py
+-------------
+Admission control for the expensive POST routes.
+
+Every guarded route has its own pool with:
+  - a concurrency limit (requests running at once)
+  - a bounded wait queue (requests allowed to wait for a slot)
+  - a queue deadline (how long a request may wait before giving up)
+
+A request that finds the queue full, or is still waiting at its deadline,
+is rejected at once with 503 + Retry-After instead of piling up behind
+the others. /train has a separate single-slot pool with no queue, so a
+training run can never take slots that inference requests need.
+
+Pools live in each worker process, so N gunicorn workers would still allow
+N training runs at once. The train pool therefore also takes a non-blocking
+flock on models/.train.lock (ExclusivePool): one run across all workers,
+the others are rejected like a full queue.
+
+Limits can be overridden per pool via environment variables, e.g.
+ADMISSION_PREDICT_CONCURRENCY=16, ADMISSION_PREDICT_QUEUE=64,
+ADMISSION_PREDICT_TIMEOUT_MS=1500. Current limits, queue depth and
+rejection counts are exported by app.py at /metrics/admission.
+"""
+
+import os
+import math
+import time
+import fcntl
+import threading
+
+# name: (max concurrent, max queued, queue deadline in ms)
+DEFAULT_LIMITS = {
+    'predict':  (8, 32, 2000),
+    'advance':  (8, 32, 2000),
+    'explain':  (8, 32, 2000),
+    'target':   (8, 32, 2000),
+    'report':   (4, 16, 2000),
+    'train':    (1, 0, 0),
+}
+
+# Pools that also hold a lock file, so only one request runs across all workers
+TRAIN_LOCK_PATH = os.getenv('TRAIN_LOCK_PATH',
+                            os.path.join(os.path.dirname(__file__), '..', 'models', '.train.lock'))
+EXCLUSIVE_POOLS = {'train': TRAIN_LOCK_PATH}
+
+# Flask endpoint → pool name (only POST requests are admission-controlled)
+ENDPOINT_POOLS = {
+    'predict_view':      'predict',
+    'advance_view':      'advance',
+    'api_explain':       'explain',
+    'api_target_weight': 'target',
+    'download_report':   'report',
+    'train_model':       'train',
+}
+
+# Retry-After used before a pool has timed any request (seconds)
+DEFAULT_RETRY_AFTER = 1
+
+# Weight of the newest sample in the service-time moving average
+SERVICE_TIME_ALPHA = 0.2
+
+
+class Rejected(Exception):
+    """The request was not admitted; retry_after is a hint in whole seconds."""
+
+    def __init__(self, pool, reason, retry_after):
+        super().__init__(f"{pool}: {reason}")
+        self.pool = pool
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionPool:
+    """Concurrency limit + bounded FIFO-ish wait queue with a deadline."""
+
+    def __init__(self, name, max_concurrent, max_queue, timeout_ms):
+        self.name = name
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.timeout = max(0.0, float(timeout_ms)) / 1000.0
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.service_time_s = None
+
+    def retry_after(self):
+        """Seconds until a slot is likely free: queued work spread over the slots."""
+        if self.service_time_s is None:
+            return DEFAULT_RETRY_AFTER
+        backlog = (self.waiting + self.active) / self.max_concurrent
+        return max(1, math.ceil(backlog * self.service_time_s))
+
+    def acquire(self):
+        """Take a slot, waiting in the queue up to the deadline; raises Rejected."""
+        with self._cond:
+            if self.active < self.max_concurrent and self.waiting == 0:
+                self.active += 1
+                self.admitted += 1
+                return time.perf_counter()
+
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                raise Rejected(self.name, 'queue full', self.retry_after())
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.timeout
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        raise Rejected(self.name, 'queue deadline exceeded', self.retry_after())
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            self.admitted += 1
+            return time.perf_counter()
+
+    def release(self, started):
+        with self._cond:
+            self.active -= 1
+            elapsed = time.perf_counter() - started
+            if self.service_time_s is None:
+                self.service_time_s = elapsed
+            else:
+                self.service_time_s += SERVICE_TIME_ALPHA * (elapsed - self.service_time_s)
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'max_concurrent':      self.max_concurrent,
+                'max_queue':           self.max_queue,
+                'timeout_ms':          round(self.timeout * 1000),
+                'active':              self.active,
+                'queued':              self.waiting,
+                'admitted':            self.admitted,
+                'rejected_queue_full': self.rejected_queue_full,
+                'rejected_timeout':    self.rejected_timeout,
+                'service_time_ms':     (round(self.service_time_s * 1000, 2)
+                                        if self.service_time_s is not None else None),
+            }
+
+
+class ExclusivePool(AdmissionPool):
+    """AdmissionPool whose admitted request also holds an flock on lock_path."""
+
+    def __init__(self, name, max_concurrent, max_queue, timeout_ms, lock_path):
+        super().__init__(name, max_concurrent, max_queue, timeout_ms)
+        self.lock_path = lock_path
+        self.rejected_other_worker = 0
+        self._fd = None
+
+    def acquire(self):
+        started = super().acquire()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError:
+            self._give_back()
+            raise
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            self._give_back()
+            with self._cond:
+                self.rejected_other_worker += 1
+            raise Rejected(self.name, 'running in another worker', self.retry_after())
+        self._fd = fd
+        return started
+
+    def _give_back(self):
+        """Undo super().acquire() for a request that never ran."""
+        with self._cond:
+            self.active -= 1
+            self.admitted -= 1
+            self._cond.notify()
+
+    def release(self, started):
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        super().release(started)
+
+    def stats(self):
+        return {**super().stats(), 'rejected_other_worker': self.rejected_other_worker}
+
+
+def _env_limit(name, key, default):
+    value = os.getenv(f'ADMISSION_{name.upper()}_{key}')
+    return float(value) if value else default
+
+
+def build_pools(limits=None, exclusive=None):
+    """
+    One AdmissionPool per entry of DEFAULT_LIMITS (or `limits`), with env
+    overrides; the pools named in EXCLUSIVE_POOLS (or `exclusive`) are
+    ExclusivePools on their lock file.
+    """
+    limits = limits or DEFAULT_LIMITS
+    exclusive = EXCLUSIVE_POOLS if exclusive is None else exclusive
+    pools = {}
+    for name, (concurrency, queue, timeout_ms) in limits.items():
+        settings = (name,
+                    _env_limit(name, 'CONCURRENCY', concurrency),
+                    _env_limit(name, 'QUEUE', queue),
+                    _env_limit(name, 'TIMEOUT_MS', timeout_ms))
+        pools[name] = (ExclusivePool(*settings, exclusive[name]) if name in exclusive
+                       else AdmissionPool(*settings))
+    return pools
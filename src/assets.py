@@ -0,0 +1,279 @@
+"""
+assets.py
+----------
+Static asset build step and the helpers the Flask app uses to serve it.
+
+What the build does (python -m src.assets):
+  1. Scans templates/ and static/js/ for data-lucide="..." icons and writes
+     static/icons/sprite.svg with ONLY those icons, taken from the vendored
+     SVGs in static/icons/lucide/ (no CDN needed at runtime)
+  2. Resizes the hero image into WebP + JPEG/PNG variants (needs Pillow;
+     skipped with a warning if it is not installed)
+  3. Copies every asset to static/dist/ under a content-hashed filename,
+     e.g. css/style.3f9a1c2b7d.css, and writes a precompressed .gz next to
+     each text asset
+  4. Writes static/dist/manifest.json: logical name → hashed name (atomically;
+     the previous build's hashed files are kept so pages that still
+     reference them keep working, anything older is deleted)
+
+At runtime app.py replaces Jinja's url_for so that
+url_for('static', filename='css/style.css') points at the hashed file under
+/assets/, which is served with a one-year immutable Cache-Control header and
+the .gz variant when the client accepts gzip. Running workers reload the
+manifest when it changes, and its hash is part of every page ETag. Without a
+build the app falls back to the plain /static/ files.
+"""
+
+import os
+import re
+import io
+import sys
+import json
+import gzip
+import shutil
+import hashlib
+import argparse
+
+ROOT_DIR      = os.path.join(os.path.dirname(__file__), '..')
+STATIC_DIR    = os.path.join(ROOT_DIR, 'static')
+TEMPLATE_DIR  = os.path.join(ROOT_DIR, 'templates')
+DIST_DIR      = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+ICON_SRC_DIR  = os.path.join(STATIC_DIR, 'icons', 'lucide')
+SPRITE_PATH   = os.path.join(STATIC_DIR, 'icons', 'sprite.svg')
+
+# Source folders (relative to static/) that get fingerprinted
+ASSET_DIRS = ['css', 'js', 'img', 'icons']
+
+# Files worth precompressing (images are already compressed)
+COMPRESSIBLE_EXTS = {'.css', '.js', '.svg', '.json', '.txt'}
+
+# Hero image and the widths generated for it
+HERO_IMAGE   = 'img/ai_healthcare.png'
+HERO_WIDTHS  = [480, 960]
+
+# One year — safe because the filename changes whenever the content does
+IMMUTABLE_MAX_AGE = 31536000
+
+HASH_LENGTH = 10
+
+ICON_PATTERN = re.compile(r'''data-lucide\s*=\s*["']([a-z0-9-]+)["']''')
+
+
+# ── Step 1: Icon sprite ───────────────────────────────────────────────────────
+
+def find_used_icons(dirs=None):
+    """Return the sorted set of lucide icon names used by templates and scripts."""
+    dirs = dirs or [TEMPLATE_DIR, os.path.join(STATIC_DIR, 'js')]
+    names = set()
+    for folder in dirs:
+        for dirpath, _, filenames in os.walk(folder):
+            for filename in filenames:
+                if filename.endswith(('.html', '.js')):
+                    with open(os.path.join(dirpath, filename), 'r', encoding='utf-8') as f:
+                        names.update(ICON_PATTERN.findall(f.read()))
+    return sorted(names)
+
+
+def build_sprite(names, src_dir=None):
+    """
+    Build an SVG sprite with one <symbol id="name"> per icon.
+    Stroke/fill attributes are left to the referencing <svg> so icons keep
+    inheriting currentColor like the CDN version did.
+    """
+    src_dir = src_dir or ICON_SRC_DIR
+    symbols = []
+    missing = []
+    for name in names:
+        path = os.path.join(src_dir, f'{name}.svg')
+        if not os.path.exists(path):
+            missing.append(name)
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            svg = f.read()
+        body = re.search(r'<svg[^>]*>(.*)</svg>', svg, re.S).group(1)
+        body = ' '.join(line.strip() for line in body.splitlines() if line.strip())
+        symbols.append(f'<symbol id="{name}" viewBox="0 0 24 24">{body}</symbol>')
+
+    if missing:
+        raise FileNotFoundError(
+            f"Icons used in templates but not vendored in static/icons/lucide/: {missing}. "
+            "Copy the SVGs from the lucide icon set into that folder."
+        )
+
+    return ('<svg xmlns="http://www.w3.org/2000/svg" style="display:none">'
+            + ''.join(symbols) + '</svg>\n')
+
+
+# ── Step 2: Image variants ────────────────────────────────────────────────────
+
+def build_image_variants(logical_name, widths, out_dir):
+    """
+    Write resized WebP copies of an image into out_dir, plus a fallback in
+    the source's own format (JPEG photos stay JPEG, everything else PNG).
+    Returns {logical variant name: file path}. Needs Pillow (optional).
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        print("  Pillow not installed — skipping image variants (pip install Pillow)")
+        return {}
+
+    src_path = os.path.join(STATIC_DIR, logical_name)
+    stem, _ = os.path.splitext(logical_name)
+    variants = {}
+
+    with Image.open(src_path) as image:
+        if image.format == 'JPEG':
+            fallback = ('JPEG', '.jpg', {'quality': 82, 'optimize': True, 'progressive': True})
+        else:
+            fallback = ('PNG', '.png', {'optimize': True})
+
+        image = image.convert('RGB')
+        for width in widths:
+            if width >= image.width:
+                continue
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), Image.LANCZOS)
+            for fmt, ext, options in (('WEBP', '.webp', {'quality': 80, 'method': 6}), fallback):
+                name = f'{stem}-{width}{ext}'
+                path = os.path.join(out_dir, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                resized.save(path, fmt, **options)
+                variants[name] = path
+    return variants
+
+
+# ── Step 3: Fingerprint + precompress ─────────────────────────────────────────
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(logical_name, data):
+    stem, ext = os.path.splitext(logical_name)
+    return f'{stem}.{content_hash(data)}{ext}'
+
+
+def _emit(logical_name, data, manifest):
+    name = hashed_name(logical_name, data)
+    path = os.path.join(DIST_DIR, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    if os.path.splitext(logical_name)[1] in COMPRESSIBLE_EXTS:
+        buffer = io.BytesIO()
+        # mtime=0 keeps the .gz byte-identical across builds
+        with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9, mtime=0) as gz:
+            gz.write(data)
+        if len(buffer.getvalue()) < len(data):
+            with open(path + '.gz', 'wb') as f:
+                f.write(buffer.getvalue())
+
+    manifest[logical_name] = name
+
+
+def build(verbose=True):
+    """Run the whole asset build and return the manifest."""
+    log = print if verbose else (lambda *a, **k: None)
+
+    log("=" * 55)
+    log("  ASSET BUILD")
+    log("=" * 55)
+
+    icons = find_used_icons()
+    with open(SPRITE_PATH, 'w', encoding='utf-8') as f:
+        f.write(build_sprite(icons))
+    log(f"  Icon sprite      : {len(icons)} icons → static/icons/sprite.svg ({', '.join(icons)})")
+
+    # Hashed names never collide, so the new build is written next to the
+    # old one: pages rendered from the previous manifest keep working
+    previous = load_manifest()
+    os.makedirs(DIST_DIR, exist_ok=True)
+
+    manifest = {}
+    for folder in ASSET_DIRS:
+        for dirpath, _, filenames in os.walk(os.path.join(STATIC_DIR, folder)):
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                logical = os.path.relpath(path, STATIC_DIR).replace(os.sep, '/')
+                if logical.startswith('icons/lucide/') or filename.endswith('.txt'):
+                    continue
+                with open(path, 'rb') as f:
+                    _emit(logical, f.read(), manifest)
+
+    staging = os.path.join(DIST_DIR, '_variants')
+    for logical, path in build_image_variants(HERO_IMAGE, HERO_WIDTHS, staging).items():
+        with open(path, 'rb') as f:
+            _emit(logical, f.read(), manifest)
+    shutil.rmtree(staging, ignore_errors=True)
+
+    # Atomic swap: running workers see either the old or the new manifest
+    tmp_path = MANIFEST_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+    removed = prune_dist(set(manifest.values()) | set(previous.values()))
+
+    for logical in sorted(manifest):
+        hashed = os.path.join(DIST_DIR, manifest[logical])
+        size = os.path.getsize(hashed)
+        gz = f" (gz {os.path.getsize(hashed + '.gz') / 1024:.1f} KB)" if os.path.exists(hashed + '.gz') else ''
+        log(f"  {logical:<32} {size / 1024:>8.1f} KB{gz}")
+    log(f"\n  Saved → static/dist/manifest.json ({len(manifest)} assets, "
+        f"previous build kept, {removed} older files removed)\n")
+    return manifest
+
+
+def prune_dist(keep):
+    """Delete hashed files (and their .gz) under DIST_DIR not named in keep; returns the count."""
+    removed = 0
+    for dirpath, _, filenames in os.walk(DIST_DIR):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if os.path.abspath(path) == os.path.abspath(MANIFEST_PATH):
+                continue
+            logical = os.path.relpath(path, DIST_DIR).replace(os.sep, '/')
+            if logical.endswith('.gz'):
+                logical = logical[:-3]
+            if logical not in keep:
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+# ── Runtime helpers (used by app.py) ──────────────────────────────────────────
+
+def load_manifest(path=None):
+    """Return the build manifest, or {} when the build has not been run."""
+    path = path or MANIFEST_PATH
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def srcset(manifest, logical_name, ext, url):
+    """
+    Build a srcset string ("url 480w, url 960w") for the resized variants
+    of an image. `url` maps a logical filename to its public URL.
+    """
+    stem, _ = os.path.splitext(logical_name)
+    entries = []
+    for width in HERO_WIDTHS:
+        name = f'{stem}-{width}{ext}'
+        if name in manifest:
+            entries.append(f'{url(name)} {width}w')
+    return ', '.join(entries)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build fingerprinted static assets.')
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+    try:
+        build(verbose=not args.quiet)
+    except FileNotFoundError as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,344 @@
+"""
+audit.py
+---------
+Prediction audit log: every prediction's inputs, model version, class,
+probabilities and latency, written without adding disk I/O to requests.
+
+  record()  — puts the record on a bounded in-memory queue and returns.
+              When the queue is full the caller waits up to AUDIT_BLOCK_MS
+              (backpressure); only after that is the record dropped, and
+              drops are counted in stats().
+  writer    — a background thread takes up to AUDIT_BATCH_SIZE records (or
+              whatever arrived within AUDIT_FLUSH_MS) and appends them to the
+              active JSONL segment with one write.
+
+Files (AUDIT_DIR, default outputs/audit/), one active segment per worker:
+    audit-<start time>-<pid>.jsonl        active segment, plain JSONL
+    audit-<start time>-<pid>.jsonl.gz     rotated segment (> AUDIT_MAX_BYTES), gzipped
+    audit-<start time>-<pid>.idx.json     sidecar: time range, record and class counts
+
+The query CLI reads the small sidecars first and only opens segments whose
+time range and classes can match:
+    python -m src.audit --since 2026-10-01 --until 2026-10-02T12:00 --class Obesity_Type_I
+    python -m src.audit --summary
+
+AUDIT_FSYNC sets durability: 'batch' fsyncs after every write, 'interval'
+at most every AUDIT_FSYNC_INTERVAL_S seconds (default), 'none' leaves it to
+the OS. Disable the log entirely with AUDIT_LOG=0.
+"""
+
+import os
+import sys
+import glob
+import gzip
+import json
+import time
+import queue
+import atexit
+import shutil
+import argparse
+import threading
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+AUDIT_ENABLED          = os.getenv('AUDIT_LOG', '1').strip().lower() not in {'0', 'false', 'no'}
+AUDIT_DIR              = os.getenv('AUDIT_DIR', os.path.join(ROOT_DIR, 'outputs', 'audit'))
+AUDIT_QUEUE_SIZE       = int(os.getenv('AUDIT_QUEUE_SIZE', '10000'))
+AUDIT_BLOCK_MS         = float(os.getenv('AUDIT_BLOCK_MS', '250'))
+AUDIT_BATCH_SIZE       = int(os.getenv('AUDIT_BATCH_SIZE', '256'))
+AUDIT_FLUSH_MS         = float(os.getenv('AUDIT_FLUSH_MS', '200'))
+AUDIT_MAX_BYTES        = int(os.getenv('AUDIT_MAX_BYTES', str(16 * 1024 * 1024)))
+AUDIT_FSYNC            = os.getenv('AUDIT_FSYNC', 'interval').strip().lower()
+AUDIT_FSYNC_INTERVAL_S = float(os.getenv('AUDIT_FSYNC_INTERVAL_S', '1.0'))
+
+FSYNC_POLICIES = ('batch', 'interval', 'none')
+_STOP = object()
+
+
+def _write_json_atomic(path, payload):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+class AuditLog:
+    """Bounded queue + background writer for one process."""
+
+    def __init__(self, directory=AUDIT_DIR, queue_size=AUDIT_QUEUE_SIZE, block_ms=AUDIT_BLOCK_MS,
+                 batch_size=AUDIT_BATCH_SIZE, flush_ms=AUDIT_FLUSH_MS, max_bytes=AUDIT_MAX_BYTES,
+                 fsync=AUDIT_FSYNC, fsync_interval_s=AUDIT_FSYNC_INTERVAL_S):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"AUDIT_FSYNC must be one of {', '.join(FSYNC_POLICIES)}, got '{fsync}'")
+        self.directory = directory
+        self.block = max(0.0, block_ms) / 1000.0
+        self.batch_size = max(1, int(batch_size))
+        self.flush_wait = max(0.0, flush_ms) / 1000.0
+        self.max_bytes = int(max_bytes)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval_s
+        self.counts = {'recorded': 0, 'written': 0, 'dropped': 0, 'batches': 0, 'rotations': 0, 'errors': 0}
+        self._counts_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._file = None
+        self._index = None
+        self._last_fsync = 0.0
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+
+    def _count(self, key, n=1):
+        with self._counts_lock:
+            self.counts[key] += n
+
+    # ── Producer side (request threads) ──────────────────────────────────────
+
+    def record(self, entry):
+        """Queue one audit record; returns False if it had to be dropped."""
+        now = time.time()
+        entry = {'ts': now, 'time': datetime.fromtimestamp(now, timezone.utc).isoformat(timespec='milliseconds'),
+                 **entry}
+        try:
+            self._queue.put(entry, timeout=self.block)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('recorded')
+        return True
+
+    # ── Writer thread ────────────────────────────────────────────────────────
+
+    def _collect(self):
+        """Block for the first record, then gather more until the batch is full or due."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_wait
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            stop = batch[-1] is _STOP
+            records = [entry for entry in batch if entry is not _STOP]
+            if records:
+                try:
+                    self._write(records)
+                except OSError as e:
+                    self._count('errors')
+                    print(f"⚠️  Audit log write failed ({e}) — {len(records)} records lost")
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                self._close_segment(compress=False)
+                return
+
+    def _open_segment(self):
+        started = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        base = os.path.join(self.directory, f'audit-{started}-{os.getpid()}')
+        self._file = open(f'{base}.jsonl', 'ab')
+        self._index = {'segment': os.path.basename(f'{base}.jsonl'), 'first_ts': None, 'last_ts': None,
+                       'records': 0, 'classes': {}, 'closed': False}
+        self._index_path = f'{base}.idx.json'
+
+    def _write(self, records):
+        if self._file is None:
+            self._open_segment()
+        data = b''.join(json.dumps(entry, separators=(',', ':')).encode('utf-8') + b'\n'
+                        for entry in records)
+        self._file.write(data)
+        self._file.flush()
+        now = time.monotonic()
+        if self.fsync == 'batch' or (self.fsync == 'interval' and now - self._last_fsync >= self.fsync_interval):
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+        index = self._index
+        if index['first_ts'] is None:
+            index['first_ts'] = records[0]['ts']
+        index['last_ts'] = records[-1]['ts']
+        index['records'] += len(records)
+        for entry in records:
+            label = entry.get('class_label')
+            index['classes'][label] = index['classes'].get(label, 0) + 1
+        _write_json_atomic(self._index_path, index)
+        self._count('written', len(records))
+        self._count('batches')
+
+        if self._file.tell() >= self.max_bytes:
+            self._close_segment(compress=True)
+
+    def _close_segment(self, compress):
+        """Close the active segment; a full one is gzipped and its sidecar updated."""
+        if self._file is None:
+            return
+        path = self._file.name
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        if compress:
+            with open(path, 'rb') as src, gzip.open(f'{path}.gz', 'wb', compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst)
+            self._index['segment'] += '.gz'
+            self._count('rotations')
+        self._index['closed'] = True
+        _write_json_atomic(self._index_path, self._index)
+        if compress:
+            os.remove(path)
+
+    # ── Lifecycle ────────────────────────────────────────────────────────────
+
+    def flush(self, timeout=5.0):
+        """Wait until everything queued so far has been written."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def close(self):
+        """Write what is queued, fsync and close the active segment."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=5.0)
+
+    def stats(self):
+        with self._counts_lock:
+            counts = dict(self.counts)
+        return {
+            'directory': os.path.abspath(self.directory),
+            'queued': self._queue.qsize(),
+            'queue_size': self._queue.maxsize,
+            'fsync': self.fsync,
+            **counts,
+        }
+
+
+_audit_log = None
+_audit_pid = None
+_audit_lock = threading.Lock()
+
+
+def get_audit_log():
+    """
+    The process-wide audit log, or None when disabled.
+    Recreated after a fork, since the writer thread does not survive it.
+    """
+    global _audit_log, _audit_pid
+    if not AUDIT_ENABLED:
+        return None
+    if _audit_log is None or _audit_pid != os.getpid():
+        with _audit_lock:
+            if _audit_log is None or _audit_pid != os.getpid():
+                _audit_log, _audit_pid = AuditLog(), os.getpid()
+                atexit.register(_audit_log.close)
+    return _audit_log
+
+
+def get_audit_stats():
+    """Queue depth and write/drop counters (for the /metrics/audit endpoint)."""
+    audit_log = get_audit_log()
+    if audit_log is None:
+        return {'enabled': False}
+    return {'enabled': True, **audit_log.stats()}
+
+
+# ── Query ─────────────────────────────────────────────────────────────────────
+
+def read_indexes(directory=AUDIT_DIR):
+    indexes = []
+    for path in sorted(glob.glob(os.path.join(directory, 'audit-*.idx.json'))):
+        try:
+            with open(path) as f:
+                indexes.append(json.load(f))
+        except (OSError, ValueError):
+            continue    # sidecar being replaced right now
+    return indexes
+
+
+def _segment_lines(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.endswith('\n'):    # skip a line still being written
+                yield line
+
+
+def query(since=None, until=None, class_label=None, model_version=None, directory=AUDIT_DIR):
+    """
+    Audit records (oldest first per segment) matching the filters. since/until
+    are epoch seconds. Segments are chosen from their sidecars, so only files
+    that can hold a match are read.
+    """
+    for index in read_indexes(directory):
+        if index['first_ts'] is None:
+            continue
+        if since is not None and index['last_ts'] < since:
+            continue
+        if until is not None and index['first_ts'] > until:
+            continue
+        if class_label is not None and class_label not in index['classes']:
+            continue
+        path = os.path.join(directory, index['segment'])
+        if not os.path.exists(path):
+            continue
+        for line in _segment_lines(path):
+            entry = json.loads(line)
+            if since is not None and entry['ts'] < since:
+                continue
+            if until is not None and entry['ts'] > until:
+                continue
+            if class_label is not None and entry.get('class_label') != class_label:
+                continue
+            if model_version is not None and entry.get('model_version') != model_version:
+                continue
+            yield entry
+
+
+def _parse_time(value):
+    """ISO date/datetime (UTC unless it carries an offset) → epoch seconds."""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query the prediction audit log.')
+    parser.add_argument('--since', type=_parse_time, help='ISO date/time, UTC (e.g. 2026-10-01T08:00)')
+    parser.add_argument('--until', type=_parse_time, help='ISO date/time, UTC')
+    parser.add_argument('--class', dest='class_label', help='predicted class, e.g. Obesity_Type_I')
+    parser.add_argument('--model-version', help='only records from this model version')
+    parser.add_argument('--limit', type=int, default=0, help='stop after N records (0 = all)')
+    parser.add_argument('--dir', default=AUDIT_DIR, help='audit directory')
+    parser.add_argument('--summary', action='store_true', help='per-segment counts from the sidecars only')
+    args = parser.parse_args(argv)
+
+    if args.summary:
+        indexes = read_indexes(args.dir)
+        print("=" * 55)
+        print(f"  AUDIT LOG — {len(indexes)} segment(s) in {os.path.abspath(args.dir)}")
+        print("=" * 55)
+        for index in indexes:
+            if index['first_ts'] is None:
+                continue
+            first = datetime.fromtimestamp(index['first_ts'], timezone.utc).isoformat(timespec='seconds')
+            last = datetime.fromtimestamp(index['last_ts'], timezone.utc).isoformat(timespec='seconds')
+            state = 'closed' if index['closed'] else 'open'
+            print(f"  {index['segment']:<52} {index['records']:>7} records  {first} → {last}  {state}")
+        print()
+        return
+
+    for n, entry in enumerate(query(args.since, args.until, args.class_label, args.model_version, args.dir), 1):
+        print(json.dumps(entry))
+        if args.limit and n >= args.limit:
+            break
+
+
+if __name__ == '__main__':
+    main()
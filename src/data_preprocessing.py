@@ -12,21 +12,62 @@ Steps:
   6. Scale all values to the same range (StandardScaler)
   7. Split data into Training set and Test set
 
+The CSV is read with explicit dtypes (category for text columns, float32
+for numbers) instead of inferred object/float64 columns. CSV_ENGINE=pyarrow
+uses the pyarrow parser when it is installed.
+
+For exports too large to load at once, chunked mode (PREPROCESS_CHUNK_ROWS
+or `python main.py --chunk-rows N`) streams the CSV in chunks instead:
+  pass 1  counts, sums, min/max, category counts and quartile sketches
+          → means, modes, encoders, outlier caps
+  pass 2  (exact quantiles only) fixed-range histograms of the numeric columns
+  pass 3  (exact quantiles only) the values in the histogram bins holding the
+          wanted ranks → exact quartiles and medians (same values as pandas)
+  pass 4  fill, cap, add BMI, encode → one preallocated float32 matrix
+Only the final feature matrix is ever held in memory.
+
+Outlier caps come from KLL quantile sketches by default (src/quantiles.py):
+every numeric column is sketched in one pass and the capping itself is a
+single vectorized clip. OUTLIER_QUANTILES=exact restores exact quartiles.
+The caps are saved in the model bundle and applied to prediction inputs too.
+
+The output of the whole pipeline is cached in cache/ keyed by a hash of the
+CSV bytes and PREPROCESSING_CONFIG, so reruns on unchanged data skip straight
+to model fitting.
+
 Run this file standalone to see the full preprocessing report:
     python -m src.data_preprocessing
+    python -m src.data_preprocessing --chunk-rows 100000
+    python -m src.data_preprocessing --quantile-report   # sketch vs exact quartiles
 """
 
+import io
 import os
 import json
+import glob
+import time
+import pickle
+import hashlib
+import argparse
+from contextlib import redirect_stdout
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+import sklearn
+from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 
+from src.quantiles import KLLSketch, rank_error_bound
+from src.vocabulary import Vocabulary, as_vocabulary, encode_frame, fit_vocabularies
+
 # ── File paths ─────────────────────────────────────────────────────────────────
 ROOT_DIR    = os.path.join(os.path.dirname(__file__), '..')
 DATA_PATH   = os.path.join(ROOT_DIR, 'data',    'obesity_dataset.csv')
 REPORT_PATH = os.path.join(ROOT_DIR, 'outputs', 'preprocessing_report.json')
+QUANTILE_REPORT_PATH = os.path.join(ROOT_DIR, 'outputs', 'quantile_error_report.json')
+CACHE_DIR   = os.path.join(ROOT_DIR, 'cache')
+
+# How many preprocessing cache entries to keep on disk (oldest are removed)
+PREPROCESS_CACHE_MAX_ENTRIES = 4
 
 # ── Column names ───────────────────────────────────────────────────────────────
 # These are the text (categorical) columns in the dataset
@@ -58,25 +99,86 @@ INFERENCE_DEFAULT_STRATEGY = {
     'MTRANS': 'mode',
 }
 
+# Explicit column dtypes for read_csv (columns missing from a file are ignored)
+CSV_DTYPES = {
+    **{col: 'category' for col in CATEGORICAL_COLS},
+    TARGET_COL: 'category',
+    **{col: 'float32' for col in NUMERIC_COLS},
+}
+
+# 'c' (default) or 'pyarrow' (used when installed; chunked reads always use 'c')
+CSV_ENGINE = os.getenv('CSV_ENGINE', 'c').strip().lower()
+
+# Rows per chunk for chunked preprocessing (0 = load the whole CSV at once)
+PREPROCESS_CHUNK_ROWS = int(os.getenv('PREPROCESS_CHUNK_ROWS', '0'))
+
+# Histogram resolution used to locate quantiles in chunked mode
+QUANTILE_BINS = 4096
+
+# How the IQR outlier caps find their quartiles:
+#   'sketch' — one-pass KLL sketches (rank error ~1% at k=200)
+#   'exact'  — exact quartiles (chunked mode then needs two extra CSV passes)
+OUTLIER_QUANTILES   = os.getenv('OUTLIER_QUANTILES', 'sketch').strip().lower()
+OUTLIER_SKETCH_K    = 200
+OUTLIER_SKETCH_ROWS = 65536      # rows per sketch update in the in-memory pipeline
+
+# Every setting that changes the preprocessing output.
+# It is part of the cache key, so editing anything here invalidates the cache.
+PREPROCESSING_CONFIG = {
+    'version':            5,
+    'csv_dtypes':         CSV_DTYPES,
+    'categorical_cols':   CATEGORICAL_COLS,
+    'numeric_cols':       NUMERIC_COLS,
+    'target_col':         TARGET_COL,
+    'inference_defaults': INFERENCE_DEFAULT_STRATEGY,
+    'outlier_iqr_factor': 1.5,
+    'outlier_quantiles':  OUTLIER_QUANTILES,
+    'outlier_sketch_k':   OUTLIER_SKETCH_K,
+    'test_size':          0.20,
+    'random_state':       42,
+}
+
 
 # ── Step 1: Load Dataset ──────────────────────────────────────────────────────
 
-def load_data():
-    """Load the CSV file and print a quick summary."""
+def csv_engine(requested=None):
+    """The read_csv engine to use: pyarrow when asked for and installed, else 'c'."""
+    requested = (requested or CSV_ENGINE).lower()
+    if requested == 'pyarrow':
+        try:
+            import pyarrow  # noqa: F401
+            return 'pyarrow'
+        except ImportError:
+            print("  ⚠️  CSV_ENGINE=pyarrow but pyarrow is not installed — using the C parser")
+    return 'c'
+
+
+def read_typed_csv(source, engine=None, **kwargs):
+    """pd.read_csv with the dataset's explicit dtypes (category / float32)."""
+    return pd.read_csv(source, dtype=CSV_DTYPES, engine=engine or csv_engine(), **kwargs)
+
 
+def _check_dataset_exists():
     if not os.path.exists(DATA_PATH):
         raise FileNotFoundError(
             f"Dataset not found at: {DATA_PATH}\n"
             "Please place obesity_dataset.csv inside the data/ folder."
         )
 
-    df = pd.read_csv(DATA_PATH)
+
+def load_data():
+    """Load the CSV file and print a quick summary."""
+
+    _check_dataset_exists()
+    df = read_typed_csv(DATA_PATH)
 
     print("=" * 55)
     print("  STEP 1 — Dataset Loaded")
     print("=" * 55)
     print(f"  Rows    : {df.shape[0]}")
     print(f"  Columns : {df.shape[1]}")
+    print(f"  Memory  : {df.memory_usage(deep=True).sum() / 1e6:.2f} MB "
+          f"(category / float32 columns)")
     print()
     print("  Target class distribution:")
     for label, count in df[TARGET_COL].value_counts().items():
@@ -131,6 +233,44 @@ def fill_missing_values(df):
 
 # ── Step 3: Handle Outliers ──────────────────────────────────────────────────
 
+def _use_sketches():
+    method = PREPROCESSING_CONFIG['outlier_quantiles']
+    if method not in ('sketch', 'exact'):
+        raise ValueError(f"outlier_quantiles must be 'sketch' or 'exact', got {method!r}")
+    return method == 'sketch'
+
+
+def iqr_bounds(q1, q3):
+    """(lower, upper) IQR caps for the given quartiles."""
+    factor = PREPROCESSING_CONFIG['outlier_iqr_factor']
+    return float(q1 - factor * (q3 - q1)), float(q3 + factor * (q3 - q1))
+
+
+def new_sketches(columns):
+    return {col: KLLSketch(PREPROCESSING_CONFIG['outlier_sketch_k']) for col in columns}
+
+
+def sketch_columns(values, columns, sketches=None, block_rows=OUTLIER_SKETCH_ROWS):
+    """
+    Feed a (rows × columns) matrix into one sketch per column, a block of
+    rows at a time, in a single pass over the data.
+    """
+    sketches = sketches if sketches is not None else new_sketches(columns)
+    for start in range(0, len(values), block_rows):
+        block = values[start:start + block_rows]
+        for j, col in enumerate(columns):
+            sketches[col].update(block[:, j])
+    return sketches
+
+
+def quantile_method():
+    """How the caps are computed, for the preprocessing report."""
+    if not _use_sketches():
+        return {'method': 'exact', 'rank_error_bound': 0.0}
+    k = PREPROCESSING_CONFIG['outlier_sketch_k']
+    return {'method': 'sketch', 'k': k, 'rank_error_bound': round(rank_error_bound(k), 5)}
+
+
 def handle_outliers(df):
     """
     Detect extreme values using the IQR method and cap them.
@@ -141,36 +281,47 @@ def handle_outliers(df):
       - Values outside these bounds are capped (not deleted)
 
     We cap instead of delete so we don't lose data samples.
+
+    Q1 and Q3 of every numeric column come from one pass of KLL sketches
+    (or exact quantiles with outlier_quantiles='exact'); all columns are
+    then counted and clipped together.
+
+    Returns the capped df, the number of outliers per column and the
+    (lower, upper) bounds per column so later data can be capped the same way.
     """
 
     print("=" * 55)
     print("  STEP 3 — Outlier Detection (IQR Method)")
     print("=" * 55)
 
-    outlier_report = {}
-
-    for col in NUMERIC_COLS:
-        if col not in df.columns:
-            continue
+    cols = [col for col in NUMERIC_COLS if col in df.columns]
+    values = df[cols].to_numpy()
 
-        Q1  = df[col].quantile(0.25)
-        Q3  = df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        lower = Q1 - 1.5 * IQR
-        upper = Q3 + 1.5 * IQR
+    if _use_sketches():
+        sketches = sketch_columns(values, cols)
+        quartiles = [sketches[col].quantiles([0.25, 0.75]) for col in cols]
+    else:
+        quartiles = np.quantile(values, [0.25, 0.75], axis=0).T
+    bounds = {col: iqr_bounds(q1, q3) for col, (q1, q3) in zip(cols, quartiles)}
 
-        outliers_found = int(((df[col] < lower) | (df[col] > upper)).sum())
+    lower = np.array([bounds[col][0] for col in cols], dtype=values.dtype)
+    upper = np.array([bounds[col][1] for col in cols], dtype=values.dtype)
+    capped = np.clip(values, lower, upper)
+    found = (capped != values).sum(axis=0)
+    df[cols] = capped
 
+    outlier_report = {}
+    for col, outliers_found in zip(cols, found):
         if outliers_found > 0:
-            df[col] = df[col].clip(lower, upper)
+            lower, upper = bounds[col]
             print(f"  {col:<12}  {outliers_found} outliers capped  "
                   f"(range: {lower:.2f} to {upper:.2f})")
-            outlier_report[col] = outliers_found
+            outlier_report[col] = int(outliers_found)
         else:
             print(f"  {col:<12}  No outliers found")
 
     print()
-    return df, outlier_report
+    return df, outlier_report, bounds
 
 
 # ── Step 4: Feature Engineering — Add BMI ───────────────────────────────────
@@ -207,7 +358,11 @@ def encode_labels(df):
     Example: Gender → Male=1, Female=0
              CAEC   → Always=0, Frequently=1, Sometimes=2, no=3
 
-    We save the encoder objects so we can apply the same conversion
+    Each column gets a vocabulary (its sorted values; a value's code is its
+    position — the same codes LabelEncoder gives) and all columns are then
+    encoded together from their pandas categorical codes.
+
+    We save the vocabularies so we can apply the same conversion
     to new user inputs during prediction.
     """
 
@@ -215,21 +370,14 @@ def encode_labels(df):
     print("  STEP 5 — Label Encoding (Text → Numbers)")
     print("=" * 55)
 
-    encoders = {}
+    vocabularies = fit_vocabularies(df, CATEGORICAL_COLS + [TARGET_COL])
+    df = encode_frame(df, vocabularies)
 
-    # Encode each categorical feature column
-    for col in CATEGORICAL_COLS:
-        if col not in df.columns:
-            continue
-        encoder = LabelEncoder()
-        df[col] = encoder.fit_transform(df[col].astype(str))
-        encoders[col] = encoder
+    target_encoder = vocabularies.pop(TARGET_COL)
+    encoders = vocabularies
+    for col, encoder in encoders.items():
         print(f"  Encoded '{col}'  →  classes: {list(encoder.classes_)}")
 
-    # Encode the target column
-    target_encoder = LabelEncoder()
-    df[TARGET_COL] = target_encoder.fit_transform(df[TARGET_COL].astype(str))
-
     print(f"\n  Target classes: {list(target_encoder.classes_)}")
     print()
 
@@ -256,21 +404,11 @@ def scale_and_split(df, feature_cols):
     print("  STEP 6 & 7 — Scaling + Train/Test Split")
     print("=" * 55)
 
-    X = df[feature_cols].values.astype(float)
-    y = df[TARGET_COL].values
+    # One float64 copy of the feature columns (no intermediate object array)
+    X = df[feature_cols].to_numpy(dtype=np.float64)
+    y = df[TARGET_COL].to_numpy()
 
-    # Split first (80% train, 20% test) — stratified keeps class proportions equal
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y,
-        test_size=0.20,
-        random_state=42,
-        stratify=y
-    )
-
-    # Scale: fit ONLY on training data to avoid data leakage
-    scaler = StandardScaler()
-    X_train = scaler.fit_transform(X_train)
-    X_test  = scaler.transform(X_test)   # only transform, not fit
+    X_train, X_test, y_train, y_test, scaler = _split_and_scale(X, y)
 
     print(f"  Training samples : {X_train.shape[0]}")
     print(f"  Test samples     : {X_test.shape[0]}")
@@ -282,6 +420,20 @@ def scale_and_split(df, feature_cols):
     return X_train, X_test, y_train, y_test, scaler
 
 
+def _split_and_scale(X, y):
+    """Stratified 80/20 split, then a StandardScaler fitted on the train rows only."""
+    # Split first (80% train, 20% test) — stratified keeps class proportions equal
+    train_idx, test_idx = split_indices(y)
+    X_train, X_test = X[train_idx], X[test_idx]
+
+    # Scale: fit ONLY on training data to avoid data leakage. The split made
+    # fresh arrays, so they are scaled in place instead of copied again.
+    scaler = StandardScaler().fit(X_train)
+    X_train = scaler.transform(X_train, copy=False)
+    X_test  = scaler.transform(X_test, copy=False)   # only transform, not fit
+    return X_train, X_test, y[train_idx], y[test_idx], scaler
+
+
 def compute_inference_defaults(df):
     """
     Compute defaults for form-missing features from encoded training data.
@@ -299,22 +451,187 @@ def compute_inference_defaults(df):
     return defaults
 
 
+# ── Appended Rows (incremental training) ─────────────────────────────────────
+
+def _watermark_of(raw):
+    header_end = raw.find(b'\n') + 1
+    end        = raw.rfind(b'\n') + 1
+    return {
+        'bytes':   end,
+        'rows':    sum(1 for line in raw[header_end:end].split(b'\n') if line.strip()),
+        'sha256':  hashlib.sha256(raw[:end]).hexdigest(),
+        'columns': raw[:header_end].decode('utf-8').strip().split(','),
+    }
+
+
+def data_watermark(path=None):
+    """
+    Describe the CSV up to its last complete line so a later run can tell
+    whether rows were only appended (same prefix) or the file was rewritten.
+    """
+    with open(path or DATA_PATH, 'rb') as f:
+        return _watermark_of(f.read())
+
+
+def read_rows_since(watermark, path=None):
+    """
+    Split the CSV at a previous watermark.
+
+    Returns (df_before, df_appended, new_watermark), or None when the bytes
+    before the watermark changed (the file was edited, not appended to).
+    """
+    with open(path or DATA_PATH, 'rb') as f:
+        raw = f.read()
+    offset = watermark['bytes']
+    if len(raw) < offset or hashlib.sha256(raw[:offset]).hexdigest() != watermark['sha256']:
+        return None
+
+    header_end = raw.find(b'\n') + 1
+    end        = raw.rfind(b'\n') + 1
+    df_before  = read_typed_csv(io.BytesIO(raw[:offset]))
+    appended   = raw[offset:end]
+    if appended.strip():
+        df_appended = read_typed_csv(io.BytesIO(raw[:header_end] + appended))
+    else:
+        df_appended = df_before.iloc[0:0]
+
+    return df_before, df_appended, _watermark_of(raw)
+
+
+def transform_with_fitted(df, info):
+    """
+    Apply an already-fitted preprocessing (info from load_and_preprocess)
+    to raw rows without refitting anything and without printing.
+
+    Raises ValueError when a categorical column or the target contains a
+    value the fitted encoders have never seen.
+
+    Returns:
+        X — unscaled feature matrix in info['feature_cols'] order
+        y — encoded target labels
+    """
+    df = df.dropna(subset=[TARGET_COL]).copy()
+
+    for col in NUMERIC_COLS:
+        if col in df.columns and df[col].isnull().any():
+            df[col] = df[col].fillna(df[col].mean())
+    for col in CATEGORICAL_COLS:
+        if col in df.columns and df[col].isnull().any():
+            df[col] = df[col].fillna(df[col].mode()[0])
+
+    for col, (lower, upper) in (info.get('outlier_bounds') or {}).items():
+        df[col] = df[col].clip(lower, upper)
+
+    df['BMI'] = df['Weight'] / (df['Height'] ** 2)
+
+    vocabularies = {col: as_vocabulary(encoder) for col, encoder in info['feature_encoders'].items()}
+    vocabularies[TARGET_COL] = as_vocabulary(info['label_encoder'])
+    df = encode_frame(df, vocabularies, unseen='error')
+
+    X = df[info['feature_cols']].values.astype(float)
+    y = df[TARGET_COL].values
+    return X, y
+
+
+def split_indices(y):
+    """
+    Row indices of the train/test split used by scale_and_split().
+    The split only depends on y and the config, so it can be reproduced.
+    """
+    return train_test_split(
+        np.arange(len(y)),
+        test_size=PREPROCESSING_CONFIG['test_size'],
+        random_state=PREPROCESSING_CONFIG['random_state'],
+        stratify=y
+    )
+
+
+# ── Preprocessing Cache ──────────────────────────────────────────────────────
+
+def dataset_hash(path=None):
+    """SHA-256 of the raw CSV bytes (read in 1 MB blocks)."""
+    sha = hashlib.sha256()
+    with open(path or DATA_PATH, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def preprocessing_cache_key(data_hash, chunked=False):
+    """
+    Cache key = dataset hash + preprocessing config + library versions.
+    The versions matter because the scaler and encoders are pickled.
+    Chunked runs produce float32 matrices, so they are cached separately.
+    """
+    payload = json.dumps({
+        'data_sha256': data_hash,
+        'chunked':     bool(chunked),
+        'config':      PREPROCESSING_CONFIG,
+        'sklearn':     sklearn.__version__,
+        'pandas':      pd.__version__,
+        'numpy':       np.__version__,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _cache_path(key):
+    return os.path.join(CACHE_DIR, f'preprocess_{key[:16]}.pkl')
+
+
+def load_cached_preprocessing(key):
+    """Return the cached pipeline output for this key, or None on a miss."""
+    path = _cache_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            entry = pickle.load(f)
+    except Exception:
+        # A truncated or incompatible cache file is just a miss
+        return None
+    if entry.get('key') != key:
+        return None
+    return entry
+
+
+def save_cached_preprocessing(key, entry):
+    """Write a cache entry atomically and prune the oldest entries."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_path(key)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({**entry, 'key': key}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    entries = sorted(glob.glob(os.path.join(CACHE_DIR, 'preprocess_*.pkl')),
+                     key=os.path.getmtime, reverse=True)
+    for old_path in entries[PREPROCESS_CACHE_MAX_ENTRIES:]:
+        try:
+            os.remove(old_path)
+        except OSError:
+            pass
+
+
+def _write_report(report):
+    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+    with open(REPORT_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
 # ── Main Pipeline ─────────────────────────────────────────────────────────────
 
-def load_and_preprocess():
+def run_pipeline():
     """
-    Run the complete preprocessing pipeline in one call.
+    Run every preprocessing step on the raw CSV (no caching).
 
     Returns:
-        X_train, X_test  — input features (numpy arrays, scaled)
-        y_train, y_test  — target labels (numpy arrays)
-        info             — dict with scaler, encoders, and column names
+        X_train, X_test, y_train, y_test, info, report
     """
 
     # Run all steps in order
     df                          = load_data()
     df                          = fill_missing_values(df)
-    df, outlier_report          = handle_outliers(df)
+    df, outlier_report, bounds  = handle_outliers(df)
     df                          = add_bmi(df)
     df, encoders, target_encoder = encode_labels(df)
 
@@ -332,9 +649,10 @@ def load_and_preprocess():
         'label_encoder':    target_encoder,
         'feature_cols':     feature_cols,
         'inference_defaults': inference_defaults,
+        'outlier_bounds':   bounds,
     }
 
-    # Save a simple preprocessing report to outputs/
+    # A simple preprocessing report for outputs/
     report = {
         'train_samples': int(X_train.shape[0]),
         'test_samples':  int(X_test.shape[0]),
@@ -342,12 +660,440 @@ def load_and_preprocess():
         'feature_cols':  feature_cols,
         'class_names':   list(target_encoder.classes_),
         'outliers_capped': outlier_report,
+        'outlier_quantiles': quantile_method(),
         'inference_defaults': inference_defaults,
     }
-    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
-    with open(REPORT_PATH, 'w') as f:
+
+    return X_train, X_test, y_train, y_test, info, report
+
+
+# ── Chunked Pipeline (CSV larger than memory) ────────────────────────────────
+
+def _read_chunks(chunk_rows, usecols=None):
+    """The CSV as typed DataFrame chunks (the C parser is the one that streams)."""
+    return read_typed_csv(DATA_PATH, engine='c', chunksize=chunk_rows, usecols=usecols)
+
+
+def _mode_of(counts):
+    """Most frequent value; ties go to the smallest value, like Series.mode()[0]."""
+    best = max(counts.values())
+    return min(value for value, count in counts.items() if count == best)
+
+
+def _bin_of(values, low, high):
+    if high <= low:
+        return np.zeros(len(values), dtype=np.int64)
+    scaled = (values.astype(np.float64) - low) / (high - low) * QUANTILE_BINS
+    return np.clip(scaled.astype(np.int64), 0, QUANTILE_BINS - 1)
+
+
+def _scan_stats(chunk_rows, sketch=False):
+    """
+    Pass 1: row count, numeric sums/min/max and category counts; with
+    sketch=True also a quantile sketch per numeric column.
+    """
+    n_rows = 0
+    sketches = new_sketches(NUMERIC_COLS) if sketch else {}
+    numeric = {col: {'sum': 0.0, 'count': 0, 'min': np.inf, 'max': -np.inf, 'missing_kept': 0}
+               for col in NUMERIC_COLS}
+    counts_all = {col: {} for col in CATEGORICAL_COLS}    # modes for filling (all rows)
+    counts_kept = {col: {} for col in CATEGORICAL_COLS}   # encoder classes (rows with a target)
+    missing_kept = {col: 0 for col in CATEGORICAL_COLS}
+    target_counts = {}
+
+    for chunk in _read_chunks(chunk_rows):
+        kept = chunk[TARGET_COL].notna()
+        n_rows += int(kept.sum())
+        for value, count in chunk.loc[kept, TARGET_COL].astype(str).value_counts().items():
+            target_counts[value] = target_counts.get(value, 0) + int(count)
+
+        for col in NUMERIC_COLS:
+            if col not in chunk.columns:
+                continue
+            values = chunk[col]
+            stats = numeric[col]
+            stats['sum'] += float(values.astype(np.float64).sum())
+            stats['count'] += int(values.count())
+            kept_values = values[kept]
+            stats['missing_kept'] += int(kept_values.isna().sum())
+            if kept_values.count():
+                stats['min'] = min(stats['min'], float(kept_values.min()))
+                stats['max'] = max(stats['max'], float(kept_values.max()))
+            if sketch:
+                sketches[col].update(kept_values.to_numpy())   # NaNs are skipped here
+
+        for col in CATEGORICAL_COLS:
+            if col not in chunk.columns:
+                continue
+            for value, count in chunk[col].dropna().astype(str).value_counts().items():
+                counts_all[col][value] = counts_all[col].get(value, 0) + int(count)
+            kept_values = chunk.loc[kept, col]
+            missing_kept[col] += int(kept_values.isna().sum())
+            for value, count in kept_values.dropna().astype(str).value_counts().items():
+                counts_kept[col][value] = counts_kept[col].get(value, 0) + int(count)
+
+    means = {col: stats['sum'] / stats['count'] for col, stats in numeric.items() if stats['count']}
+    fill_modes = {col: _mode_of(counts) for col, counts in counts_all.items() if counts}
+
+    # Counts after filling: missing cells of kept rows become the fill value
+    for col, n_missing in missing_kept.items():
+        if n_missing:
+            counts_kept[col][fill_modes[col]] = counts_kept[col].get(fill_modes[col], 0) + n_missing
+    ranges = {}
+    for col, stats in numeric.items():
+        if not stats['count']:
+            continue
+        low, high = stats['min'], stats['max']
+        if stats['missing_kept']:
+            low, high = min(low, means[col]), max(high, means[col])
+        ranges[col] = (low, high)
+    # Missing cells are filled with the column mean: add them to the sketch as such
+    for col, sketch_ in sketches.items():
+        if numeric[col]['missing_kept']:
+            sketch_.update(np.full(numeric[col]['missing_kept'], means[col]))
+    sketches = {col: sketch_ for col, sketch_ in sketches.items() if sketch_.n}
+
+    return {
+        'n_rows': n_rows, 'means': means, 'fill_modes': fill_modes, 'ranges': ranges,
+        'category_counts': counts_kept, 'target_counts': target_counts,
+        'missing': sum(s['missing_kept'] for s in numeric.values()) + sum(missing_kept.values()),
+        'sketches': sketches,
+    }
+
+
+def _numeric_chunks(chunk_rows, columns, means):
+    """Filled numeric columns of the rows that have a target, chunk by chunk."""
+    for chunk in _read_chunks(chunk_rows, usecols=list(columns) + [TARGET_COL]):
+        chunk = chunk[chunk[TARGET_COL].notna()]
+        yield {col: chunk[col].fillna(means[col]).to_numpy() for col in columns}
+
+
+def _streaming_order_stats(chunk_rows, ranks, means, ranges):
+    """
+    Passes 2 and 3: exact order statistics (0-based ranks) per numeric column.
+    Pass 2 counts values per histogram bin to find the bin of every rank;
+    pass 3 keeps only the values in those bins and sorts them.
+    """
+    columns = list(ranks)
+    histograms = {col: np.zeros(QUANTILE_BINS, dtype=np.int64) for col in columns}
+    for values in _numeric_chunks(chunk_rows, columns, means):
+        for col in columns:
+            histograms[col] += np.bincount(_bin_of(values[col], *ranges[col]), minlength=QUANTILE_BINS)
+
+    wanted = {}
+    for col in columns:
+        cumulative = np.cumsum(histograms[col])
+        wanted[col] = {r: int(np.searchsorted(cumulative, r + 1)) for r in ranks[col]}
+
+    collected = {col: [] for col in columns}
+    for values in _numeric_chunks(chunk_rows, columns, means):
+        for col in columns:
+            bins = np.array(sorted(set(wanted[col].values())))
+            mask = np.isin(_bin_of(values[col], *ranges[col]), bins)
+            collected[col].append(values[col][mask])
+
+    order_stats = {}
+    for col in columns:
+        cumulative = np.cumsum(histograms[col])
+        values = np.concatenate(collected[col])
+        bins_of_values = _bin_of(values, *ranges[col])
+        order_stats[col] = {}
+        for r, b in wanted[col].items():
+            in_bin = np.sort(values[bins_of_values == b])
+            before = int(cumulative[b - 1]) if b > 0 else 0
+            order_stats[col][r] = float(in_bin[r - before])
+    return order_stats
+
+
+def _ranks_for(n, q):
+    """Order statistics pandas' linear quantile interpolates between."""
+    position = q * (n - 1)
+    lower = int(np.floor(position))
+    return lower, min(lower + 1, n - 1), position - lower
+
+
+def _quantile(order_stats, n, q, clip=None):
+    lower, upper, fraction = _ranks_for(n, q)
+    a, b = order_stats[lower], order_stats[upper]
+    if clip is not None:
+        a, b = np.clip(a, *clip), np.clip(b, *clip)
+    return float(a + (b - a) * fraction)
+
+
+def run_pipeline_chunked(chunk_rows):
+    """
+    run_pipeline() for a CSV that does not fit in memory: the same steps,
+    computed in streaming passes over chunks of chunk_rows rows.
+
+    Returns:
+        X_train, X_test, y_train, y_test, info, report (float32 features)
+    """
+    _check_dataset_exists()
+    columns = list(pd.read_csv(DATA_PATH, nrows=0).columns)
+    unknown = sorted(set(columns) - set(CATEGORICAL_COLS) - set(NUMERIC_COLS) - {TARGET_COL})
+    if unknown or TARGET_COL not in columns:
+        raise ValueError(f"Chunked preprocessing needs the known dataset columns; "
+                         f"unexpected {unknown}, target present: {TARGET_COL in columns}")
+    numeric_cols = [col for col in NUMERIC_COLS if col in columns]
+    categorical_cols = [col for col in CATEGORICAL_COLS if col in columns]
+
+    # ── Pass 1: means, modes, categories (and quartile sketches) ─────────────
+    use_sketches = _use_sketches()
+    stats = _scan_stats(chunk_rows, sketch=use_sketches)
+    n = stats['n_rows']
+    print("=" * 55)
+    print(f"  STEP 1 & 2 — Dataset Scanned ({chunk_rows} rows per chunk)")
+    print("=" * 55)
+    print(f"  Rows    : {n}")
+    print(f"  Columns : {len(columns)}")
+    print(f"  Missing values filled: {stats['missing']}")
+    print()
+
+    # ── Quartiles for capping, medians for inference defaults ─────────────────
+    median_cols = [col for col, strategy in INFERENCE_DEFAULT_STRATEGY.items()
+                   if strategy == 'median' and col in numeric_cols]
+    if use_sketches:
+        sketches = stats['sketches']
+        bounds = {col: iqr_bounds(*sketches[col].quantiles([0.25, 0.75])) for col in numeric_cols}
+        # capping is monotone, so the capped median is the clipped raw median
+        medians = {col: float(np.clip(sketches[col].quantile(0.5), *bounds[col])) for col in median_cols}
+    else:
+        # passes 2 & 3: exact order statistics
+        ranks = {}
+        for col in numeric_cols:
+            wanted = set()
+            for q in (0.25, 0.75) + ((0.5,) if col in median_cols else ()):
+                lower, upper, _ = _ranks_for(n, q)
+                wanted.update((lower, upper))
+            ranks[col] = sorted(wanted)
+        order_stats = _streaming_order_stats(chunk_rows, ranks, stats['means'], stats['ranges'])
+        bounds = {col: iqr_bounds(_quantile(order_stats[col], n, 0.25), _quantile(order_stats[col], n, 0.75))
+                  for col in numeric_cols}
+        medians = {col: _quantile(order_stats[col], n, 0.5, clip=bounds[col]) for col in median_cols}
+
+    # ── Vocabularies from the category counts (same classes as in memory) ─────
+    encoders = {col: Vocabulary(sorted(stats['category_counts'][col]),
+                                default=_mode_of(stats['category_counts'][col]))
+                for col in categorical_cols}
+    target_encoder = Vocabulary(sorted(stats['target_counts']), default=_mode_of(stats['target_counts']))
+
+    inference_defaults = {}
+    for col, strategy in INFERENCE_DEFAULT_STRATEGY.items():
+        if col in numeric_cols and strategy == 'median':
+            inference_defaults[col] = medians[col]
+        elif col in categorical_cols:
+            mode = _mode_of(stats['category_counts'][col])
+            inference_defaults[col] = float(list(encoders[col].classes_).index(mode))
+
+    # ── Pass 4: transform every chunk into one preallocated matrix ────────────
+    feature_cols = [col for col in columns if col != TARGET_COL] + ['BMI']
+    X = np.empty((n, len(feature_cols)), dtype=np.float32)
+    y = np.empty(n, dtype=np.int64)
+    outlier_report = {col: 0 for col in numeric_cols}
+    row = 0
+    for chunk in _read_chunks(chunk_rows):
+        chunk = chunk[chunk[TARGET_COL].notna()]
+        end = row + len(chunk)
+        for j, col in enumerate(feature_cols[:-1]):
+            if col in numeric_cols:
+                lower, upper = bounds[col]
+                values = chunk[col].fillna(stats['means'][col]).to_numpy(dtype=np.float32)
+                outlier_report[col] += int(((values < lower) | (values > upper)).sum())
+                X[row:end, j] = np.clip(values, lower, upper)
+            else:
+                values = chunk[col].astype(str).where(chunk[col].notna(), stats['fill_modes'][col])
+                X[row:end, j] = encoders[col].codes(values, column=col)
+        X[row:end, -1] = X[row:end, feature_cols.index('Weight')] / X[row:end, feature_cols.index('Height')] ** 2
+        y[row:end] = target_encoder.codes(chunk[TARGET_COL], column=TARGET_COL)
+        row = end
+
+    print("=" * 55)
+    print(f"  STEP 3 — Outlier Capping (IQR, {'sketched' if use_sketches else 'exact streaming'} quartiles)")
+    print("=" * 55)
+    for col in numeric_cols:
+        lower, upper = bounds[col]
+        found = outlier_report[col]
+        print(f"  {col:<12}  " + (f"{found} outliers capped  (range: {lower:.2f} to {upper:.2f})"
+                                  if found else "No outliers found"))
+    print()
+    outlier_report = {col: count for col, count in outlier_report.items() if count}
+
+    print("=" * 55)
+    print("  STEP 4 & 5 — BMI + Encoding")
+    print("=" * 55)
+    bmi = X[:, -1]
+    print(f"  BMI range {bmi.min():.2f} – {bmi.max():.2f}, mean {bmi.mean(dtype=np.float64):.2f}")
+    print(f"  Target classes: {list(target_encoder.classes_)}")
+    print()
+
+    X_train, X_test, y_train, y_test, scaler = _split_and_scale(X, y)
+    del X
+    print("=" * 55)
+    print("  STEP 6 & 7 — Scaling + Train/Test Split")
+    print("=" * 55)
+    print(f"  Training samples : {X_train.shape[0]}")
+    print(f"  Test samples     : {X_test.shape[0]}")
+    print(f"  Feature matrix   : float32, {(X_train.nbytes + X_test.nbytes) / 1e6:.1f} MB")
+    print()
+
+    info = {
+        'scaler':             scaler,
+        'feature_encoders':   encoders,
+        'label_encoder':      target_encoder,
+        'feature_cols':       feature_cols,
+        'inference_defaults': inference_defaults,
+        'outlier_bounds':     bounds,
+    }
+    report = {
+        'train_samples':      int(X_train.shape[0]),
+        'test_samples':       int(X_test.shape[0]),
+        'num_features':       int(X_train.shape[1]),
+        'feature_cols':       feature_cols,
+        'class_names':        list(target_encoder.classes_),
+        'outliers_capped':    outlier_report,
+        'outlier_quantiles':  quantile_method(),
+        'inference_defaults': inference_defaults,
+        'chunk_rows':         chunk_rows,
+    }
+    return X_train, X_test, y_train, y_test, info, report
+
+
+# ── Quantile Error Report ─────────────────────────────────────────────────────
+
+def quantile_error_report(chunk_rows=None):
+    """
+    Compare the sketched quartiles and IQR caps with the exact ones.
+
+    The sketches are built the way the pipeline builds them (in memory, or in
+    pass 1 when chunk_rows > 0). For each numeric column the report lists
+    both quartiles and both caps, and the observed normalized rank error of
+    each sketched quartile (distance between its rank in the data and the
+    wanted rank, divided by the row count) next to the a-priori bound.
+
+    Written to outputs/quantile_error_report.json and returned.
+    """
+    chunk_rows = PREPROCESS_CHUNK_ROWS if chunk_rows is None else chunk_rows
+    qs = (0.25, 0.75)
+
+    if chunk_rows > 0:
+        stats = _scan_stats(chunk_rows, sketch=True)
+        n, sketches = stats['n_rows'], stats['sketches']
+        ranks = {col: sorted({r for q in qs for r in _ranks_for(n, q)[:2]}) for col in sketches}
+        order_stats = _streaming_order_stats(chunk_rows, ranks, stats['means'], stats['ranges'])
+        exact = {col: [_quantile(order_stats[col], n, q) for q in qs] for col in sketches}
+        chunks = _numeric_chunks(chunk_rows, list(sketches), stats['means'])
+    else:
+        with redirect_stdout(io.StringIO()):
+            df = fill_missing_values(load_data())
+        cols = [col for col in NUMERIC_COLS if col in df.columns]
+        values = df[cols].to_numpy()
+        n, sketches = len(values), sketch_columns(values, cols)
+        exact = dict(zip(cols, np.quantile(values, qs, axis=0).T))
+        chunks = [dict(zip(cols, values.T))]
+
+    estimates = {col: sketch.quantiles(qs) for col, sketch in sketches.items()}
+    below = {col: np.zeros(len(qs), dtype=np.int64) for col in sketches}     # values < estimate
+    at_or_below = {col: np.zeros(len(qs), dtype=np.int64) for col in sketches}
+    for values in chunks:
+        for col, estimate in estimates.items():
+            column = values[col][:, None]
+            below[col] += (column < estimate).sum(axis=0)
+            at_or_below[col] += (column <= estimate).sum(axis=0)
+
+    columns = {}
+    for col, sketch in sketches.items():
+        # the estimate occupies ranks below .. at_or_below-1; error is the distance to q·(n-1)
+        targets = np.array(qs) * (n - 1)
+        distance = np.maximum(below[col] - targets, 0) + np.maximum(targets - (at_or_below[col] - 1), 0)
+        columns[col] = {
+            'q1':            {'sketch': float(estimates[col][0]), 'exact': float(exact[col][0])},
+            'q3':            {'sketch': float(estimates[col][1]), 'exact': float(exact[col][1])},
+            'bounds':        {'sketch': iqr_bounds(*estimates[col]), 'exact': iqr_bounds(*exact[col])},
+            'rank_error':    round(float(distance.max() / n), 6),
+            'error_bound':   round(sketch.rank_error(), 6),
+            'sketch_items':  sketch.size(),
+        }
+
+    report = {
+        'rows':       n,
+        'chunk_rows': chunk_rows or None,
+        'k':          PREPROCESSING_CONFIG['outlier_sketch_k'],
+        'max_rank_error': max(c['rank_error'] for c in columns.values()),
+        'within_bound': all(c['rank_error'] <= c['error_bound'] for c in columns.values()),
+        'columns':    columns,
+    }
+    os.makedirs(os.path.dirname(QUANTILE_REPORT_PATH), exist_ok=True)
+    with open(QUANTILE_REPORT_PATH, 'w') as f:
         json.dump(report, f, indent=2)
 
+    print("=" * 55)
+    print(f"  QUANTILE SKETCH vs EXACT ({n} rows, k={report['k']})")
+    print("=" * 55)
+    print(f"  {'Column':<8} {'rank err':>9} {'bound':>7}   {'caps (sketch)':>17}   {'caps (exact)':>17}")
+    for col, c in columns.items():
+        (sl, su), (el, eu) = c['bounds']['sketch'], c['bounds']['exact']
+        print(f"  {col:<8} {c['rank_error']:>9.4f} {c['error_bound']:>7.4f}   "
+              f"{sl:>8.2f}–{su:<8.2f}   {el:>8.2f}–{eu:<8.2f}")
+    print()
+    return report
+
+
+def load_and_preprocess(use_cache=True, chunk_rows=None):
+    """
+    Run the complete preprocessing pipeline in one call.
+
+    With use_cache=True the result is read from cache/ when the CSV bytes
+    and PREPROCESSING_CONFIG are unchanged since a previous run.
+
+    chunk_rows > 0 streams the CSV in chunks of that many rows instead of
+    loading it whole (default: PREPROCESS_CHUNK_ROWS).
+
+    Returns:
+        X_train, X_test  — input features (numpy arrays, scaled)
+        y_train, y_test  — target labels (numpy arrays)
+        info             — dict with scaler, encoders, and column names
+    """
+
+    chunk_rows = PREPROCESS_CHUNK_ROWS if chunk_rows is None else chunk_rows
+
+    if use_cache and os.path.exists(DATA_PATH):
+        start    = time.perf_counter()
+        data_sha = dataset_hash()
+        key      = preprocessing_cache_key(data_sha, chunked=chunk_rows > 0)
+        cached   = load_cached_preprocessing(key)
+
+        if cached is not None:
+            elapsed = time.perf_counter() - start
+            _write_report(cached['report'])
+            print("=" * 55)
+            print("  PREPROCESSING CACHE HIT")
+            print("=" * 55)
+            print(f"  Dataset SHA-256 : {data_sha[:16]}…")
+            print(f"  Loaded in       : {elapsed:.2f}s "
+                  f"(saved {max(cached['build_seconds'] - elapsed, 0.0):.2f}s)")
+            print()
+            return (cached['X_train'], cached['X_test'],
+                    cached['y_train'], cached['y_test'], cached['info'])
+
+    start = time.perf_counter()
+    if chunk_rows > 0:
+        X_train, X_test, y_train, y_test, info, report = run_pipeline_chunked(chunk_rows)
+    else:
+        X_train, X_test, y_train, y_test, info, report = run_pipeline()
+    build_seconds = time.perf_counter() - start
+
+    # Save a simple preprocessing report to outputs/
+    _write_report(report)
+
+    if use_cache and os.path.exists(DATA_PATH):
+        save_cached_preprocessing(key, {
+            'X_train': X_train, 'X_test': X_test,
+            'y_train': y_train, 'y_test': y_test,
+            'info':    info,
+            'report':  report,
+            'build_seconds': build_seconds,
+        })
+
     print("=" * 55)
     print("  PREPROCESSING COMPLETE")
     print("=" * 55)
@@ -358,4 +1104,13 @@ def load_and_preprocess():
 
 # ── Standalone run ────────────────────────────────────────────────────────────
 if __name__ == '__main__':
-    load_and_preprocess()
+    parser = argparse.ArgumentParser(description='Run the preprocessing pipeline.')
+    parser.add_argument('--chunk-rows', type=int, default=None,
+                        help='stream the CSV in chunks of N rows (default: PREPROCESS_CHUNK_ROWS)')
+    parser.add_argument('--quantile-report', action='store_true',
+                        help='compare the sketched outlier quartiles with exact quantiles')
+    args = parser.parse_args()
+    if args.quantile_report:
+        quantile_error_report(chunk_rows=args.chunk_rows)
+    else:
+        load_and_preprocess(use_cache=False, chunk_rows=args.chunk_rows)
@@ -0,0 +1,259 @@
+"""
+drift.py
+---------
+Input drift monitoring against the training distribution.
+
+Training stores a reference sketch in the bundle (bundle['drift_reference']):
+  - numeric features : decile bin edges of the training rows + counts per bin
+  - categoricals     : counts per encoded category
+  - predicted class  : counts per class in the training labels
+
+Every prediction served by a route (predict(..., record=True); benchmarks,
+the memory profiler and other internal callers leave it off) adds one count
+per feature to the matching live bin, plus its predicted class, in shared-memory counters (src/shm.py) so all workers
+feed one sketch. Raw requests are never stored — only these fixed-size
+counts, which also makes every score O(bins) to compute:
+  - PSI  = Σ (live% - ref%) · ln(live% / ref%)       per feature and for the class mix
+  - KS   = max |live CDF - ref CDF| over the bin edges (numeric features)
+
+Predictions from the 6-field form fill the lifestyle features from
+inference_defaults; they are counted separately (imputed_fraction) because
+a high share of them shows up as drift in exactly those features.
+
+Disable with DRIFT_MONITOR=0. From a shell:
+    python -m src.drift            # current scores from the shared counters
+    python -m src.drift --reset    # start counting from zero
+"""
+
+import os
+import sys
+import json
+import argparse
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.shm import SharedCounters, segment_name
+
+DRIFT_MONITOR_ENABLED = os.getenv('DRIFT_MONITOR', '1').strip().lower() not in {'0', 'false', 'no'}
+REFERENCE_BINS = 10
+MIN_PREDICTIONS = 100          # below this the scores are reported but not judged
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+PSI_EPSILON = 1e-4             # floor for empty bins so PSI stays finite
+
+COUNTER_TOTAL, COUNTER_IMPUTED = 0, 1
+
+
+# ── Reference sketch (built at training time) ────────────────────────────────
+
+def _bin_index(edges, values):
+    return np.searchsorted(edges, values, side='left')
+
+
+def build_reference(X_raw, y, feature_cols, feature_encoders, class_names, n_bins=REFERENCE_BINS):
+    """JSON-ready reference sketch of the (unscaled) training rows and labels."""
+    X_raw = np.asarray(X_raw, dtype=float)
+    numeric, categorical = {}, {}
+    for i, col in enumerate(feature_cols):
+        values = X_raw[:, i]
+        if col in feature_encoders:
+            n_categories = len(feature_encoders[col].classes_)
+            codes = np.clip(np.rint(values).astype(int), 0, n_categories - 1)
+            categorical[col] = {'counts': np.bincount(codes, minlength=n_categories).tolist()}
+        else:
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+            counts = np.bincount(_bin_index(edges, values), minlength=len(edges) + 1)
+            numeric[col] = {'edges': edges.tolist(), 'counts': counts.tolist()}
+    return {
+        'n_rows':      int(len(X_raw)),
+        'numeric':     numeric,
+        'categorical': categorical,
+        'classes':     {'names': [str(c) for c in class_names],
+                        'counts': np.bincount(np.asarray(y, dtype=int), minlength=len(class_names)).tolist()},
+    }
+
+
+# ── Live sketch ───────────────────────────────────────────────────────────────
+
+def psi(live_counts, reference_counts):
+    live = np.asarray(live_counts, dtype=float)
+    reference = np.asarray(reference_counts, dtype=float)
+    p = np.maximum(live / max(live.sum(), 1.0), PSI_EPSILON)
+    q = np.maximum(reference / max(reference.sum(), 1.0), PSI_EPSILON)
+    return float(np.sum((p - q) * np.log(p / q)))
+
+
+def binned_ks(live_counts, reference_counts):
+    live = np.asarray(live_counts, dtype=float)
+    reference = np.asarray(reference_counts, dtype=float)
+    live_cdf = np.cumsum(live) / max(live.sum(), 1.0)
+    reference_cdf = np.cumsum(reference) / max(reference.sum(), 1.0)
+    return float(np.max(np.abs(live_cdf - reference_cdf)))
+
+
+def _status(score, enough_data):
+    if not enough_data:
+        return 'insufficient_data'
+    if score >= PSI_SIGNIFICANT:
+        return 'significant'
+    if score >= PSI_MODERATE:
+        return 'moderate'
+    return 'stable'
+
+
+class DriftMonitor:
+    """Live counts for one model version, laid out to match its reference sketch."""
+
+    def __init__(self, reference, feature_cols, model_version, counters=None):
+        self.reference = reference
+        self.model_version = model_version
+        self.feature_cols = list(feature_cols)
+
+        # counter layout: [total, imputed, <bins of each feature...>, <classes...>]
+        offset = 2
+        self.numeric = []        # (column index, name, edges, offset)
+        self.categorical = []    # (column index, name, n_categories, offset)
+        self.slices = {}
+        for i, col in enumerate(self.feature_cols):
+            if col in reference['numeric']:
+                edges = np.asarray(reference['numeric'][col]['edges'], dtype=float)
+                self.numeric.append((i, col, edges, offset))
+                width = len(edges) + 1
+            elif col in reference['categorical']:
+                width = len(reference['categorical'][col]['counts'])
+                self.categorical.append((i, col, width, offset))
+            else:
+                continue
+            self.slices[col] = slice(offset, offset + width)
+            offset += width
+        n_classes = len(reference['classes']['counts'])
+        self.class_slice = slice(offset, offset + n_classes)
+        self.n_counters = offset + n_classes
+
+        layout_key = (model_version, self.feature_cols, json.dumps(reference, sort_keys=True))
+        self.counters = counters or SharedCounters(segment_name('drift', layout_key), self.n_counters)
+
+    def record(self, feature_row, class_index, imputed=False):
+        """Count one prediction (the row itself is not kept)."""
+        indices = [COUNTER_TOTAL]
+        if imputed:
+            indices.append(COUNTER_IMPUTED)
+        for i, _, edges, offset in self.numeric:
+            indices.append(offset + int(_bin_index(edges, feature_row[i])))
+        for i, _, n_categories, offset in self.categorical:
+            indices.append(offset + min(max(int(round(feature_row[i])), 0), n_categories - 1))
+        indices.append(self.class_slice.start + int(class_index))
+        self.counters.add(np.array(indices))
+
+    def report(self):
+        """PSI / KS per feature and for the predicted-class mix."""
+        totals = self.counters.totals()
+        n = int(totals[COUNTER_TOTAL])
+        enough = n >= MIN_PREDICTIONS
+
+        features = {}
+        for _, col, edges, _ in self.numeric:
+            live, reference = totals[self.slices[col]], self.reference['numeric'][col]['counts']
+            score = psi(live, reference)
+            features[col] = {'type': 'numeric', 'psi': round(score, 4),
+                             'ks': round(binned_ks(live, reference), 4),
+                             'status': _status(score, enough), 'edges': [round(e, 3) for e in edges.tolist()],
+                             'live': live.tolist(), 'reference': reference}
+        for _, col, _, _ in self.categorical:
+            live, reference = totals[self.slices[col]], self.reference['categorical'][col]['counts']
+            score = psi(live, reference)
+            features[col] = {'type': 'categorical', 'psi': round(score, 4),
+                             'status': _status(score, enough), 'live': live.tolist(), 'reference': reference}
+
+        live_classes = totals[self.class_slice]
+        class_score = psi(live_classes, self.reference['classes']['counts'])
+        names = self.reference['classes']['names']
+        return {
+            'enabled':          True,
+            'model_version':    self.model_version,
+            'shared':           self.counters.shared,
+            'workers':          self.counters.workers(),
+            'predictions':      n,
+            'imputed_fraction': round(float(totals[COUNTER_IMPUTED]) / n, 4) if n else 0.0,
+            'reference_rows':   self.reference['n_rows'],
+            'max_psi':          round(max([f['psi'] for f in features.values()] + [class_score]), 4),
+            'drifted':          sorted(col for col, f in features.items() if f['status'] == 'significant'),
+            'features':         features,
+            'classes': {
+                'psi':       round(class_score, 4),
+                'status':    _status(class_score, enough),
+                'live':      dict(zip(names, live_classes.tolist())),
+                'reference': dict(zip(names, self.reference['classes']['counts'])),
+            },
+        }
+
+
+# ── One monitor per model version per process ────────────────────────────────
+
+_monitors = {}
+_monitors_lock = threading.Lock()
+
+
+def get_monitor(bundle):
+    """The monitor for the bundle's model, or None (disabled / no reference sketch)."""
+    reference = bundle.get('drift_reference')
+    if not DRIFT_MONITOR_ENABLED or not reference:
+        return None
+    version = (bundle.get('metadata') or {}).get('model_version', 'legacy')
+    with _monitors_lock:
+        monitor = _monitors.get(version)
+        if monitor is None:
+            monitor = _monitors[version] = DriftMonitor(reference, bundle['feature_cols'], version)
+        return monitor
+
+
+def record_prediction(bundle, feature_row, class_index, imputed=False):
+    monitor = get_monitor(bundle)
+    if monitor is not None:
+        monitor.record(feature_row, class_index, imputed)
+
+
+def drift_report(bundle):
+    monitor = get_monitor(bundle)
+    if monitor is None:
+        reason = ('disabled (DRIFT_MONITOR=0)' if not DRIFT_MONITOR_ENABLED
+                  else 'the model has no drift reference — retrain with python main.py')
+        return {'enabled': False, 'reason': reason}
+    return monitor.report()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Input drift against the training distribution.')
+    parser.add_argument('--reset', action='store_true', help='zero the live counters of every worker')
+    args = parser.parse_args(argv)
+
+    from src.predict import load_model
+    bundle = load_model()
+    monitor = get_monitor(bundle)
+    if monitor is None:
+        print(json.dumps(drift_report(bundle), indent=2))
+        return
+
+    if args.reset:
+        monitor.counters.reset()
+        print("  Drift counters reset.")
+        return
+
+    report = monitor.report()
+    print("=" * 55)
+    print(f"  INPUT DRIFT — model {report['model_version']}")
+    print("=" * 55)
+    print(f"  Predictions: {report['predictions']} from {report['workers']} worker(s), "
+          f"{report['imputed_fraction']:.0%} with imputed lifestyle fields")
+    for col, feature in sorted(report['features'].items(), key=lambda item: -item[1]['psi']):
+        ks = f"  KS {feature['ks']:.3f}" if 'ks' in feature else ''
+        print(f"  {col:<32} PSI {feature['psi']:.3f}{ks}  {feature['status']}")
+    print(f"  {'predicted class mix':<32} PSI {report['classes']['psi']:.3f}  {report['classes']['status']}")
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -10,8 +10,13 @@ Each category has:
   - avoid       : exercises to stay away from
   - tips        : expert advice
   - bmi_tip     : one-line motivational note
+
+The plans are frozen into a read-only catalogue at import (src/plans.py):
+EXERCISE_PLANS and get_exercise_plan() return shared, immutable mappings.
 """
 
+from src.plans import PlanCatalogue
+
 # ── Exercise plans for each obesity class ─────────────────────────────────────
 
 EXERCISE_PLANS = {
@@ -376,9 +381,13 @@ EXERCISE_PLANS = {
 }
 
 
+EXERCISE_CATALOGUE = PlanCatalogue(EXERCISE_PLANS, default='Normal_Weight')
+EXERCISE_PLANS = EXERCISE_CATALOGUE.plans
+
+
 def get_exercise_plan(obesity_class):
     """
-    Return the exercise plan for a given obesity class.
+    Return the (read-only) exercise plan for a given obesity class.
     Falls back to Normal_Weight plan if class is not found.
     """
-    return EXERCISE_PLANS.get(obesity_class, EXERCISE_PLANS['Normal_Weight'])
+    return EXERCISE_CATALOGUE.get(obesity_class)
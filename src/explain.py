@@ -0,0 +1,337 @@
+"""
+explain.py
+-----------
+Per-prediction feature attributions for the soft-voting ensemble.
+
+For one feature row, every class probability is split into
+    expected value + one contribution per input feature
+where the expected value is the ensemble's output for the average training
+profile, and the contributions add up exactly to the prediction.
+
+How each member is attributed:
+  - Trees (Random Forest, (Hist) Gradient Boosting): every node gets the
+    cover-weighted mean of the leaf values below it, E[f(x) | x reaches
+    node]. Walking a row down a tree, each split credits
+    E[child] - E[parent] to the feature it tested (path attributions, as in
+    Saabas' treeinterpreter). All trees and rows are walked together, one
+    level per iteration, over the runtime copy of the model
+    (predict.get_runtime_model).
+  - Logistic Regression: coef × (x - mean) per feature — exact in log-odds
+    space, since the scaler centres every feature on its training mean.
+
+Gradient Boosting and Logistic Regression contributions live in log-odds
+space; they are mapped into probability space by scaling each class column
+with Δprobability / Δlog-odds, so they still add up to that member's
+probability. The member attributions are then averaged with the voting
+weights, the same way the ensemble averages probabilities.
+
+The per-node expectations and expected values are computed once per model
+version. Explanations for repeated profiles come from an LRU cache
+(EXPLAIN_CACHE_SIZE entries, default 1024).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.predict import get_runtime_model
+from src.runtime.models import (
+    ForestClassifier, GradientBoostingClassifier, LogisticModel, expit, softmax,
+)
+
+EXPLAIN_CACHE_SIZE = int(os.getenv('EXPLAIN_CACHE_SIZE', '1024'))
+
+FEATURE_LABELS = {
+    'Gender':                         'Gender',
+    'Age':                            'Age',
+    'Height':                         'Height (m)',
+    'Weight':                         'Weight (kg)',
+    'family_history_with_overweight': 'Family History',
+    'FAVC':                           'High-Calorie Food (FAVC)',
+    'FCVC':                           'Vegetable Intake (FCVC)',
+    'NCP':                            'Main Meals (NCP)',
+    'CAEC':                           'Snacking (CAEC)',
+    'SMOKE':                          'Smoking',
+    'CH2O':                           'Water Intake (CH2O)',
+    'SCC':                            'Calorie Monitoring (SCC)',
+    'FAF':                            'Physical Activity (FAF)',
+    'TUE':                            'Technology Use (TUE)',
+    'CALC':                           'Alcohol Intake (CALC)',
+    'MTRANS':                         'Primary Transport (MTRANS)',
+    'BMI':                            'BMI',
+}
+
+
+# ── Trees ─────────────────────────────────────────────────────────────────────
+
+def node_expectations(trees):
+    """
+    Cover-weighted mean of the leaf values below every node, computed
+    bottom-up one depth level at a time. Trees exported without cover fall
+    back to the stored node values.
+    """
+    if trees.cover is None:
+        return trees.value
+
+    levels = []
+    frontier = trees.roots
+    while frontier.size:
+        levels.append(frontier)
+        internal = frontier[~trees.is_leaf[frontier]]
+        frontier = np.concatenate([trees.left[internal], trees.right[internal]])
+
+    expected = trees.value.copy()
+    for frontier in reversed(levels):
+        internal = frontier[~trees.is_leaf[frontier]]
+        left, right = trees.left[internal], trees.right[internal]
+        cover_left = trees.cover[left][:, None]
+        cover_right = trees.cover[right][:, None]
+        expected[internal] = ((cover_left * expected[left] + cover_right * expected[right])
+                              / (cover_left + cover_right))
+    return expected
+
+
+def path_contributions(trees, expected, X, n_features, columns=None, n_columns=None):
+    """
+    Sum over all trees of E[child] - E[parent], credited to each split's
+    feature: (n_rows, n_features, n_columns).
+
+    With columns=None every tree adds to all its outputs; otherwise tree t
+    has a single output that is added to class column columns[t] (the
+    Gradient Boosting layout, one tree per class per stage).
+    """
+    X = np.asarray(X, dtype=trees.split_dtype)
+    n_rows = X.shape[0]
+    width = expected.shape[1] if columns is None else n_columns
+    totals = np.zeros(n_rows * n_features * width)
+
+    nodes = np.repeat(trees.roots[None, :], n_rows, axis=0)
+    row_of = np.repeat(np.arange(n_rows)[:, None], trees.n_trees, axis=1)
+    tree_of = np.repeat(np.arange(trees.n_trees)[None, :], n_rows, axis=0)
+    for _ in range(trees.max_depth):
+        active = ~trees.is_leaf[nodes]
+        if not active.any():
+            break
+        parent = nodes[active]
+        rows = row_of[active]
+        feature = trees.feature[parent]
+        go_left = X[rows, feature] <= trees.threshold[parent]
+        child = np.where(go_left, trees.left[parent], trees.right[parent])
+        delta = expected[child] - expected[parent]
+
+        slot = (rows * n_features + feature) * width
+        if columns is None:
+            index = (slot[:, None] + np.arange(width)).ravel()
+            totals += np.bincount(index, weights=delta.ravel(), minlength=totals.size)
+        else:
+            index = slot + columns[tree_of[active]]
+            totals += np.bincount(index, weights=delta[:, 0], minlength=totals.size)
+        nodes[active] = child
+
+    return totals.reshape(n_rows, n_features, width)
+
+
+# ── Log-odds → probability ────────────────────────────────────────────────────
+
+def _two_columns(raw):
+    """Binary models have one log-odds column; softmax([-r/2, r/2]) == [1-σ(r), σ(r)]."""
+    return np.concatenate([-raw / 2, raw / 2], axis=-1)
+
+
+def _to_probability(base_raw, contributions, link):
+    """
+    Map log-odds attributions to probability space: every class column is
+    scaled by Δprobability / Δlog-odds between the row and the expected
+    value, so the contributions add up to the member's probability.
+    """
+    raw = base_raw + contributions.sum(axis=1)
+    base_proba = link(base_raw[None, :])
+    proba = link(raw)
+    d_raw = raw - base_raw
+    d_proba = proba - base_proba
+    moved = np.abs(d_raw) > 1e-12
+    scale = np.where(moved, d_proba / np.where(moved, d_raw, 1.0), proba * (1.0 - proba))
+    return base_proba[0], contributions * scale[:, None, :]
+
+
+def _ovr_link(raw):
+    proba = expit(raw)
+    return proba / proba.sum(axis=1, keepdims=True)
+
+
+# ── Member explainers ─────────────────────────────────────────────────────────
+
+class ForestExplainer:
+    """Mean path attributions of a forest's trees (already in probability space)."""
+
+    def __init__(self, member, n_features):
+        self.trees = member.trees
+        self.n_features = n_features
+        self.expected = node_expectations(self.trees)
+        self.expected_value = self.expected[self.trees.roots].mean(axis=0)
+
+    def explain(self, X):
+        contributions = path_contributions(self.trees, self.expected, X, self.n_features)
+        return self.expected_value, contributions / self.trees.n_trees
+
+
+class BoostingExplainer:
+    """Gradient Boosting: path attributions of every stage, summed in log-odds space."""
+
+    def __init__(self, member, n_features):
+        self.trees = member.trees
+        self.n_features = n_features
+        self.learning_rate = member.learning_rate
+        self.n_columns = len(member.init_raw)
+        self.columns = np.arange(self.trees.n_trees) % self.n_columns
+        self.expected = node_expectations(self.trees)
+        root_values = self.expected[self.trees.roots, 0].reshape(-1, self.n_columns)
+        self.expected_raw = member.init_raw + self.learning_rate * root_values.sum(axis=0)
+        if self.n_columns == 1:
+            self.expected_raw = _two_columns(self.expected_raw)
+        self.expected_value = softmax(self.expected_raw[None, :])[0]
+
+    def explain(self, X):
+        contributions = self.learning_rate * path_contributions(
+            self.trees, self.expected, X, self.n_features, self.columns, self.n_columns)
+        if self.n_columns == 1:
+            contributions = _two_columns(contributions)
+        return _to_probability(self.expected_raw, contributions, softmax)
+
+
+class LinearExplainer:
+    """Logistic Regression: coef × (x - mean); scaled inputs have mean 0."""
+
+    def __init__(self, member, n_features):
+        self.coef = member.coef_
+        self.binary = self.coef.shape[0] == 1
+        self.expected_raw = np.asarray(member.intercept_, dtype=float)
+        if self.binary:
+            self.expected_raw = _two_columns(self.expected_raw)
+            self.link = softmax
+        else:
+            self.link = _ovr_link if member.multi_class == 'ovr' else softmax
+        self.expected_value = self.link(self.expected_raw[None, :])[0]
+
+    def explain(self, X):
+        contributions = np.asarray(X, dtype=float)[:, :, None] * self.coef.T[None, :, :]
+        if self.binary:
+            contributions = _two_columns(contributions)
+        return _to_probability(self.expected_raw, contributions, self.link)
+
+
+MEMBER_EXPLAINERS = {
+    ForestClassifier:           ForestExplainer,
+    GradientBoostingClassifier: BoostingExplainer,
+    LogisticModel:              LinearExplainer,
+}
+
+
+# ── Ensemble ──────────────────────────────────────────────────────────────────
+
+class EnsembleExplainer:
+    """Soft-vote attributions: member attributions averaged with the voting weights."""
+
+    def __init__(self, bundle):
+        model = get_runtime_model(bundle)
+        self.feature_cols = list(bundle['feature_cols'])
+        self.model_version = (bundle.get('metadata') or {}).get('model_version', 'legacy')
+
+        n_features = len(self.feature_cols)
+        self.members = []
+        for member in model.named_estimators_.values():
+            self.members.append(MEMBER_EXPLAINERS[type(member)](member, n_features))
+
+        weights = np.ones(len(self.members)) if model.weights is None else np.asarray(model.weights, dtype=float)
+        self.weights = weights / weights.sum()
+        self.expected_value = sum(w * m.expected_value for w, m in zip(self.weights, self.members))
+
+    def explain(self, X_scaled):
+        """(expected value (n_classes,), contributions (n_rows, n_features, n_classes))."""
+        contributions = sum(weight * member.explain(X_scaled)[1]
+                            for weight, member in zip(self.weights, self.members))
+        return self.expected_value, contributions
+
+
+_explainer = {'bundle': None, 'explainer': None}
+_explainer_lock = threading.Lock()
+
+_explanations = OrderedDict()
+_explanations_lock = threading.Lock()
+_cache_counts = {'hits': 0, 'misses': 0}
+
+
+def get_explainer(bundle):
+    """The explainer for this bundle, rebuilt (and the cache cleared) when the model changes."""
+    with _explainer_lock:
+        if _explainer['bundle'] is not bundle:
+            _explainer['explainer'] = EnsembleExplainer(bundle)
+            _explainer['bundle'] = bundle
+            with _explanations_lock:
+                _explanations.clear()
+        return _explainer['explainer']
+
+
+def _display_value(bundle, column, value):
+    encoder = (bundle.get('feature_encoders') or {}).get(column)
+    if encoder is not None:
+        return str(encoder.classes_[int(value)])
+    return round(float(value), 2)
+
+
+def _build_explanation(bundle, explainer, feature_row, class_index, class_label):
+    X_scaled = bundle['scaler'].transform(feature_row.reshape(1, -1))
+    expected_value, contributions = explainer.explain(X_scaled)
+    class_contributions = contributions[0, :, class_index]
+
+    order = np.argsort(-np.abs(class_contributions), kind='stable')
+    return {
+        'model_version': explainer.model_version,
+        'class_label':   class_label,
+        'expected':      round(float(expected_value[class_index]) * 100, 1),
+        'prediction':    round(float(expected_value[class_index] + class_contributions.sum()) * 100, 1),
+        'contributions': [
+            {
+                'feature':      explainer.feature_cols[i],
+                'label':        FEATURE_LABELS.get(explainer.feature_cols[i], explainer.feature_cols[i]),
+                'value':        _display_value(bundle, explainer.feature_cols[i], feature_row[i]),
+                'contribution': round(float(class_contributions[i]) * 100, 2),
+            }
+            for i in order
+        ],
+    }
+
+
+def explain_row(bundle, feature_row, class_label):
+    """
+    Attributions (in percentage points) of one raw feature row's probability
+    for class_label, largest first. Repeated rows are served from the cache.
+    """
+    explainer = get_explainer(bundle)
+    feature_row = np.asarray(feature_row, dtype=float)
+    key = (explainer.model_version, feature_row.tobytes(), class_label)
+    with _explanations_lock:
+        cached = _explanations.get(key)
+        if cached is not None:
+            _explanations.move_to_end(key)
+            _cache_counts['hits'] += 1
+            return cached
+        _cache_counts['misses'] += 1
+
+    class_names = [str(c) for c in bundle['label_encoder'].inverse_transform(bundle['model'].classes_)]
+    explanation = _build_explanation(bundle, explainer, feature_row,
+                                     class_names.index(class_label), class_label)
+
+    with _explanations_lock:
+        _explanations[key] = explanation
+        while len(_explanations) > EXPLAIN_CACHE_SIZE:
+            _explanations.popitem(last=False)
+    return explanation
+
+
+def get_explain_stats():
+    """Explanation cache size and hit/miss counts for this process."""
+    with _explanations_lock:
+        return {'cache_size': len(_explanations), 'cache_limit': EXPLAIN_CACHE_SIZE, **_cache_counts}
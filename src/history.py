@@ -0,0 +1,238 @@
+"""
+history.py
+-----------
+Per-patient assessment history in a local SQLite database.
+
+Every /predict or /advance assessment made with a patient ID (the
+optional "Patient ID" form field) stores one row: BMI, weight, the
+predicted class and the nutrition targets shown to the user. The trend
+endpoint turns a patient's rows into a downsampled time series.
+
+  - WAL journal: readers never block the writer and vice versa, so trend
+    queries from one worker run while others insert.
+  - Pooled connections: each worker keeps up to HISTORY_POOL_SIZE open
+    connections (recreated after a fork); sqlite3 caches the compiled form
+    of the module's fixed SQL statements per connection, so each request
+    only binds parameters.
+  - Index on (user_id, ts): a trend query is one index range scan, and the
+    downsampling (GROUP BY time bucket) happens inside SQLite, so only
+    `points` rows come back however many assessments a patient has.
+
+HISTORY_DB sets the database file (default outputs/history.db);
+HISTORY_STORE=0 disables the store.
+"""
+
+import os
+import re
+import time
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+HISTORY_ENABLED   = os.getenv('HISTORY_STORE', '1').strip().lower() not in {'0', 'false', 'no'}
+HISTORY_DB        = os.getenv('HISTORY_DB', os.path.join(ROOT_DIR, 'outputs', 'history.db'))
+HISTORY_POOL_SIZE = int(os.getenv('HISTORY_POOL_SIZE', '4'))
+TREND_POINTS      = 100           # default points per trend series
+MAX_TREND_POINTS  = 1000
+PATIENT_ID_RE     = re.compile(r'^[A-Za-z0-9_.\-]{1,64}$')
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS assessments (
+        id            INTEGER PRIMARY KEY,
+        user_id       TEXT    NOT NULL,
+        ts            REAL    NOT NULL,
+        endpoint      TEXT,
+        model_version TEXT,
+        class_label   TEXT    NOT NULL,
+        confidence    REAL,
+        bmi           REAL    NOT NULL,
+        weight_kg     REAL,
+        calories      REAL,
+        protein_g     REAL,
+        carbs_g       REAL,
+        fat_g         REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_assessments_user_ts ON assessments (user_id, ts)",
+)
+
+INSERT_SQL = """
+    INSERT INTO assessments (user_id, ts, endpoint, model_version, class_label, confidence,
+                             bmi, weight_kg, calories, protein_g, carbs_g, fat_g)
+    VALUES (:user_id, :ts, :endpoint, :model_version, :class_label, :confidence,
+            :bmi, :weight_kg, :calories, :protein_g, :carbs_g, :fat_g)
+"""
+
+RANGE_SQL = """
+    SELECT COUNT(*), MIN(ts), MAX(ts) FROM assessments
+    WHERE user_id = :user_id AND ts BETWEEN :since AND :until
+"""
+
+# One row per time bucket. class_label is a bare column next to the single
+# MAX(ts) aggregate, which SQLite takes from the bucket's latest row.
+TREND_SQL = """
+    SELECT CAST((ts - :start) / :bucket AS INTEGER) AS bucket,
+           COUNT(*), AVG(bmi), AVG(weight_kg), AVG(calories),
+           AVG(protein_g), AVG(carbs_g), AVG(fat_g), class_label, MAX(ts)
+    FROM assessments
+    WHERE user_id = :user_id AND ts BETWEEN :since AND :until
+    GROUP BY bucket
+    ORDER BY bucket
+"""
+
+
+def normalize_patient_id(value):
+    """The patient ID from a form/JSON field, None when empty; ValueError if malformed."""
+    patient_id = str(value or '').strip()
+    if not patient_id:
+        return None
+    if not PATIENT_ID_RE.match(patient_id):
+        raise ValueError('Patient ID may only use letters, digits, "_", "-" and "." (max 64 characters).')
+    return patient_id
+
+
+def parse_timestamp(value):
+    """ISO date/datetime query parameter (UTC unless it has an offset) → epoch seconds, or None."""
+    if not value:
+        return None
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class HistoryStore:
+    """SQLite assessment store with a small per-process connection pool."""
+
+    def __init__(self, path=HISTORY_DB, pool_size=HISTORY_POOL_SIZE):
+        self.path = path
+        self._pool = queue.LifoQueue(maxsize=max(1, int(pool_size)))
+        self._pid = os.getpid()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self.connection() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False,
+                               isolation_level=None, cached_statements=64)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection (a new one when the pool is empty)."""
+        if self._pid != os.getpid():
+            # connections must not cross a fork: start a fresh pool
+            self._pool = queue.LifoQueue(maxsize=self._pool.maxsize)
+            self._pid = os.getpid()
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def add(self, patient_id, result, nutrition=None, weight_kg=None, endpoint=None, ts=None):
+        """Store one assessment (a predict() result plus its nutrition plan)."""
+        nutrition = nutrition or {}
+        row = {
+            'user_id':       patient_id,
+            'ts':            time.time() if ts is None else ts,
+            'endpoint':      endpoint,
+            'model_version': result.get('model_version'),
+            'class_label':   result['class_label'],
+            'confidence':    result.get('confidence'),
+            'bmi':           result['bmi'],
+            'weight_kg':     weight_kg,
+            'calories':      nutrition.get('daily_calories'),
+            'protein_g':     nutrition.get('protein_g'),
+            'carbs_g':       nutrition.get('carbs_g'),
+            'fat_g':         nutrition.get('fat_g'),
+        }
+        with self.connection() as conn:
+            conn.execute(INSERT_SQL, row)
+
+    def add_many(self, rows):
+        """Bulk insert of add()-shaped dicts in one transaction (imports, benchmarks)."""
+        with self.connection() as conn:
+            conn.execute('BEGIN')
+            try:
+                conn.executemany(INSERT_SQL, rows)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def trend(self, patient_id, since=None, until=None, points=TREND_POINTS):
+        """
+        The patient's assessments between since and until (epoch seconds)
+        averaged into at most `points` equal time buckets.
+        """
+        points = min(max(int(points), 1), MAX_TREND_POINTS)
+        bounds = {'user_id': patient_id,
+                  'since': float('-inf') if since is None else since,
+                  'until': float('inf') if until is None else until}
+        with self.connection() as conn:
+            count, first, last = conn.execute(RANGE_SQL, bounds).fetchone()
+            if not count:
+                return {'patient_id': patient_id, 'assessments': 0, 'bucket_s': 0, 'points': []}
+            # widen slightly so the latest row falls into the last bucket
+            bucket = max((last - first) / points, 1e-6) * (1 + 1e-9)
+            rows = conn.execute(TREND_SQL, {**bounds, 'start': first, 'bucket': bucket}).fetchall()
+
+        series = []
+        for index, n, bmi, weight, calories, protein, carbs, fat, class_label, latest in rows:
+            start = first + index * bucket
+            series.append({
+                'ts':          round(start, 3),
+                'time':        datetime.fromtimestamp(start, timezone.utc).isoformat(timespec='seconds'),
+                'assessments': n,
+                'bmi':         _round(bmi),
+                'weight_kg':   _round(weight),
+                'calories':    _round(calories, 0),
+                'protein_g':   _round(protein),
+                'carbs_g':     _round(carbs),
+                'fat_g':       _round(fat),
+                'class_label': class_label,
+            })
+        return {
+            'patient_id':  patient_id,
+            'assessments': count,
+            'first':       datetime.fromtimestamp(first, timezone.utc).isoformat(timespec='seconds'),
+            'last':        datetime.fromtimestamp(last, timezone.utc).isoformat(timespec='seconds'),
+            'bucket_s':    round(bucket, 3),
+            'points':      series,
+        }
+
+
+def _round(value, digits=1):
+    return None if value is None else round(float(value), digits)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store():
+    """The process-wide store, or None when disabled."""
+    global _store
+    if not HISTORY_ENABLED:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HistoryStore()
+    return _store
@@ -0,0 +1,394 @@
+"""
+inference_server.py
+--------------------
+Optional shared inference process for the web workers.
+
+Without it, every gunicorn worker unpickles its own copy of the ensemble
+and the nutrition forest. With it, ONE long-lived process (python serve.py)
+owns both bundles and the workers talk to it over a Unix domain socket;
+they only keep the small schema (feature order, category vocabularies,
+class names) needed to encode a form into a feature row.
+
+Wire format (little-endian, one frame per message, many frames per connection):
+
+    request   <BBHHII  version, op, rows, cols, schema_tag, payload_len
+    response  <BBHHI   status,  op, rows, cols, payload_len
+
+    payload   rows × cols float64 for OP_PREDICT / OP_NUTRITION,
+              one feature row + the class index for OP_EXPLAIN (JSON back),
+              UTF-8 JSON for OP_SCHEMA, UTF-8 text for errors
+
+schema_tag is a CRC32 of the whole schema, model version included. The
+server answers STATUS_STALE_SCHEMA when a client encoded its row with an
+older schema (after any retrain: new categories, defaults, outlier caps);
+the client then refetches the schema and re-encodes.
+
+The client (get_client) reuses one connection per thread and, if the socket
+is unavailable, backs off for a few seconds so callers fall back to
+in-process inference instead of paying a failed connect per request.
+"""
+
+import os
+import json
+import time
+import zlib
+import socket
+import struct
+import tempfile
+import threading
+import socketserver
+
+import numpy as np
+
+from src.runtime.models import VocabularyEncoder
+
+PROTOCOL_VERSION = 1
+
+REQUEST_HEADER  = struct.Struct('<BBHHII')
+RESPONSE_HEADER = struct.Struct('<BBHHI')
+
+OP_PING      = 0
+OP_SCHEMA    = 1
+OP_PREDICT   = 2
+OP_NUTRITION = 3
+OP_EXPLAIN   = 4
+
+STATUS_OK           = 0
+STATUS_ERROR        = 1
+STATUS_STALE_SCHEMA = 2
+STATUS_UNAVAILABLE  = 3
+
+MAX_ROWS = 1024
+MAX_COLS = 64
+
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), 'obesity-inference.sock')
+
+CLIENT_TIMEOUT   = 5.0   # seconds per request
+CLIENT_BACKOFF_S = 5.0   # how long to stay in-process after the server was unreachable
+
+# Order of the nutrition model's input columns (see train_nutrition.py)
+NUTRITION_COLS = ['age', 'gender', 'height', 'weight', 'activity', 'obesity_class']
+
+
+class InferenceUnavailable(Exception):
+    """The inference server could not be reached or could not answer."""
+
+
+class StaleSchema(Exception):
+    """The row was encoded with an older schema; refetch it and encode again."""
+
+
+# ── Framing ───────────────────────────────────────────────────────────────────
+
+def _recv_exact(sock, n):
+    chunks = bytearray()
+    while len(chunks) < n:
+        chunk = sock.recv(n - len(chunks))
+        if not chunk:
+            raise ConnectionError('connection closed mid-frame')
+        chunks.extend(chunk)
+    return bytes(chunks)
+
+
+def encode_rows(X):
+    return np.ascontiguousarray(X, dtype='<f8').tobytes()
+
+
+def decode_rows(payload, rows, cols):
+    return np.frombuffer(payload, dtype='<f8').reshape(rows, cols)
+
+
+def build_schema(bundle, nutrition_bundle=None):
+    """The part of the bundles a client needs to encode inputs and read results."""
+    schema = {
+        'feature_cols': list(bundle['feature_cols']),
+        'feature_encoders': {
+            col: [str(c) for c in encoder.classes_]
+            for col, encoder in bundle['feature_encoders'].items()
+        },
+        'inference_defaults': {
+            k: float(v) for k, v in (bundle.get('inference_defaults') or {}).items()
+        },
+        'class_names': [
+            str(c) for c in bundle['label_encoder'].inverse_transform(bundle['model'].classes_)
+        ],
+        'nutrition_classes': (
+            [str(c) for c in nutrition_bundle['label_encoder'].classes_] if nutrition_bundle else None
+        ),
+        'outlier_bounds': {
+            col: [float(lower), float(upper)] for col, (lower, upper) in (bundle.get('outlier_bounds') or {}).items()
+        },
+        'drift_reference': bundle.get('drift_reference'),
+    }
+    schema['model_version'] = (bundle.get('metadata') or {}).get('model_version', 'legacy')
+    # the tag covers everything the client uses (defaults, caps, drift
+    # reference, model version), so any retrain makes cached schemas stale
+    schema['schema_tag'] = zlib.crc32(json.dumps(schema, sort_keys=True).encode())
+    return schema
+
+
+# ── Server ────────────────────────────────────────────────────────────────────
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Serves frames on one connection until the client hangs up."""
+
+    def handle(self):
+        while True:
+            try:
+                header = _recv_exact(self.request, REQUEST_HEADER.size)
+            except (ConnectionError, OSError):
+                return
+            version, op, rows, cols, tag, length = REQUEST_HEADER.unpack(header)
+            try:
+                payload = _recv_exact(self.request, length)
+            except (ConnectionError, OSError):
+                return
+
+            if version != PROTOCOL_VERSION:
+                status, op, out = STATUS_ERROR, op, f'unsupported protocol version {version}'.encode()
+                out_rows = out_cols = 0
+            else:
+                status, out_rows, out_cols, out = self.server.dispatch(op, rows, cols, tag, payload)
+
+            try:
+                self.request.sendall(RESPONSE_HEADER.pack(status, op, out_rows, out_cols, len(out)) + out)
+            except OSError:
+                return
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Owns the model bundles and answers OP_* frames. One thread per
+    connection; single predict rows go through the MicroBatcher so rows from
+    every web worker share ensemble calls.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path=None, load_bundle=None, load_nutrition=None, batcher=None):
+        from src.predict import load_model, get_batcher, predict_proba_rows
+        from src.nutrition import load_nutrition_model
+
+        self.socket_path = socket_path or DEFAULT_SOCKET_PATH
+        self.load_bundle = load_bundle or load_model
+        self.load_nutrition = load_nutrition or load_nutrition_model
+        self.batcher = batcher if batcher is not None else get_batcher()
+        self.predict_proba_rows = predict_proba_rows
+        self._schema_lock = threading.Lock()
+        self._schema_key = None
+        self._schema = None
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        super().__init__(self.socket_path, _Handler)
+        os.chmod(self.socket_path, 0o660)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def current(self):
+        """(bundle, nutrition_bundle, schema) — schema rebuilt only when a bundle changes."""
+        bundle = self.load_bundle()
+        nutrition = self.load_nutrition()
+        key = (id(bundle), id(nutrition))
+        with self._schema_lock:
+            if key != self._schema_key:
+                self._schema = build_schema(bundle, nutrition)
+                self._schema_key = key
+            return bundle, nutrition, self._schema
+
+    def dispatch(self, op, rows, cols, tag, payload):
+        """Returns (status, rows, cols, payload bytes)."""
+        try:
+            if op == OP_PING:
+                return STATUS_OK, 0, 0, b''
+
+            bundle, nutrition, schema = self.current()
+            if op == OP_SCHEMA:
+                return STATUS_OK, 0, 0, json.dumps(schema).encode()
+
+            if rows > MAX_ROWS or cols > MAX_COLS or len(payload) != rows * cols * 8:
+                return STATUS_ERROR, 0, 0, b'malformed payload'
+            X = decode_rows(payload, rows, cols)
+
+            if op == OP_PREDICT:
+                if tag != schema['schema_tag']:
+                    return STATUS_STALE_SCHEMA, 0, 0, b''
+                if rows == 1 and self.batcher is not None:
+                    probs = self.batcher.submit(bundle, X[0]).result(timeout=CLIENT_TIMEOUT)[None, :]
+                else:
+                    probs = self.predict_proba_rows(bundle, X)
+                return STATUS_OK, probs.shape[0], probs.shape[1], encode_rows(probs)
+
+            if op == OP_NUTRITION:
+                if nutrition is None:
+                    return STATUS_UNAVAILABLE, 0, 0, b'nutrition model not trained'
+                if tag != schema['schema_tag']:
+                    return STATUS_STALE_SCHEMA, 0, 0, b''
+                preds = np.atleast_2d(nutrition['model'].predict(X))
+                return STATUS_OK, preds.shape[0], preds.shape[1], encode_rows(preds)
+
+            if op == OP_EXPLAIN:
+                if tag != schema['schema_tag']:
+                    return STATUS_STALE_SCHEMA, 0, 0, b''
+                from src.explain import explain_row
+                class_label = schema['class_names'][int(X[0, -1])]
+                return STATUS_OK, 0, 0, json.dumps(explain_row(bundle, X[0, :-1], class_label)).encode()
+
+            return STATUS_ERROR, 0, 0, f'unknown op {op}'.encode()
+        except Exception as exc:
+            return STATUS_ERROR, 0, 0, str(exc).encode()
+
+
+# ── Client ────────────────────────────────────────────────────────────────────
+
+class InferenceClient:
+    """Talks to InferenceServer, reusing one socket per thread."""
+
+    def __init__(self, socket_path=None, timeout=CLIENT_TIMEOUT):
+        self.socket_path = socket_path or DEFAULT_SOCKET_PATH
+        self.timeout = timeout
+        self._local = threading.local()
+        self._schema = None
+        self._schema_lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.settimeout(self.timeout)
+            try:
+                conn.connect(self.socket_path)
+            except OSError:
+                conn.close()
+                raise
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            conn.close()
+
+    def close(self):
+        self._drop_connection()
+
+    def call(self, op, X=None, schema_tag=0):
+        """Send one frame and return (status, rows, cols, payload)."""
+        if X is None:
+            rows = cols = 0
+            payload = b''
+        else:
+            X = np.atleast_2d(X)
+            rows, cols = X.shape
+            payload = encode_rows(X)
+        frame = REQUEST_HEADER.pack(PROTOCOL_VERSION, op, rows, cols, schema_tag, len(payload)) + payload
+
+        # A reused connection may have been closed by a server restart: retry once on a fresh one
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.sendall(frame)
+                status, _, out_rows, out_cols, length = RESPONSE_HEADER.unpack(
+                    _recv_exact(conn, RESPONSE_HEADER.size)
+                )
+                return status, out_rows, out_cols, _recv_exact(conn, length)
+            except (OSError, ConnectionError) as exc:
+                self._drop_connection()
+                if attempt == 1:
+                    raise InferenceUnavailable(str(exc)) from exc
+
+    def _check(self, status, payload):
+        if status == STATUS_STALE_SCHEMA:
+            with self._schema_lock:
+                self._schema = None
+            raise StaleSchema()
+        if status != STATUS_OK:
+            raise InferenceUnavailable(payload.decode(errors='replace'))
+
+    def schema(self):
+        with self._schema_lock:
+            if self._schema is None:
+                status, _, _, payload = self.call(OP_SCHEMA)
+                if status != STATUS_OK:
+                    raise InferenceUnavailable(payload.decode(errors='replace'))
+                self._schema = json.loads(payload)
+            return self._schema
+
+    def remote_bundle(self):
+        """A bundle-shaped dict predict.py can encode inputs with; inference goes to the server."""
+        schema = self.schema()
+        return {
+            'client': self,
+            'schema_tag': schema['schema_tag'],
+            'feature_cols': schema['feature_cols'],
+            'feature_encoders': {
+                col: VocabularyEncoder(classes) for col, classes in schema['feature_encoders'].items()
+            },
+            'inference_defaults': schema['inference_defaults'],
+            'class_names': schema['class_names'],
+            'outlier_bounds': schema.get('outlier_bounds') or {},
+            'drift_reference': schema.get('drift_reference'),
+            'metadata': {'model_version': schema.get('model_version', 'legacy')},
+        }
+
+    def predict_proba(self, X, schema_tag):
+        status, rows, cols, payload = self.call(OP_PREDICT, X, schema_tag)
+        self._check(status, payload)
+        return decode_rows(payload, rows, cols)
+
+    def explain(self, feature_row, class_index, schema_tag):
+        """Per-feature attributions for class_index, computed where the trees live."""
+        row = np.append(np.asarray(feature_row, dtype=float), float(class_index))
+        status, _, _, payload = self.call(OP_EXPLAIN, row, schema_tag)
+        self._check(status, payload)
+        return json.loads(payload)
+
+    def nutrition(self, age, gender, height, weight, activity, obesity_class):
+        """
+        [calories, protein, carbs, fat] from the server's nutrition model,
+        or None when the server has no nutrition model.
+        """
+        schema = self.schema()
+        classes = schema.get('nutrition_classes')
+        if classes is None:
+            return None
+        code = classes.index(obesity_class) if obesity_class in classes else classes.index('Normal_Weight')
+        row = [[age, gender, height, weight, activity, code]]
+        status, rows, cols, payload = self.call(OP_NUTRITION, row, schema['schema_tag'])
+        if status == STATUS_UNAVAILABLE:
+            return None
+        self._check(status, payload)
+        return decode_rows(payload, rows, cols)[0]
+
+
+_client = None
+_client_pid = None
+_client_down_until = 0.0
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    The process-wide client when INFERENCE_SOCKET is set and the server was
+    not recently unreachable; otherwise None (callers run in-process).
+    """
+    global _client, _client_pid
+    socket_path = os.getenv('INFERENCE_SOCKET')
+    if not socket_path or time.monotonic() < _client_down_until:
+        return None
+    if _client is None or _client_pid != os.getpid() or _client.socket_path != socket_path:
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid() or _client.socket_path != socket_path:
+                _client, _client_pid = InferenceClient(socket_path), os.getpid()
+    return _client
+
+
+def mark_unavailable():
+    """Skip the server for CLIENT_BACKOFF_S seconds after a failed call."""
+    global _client_down_until
+    _client_down_until = time.monotonic() + CLIENT_BACKOFF_S
+    print(f"⚠️  Inference server unavailable — using in-process models for {CLIENT_BACKOFF_S:.0f}s")
@@ -0,0 +1,380 @@
+"""
+memory.py
+----------
+Memory accounting for a web worker.
+
+Reports:
+  1. Deep size of every bundle component — each ensemble member, the
+     scaler, every feature encoder, the nutrition forest — plus the
+     NUTRITION_PLANS / EXERCISE_PLANS dicts
+  2. RSS / PSS and shared vs private pages of this worker and its sibling
+     workers (children of the same parent, e.g. gunicorn), read from
+     /proc/<pid>/smaps_rollup (Linux only)
+  3. tracemalloc's top allocating source lines during a burst of predictions
+  4. (CLI only) how much RSS each import / load step adds, measured in a
+     fresh interpreter: numpy, pandas, sklearn, unpickling each bundle
+
+Run it:
+    python -m src.memory --burst 200
+The app serves sections 1–2 at /metrics/memory. Section 3 runs synthetic
+predictions with tracemalloc on, which slows every request in the process,
+so it is CLI only.
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import warnings
+import subprocess
+import tracemalloc
+from types import MappingProxyType
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+ROOT_DIR    = os.path.join(os.path.dirname(__file__), '..')
+REPORT_PATH = os.path.join(ROOT_DIR, 'outputs', 'memory_report.json')
+
+SMAPS_FIELDS = ['Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty', 'Swap']
+
+MAX_BURST = 1000
+TOP_ALLOCATORS = 15
+
+
+# ── 1. Deep object sizes ──────────────────────────────────────────────────────
+
+def deep_sizeof(obj, seen=None):
+    """
+    Bytes reachable from obj, each object counted once.
+
+    Extension types that keep their data outside Python objects (sklearn's
+    Cython Tree) are measured through the state they pickle, whose arrays
+    are views of the internal buffers — those count their nbytes.
+    Object arrays are walked item by item.
+    `seen` maps id → object: keeping the objects alive stops the ids of
+    temporary pickled state from being reused mid-walk.
+    """
+    if seen is None:
+        seen = {}
+    if id(obj) in seen:
+        return 0
+    seen[id(obj)] = obj
+
+    if isinstance(obj, np.ndarray):
+        size = sys.getsizeof(obj) if obj.flags.owndata else sys.getsizeof(obj) + obj.nbytes
+        if obj.dtype == object:
+            # the buffer only holds pointers (e.g. GradientBoosting's grid of trees)
+            size += sum(deep_sizeof(item, seen) for item in obj.flat)
+        return size
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return sys.getsizeof(obj)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (dict, MappingProxyType)):
+        for key, value in obj.items():
+            size += deep_sizeof(key, seen) + deep_sizeof(value, seen)
+        return size
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_sizeof(item, seen)
+        return size
+
+    if hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    elif hasattr(obj, '__getstate__'):
+        try:
+            state = obj.__getstate__()
+        except Exception:
+            state = None
+        if isinstance(state, dict):
+            size += sum(deep_sizeof(value, seen) for value in state.values())
+    for slot in getattr(type(obj), '__slots__', ()):
+        if hasattr(obj, slot):
+            size += deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+
+def _kb(nbytes):
+    return round(nbytes / 1024, 1)
+
+
+def bundle_breakdown(bundle):
+    """{component: KB} for an obesity model bundle, members itemised."""
+    report = {}
+    model = bundle['model']
+    members = getattr(model, 'named_estimators_', {})
+
+    seen = {}
+    for name, member in members.items():
+        size = deep_sizeof(member, seen)
+        report[f'model.{name} ({type(member).__name__})'] = _kb(size)
+    # The models passed to VotingClassifier(estimators=...) are kept as well;
+    # if they were fitted before being passed in, this is a full second copy
+    if hasattr(model, 'estimators'):
+        report['model.estimators (constructor argument)'] = _kb(deep_sizeof(model.estimators, seen))
+    report['model (voting overhead)'] = _kb(deep_sizeof(model, seen))
+
+    for key, value in bundle.items():
+        if key == 'model':
+            continue
+        if key == 'feature_encoders':
+            for col, encoder in value.items():
+                report[f'feature_encoders.{col}'] = _kb(deep_sizeof(encoder))
+        else:
+            report[key] = _kb(deep_sizeof(value))
+    report['total'] = _kb(deep_sizeof(bundle))
+    return report
+
+
+def component_sizes():
+    """Deep sizes of every loaded bundle and plan dict, in KB."""
+    from src.nutrition import NUTRITION_PLANS, load_nutrition_model
+    from src.exercise import EXERCISE_PLANS
+    from src.inference_server import get_client
+    from src import predict as predict_module, nutrition as nutrition_module
+
+    report = {
+        'NUTRITION_PLANS': _kb(deep_sizeof(NUTRITION_PLANS)),
+        'EXERCISE_PLANS':  _kb(deep_sizeof(EXERCISE_PLANS)),
+    }
+    # With the inference server up only what this worker already holds is
+    # measured: loading a bundle here would defeat sharing it
+    remote = get_client() is not None
+    if remote:
+        bundle = predict_module._model_bundle
+    else:
+        bundle = predict_module.load_model() if os.path.exists(predict_module.MODEL_PATH) else None
+    if bundle is not None:
+        report['obesity_bundle'] = bundle_breakdown(bundle)
+    nutrition = nutrition_module._nutrition_bundle if remote else load_nutrition_model()
+    if nutrition:
+        report['nutrition_bundle'] = {
+            key: _kb(deep_sizeof(value)) for key, value in nutrition.items()
+        }
+        report['nutrition_bundle']['total'] = _kb(deep_sizeof(nutrition))
+    return report
+
+
+# ── 2. Process memory ─────────────────────────────────────────────────────────
+
+def process_memory(pid='self'):
+    """RSS/PSS and shared/private page totals in KB from smaps_rollup, or None."""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    values = {}
+    for line in lines:
+        name, _, rest = line.partition(':')
+        if name in SMAPS_FIELDS:
+            values[name.lower()] = int(rest.split()[0])
+    values['shared'] = values.get('shared_clean', 0) + values.get('shared_dirty', 0)
+    values['private'] = values.get('private_clean', 0) + values.get('private_dirty', 0)
+    return values
+
+
+def sibling_pids():
+    """PIDs of processes with the same parent and executable as this one (other workers)."""
+    parent, exe = os.getppid(), os.path.realpath(sys.executable)
+    pids = []
+    for entry in os.listdir('/proc') if os.path.isdir('/proc') else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            if ppid == parent and os.path.realpath(f'/proc/{entry}/exe') == exe:
+                pids.append(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+    return sorted(pids)
+
+
+def worker_memory():
+    """Per-worker page accounting for this worker and its siblings."""
+    workers = {}
+    for pid in sibling_pids() or [os.getpid()]:
+        usage = process_memory(pid)
+        if usage is not None:
+            workers[str(pid)] = usage
+    if not workers:
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        workers[str(os.getpid())] = {'max_rss': max_rss}
+    return {'self': os.getpid(), 'workers': workers}
+
+
+# ── 3. Allocations during a prediction burst ─────────────────────────────────
+
+def _sample_inputs(n, seed=7):
+    from src.predict import VALID_PHYSICAL_ACTIVITY
+    rng = random.Random(seed)
+    levels = sorted(VALID_PHYSICAL_ACTIVITY)
+    return [
+        (rng.randint(14, 61), rng.choice(['Male', 'Female']), round(rng.uniform(145, 198), 1),
+         round(rng.uniform(39, 173), 1), rng.choice(levels), rng.choice(['yes', 'no']))
+        for _ in range(n)
+    ]
+
+
+def allocation_burst(n=200, top=TOP_ALLOCATORS):
+    """
+    Run n predictions (with nutrition plans) under tracemalloc and return the
+    source lines that allocated the most memory that was still live, plus the
+    peak traced during the burst.
+    """
+    from src.predict import predict
+    from src.nutrition import get_nutrition_plan
+
+    n = max(1, min(int(n), MAX_BURST))
+    inputs = _sample_inputs(n)
+    predict(*inputs[0])   # load bundles before tracing
+
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(10)
+    gc.collect()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        # Warnings are formatted through linecache, which would dominate the trace
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            for age, gender, height, weight, activity, family in inputs:
+                result = predict(age, gender, height, weight, activity, family)
+                get_nutrition_plan(result['class_label'], user_profile={
+                    'age': age, 'gender': gender, 'height': height, 'weight': weight, 'activity': 1.5,
+                })
+        elapsed = time.perf_counter() - start
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), 'lineno')
+    allocators = [
+        {
+            'where':         str(stat.traceback[0]),
+            'size_diff_kb':  _kb(stat.size_diff),
+            'count_diff':    stat.count_diff,
+            'size_kb':       _kb(stat.size),
+        }
+        for stat in sorted(diff, key=lambda s: abs(s.size_diff), reverse=True)[:top]
+    ]
+    return {
+        'predictions':  n,
+        'seconds':      round(elapsed, 3),
+        'peak_kb':      _kb(peak),
+        'top_allocators': allocators,
+    }
+
+
+# ── 4. RSS added by each import / load step (fresh interpreter) ──────────────
+
+_STEP_SCRIPT = r'''
+import json, os, sys, pickle
+sys.path.insert(0, {root!r})
+def rss():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+steps = [('python', rss())]
+import numpy; steps.append(('import numpy', rss()))
+import pandas; steps.append(('import pandas', rss()))
+import sklearn.ensemble, sklearn.linear_model, sklearn.preprocessing; steps.append(('import sklearn', rss()))
+for label, path in {paths!r}:
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            pickle.load(f)
+        steps.append((label, rss()))
+print(json.dumps(steps))
+'''
+
+
+def import_costs():
+    """[(step, KB added)] measured in a fresh interpreter (Linux only), or None."""
+    from src.predict import MODEL_PATH
+    from src.nutrition import NUTRITION_MODEL_PATH
+    if not os.path.exists('/proc/self/status'):
+        return None
+    script = _STEP_SCRIPT.format(
+        root=os.path.abspath(ROOT_DIR),
+        paths=[('unpickle obesity bundle', os.path.abspath(MODEL_PATH)),
+               ('unpickle nutrition bundle', os.path.abspath(NUTRITION_MODEL_PATH))],
+    )
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    steps = json.loads(output.stdout)
+    return [
+        {'step': label, 'rss_kb': rss, 'added_kb': rss - (steps[i - 1][1] if i else 0)}
+        for i, (label, rss) in enumerate(steps)
+    ]
+
+
+def memory_report(burst=0):
+    """Sections 1–3 as one JSON-ready dict (the /metrics/memory endpoint uses burst=0)."""
+    report = {
+        'components_kb': component_sizes(),
+        'process_kb':    worker_memory(),
+    }
+    if burst:
+        report['allocation_burst'] = allocation_burst(burst)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memory accounting for models and workers.')
+    parser.add_argument('--burst', type=int, default=200, help='predictions to trace (0 to skip)')
+    parser.add_argument('--output', default=REPORT_PATH)
+    args = parser.parse_args(argv)
+
+    print("=" * 55)
+    print("  MEMORY REPORT")
+    print("=" * 55)
+
+    report = memory_report(burst=args.burst)
+    report['import_costs'] = import_costs()
+
+    print("\n  Component sizes (deep, KB):")
+    components = report['components_kb']
+    for name, value in components.items():
+        if isinstance(value, dict):
+            for part, size in value.items():
+                print(f"    {name + '.' + part:<58} {size:>10,.1f}")
+        else:
+            print(f"    {name:<58} {value:>10,.1f}")
+
+    print("\n  Worker pages (KB):")
+    for pid, usage in report['process_kb']['workers'].items():
+        print(f"    pid {pid:<8} " + '  '.join(f"{k}={v:,}" for k, v in usage.items()))
+
+    if report['import_costs']:
+        print("\n  RSS added per step (fresh interpreter, KB):")
+        for step in report['import_costs']:
+            print(f"    {step['step']:<28} +{step['added_kb']:>8,}  (total {step['rss_kb']:,})")
+
+    if 'allocation_burst' in report:
+        burst = report['allocation_burst']
+        print(f"\n  Top allocators over {burst['predictions']} predictions "
+              f"(peak {burst['peak_kb']:,.1f} KB):")
+        for row in burst['top_allocators']:
+            print(f"    {row['size_diff_kb']:>+9,.1f} KB  {row['count_diff']:>+7}  {row['where']}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n  Saved → {os.path.relpath(args.output, ROOT_DIR)}\n")
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+model_zoo.py
+-------------
+The estimators the soft-voting ensemble can be built from.
+
+  rf   Random Forest            bagged deep trees, fitted on all cores
+  et   Extra Trees              random split points: faster to fit than rf
+  lr   Logistic Regression      linear baseline
+  gb   Gradient Boosting        one tree per class per stage, single-threaded
+  hgb  Hist Gradient Boosting   binned features, multithreaded, stops early
+                                when the validation loss stops improving
+
+ENSEMBLE_MEMBERS picks the members (default rf,lr,gb), e.g.
+    ENSEMBLE_MEMBERS=rf,lr,hgb python main.py
+Every member goes through the same training, evaluation, stats, NumPy
+runtime export and explanations. MODEL_ZOO_COMPARE=1 (or
+`python main.py --compare-zoo`) also fits the entries that are not members,
+so the comparison table in model_stats.json covers the whole zoo.
+
+fit_member(..., n_jobs=N) caps the cores a fit may use (joblib workers and
+OpenMP/BLAS threads) without changing the saved estimator's settings; the
+app uses it when /train runs inside a web worker.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from threadpoolctl import threadpool_limits
+from sklearn.ensemble import (
+    ExtraTreesClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier,
+    RandomForestClassifier,
+)
+from sklearn.linear_model import LogisticRegression
+
+# key → display name, estimator class, fixed settings, default hyperparameters
+# (tuned_params.json overrides the defaults) and the models/ file it is saved to
+MODEL_ZOO = {
+    'rf': {
+        'name':      'Random Forest',
+        'estimator': RandomForestClassifier,
+        'fixed':     {'random_state': 42, 'n_jobs': -1},
+        'defaults':  {'n_estimators': 200},
+        'filename':  'random_forest.pkl',
+    },
+    'et': {
+        'name':      'Extra Trees',
+        'estimator': ExtraTreesClassifier,
+        'fixed':     {'random_state': 42, 'n_jobs': -1},
+        'defaults':  {'n_estimators': 300},
+        'filename':  'extra_trees.pkl',
+    },
+    'lr': {
+        'name':      'Logistic Regression',
+        'estimator': LogisticRegression,
+        'fixed':     {'random_state': 42},
+        'defaults':  {'max_iter': 1000},
+        'filename':  'logistic_regression.pkl',
+    },
+    'gb': {
+        'name':      'Gradient Boosting',
+        'estimator': GradientBoostingClassifier,
+        'fixed':     {'random_state': 42},
+        'defaults':  {'n_estimators': 200},
+        'filename':  'gradient_boosting.pkl',
+    },
+    'hgb': {
+        'name':      'Hist Gradient Boosting',
+        'estimator': HistGradientBoostingClassifier,
+        'fixed':     {'random_state': 42, 'early_stopping': True,
+                      'validation_fraction': 0.1, 'n_iter_no_change': 10},
+        'defaults':  {'max_iter': 500, 'learning_rate': 0.1},
+        'filename':  'hist_gradient_boosting.pkl',
+    },
+}
+
+# The members `python -m src.tune` searches over (its weights only apply to them)
+DEFAULT_MEMBERS = ['rf', 'lr', 'gb']
+
+# Single-row predict_proba calls timed per model for the comparison table
+LATENCY_REPEATS = 50
+
+
+def parse_members(value):
+    """Comma-separated zoo keys → list; ValueError for unknown or repeated keys."""
+    members = [key.strip().lower() for key in str(value).split(',') if key.strip()]
+    unknown = [key for key in members if key not in MODEL_ZOO]
+    if unknown or not members or len(set(members)) != len(members):
+        raise ValueError(f"ENSEMBLE_MEMBERS must be distinct keys from {sorted(MODEL_ZOO)}, got {value!r}")
+    return members
+
+
+ENSEMBLE_MEMBERS  = parse_members(os.getenv('ENSEMBLE_MEMBERS', ','.join(DEFAULT_MEMBERS)))
+MODEL_ZOO_COMPARE = os.getenv('MODEL_ZOO_COMPARE', '0').strip().lower() in {'1', 'true', 'yes'}
+
+
+def build_member(key, params=None):
+    """Unfitted estimator for a zoo key (its default hyperparameters unless params are given)."""
+    entry = MODEL_ZOO[key]
+    settings = entry['defaults'] if params is None else params
+    return entry['estimator'](**entry['fixed'], **settings)
+
+
+@contextmanager
+def training_threads(model, n_jobs=None):
+    """
+    Cap a fit at n_jobs cores (None = no cap). The model's own n_jobs is
+    restored afterwards, so the saved estimator keeps its production value.
+    """
+    if not n_jobs:
+        yield model
+        return
+    saved = model.get_params().get('n_jobs', 'absent')
+    if saved != 'absent':
+        model.set_params(n_jobs=n_jobs)
+    try:
+        with threadpool_limits(limits=n_jobs):
+            yield model
+    finally:
+        if saved != 'absent':
+            model.set_params(n_jobs=saved)
+
+
+def fit_member(key, X, y, params=None, n_jobs=None):
+    """(fitted estimator, fit seconds); n_jobs caps the cores used for the fit."""
+    model = build_member(key, params)
+    start = time.perf_counter()
+    with training_threads(model, n_jobs):
+        model.fit(X, y)
+    return model, time.perf_counter() - start
+
+
+def single_row_latency_us(model, X, repeats=LATENCY_REPEATS):
+    """Median wall time of one predict_proba call on a single row (microseconds)."""
+    rows = X[np.arange(repeats) % len(X)]
+    timings = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(rows[i:i + 1])
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1e6)
@@ -1,21 +1,35 @@
 """
 Nutrition plan logic per obesity class.
+
+NUTRITION_PLANS is frozen into a read-only catalogue at import
+(src/plans.py); get_nutrition_plan() returns the shared plan unless the AI
+model personalises it.
 """
 
 import os
 import pickle
 import numpy as np
 
+from src.inference_server import InferenceUnavailable, StaleSchema, get_client, mark_unavailable
+from src.plans import PlanCatalogue
+from src.runtime import RUNTIME_NUTRITION_PATH, numpy_runtime_enabled
+
 # Path to the saved nutrition model bundle
 NUTRITION_MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'models', 'nutrition_model.pkl')
 
 _nutrition_bundle = None
 
 def load_nutrition_model():
-    """Load the local nutrition AI bundle if it exists."""
+    """
+    Load the local nutrition AI bundle if it exists
+    (the NumPy export when MODEL_RUNTIME=numpy and it has been exported).
+    """
     global _nutrition_bundle
     if _nutrition_bundle is None:
-        if os.path.exists(NUTRITION_MODEL_PATH):
+        if numpy_runtime_enabled() and os.path.exists(RUNTIME_NUTRITION_PATH):
+            from src.runtime import load_nutrition_bundle
+            _nutrition_bundle = load_nutrition_bundle(RUNTIME_NUTRITION_PATH)
+        elif os.path.exists(NUTRITION_MODEL_PATH):
             with open(NUTRITION_MODEL_PATH, 'rb') as f:
                 _nutrition_bundle = pickle.load(f)
     return _nutrition_bundle
@@ -274,10 +288,32 @@ NUTRITION_PLANS = {
 }
 
 
+NUTRITION_CATALOGUE = PlanCatalogue(NUTRITION_PLANS, default='Normal_Weight')
+NUTRITION_PLANS = NUTRITION_CATALOGUE.plans
+
+
 def get_nutrition_recommendation(age, gender, height, weight, activity_level, obesity_class):
     """
     Predict calories and macros using the local AI model.
+    Runs on the shared inference server when one is configured (INFERENCE_SOCKET).
     """
+    # 1. Prepare Features
+    gender_val = 1 if gender == 'Male' else 0
+    # Map physical activity (FAF scale 0-3) to the 1.2-1.9 scale used in training
+    activity_map = {0.0: 1.2, 0.75: 1.375, 1.5: 1.55, 2.25: 1.725, 3.0: 1.9}
+    act_val = activity_map.get(activity_level, 1.55)
+
+    # 2. Predict — on the inference server if it is up, else in-process
+    client = get_client()
+    if client is not None:
+        try:
+            preds = client.nutrition(age, gender_val, height, weight, act_val, obesity_class)
+            return _nutrition_result(preds) if preds is not None else None
+        except StaleSchema:
+            pass  # schema refetched on the next call; answer this one in-process
+        except InferenceUnavailable:
+            mark_unavailable()
+
     bundle = load_nutrition_model()
     if not bundle:
         return None
@@ -285,12 +321,6 @@ def get_nutrition_recommendation(age, gender, height, weight, activity_level, ob
     model = bundle['model']
     le = bundle['label_encoder']
     
-    # 1. Prepare Features
-    gender_val = 1 if gender == 'Male' else 0
-    # Map physical activity (FAF scale 0-3) to the 1.2-1.9 scale used in training
-    activity_map = {0.0: 1.2, 0.75: 1.375, 1.5: 1.55, 2.25: 1.725, 3.0: 1.9}
-    act_val = activity_map.get(activity_level, 1.55)
-    
     try:
         class_encoded = le.transform([obesity_class])[0]
     except:
@@ -298,9 +328,12 @@ def get_nutrition_recommendation(age, gender, height, weight, activity_level, ob
         
     features = np.array([[age, gender_val, height, weight, act_val, class_encoded]])
     
-    # 2. Predict
     preds = model.predict(features)[0]
-    
+    return _nutrition_result(preds)
+
+
+def _nutrition_result(preds):
+    """Shape the model's [calories, protein, carbs, fat] output."""
     return {
         'calories': int(preds[0]),
         'protein': float(preds[1]),
@@ -315,9 +348,12 @@ def get_nutrition_plan(obesity_class: str, user_profile: dict = None) -> dict:
     Get the nutrition plan for a given obesity class.
     If user_profile (age, gender, height, weight, activity) is provided, 
     it uses the Local AI model for precise calorie/macro calculation.
+
+    Without AI targets this is the shared read-only plan; with them, a new
+    dict over the same (frozen) meal lists.
     """
-    plan = NUTRITION_PLANS.get(obesity_class, NUTRITION_PLANS['Normal_Weight']).copy()
-    
+    plan = NUTRITION_CATALOGUE.get(obesity_class)
+
     if user_profile:
         ai_rec = get_nutrition_recommendation(
             age=user_profile.get('age'),
@@ -329,6 +365,7 @@ def get_nutrition_plan(obesity_class: str, user_profile: dict = None) -> dict:
         )
         
         if ai_rec:
+            plan = dict(plan)
             plan['daily_calories'] = ai_rec['calories']
             plan['protein_g'] = ai_rec['protein']
             plan['carbs_g'] = ai_rec['carbs']
@@ -0,0 +1,85 @@
+"""
+plans.py
+---------
+Read-only catalogue of the per-class nutrition and exercise plans.
+
+Built once at import time from the plan dicts in src/nutrition.py and
+src/exercise.py. Every class gets:
+  - plan  : the plan deep-frozen (dicts → MappingProxyType, lists → tuples),
+            shared by all requests without copying and safe from accidental
+            mutation
+  - body  : the plan serialized once as JSON bytes (same format as jsonify)
+  - body_gz: body gzipped once
+  - etag  : strong ETag, a hash of body
+  - etag_gz: strong ETag of body_gz (etag + '-gz'; a strong validator
+             belongs to one content-coding)
+
+So /api/exercise answers from prebuilt bytes, and a client that sends back
+the ETag of the variant it got gets a 304 without anything being serialized.
+"""
+
+import gzip
+import hashlib
+import json
+from types import MappingProxyType
+from typing import NamedTuple
+
+
+def freeze(value):
+    """Deep read-only copy: dicts → MappingProxyType, lists/tuples → tuples."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Plain dicts and lists again (for JSON or a caller that needs its own copy)."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+def serialize(plan):
+    """JSON bytes as Flask's jsonify writes them (compact, sorted keys)."""
+    return (json.dumps(thaw(plan), sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+class PlanEntry(NamedTuple):
+    plan:    MappingProxyType
+    body:    bytes
+    body_gz: bytes
+    etag:    str
+    etag_gz: str
+
+
+class PlanCatalogue:
+    """Frozen plans per obesity class, with their JSON bytes and ETags."""
+
+    def __init__(self, plans, default):
+        self.default = default
+        self._entries = {}
+        for key, plan in plans.items():
+            body = serialize(plan)
+            etag = hashlib.sha256(body).hexdigest()[:32]
+            self._entries[key] = PlanEntry(
+                plan=freeze(plan),
+                body=body,
+                body_gz=gzip.compress(body, compresslevel=9, mtime=0),
+                etag=etag,
+                etag_gz=f'{etag}-gz',
+            )
+        self.plans = MappingProxyType({key: entry.plan for key, entry in self._entries.items()})
+
+    def entry(self, key):
+        """The class's entry; the default class's for unknown keys."""
+        return self._entries.get(key) or self._entries[self.default]
+
+    def get(self, key):
+        return self.entry(key).plan
+
+    def keys(self):
+        return list(self._entries)
@@ -8,17 +8,42 @@ The user provides 6 inputs:
 
 The model was trained on 17 features, so we fill the remaining 11
 with sensible default values (dataset averages or most common values).
+
+Concurrent predictions are micro-batched: each request thread puts its
+feature row on a queue, a single batcher thread flushes the queue as ONE
+vectorized predict_proba call (when it holds PREDICT_BATCH_SIZE rows or
+the oldest row has waited PREDICT_BATCH_WAIT_MS), and every caller gets
+its own row back through a future. Set PREDICT_BATCHING=0 to disable.
+
+When INFERENCE_SOCKET points at a running inference server (python serve.py),
+rows are sent there instead and this process never loads the ensemble; if the
+server cannot be reached, inference falls back to the in-process model.
+
+With MODEL_RUNTIME=numpy the in-process model is the NumPy export
+(src/runtime) instead of the sklearn pickle.
 """
 
 import os
+import time
+import queue
 import pickle
+import bisect
+import threading
+from concurrent.futures import Future
+
 import numpy as np
 
+from src.inference_server import InferenceUnavailable, StaleSchema, get_client, mark_unavailable
+from src.drift import drift_report, record_prediction
+from src.runtime import RUNTIME_MODEL_PATH, numpy_runtime_enabled
+
 # Path to the saved model bundle
 MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'models', 'obesity_model.pkl')
 
 # We cache the model so it only loads from disk once
+# (and again only when the file on disk is replaced, e.g. after retraining)
 _model_bundle = None
+_model_mtime = None
 
 MODEL_SCHEMA_VERSION = 1
 REQUIRED_BUNDLE_KEYS = {
@@ -45,6 +70,15 @@ LEGACY_DEFAULTS = {
     'MTRANS': 1.0,
 }
 
+# ── Micro-batching settings ──
+BATCHING_ENABLED = os.getenv('PREDICT_BATCHING', '1').strip().lower() not in {'0', 'false', 'no'}
+BATCH_MAX_SIZE   = int(os.getenv('PREDICT_BATCH_SIZE', '32'))
+BATCH_MAX_WAIT_MS = float(os.getenv('PREDICT_BATCH_WAIT_MS', '2'))
+BATCH_RESULT_TIMEOUT = 30.0   # seconds a caller waits for its row before giving up
+
+BATCH_SIZE_BUCKETS   = [1, 2, 4, 8, 16, 32, 64, 128]
+QUEUE_WAIT_BUCKETS_MS = [0.1, 0.5, 1, 2, 5, 10, 25, 50, 100]
+
 ADVANCED_REQUIRED_FIELDS = {
     'age', 'gender', 'height', 'weight', 'family_history', 'physical_activity',
     'favc', 'fcvc', 'ncp', 'caec', 'smoke', 'ch2o', 'scc', 'tue', 'calc', 'mtrans'
@@ -94,7 +128,18 @@ def validate_model_bundle(bundle):
 
 
 def get_model_health():
-    """Check model artifact availability and integrity for app-level health checks."""
+    """
+    Check model artifact availability and integrity for app-level health checks.
+    With a reachable inference server its schema is enough: the worker does
+    not load the model just to report on it.
+    """
+    client = get_client()
+    if client is not None:
+        try:
+            client.schema()
+            return True, 'Model served by the inference server.'
+        except InferenceUnavailable:
+            mark_unavailable()
     if not os.path.exists(MODEL_PATH):
         return False, 'Model artifact not found.'
     try:
@@ -105,16 +150,65 @@ def get_model_health():
         return False, f'Model artifact validation failed: {exc}'
 
 
+def _model_source():
+    """(path, loader) of the bundle this process should use."""
+    if numpy_runtime_enabled():
+        if os.path.exists(RUNTIME_MODEL_PATH):
+            from src.runtime import load_bundle
+            return RUNTIME_MODEL_PATH, load_bundle
+        print("⚠️  MODEL_RUNTIME=numpy but models/obesity_runtime.npz is missing — "
+              "loading the pickle (run python -m src.runtime.export)")
+
+    def load_pickle(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    return MODEL_PATH, load_pickle
+
+
 def load_model():
-    """Load the model from disk (only once, then cache it in memory)."""
-    global _model_bundle
-    if _model_bundle is None:
-        with open(MODEL_PATH, 'rb') as f:
-            _model_bundle = pickle.load(f)
-        validate_model_bundle(_model_bundle)
+    """
+    Load the model from disk (only once, then cache it in memory).
+    The cached bundle is reloaded when the file's modification time changes.
+    """
+    global _model_bundle, _model_mtime
+    path, loader = _model_source()
+    key = (path, os.path.getmtime(path))
+    if _model_bundle is None or key != _model_mtime:
+        bundle = loader(path)
+        validate_model_bundle(bundle)
+        _model_bundle, _model_mtime = bundle, key
     return _model_bundle
 
 
+def _inference_bundle():
+    """
+    The bundle to encode inputs with: the inference server's schema when the
+    server is reachable, otherwise the in-process model.
+    """
+    client = get_client()
+    if client is not None:
+        try:
+            return client.remote_bundle()
+        except InferenceUnavailable:
+            mark_unavailable()
+    return load_model()
+
+
+def get_model_version():
+    """Model version from the bundle metadata, or None if no valid model is available."""
+    client = get_client()
+    if client is not None:
+        try:
+            return client.schema().get('model_version', 'legacy')
+        except InferenceUnavailable:
+            mark_unavailable()
+    try:
+        bundle = load_model()
+    except Exception:
+        return None
+    return (bundle.get('metadata') or {}).get('model_version', 'legacy')
+
+
 def _normalize_text(value):
     return str(value).strip().lower().replace(' ', '_')
 
@@ -136,39 +230,308 @@ def _encode_categorical(feature_encoders, column_name, raw_value):
     raise ValueError(f"Invalid value for {column_name}: '{raw_value}'. Allowed values: {allowed}")
 
 
-def _run_prediction(bundle, all_features, bmi):
-    """Run model prediction from a fully prepared feature dictionary."""
-    model = bundle['model']
-    scaler = bundle['scaler']
-    target_encoder = bundle['label_encoder']
-    feature_cols = bundle['feature_cols']
+def cap_features(bundle, X):
+    """
+    Raw feature row(s) clipped to the bundle's outlier caps (the IQR bounds
+    fitted in preprocessing), with BMI recomputed from the capped Weight and
+    Height as in training. Returns a new array; no caps, no change.
+    """
+    X = np.array(X, dtype=float)
+    bounds = bundle.get('outlier_bounds')
+    if not bounds:
+        return X
+    cols = list(bundle['feature_cols'])
+    capped = [col for col in bounds if col in cols]
+    index = [cols.index(col) for col in capped]
+    lower = np.array([bounds[col][0] for col in capped])
+    upper = np.array([bounds[col][1] for col in capped])
+    X[..., index] = np.clip(X[..., index], lower, upper)
+    if {'BMI', 'Weight', 'Height'} <= set(cols):
+        X[..., cols.index('BMI')] = X[..., cols.index('Weight')] / X[..., cols.index('Height')] ** 2
+    return X
+
+
+# ── Micro-batching executor ───────────────────────────────────────────────────
+
+class Histogram:
+    """Fixed-bucket histogram; counts[i] holds values <= bounds[i], the last slot the overflow."""
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.total += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f'<={b}' for b in self.bounds] + [f'>{self.bounds[-1]}']
+            return {
+                'buckets': dict(zip(labels, self.counts)),
+                'count': self.total,
+                'mean': round(self.sum / self.total, 3) if self.total else 0.0,
+            }
+
+
+def predict_proba_rows(bundle, X):
+    """Ensemble class probabilities for raw (unscaled) feature rows."""
+    return bundle['model'].predict_proba(bundle['scaler'].transform(X))
+
+
+class MicroBatcher:
+    """
+    Collects single feature rows from concurrent callers and runs them through
+    the ensemble in one predict_proba call.
 
-    feature_row = [all_features.get(col, 0.0) for col in feature_cols]
-    X = np.array(feature_row).reshape(1, -1)
-    X_scaled = scaler.transform(X)
+    A batch is flushed when it holds max_batch_size rows or when its oldest
+    row has waited max_wait_ms. Rows are grouped by bundle so a model reload
+    in the middle of a batch never mixes two models in one call.
+    """
 
-    predicted_class_number = model.predict(X_scaled)[0]
-    class_probabilities = model.predict_proba(X_scaled)[0]
+    def __init__(self, predict_fn=predict_proba_rows, max_batch_size=BATCH_MAX_SIZE,
+                 max_wait_ms=BATCH_MAX_WAIT_MS):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='predict-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, bundle, row):
+        """Queue one feature row; the returned future resolves to its probability row."""
+        future = Future()
+        self._queue.put((bundle, np.asarray(row, dtype=float), future, time.perf_counter()))
+        return future
+
+    def _collect(self):
+        """Block for the first row, then gather more until the batch is full or due."""
+        batch = [self._queue.get()]
+        deadline = batch[0][3] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            self.batch_sizes.observe(len(batch))
+            for *_, enqueued in batch:
+                self.queue_wait_ms.observe((started - enqueued) * 1000)
+
+            groups = {}
+            for item in batch:
+                groups.setdefault(id(item[0]), []).append(item)
+            for items in groups.values():
+                try:
+                    probs = self.predict_fn(items[0][0], np.vstack([item[1] for item in items]))
+                except Exception as exc:
+                    for item in items:
+                        item[2].set_exception(exc)
+                    continue
+                for item, row in zip(items, probs):
+                    item[2].set_result(row)
+
+    def stats(self):
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'queued': self._queue.qsize(),
+            'batch_size': self.batch_sizes.snapshot(),
+            'queue_wait_ms': self.queue_wait_ms.snapshot(),
+        }
+
+
+_batcher = None
+_batcher_pid = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher():
+    """
+    The process-wide batcher, or None when batching is disabled.
+    Recreated after a fork, since the batcher thread does not survive it.
+    """
+    global _batcher, _batcher_pid
+    if not BATCHING_ENABLED:
+        return None
+    if _batcher is None or _batcher_pid != os.getpid():
+        with _batcher_lock:
+            if _batcher is None or _batcher_pid != os.getpid():
+                _batcher, _batcher_pid = MicroBatcher(), os.getpid()
+    return _batcher
+
+
+def get_batching_stats():
+    """Batch-size and queue-wait histograms (for the /metrics/batching endpoint)."""
+    if not BATCHING_ENABLED:
+        return {'enabled': False}
+    return {'enabled': True, **get_batcher().stats()}
+
+
+def get_drift_report():
+    """Input drift of the live predictions (for the /drift endpoint)."""
+    return drift_report(_inference_bundle())
+
+
+def _predict_row(bundle, feature_row):
+    """
+    Class probabilities and class names for one raw feature row — from the
+    inference server for a remote bundle, otherwise micro-batched in-process.
+    """
+    client = bundle.get('client')
+    if client is not None:
+        try:
+            return client.predict_proba(feature_row, bundle['schema_tag'])[0], bundle['class_names']
+        except InferenceUnavailable:
+            mark_unavailable()
+            bundle = load_model()
 
-    class_label = target_encoder.inverse_transform([predicted_class_number])[0]
+    batcher = get_batcher()
+    if batcher is not None:
+        class_probabilities = batcher.submit(bundle, feature_row).result(timeout=BATCH_RESULT_TIMEOUT)
+    else:
+        class_probabilities = predict_proba_rows(bundle, feature_row.reshape(1, -1))[0]
+
+    class_names = bundle['label_encoder'].inverse_transform(bundle['model'].classes_)
+    return class_probabilities, class_names
+
+
+_runtime_view = {'bundle': None, 'model': None}
+_runtime_view_lock = threading.Lock()
+
+
+def get_runtime_model(bundle):
+    """
+    NumPy runtime copy of the bundle's ensemble, converted once per loaded
+    model and shared by the batched sweeps and the explainer.
+    """
+    from src.runtime.export import to_runtime_model
+    with _runtime_view_lock:
+        if _runtime_view['bundle'] is not bundle:
+            _runtime_view['model'] = to_runtime_model(bundle['model'])
+            _runtime_view['bundle'] = bundle
+        return _runtime_view['model']
+
+
+def predict_proba_batch(bundle, X):
+    """
+    Class probabilities and class names for a matrix of raw feature rows in
+    one call (no micro-batching: the caller already has a batch). Local
+    bundles run on the runtime copy of the model, which avoids sklearn's
+    fixed per-call cost. Rows are capped like training data (cap_features).
+    """
+    X = cap_features(bundle, X)
+    client = bundle.get('client')
+    if client is not None:
+        try:
+            return client.predict_proba(X, bundle['schema_tag']), bundle['class_names']
+        except InferenceUnavailable:
+            mark_unavailable()
+            bundle = load_model()
+
+    class_names = bundle['label_encoder'].inverse_transform(bundle['model'].classes_)
+    return get_runtime_model(bundle).predict_proba(bundle['scaler'].transform(X)), class_names
+
+
+def _run_prediction(bundle, all_features, bmi, explain=False, weight_target=None, imputed=False,
+                    record=False):
+    """
+    Run model prediction from a fully prepared feature dictionary.
+    imputed=True marks rows whose lifestyle features came from inference_defaults.
+    record=True counts the row into the drift sketch (src/drift.py); only the
+    prediction routes set it, so benchmarks and internal callers stay out of it.
+    The row is capped to the training outlier bounds; result['bmi'] stays the user's own.
+    """
+    raw_row = np.array([all_features.get(col, 0.0) for col in bundle['feature_cols']], dtype=float)
+    feature_row = cap_features(bundle, raw_row)
+
+    # Soft voting predicts the class with the highest averaged probability,
+    # so one predict_proba call gives both the label and the confidences
+    class_probabilities, class_names = _predict_row(bundle, feature_row)
+    class_index = int(np.argmax(class_probabilities))
+    class_label = class_names[class_index]
     confidence = float(np.max(class_probabilities)) * 100
+    if record:
+        record_prediction(bundle, feature_row, class_index, imputed)
 
-    all_class_names = target_encoder.inverse_transform(range(len(class_probabilities)))
     all_probs = {
-        cls: round(float(prob) * 100, 1)
-        for cls, prob in zip(all_class_names, class_probabilities)
+        str(cls): round(float(prob) * 100, 1)
+        for cls, prob in zip(class_names, class_probabilities)
     }
 
-    return {
-        'class_label': class_label,
+    result = {
+        'class_label': str(class_label),
         'confidence': round(confidence, 1),
         'bmi': round(float(bmi), 1),
         'all_probs': all_probs,
+        'model_version': (bundle.get('metadata') or {}).get('model_version', 'legacy'),
         'status': 'success'
     }
 
+    if explain:
+        result['explanation'] = _explain_row(bundle, feature_row, class_index, str(class_label))
 
-def predict(age, gender, height_cm, weight_kg, physical_activity, family_history):
+    if weight_target:
+        from src.target_weight import solve_target_weight
+        result['weight_target'] = solve_target_weight(
+            raw_row, bundle['feature_cols'], lambda X: predict_proba_batch(bundle, X), weight_target)
+
+    return result
+
+
+def _explain_row(bundle, feature_row, class_index, class_label):
+    """
+    Attributions need the trees themselves: a remote bundle asks the
+    inference server, and only loads the local model once it is unavailable.
+    """
+    from src.explain import explain_row
+    client = bundle.get('client')
+    if client is not None:
+        try:
+            return client.explain(feature_row, class_index, bundle['schema_tag'])
+        except InferenceUnavailable:
+            mark_unavailable()
+        bundle = load_model()
+    return explain_row(bundle, feature_row, class_label)
+
+
+def _retry_stale_schema(run, *args, **kwargs):
+    """
+    Call run(), which encodes the inputs with the current schema and predicts.
+    When the server was retrained on new categories (StaleSchema) run it once
+    more with the refetched schema. Stale again means the server is still
+    swapping bundles: back off to the local model for a while and raise
+    InferenceUnavailable instead of retrying without end.
+    """
+    try:
+        return run(*args, **kwargs)
+    except StaleSchema:
+        pass
+    try:
+        return run(*args, **kwargs)
+    except StaleSchema as e:
+        mark_unavailable()
+        raise InferenceUnavailable('inference server schema changed again during the retry') from e
+
+
+def predict(age, gender, height_cm, weight_kg, physical_activity, family_history, explain=False,
+            weight_target=None, record=False):
     """
     Predict the obesity class for a user based on their 6 inputs.
 
@@ -179,6 +542,11 @@ def predict(age, gender, height_cm, weight_kg, physical_activity, family_history
         weight_kg        : float — e.g. 80.0
         physical_activity: str   — 'Sedentary', 'Light', 'Moderate', 'Active', 'Very Active'
         family_history   : str   — 'Yes' or 'No'
+        explain          : bool  — also return per-feature attributions
+        weight_target    : str   — also solve for the weight at which this
+                                   class is predicted (e.g. 'Normal_Weight')
+        record           : bool  — count this request in the drift monitor
+                                   (served traffic only)
 
     Returns:
         dict with:
@@ -186,8 +554,16 @@ def predict(age, gender, height_cm, weight_kg, physical_activity, family_history
             confidence  — how sure the model is (e.g. 94.5%)
             bmi         — calculated BMI value
             all_probs   — probability for each of the 7 classes
+            explanation — (explain=True) see src/explain.py
+            weight_target — (weight_target set) see src/target_weight.py
     """
+    return _retry_stale_schema(_predict_basic, age, gender, height_cm, weight_kg, physical_activity,
+                               family_history, explain=explain, weight_target=weight_target, record=record)
+
 
+def _predict_basic(age, gender, height_cm, weight_kg, physical_activity, family_history, explain=False,
+                   weight_target=None, record=False):
+    """predict() for the current schema; raises StaleSchema when the server's has moved on."""
     normalized = validate_inputs(
         age=age,
         gender=gender,
@@ -204,7 +580,7 @@ def predict(age, gender, height_cm, weight_kg, physical_activity, family_history
     physical_activity = normalized['physical_activity']
     family_history = normalized['family_history']
 
-    bundle = load_model()
+    bundle = _inference_bundle()
 
     feature_encoders = bundle['feature_encoders']
 
@@ -247,14 +623,22 @@ def predict(age, gender, height_cm, weight_kg, physical_activity, family_history
         **defaults
     }
 
-    return _run_prediction(bundle, all_features, bmi)
+    return _run_prediction(bundle, all_features, bmi, explain=explain, weight_target=weight_target,
+                           imputed=True, record=record)
 
 
-def predict_advanced(form_data):
+def predict_advanced(form_data, explain=False, weight_target=None, record=False):
     """
     Predict using full user-provided feature set (all model input features).
     Expects form_data keys matching ADVANCED_REQUIRED_FIELDS.
+    explain / weight_target / record work as in predict().
     """
+    return _retry_stale_schema(_predict_advanced, form_data, explain=explain, weight_target=weight_target,
+                               record=record)
+
+
+def _predict_advanced(form_data, explain=False, weight_target=None, record=False):
+    """predict_advanced() for the current schema; raises StaleSchema when the server's has moved on."""
     missing_fields = [k for k in ADVANCED_REQUIRED_FIELDS if k not in form_data]
     if missing_fields:
         raise ValueError(f"Missing required fields: {', '.join(sorted(missing_fields))}")
@@ -269,7 +653,7 @@ def predict_advanced(form_data):
         family_history=form_data['family_history'],
     )
 
-    bundle = load_model()
+    bundle = _inference_bundle()
     feature_encoders = bundle['feature_encoders']
 
     height_m = shared['height_cm'] / 100.0
@@ -316,4 +700,5 @@ def predict_advanced(form_data):
         'BMI': float(bmi),
     }
 
-    return _run_prediction(bundle, all_features, bmi)
+    return _run_prediction(bundle, all_features, bmi, explain=explain, weight_target=weight_target,
+                           record=record)
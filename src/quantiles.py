@@ -0,0 +1,109 @@
+"""
+quantiles.py
+-------------
+KLL quantile sketch: approximate quantiles of a stream in bounded memory.
+
+The sketch keeps a stack of "compactors". Level h holds items that each
+stand for 2^h original values. When a level grows past its capacity it is
+sorted and every other item (random offset) moves up one level, so memory
+stays around 3·k items however many values are added. Two sketches merge
+by concatenating their levels, so per-chunk sketches can be combined.
+
+Normalized rank error (|estimated rank - true rank| / n) is about
+2.3 / k^0.97 with high probability — ~1.3% for the default k=200 — and
+zero while nothing has been compacted (small inputs are answered exactly,
+with the same linear interpolation as pandas).
+
+Used by handle_outliers() in src/data_preprocessing.py for the IQR caps.
+"""
+
+import numpy as np
+
+DEFAULT_K = 200
+_CAPACITY_DECAY = 2.0 / 3.0
+
+
+def rank_error_bound(k=DEFAULT_K):
+    """A-priori normalized rank error of a compacted sketch with parameter k."""
+    return 2.296 / k ** 0.9723
+
+
+class KLLSketch:
+    """Mergeable streaming quantile sketch over float values."""
+
+    def __init__(self, k=DEFAULT_K, seed=0):
+        self.k = int(k)
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * _CAPACITY_DECAY ** depth)))
+
+    def update(self, values):
+        """Add a batch of values (NaNs are ignored)."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return self
+        self.n += values.size
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                keep = items.size % 2            # an odd item out stays at this level
+                promoted = items[keep:][self._rng.integers(2)::2]
+                self.levels[level] = items[:keep]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    @property
+    def exact(self):
+        """True while every value is still held individually."""
+        return len(self.levels) == 1
+
+    def rank_error(self):
+        """A-priori normalized rank error bound (0 while exact)."""
+        return 0.0 if self.exact else rank_error_bound(self.k)
+
+    def quantiles(self, qs):
+        """Estimated values at the quantiles qs (0..1)."""
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if not self.n:
+            return np.full(qs.shape, np.nan)
+        if self.exact:
+            return np.quantile(self.levels[0], qs)
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(level.size, 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items, cumulative = items[order], np.cumsum(weights[order])
+        # the item whose weight range covers the 0-based target rank q·(n-1)
+        ranks = qs * (cumulative[-1] - 1)
+        return items[np.minimum(np.searchsorted(cumulative, ranks, side='right'), items.size - 1)]
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def size(self):
+        """Items currently stored (the memory footprint in values)."""
+        return int(sum(level.size for level in self.levels))
@@ -0,0 +1,114 @@
+"""
+runtime
+--------
+sklearn-free inference for the obesity ensemble and the nutrition model.
+
+Training exports the fitted models to plain NumPy arrays
+(models/obesity_runtime.npz, models/nutrition_runtime.npz). Loading those
+needs only NumPy — no pandas, scikit-learn or scipy imports and no
+unpickling — which cuts worker cold-start time and memory.
+
+Enable it with MODEL_RUNTIME=numpy; predict.py and nutrition.py then load
+the .npz files instead of the pickles (falling back to the pickles if the
+exports are missing). Export existing pickles with:
+    python -m src.runtime.export
+"""
+
+import os
+import json
+
+import numpy as np
+
+from src.runtime.models import (
+    VocabularyEncoder, Standardizer, ForestClassifier, GradientBoostingClassifier,
+    LogisticModel, SoftVotingEnsemble, ForestRegressor,
+)
+from src.runtime.trees import PackedTrees
+
+MODEL_DIR              = os.path.join(os.path.dirname(__file__), '..', '..', 'models')
+RUNTIME_MODEL_PATH     = os.path.join(MODEL_DIR, 'obesity_runtime.npz')
+RUNTIME_NUTRITION_PATH = os.path.join(MODEL_DIR, 'nutrition_runtime.npz')
+
+FORMAT_VERSION = 1
+META_KEY = '__meta__'
+
+
+def numpy_runtime_enabled():
+    """True when MODEL_RUNTIME=numpy is set for this process."""
+    return os.getenv('MODEL_RUNTIME', 'sklearn').strip().lower() == 'numpy'
+
+
+# ── File format: named arrays + one JSON metadata blob ───────────────────────
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f'Not JSON serializable: {type(value).__name__}')
+
+
+def write_npz(path, arrays, meta):
+    """Write arrays + metadata atomically (readers never see a half-written file)."""
+    meta = {'format_version': FORMAT_VERSION, **meta}
+    blob = np.frombuffer(json.dumps(meta, default=_json_default).encode('utf-8'), dtype=np.uint8)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **{META_KEY: blob}, **arrays)
+    os.replace(tmp_path, path)
+
+
+def read_npz(path):
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    meta = json.loads(arrays.pop(META_KEY).tobytes().decode('utf-8'))
+    if meta.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported runtime format {meta.get('format_version')}; "
+                         f"expected {FORMAT_VERSION}. Re-run python -m src.runtime.export")
+    return arrays, meta
+
+
+# ── Loaders ───────────────────────────────────────────────────────────────────
+
+def load_member(spec, arrays):
+    """Rebuild one ensemble member from its metadata spec and arrays."""
+    kind, prefix = spec['type'], spec['name']
+    classes = np.asarray(spec['classes'])
+    if kind == 'forest_classifier':
+        return ForestClassifier(PackedTrees.from_arrays(arrays, prefix), classes)
+    if kind == 'gradient_boosting':
+        trees = PackedTrees.from_arrays(arrays, prefix, spec.get('split_dtype', 'float32'))
+        return GradientBoostingClassifier(trees, arrays[f'{prefix}.init_raw'], spec['learning_rate'], classes)
+    if kind == 'logistic':
+        return LogisticModel(arrays[f'{prefix}.coef'], arrays[f'{prefix}.intercept'], classes,
+                             spec.get('multi_class', 'multinomial'))
+    raise ValueError(f'Unknown runtime member type: {kind}')
+
+
+def load_bundle(path=None):
+    """Load an exported obesity bundle; same keys as the pickled one."""
+    arrays, meta = read_npz(path or RUNTIME_MODEL_PATH)
+    members = [(spec['name'], load_member(spec, arrays)) for spec in meta['members']]
+    return {
+        'model':              SoftVotingEnsemble(members, meta['weights'], np.asarray(meta['classes'])),
+        'scaler':             Standardizer(arrays['scaler.mean'], arrays['scaler.scale']),
+        'label_encoder':      VocabularyEncoder(meta['label_classes']),
+        'feature_encoders':   {col: VocabularyEncoder(classes)
+                               for col, classes in meta['feature_encoders'].items()},
+        'feature_cols':       meta['feature_cols'],
+        'inference_defaults': meta['inference_defaults'],
+        'outlier_bounds':     {col: tuple(b) for col, b in meta['outlier_bounds'].items()},
+        'metadata':           meta['metadata'],
+        'stats':              meta.get('stats'),
+        'drift_reference':    meta.get('drift_reference'),
+    }
+
+
+def load_nutrition_bundle(path=None):
+    """Load an exported nutrition bundle; same keys as nutrition_model.pkl."""
+    arrays, meta = read_npz(path or RUNTIME_NUTRITION_PATH)
+    return {
+        'model':         ForestRegressor(PackedTrees.from_arrays(arrays, 'model')),
+        'label_encoder': VocabularyEncoder(meta['label_classes']),
+        'features':      meta['features'],
+    }
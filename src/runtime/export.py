@@ -0,0 +1,196 @@
+"""
+export.py
+----------
+Convert the pickled sklearn bundles into the NumPy runtime format.
+
+Called automatically at the end of training; run it by hand to export
+models trained before the runtime existed:
+    python -m src.runtime.export
+"""
+
+import os
+import sys
+import pickle
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.runtime import RUNTIME_MODEL_PATH, RUNTIME_NUTRITION_PATH, MODEL_DIR, load_member, write_npz
+from src.runtime.models import SoftVotingEnsemble
+from src.runtime.trees import PackedTrees
+
+FOREST_CLASSIFIERS = {'RandomForestClassifier', 'ExtraTreesClassifier'}
+
+
+def pack_trees(trees, value_of):
+    """
+    Flatten sklearn Tree objects into one PackedTrees. value_of(tree) returns
+    the (node_count, n_outputs) leaf values to store for that tree.
+    """
+    left, right, feature, threshold, value, roots, cover = [], [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        children_left = tree.children_left.astype(np.int32)
+        children_right = tree.children_right.astype(np.int32)
+        left.append(np.where(children_left >= 0, children_left + offset, -1))
+        right.append(np.where(children_right >= 0, children_right + offset, -1))
+        feature.append(tree.feature.astype(np.int32))
+        threshold.append(tree.threshold.astype(np.float64))
+        value.append(np.asarray(value_of(tree), dtype=np.float64))
+        cover.append(tree.weighted_n_node_samples.astype(np.float64))
+        roots.append(offset)
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+    return PackedTrees(
+        np.concatenate(left).astype(np.int32), np.concatenate(right).astype(np.int32),
+        np.concatenate(feature), np.concatenate(threshold), np.concatenate(value),
+        np.array(roots, dtype=np.int32), max_depth, cover=np.concatenate(cover),
+    )
+
+
+def _hist_tree(predictor):
+    """A HistGradientBoosting TreePredictor in the attribute layout pack_trees reads."""
+    nodes = predictor.nodes
+    if nodes['is_categorical'].any():
+        raise ValueError('HistGradientBoosting trees with categorical splits have no NumPy runtime')
+    leaf = nodes['is_leaf'].astype(bool)
+    return SimpleNamespace(
+        children_left=np.where(leaf, -1, nodes['left']),
+        children_right=np.where(leaf, -1, nodes['right']),
+        feature=np.where(leaf, -2, nodes['feature_idx']),
+        threshold=np.where(leaf, -2.0, nodes['num_threshold']),
+        value=nodes['value'][:, None],
+        weighted_n_node_samples=nodes['count'],
+        node_count=len(nodes),
+        max_depth=int(nodes['depth'].max()),
+    )
+
+
+def _class_fractions(tree):
+    counts = tree.value[:, 0, :]
+    totals = counts.sum(axis=1, keepdims=True)
+    return counts / np.where(totals == 0, 1.0, totals)
+
+
+def export_member(name, estimator):
+    """(spec for the metadata, arrays) for one ensemble member."""
+    kind = type(estimator).__name__
+    spec = {'name': name, 'classes': estimator.classes_.tolist()}
+
+    if kind in FOREST_CLASSIFIERS:
+        trees = pack_trees([est.tree_ for est in estimator.estimators_], _class_fractions)
+        return {**spec, 'type': 'forest_classifier'}, trees.to_arrays(name)
+
+    if kind == 'GradientBoostingClassifier':
+        trees = pack_trees([est.tree_ for est in estimator.estimators_.ravel()],
+                           lambda tree: tree.value[:, 0, :])
+        init_raw = estimator._raw_predict_init(np.zeros((1, estimator.n_features_in_)))[0]
+        arrays = {**trees.to_arrays(name), f'{name}.init_raw': np.asarray(init_raw, dtype=np.float64)}
+        return {**spec, 'type': 'gradient_boosting', 'learning_rate': estimator.learning_rate}, arrays
+
+    if kind == 'HistGradientBoostingClassifier':
+        # Same layout as GradientBoosting: one tree per class per iteration on
+        # top of the baseline, leaf values already scaled by the learning rate.
+        # HGB thresholds are float64 and compared against float64 inputs
+        trees = pack_trees([_hist_tree(p) for stage in estimator._predictors for p in stage],
+                           lambda tree: tree.value)
+        init_raw = np.asarray(estimator._baseline_prediction, dtype=np.float64).ravel()
+        arrays = {**trees.to_arrays(name), f'{name}.init_raw': init_raw}
+        return {**spec, 'type': 'gradient_boosting', 'learning_rate': 1.0,
+                'split_dtype': 'float64'}, arrays
+
+    if kind == 'LogisticRegression':
+        multi_class = 'ovr' if getattr(estimator, 'multi_class', None) == 'ovr' else 'multinomial'
+        arrays = {f'{name}.coef': estimator.coef_.astype(np.float64),
+                  f'{name}.intercept': estimator.intercept_.astype(np.float64)}
+        return {**spec, 'type': 'logistic', 'multi_class': multi_class}, arrays
+
+    raise ValueError(f"No NumPy runtime implementation for ensemble member '{name}' ({kind})")
+
+
+def to_runtime_model(model):
+    """
+    In-memory NumPy runtime copy of a fitted soft-voting ensemble (returned
+    as is when it already is one). Same probabilities, much lower per-call
+    overhead than sklearn for batched sweeps.
+    """
+    if isinstance(model, SoftVotingEnsemble):
+        return model
+    members = []
+    for name, estimator in model.named_estimators_.items():
+        spec, arrays = export_member(name, estimator)
+        members.append((name, load_member(spec, arrays)))
+    weights = list(model.weights) if model.weights is not None else None
+    return SoftVotingEnsemble(members, weights, np.asarray(model.classes_))
+
+
+def export_bundle(bundle, path=None):
+    """Write the obesity bundle (soft-voting ensemble + preprocessing) as .npz."""
+    model = bundle['model']
+    if getattr(model, 'voting', 'soft') != 'soft':
+        raise ValueError('Only soft-voting ensembles can be exported')
+
+    members, arrays = [], {}
+    for name, estimator in model.named_estimators_.items():
+        spec, member_arrays = export_member(name, estimator)
+        members.append(spec)
+        arrays.update(member_arrays)
+
+    scaler = bundle['scaler']
+    n_features = len(bundle['feature_cols'])
+    arrays['scaler.mean'] = np.asarray(scaler.mean_ if scaler.with_mean else np.zeros(n_features), dtype=np.float64)
+    arrays['scaler.scale'] = np.asarray(scaler.scale_ if scaler.with_std else np.ones(n_features), dtype=np.float64)
+
+    meta = {
+        'members':            members,
+        'weights':            list(model.weights) if model.weights is not None else None,
+        'classes':            model.classes_.tolist(),
+        'label_classes':      [str(c) for c in bundle['label_encoder'].classes_],
+        'feature_encoders':   {col: [str(c) for c in encoder.classes_]
+                               for col, encoder in bundle['feature_encoders'].items()},
+        'feature_cols':       list(bundle['feature_cols']),
+        'inference_defaults': bundle.get('inference_defaults') or {},
+        'outlier_bounds':     bundle.get('outlier_bounds') or {},
+        'metadata':           bundle.get('metadata') or {},
+        'stats':              bundle.get('stats'),
+        'drift_reference':    bundle.get('drift_reference'),
+    }
+    write_npz(path or RUNTIME_MODEL_PATH, arrays, meta)
+
+
+def export_nutrition_bundle(bundle, path=None):
+    """Write the nutrition RandomForestRegressor bundle as .npz."""
+    trees = pack_trees([est.tree_ for est in bundle['model'].estimators_],
+                       lambda tree: tree.value[:, :, 0])
+    meta = {
+        'label_classes': [str(c) for c in bundle['label_encoder'].classes_],
+        'features':      list(bundle['features']),
+    }
+    write_npz(path or RUNTIME_NUTRITION_PATH, trees.to_arrays('model'), meta)
+
+
+def main():
+    print("=" * 55)
+    print("  EXPORT NUMPY RUNTIME MODELS")
+    print("=" * 55)
+    jobs = [
+        ('obesity_model.pkl', export_bundle, RUNTIME_MODEL_PATH),
+        ('nutrition_model.pkl', export_nutrition_bundle, RUNTIME_NUTRITION_PATH),
+    ]
+    for filename, export, out_path in jobs:
+        src_path = os.path.join(MODEL_DIR, filename)
+        if not os.path.exists(src_path):
+            print(f"  Skipped models/{filename} (not trained)")
+            continue
+        with open(src_path, 'rb') as f:
+            export(pickle.load(f), out_path)
+        size = os.path.getsize(out_path) / 1024 ** 2
+        print(f"  Saved → models/{os.path.basename(out_path)} ({size:.1f} MB)")
+    print()
+
+
+if __name__ == '__main__':
+    main()
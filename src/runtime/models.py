@@ -0,0 +1,130 @@
+"""
+models.py
+----------
+NumPy re-implementations of the fitted estimators the app uses.
+
+Each class exposes the same methods/attributes predict.py and nutrition.py
+call on the sklearn objects (predict_proba, predict, transform, classes_,
+inverse_transform), so a runtime bundle is a drop-in replacement for the
+unpickled one.
+"""
+
+import numpy as np
+
+
+def softmax(raw):
+    raw = raw - raw.max(axis=1, keepdims=True)
+    exp = np.exp(raw)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def expit(raw):
+    return 1.0 / (1.0 + np.exp(-raw))
+
+
+class VocabularyEncoder:
+    """
+    Numpy-only stand-in for a fitted LabelEncoder, rebuilt from its classes.
+    Codes are positions in the sorted vocabulary, exactly like LabelEncoder.
+    """
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes, dtype=object)
+        self._codes = {value: code for code, value in enumerate(self.classes_)}
+
+    def transform(self, values):
+        unseen = [v for v in values if v not in self._codes]
+        if unseen:
+            raise ValueError(f'y contains previously unseen labels: {unseen}')
+        return np.array([self._codes[v] for v in values])
+
+    def inverse_transform(self, codes):
+        return self.classes_[np.asarray(list(codes), dtype=int)]
+
+
+class Standardizer:
+    """StandardScaler.transform: (X - mean) / scale."""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=float) - self.mean_) / self.scale_
+
+
+class ForestClassifier:
+    """RandomForest / ExtraTrees classifier: mean of the per-tree leaf class fractions."""
+
+    def __init__(self, trees, classes):
+        self.trees = trees
+        self.classes_ = classes
+
+    def predict_proba(self, X):
+        return self.trees.predict(X).mean(axis=1)
+
+
+class GradientBoostingClassifier:
+    """Sum of stage outputs × learning rate on top of the prior, then softmax (or sigmoid)."""
+
+    def __init__(self, trees, init_raw, learning_rate, classes):
+        self.trees = trees
+        self.init_raw = init_raw
+        self.learning_rate = float(learning_rate)
+        self.classes_ = classes
+
+    def predict_proba(self, X):
+        n_columns = len(self.init_raw)
+        stage_values = self.trees.predict(X)[:, :, 0].reshape(len(X), -1, n_columns)
+        raw = self.init_raw + self.learning_rate * stage_values.sum(axis=1)
+        if n_columns == 1:
+            positive = expit(raw[:, 0])
+            return np.column_stack([1.0 - positive, positive])
+        return softmax(raw)
+
+
+class LogisticModel:
+    """Multinomial (softmax), binary (sigmoid) or one-vs-rest logistic regression."""
+
+    def __init__(self, coef, intercept, classes, multi_class='multinomial'):
+        self.coef_ = coef
+        self.intercept_ = intercept
+        self.classes_ = classes
+        self.multi_class = multi_class
+
+    def predict_proba(self, X):
+        raw = np.asarray(X, dtype=float) @ self.coef_.T + self.intercept_
+        if raw.shape[1] == 1:
+            positive = expit(raw[:, 0])
+            return np.column_stack([1.0 - positive, positive])
+        if self.multi_class == 'ovr':
+            proba = expit(raw)
+            return proba / proba.sum(axis=1, keepdims=True)
+        return softmax(raw)
+
+
+class SoftVotingEnsemble:
+    """VotingClassifier(voting='soft'): weighted mean of the member probabilities."""
+
+    def __init__(self, members, weights, classes):
+        self.named_estimators_ = dict(members)
+        self.weights = weights
+        self.classes_ = classes
+
+    def predict_proba(self, X):
+        probas = np.stack([member.predict_proba(X) for member in self.named_estimators_.values()])
+        return np.average(probas, axis=0, weights=self.weights)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class ForestRegressor:
+    """RandomForestRegressor: mean of the per-tree leaf values (multi-output)."""
+
+    def __init__(self, trees):
+        self.trees = trees
+
+    def predict(self, X):
+        values = self.trees.predict(X).mean(axis=1)
+        return values[:, 0] if values.shape[1] == 1 else values
@@ -0,0 +1,78 @@
+"""
+trees.py
+---------
+Vectorized traversal of many decision trees at once.
+
+All trees of a model are packed into flat node arrays (children, split
+feature, threshold, leaf value) with one root offset per tree. predict()
+walks every (row, tree) pair one level per iteration, so the Python loop
+runs max_depth times instead of rows × trees × depth. Leaves link back to
+themselves in the traversal tables, so each level is a handful of gathers
+with no leaf bookkeeping.
+
+Splits are evaluated exactly like sklearn: the input is cast to float32
+first (float64 for HistGradientBoosting, which splits on the raw values)
+and a row goes left when X[feature] <= threshold.
+"""
+
+import numpy as np
+
+
+class PackedTrees:
+    """A set of trees flattened into shared node arrays."""
+
+    def __init__(self, left, right, feature, threshold, value, roots, max_depth, cover=None,
+                 split_dtype='float32'):
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.cover = cover            # weighted training samples per node (optional)
+        self.split_dtype = np.dtype(split_dtype)
+        self.is_leaf = left < 0
+
+        # Traversal tables: leaves point back to themselves, so a row that has
+        # reached its leaf just stays there and no per-level leaf test is needed
+        node_ids = np.arange(len(left), dtype=np.intp)
+        self._children = np.column_stack([np.where(self.is_leaf, node_ids, left),
+                                          np.where(self.is_leaf, node_ids, right)]).ravel()
+        self._split_feature = np.where(self.is_leaf, 0, feature).astype(np.intp)
+        self._threshold = np.asarray(threshold, dtype=np.float64)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """Leaf node index reached by every row in every tree: (n_rows, n_trees)."""
+        X = np.asarray(X, dtype=self.split_dtype)
+        flat = X.ravel()
+        row_offsets = (np.arange(X.shape[0], dtype=np.intp) * X.shape[1])[:, None]
+        nodes = np.repeat(self.roots.astype(np.intp)[None, :], X.shape[0], axis=0)
+        for _ in range(self.max_depth):
+            go_right = ~(flat[row_offsets + self._split_feature[nodes]] <= self._threshold[nodes])
+            nodes = self._children[2 * nodes + go_right]
+        return nodes
+
+    def predict(self, X):
+        """Leaf values for every row and tree: (n_rows, n_trees, n_outputs)."""
+        return self.value[self.apply(X)]
+
+    # ── (De)serialisation ────────────────────────────────────────────────────
+    FIELDS = ('left', 'right', 'feature', 'threshold', 'value', 'roots')
+
+    def to_arrays(self, prefix):
+        arrays = {f'{prefix}.{name}': getattr(self, name) for name in self.FIELDS}
+        arrays[f'{prefix}.max_depth'] = np.array(self.max_depth)
+        if self.cover is not None:
+            arrays[f'{prefix}.cover'] = self.cover
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix, split_dtype='float32'):
+        return cls(*(arrays[f'{prefix}.{name}'] for name in cls.FIELDS),
+                   max_depth=int(arrays[f'{prefix}.max_depth']),
+                   cover=arrays.get(f'{prefix}.cover'), split_dtype=split_dtype)
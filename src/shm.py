@@ -0,0 +1,226 @@
+"""
+shm.py
+-------
+Counters shared by every worker process on the machine.
+
+A SharedCounters block is a named POSIX shared-memory segment holding an
+int64 matrix with one row ("slot") per worker process:
+
+    header   : magic, layout version, n_slots, n_counters
+    owners   : int64[n_slots]               pid owning each slot (0 = free)
+    counters : int64[n_slots, n_counters]
+
+Each process claims a slot once (under an flock on a lock file next to the
+segment), then only ever writes its own row, so increments need no
+cross-process locking; threads of one process share its row under a
+process-local lock. Readers add the rows up. A slot left behind by a dead
+worker is taken over together with its counts, so totals survive worker
+restarts.
+
+If shared memory is unavailable (no /dev/shm, all slots taken by live
+workers) the block falls back to a private array in this process — same
+API, but the counts then only cover this worker.
+"""
+
+import os
+import hashlib
+import tempfile
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:   # Windows: no flock, so no shared counters
+    fcntl = None
+
+SHM_SLOTS = int(os.getenv('SHM_SLOTS', '64'))   # max worker processes per block
+SHM_PREFIX = 'obesity-ai'
+
+_MAGIC = 0x0B35E7C0
+_LAYOUT_VERSION = 1
+_HEADER_WORDS = 4
+
+
+def segment_name(kind, layout_key):
+    """Stable segment name for a counter layout (a new layout gets a new segment)."""
+    digest = hashlib.sha1(str(layout_key).encode('utf-8')).hexdigest()[:12]
+    return f'{SHM_PREFIX}-{kind}-{digest}'
+
+
+def _open_segment(name, size):
+    """Attach to (or create) a segment without registering it with multiprocessing's
+    resource tracker, which would unlink it when the first worker exits."""
+    from multiprocessing import resource_tracker, shared_memory
+
+    def open_untracked(create):
+        try:
+            return shared_memory.SharedMemory(name=name, create=create, size=size if create else 0, track=False)
+        except TypeError:   # Python < 3.13: no track argument
+            segment = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+            resource_tracker.unregister(segment._name, 'shared_memory')
+            return segment
+
+    try:
+        return open_untracked(create=False), False
+    except FileNotFoundError:
+        return open_untracked(create=True), True
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedCounters:
+    """An int64 counter vector summed over per-process rows in shared memory."""
+
+    def __init__(self, name, n_counters, n_slots=SHM_SLOTS):
+        self.name = name
+        self.n_counters = int(n_counters)
+        self.n_slots = int(n_slots)
+        self._lock = threading.Lock()
+        self._segment = None
+        self._owner_pid = None
+        self._row = None
+        self.shared = False
+
+        size = 8 * (_HEADER_WORDS + self.n_slots * (1 + self.n_counters))
+        try:
+            if fcntl is None:
+                raise OSError('flock is not available on this platform')
+            with self._file_lock():
+                self._segment, created = _open_segment(name, size)
+                expected = (_MAGIC, _LAYOUT_VERSION, self.n_slots, self.n_counters)
+                if created:
+                    np.ndarray((size // 8,), dtype=np.int64, buffer=self._segment.buf)[:] = 0
+                    np.ndarray((_HEADER_WORDS,), dtype=np.int64, buffer=self._segment.buf)[:] = expected
+                elif (self._segment.size < size or tuple(
+                        np.ndarray((_HEADER_WORDS,), dtype=np.int64, buffer=self._segment.buf)) != expected):
+                    raise ValueError(f'shared memory segment {name} has a different layout')
+            words = np.ndarray((size // 8,), dtype=np.int64, buffer=self._segment.buf)
+            self._owners = words[_HEADER_WORDS:_HEADER_WORDS + self.n_slots]
+            self._counters = words[_HEADER_WORDS + self.n_slots:].reshape(self.n_slots, self.n_counters)
+            self.shared = True
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Shared counters '{name}' unavailable ({e}) — counting per worker only")
+            self._close_segment()
+            self._owners = np.zeros(1, dtype=np.int64)
+            self._counters = np.zeros((1, self.n_counters), dtype=np.int64)
+
+    def _file_lock(self):
+        return _FileLock(os.path.join(tempfile.gettempdir(), f'{self.name}.lock'))
+
+    def _close_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    # ── Writing: only this process's own row ─────────────────────────────────
+
+    def _own_row(self):
+        pid = os.getpid()
+        if self._owner_pid == pid:
+            return self._row
+        if not self.shared:
+            self._owner_pid, self._row = pid, self._counters[0]
+            return self._row
+
+        with self._file_lock():
+            owners = self._owners
+            slot = next((i for i, owner in enumerate(owners) if owner == pid), None)
+            if slot is None:
+                slot = next((i for i, owner in enumerate(owners) if owner == 0), None)
+            if slot is None:
+                slot = next((i for i, owner in enumerate(owners) if not _pid_alive(int(owner))), None)
+            if slot is None:
+                print(f"⚠️  All {self.n_slots} slots of '{self.name}' are taken — counting per worker only")
+                self._owner_pid, self._row = pid, np.zeros(self.n_counters, dtype=np.int64)
+                return self._row
+            owners[slot] = pid
+        self._owner_pid, self._row = pid, self._counters[slot]
+        return self._row
+
+    def add(self, indices, amount=1):
+        """Add `amount` to the given counter(s) (an index or an array of indices)."""
+        with self._lock:
+            row = self._own_row()
+            np.add.at(row, indices, amount)
+
+    def set(self, index, value):
+        """Overwrite one counter in this process's own row."""
+        with self._lock:
+            self._own_row()[index] = value
+
+    def roll(self, epoch_index, epoch, cells):
+        """
+        Time-bucket reuse in this process's own row: when counter epoch_index
+        does not hold epoch, zero the counters in cells (a slice) and store
+        epoch. Each process rolls only its own row, so no cross-process lock.
+        """
+        with self._lock:
+            row = self._own_row()
+            if row[epoch_index] != epoch:
+                row[cells] = 0
+                row[epoch_index] = epoch
+
+    # ── Reading: all rows ─────────────────────────────────────────────────────
+
+    def rows(self):
+        """Snapshot of the per-process rows that have been claimed."""
+        with self._lock:
+            return self._counters[self._owners != 0].copy() if self.shared else self._counters.copy()
+
+    def totals(self):
+        """Every counter summed over all worker rows."""
+        rows = self.rows()
+        return rows.sum(axis=0) if len(rows) else np.zeros(self.n_counters, dtype=np.int64)
+
+    def workers(self):
+        """Number of slots claimed so far (live or finished workers)."""
+        return int((self._owners != 0).sum()) if self.shared else 1
+
+    def reset(self):
+        """Zero every row (all workers)."""
+        if self.shared:
+            with self._file_lock():
+                self._counters[:] = 0
+        else:
+            self._counters[:] = 0
+
+    def unlink(self):
+        """Remove the segment from the system (workers attached to it keep their mapping)."""
+        if self._segment is None:
+            return
+        try:
+            from multiprocessing import resource_tracker
+            # unlink() unregisters from the resource tracker; register first so
+            # it has something to drop (the segment was opened untracked)
+            if getattr(self._segment, '_track', None) is None:
+                resource_tracker.register(self._segment._name, 'shared_memory')
+        except ImportError:
+            pass
+        self._segment.unlink()
+
+
+class _FileLock:
+    """Exclusive flock on a lock file for the duration of a with-block."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
@@ -0,0 +1,156 @@
+"""
+target_weight.py
+-----------------
+"At what weight would the model classify me as Normal_Weight?"
+
+For one prepared feature row only Weight (and the BMI derived from it) is
+varied; every other answer stays as the user gave it.
+
+  1. Sweep  — candidate weights covering BMI 13–55 (inside the form's
+              20–250 kg limits) in SWEEP_BMI_STEP steps, all classified in
+              one batched ensemble call.
+  2. Refine — every pair of neighbouring candidates with different classes
+              brackets a class boundary. All brackets are narrowed together,
+              one batched call per round. Each round places k points inside
+              every bracket instead of a single midpoint, with k chosen so
+              one round normally reaches WEIGHT_TOLERANCE_KG — a round costs
+              one ensemble call whatever its size, so fewer, wider rounds
+              are cheaper than plain bisection.
+
+The result lists every class transition weight with its BMI, the weight
+range of each class, and the nearest weight for the requested target class.
+"""
+
+import math
+
+import numpy as np
+
+SWEEP_BMI_RANGE     = (13.0, 55.0)
+SWEEP_BMI_STEP      = 0.5
+WEIGHT_LIMITS_KG    = (20.0, 250.0)   # same limits as the prediction forms
+WEIGHT_TOLERANCE_KG = 0.1
+MAX_REFINE_POINTS   = 32              # candidates per bracket per round
+MAX_REFINE_ROUNDS   = 4
+DEFAULT_TARGET      = 'Normal_Weight'
+
+
+def _candidate_rows(feature_row, weights, weight_index, bmi_index, height_m):
+    X = np.repeat(np.asarray(feature_row, dtype=float)[None, :], len(weights), axis=0)
+    X[:, weight_index] = weights
+    if bmi_index is not None:
+        X[:, bmi_index] = weights / height_m ** 2
+    return X
+
+
+def _refine(classify, left_w, right_w, left_c, right_c):
+    """
+    Narrow all brackets until they are WEIGHT_TOLERANCE_KG wide. A bracket
+    that turns out to hold several boundaries is split into one bracket per
+    boundary. Returns the final brackets and the number of rounds run.
+    """
+    rounds = 0
+    while left_w.size and rounds < MAX_REFINE_ROUNDS:
+        widths = right_w - left_w
+        if widths.max() <= WEIGHT_TOLERANCE_KG:
+            break
+        k = int(np.clip(math.ceil(widths.max() / WEIGHT_TOLERANCE_KG) - 1, 1, MAX_REFINE_POINTS))
+        fractions = np.arange(1, k + 1) / (k + 1)
+        points = left_w[:, None] + widths[:, None] * fractions
+        labels = classify(points.ravel()).reshape(points.shape)
+        rounds += 1
+
+        weights = np.column_stack([left_w, points, right_w])
+        classes = np.column_stack([left_c, labels, right_c])
+        bracket, position = np.nonzero(classes[:, 1:] != classes[:, :-1])
+        left_w, right_w = weights[bracket, position], weights[bracket, position + 1]
+        left_c, right_c = classes[bracket, position], classes[bracket, position + 1]
+    return left_w, right_w, left_c, right_c, rounds
+
+
+def solve_target_weight(feature_row, feature_cols, predict_fn, target=DEFAULT_TARGET):
+    """
+    Class transitions along the weight axis for one raw feature row.
+
+    predict_fn(X) must return (class probabilities, class names) for a
+    matrix of raw feature rows in a single call.
+    """
+    cols = list(feature_cols)
+    weight_index = cols.index('Weight')
+    bmi_index = cols.index('BMI') if 'BMI' in cols else None
+    height_m = float(feature_row[cols.index('Height')])
+    current_weight = float(feature_row[weight_index])
+    area = height_m ** 2
+
+    counts = {'calls': 0, 'rows': 0}
+    class_names = []
+
+    def classify(weights):
+        probs, names = predict_fn(_candidate_rows(feature_row, weights, weight_index, bmi_index, height_m))
+        counts['calls'] += 1
+        counts['rows'] += len(weights)
+        class_names[:] = [str(name) for name in names]
+        return np.asarray(probs).argmax(axis=1)
+
+    low = max(WEIGHT_LIMITS_KG[0], SWEEP_BMI_RANGE[0] * area)
+    high = min(WEIGHT_LIMITS_KG[1], SWEEP_BMI_RANGE[1] * area)
+    weights = np.append(np.arange(low, high, SWEEP_BMI_STEP * area), high)
+    labels = classify(weights)
+
+    change = np.nonzero(labels[1:] != labels[:-1])[0]
+    left_w, right_w, left_c, right_c, rounds = _refine(
+        classify, weights[change], weights[change + 1], labels[change], labels[change + 1])
+    boundaries = (left_w + right_w) / 2
+
+    transitions = [
+        {
+            'weight_kg':  round(float(w), 1),
+            'bmi':        round(float(w) / area, 1),
+            'from_class': class_names[int(a)],
+            'to_class':   class_names[int(b)],
+        }
+        for w, a, b in zip(boundaries, left_c, right_c)
+    ]
+
+    edges = [low, *boundaries.tolist(), high]
+    segment_classes = [int(labels[0]), *right_c.tolist()]
+    segments = [
+        {
+            'class':    class_names[c],
+            'from_kg':  round(edges[i], 1),
+            'to_kg':    round(edges[i + 1], 1),
+            'bmi_from': round(edges[i] / area, 1),
+            'bmi_to':   round(edges[i + 1] / area, 1),
+        }
+        for i, c in enumerate(segment_classes)
+    ]
+
+    return {
+        'current_weight_kg': round(current_weight, 1),
+        'target_class':      target,
+        'target':            _nearest_target(edges, segment_classes, class_names,
+                                             target, current_weight, area),
+        'transitions':       transitions,
+        'segments':          segments,
+        'search':            {'range_kg': [round(low, 1), round(high, 1)],
+                              'refine_rounds': rounds, **counts},
+    }
+
+
+def _nearest_target(edges, segment_classes, class_names, target, current_weight, area):
+    """Closest weight to the current one at which the target class is predicted."""
+    best, best_segment = None, None
+    for i, c in enumerate(segment_classes):
+        if class_names[c] != target:
+            continue
+        weight = min(max(current_weight, edges[i]), edges[i + 1])
+        if best is None or abs(weight - current_weight) < abs(best - current_weight):
+            best, best_segment = weight, i
+    if best is None:
+        return None
+    return {
+        'weight_kg': round(best, 1),
+        'bmi':       round(best / area, 1),
+        'change_kg': round(best - current_weight, 1),
+        'reached':   best == current_weight,
+        'range_kg':  [round(edges[best_segment], 1), round(edges[best_segment + 1], 1)],
+    }
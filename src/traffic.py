@@ -0,0 +1,231 @@
+"""
+traffic.py
+-----------
+Live traffic analytics: what the served predictions look like right now.
+
+Every prediction route counts one request into time-bucketed rings kept in
+shared-memory counters (src/shm.py), so all workers feed the same numbers
+and nothing per request is stored:
+
+  window  bucket     buckets
+  1m      1 second   60
+  1h      1 minute   60
+  24h     15 minutes 96
+
+Each bucket holds: requests, basic / advanced mode, one count per predicted
+class, a 10-bin confidence histogram (0-10%, ..., 90-100%) and the summed
+confidence. Next to every bucket sits an epoch cell, the bucket's start
+time / bucket length. A worker that writes into a bucket whose epoch cell
+is stale zeroes and reclaims it in its own row only (SharedCounters.roll),
+so there is no cross-process locking and no background sweeper. Readers
+add up, per row, only the buckets whose epoch falls inside the window.
+
+Disable with TRAFFIC_ANALYTICS=0. From a shell:
+    python -m src.traffic            # current aggregates from the shared counters
+    python -m src.traffic --reset    # start counting from zero
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from typing import NamedTuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.nutrition import get_all_classes
+from src.shm import SharedCounters, segment_name
+
+TRAFFIC_ANALYTICS_ENABLED = os.getenv('TRAFFIC_ANALYTICS', '1').strip().lower() not in {'0', 'false', 'no'}
+
+MODES = ('basic', 'advanced')
+CONFIDENCE_BINS = 10
+OTHER_CLASS = 'Other'
+
+CELL_REQUESTS = 0
+
+
+class Ring(NamedTuple):
+    window:  str      # report key
+    seconds: int      # bucket length
+    buckets: int      # window = seconds × buckets
+
+
+RINGS = (
+    Ring('1m',  1,   60),
+    Ring('1h',  60,  60),
+    Ring('24h', 900, 96),
+)
+SERIES_RING = '1h'    # requests per minute over the last hour, for the dashboard chart
+
+
+class TrafficMonitor:
+    """Time-bucketed request counters over the rolling windows in RINGS."""
+
+    def __init__(self, class_names=None, name=None):
+        self.class_names = list(class_names or get_all_classes()) + [OTHER_CLASS]
+        self._class_index = {name: i for i, name in enumerate(self.class_names)}
+
+        # bucket layout: [requests, <modes...>, <classes...>, <confidence bins...>, confidence sum ×10]
+        self.mode_offset = 1
+        self.class_offset = self.mode_offset + len(MODES)
+        self.confidence_offset = self.class_offset + len(self.class_names)
+        self.confidence_sum = self.confidence_offset + CONFIDENCE_BINS
+        self.width = self.confidence_sum + 1
+
+        # counter layout per ring: [<epoch of each bucket...>, <bucket cells...>]
+        offset = 0
+        self.layout = {}
+        for ring in RINGS:
+            self.layout[ring.window] = (offset, offset + ring.buckets)
+            offset += ring.buckets * (1 + self.width)
+        self.n_counters = offset
+
+        layout_key = (RINGS, self.class_names, self.width)
+        self.counters = SharedCounters(name or segment_name('traffic', layout_key), self.n_counters)
+
+    def record(self, class_label, confidence, mode='basic', now=None):
+        """Count one served prediction (confidence in percent)."""
+        now = time.time() if now is None else now
+        confidence = min(max(float(confidence or 0.0), 0.0), 100.0)
+        fields = np.array([
+            CELL_REQUESTS,
+            self.mode_offset + (MODES.index(mode) if mode in MODES else 0),
+            self.class_offset + self._class_index.get(class_label, len(self.class_names) - 1),
+            self.confidence_offset + min(int(confidence // (100 / CONFIDENCE_BINS)), CONFIDENCE_BINS - 1),
+            self.confidence_sum,
+        ])
+        amounts = np.array([1, 1, 1, 1, int(round(confidence * 10))], dtype=np.int64)
+
+        indices = []
+        for ring in RINGS:
+            epochs_start, cells_start = self.layout[ring.window]
+            epoch = int(now // ring.seconds)
+            bucket = epoch % ring.buckets
+            cells = cells_start + bucket * self.width
+            self.counters.roll(epochs_start + bucket, epoch, slice(cells, cells + self.width))
+            indices.append(cells + fields)
+        self.counters.add(np.concatenate(indices), np.tile(amounts, len(RINGS)))
+
+    def _live_buckets(self, rows, ring, now):
+        """(n_buckets, width) counts summed over the worker rows, zero outside the window."""
+        epochs_start, cells_start = self.layout[ring.window]
+        epochs = rows[:, epochs_start:epochs_start + ring.buckets]
+        cells = rows[:, cells_start:cells_start + ring.buckets * self.width]
+        cells = cells.reshape(len(rows), ring.buckets, self.width)
+        current = int(now // ring.seconds)
+        live = (epochs > current - ring.buckets) & (epochs <= current)
+        return (cells * live[:, :, None]).sum(axis=0)
+
+    def _window_report(self, totals, ring):
+        requests = int(totals[CELL_REQUESTS])
+        minutes = ring.seconds * ring.buckets / 60
+        confidence = totals[self.confidence_offset:self.confidence_offset + CONFIDENCE_BINS]
+        return {
+            'seconds':         ring.seconds * ring.buckets,
+            'requests':        requests,
+            'per_minute':      round(requests / minutes, 2),
+            'modes':           dict(zip(MODES, totals[self.mode_offset:self.class_offset].tolist())),
+            'classes':         dict(zip(self.class_names,
+                                        totals[self.class_offset:self.confidence_offset].tolist())),
+            'confidence':      confidence.tolist(),
+            'mean_confidence': round(float(totals[self.confidence_sum]) / 10 / requests, 1) if requests else None,
+        }
+
+    def report(self, now=None):
+        """Aggregates per window plus a requests-per-minute series for the last hour."""
+        now = time.time() if now is None else now
+        rows = self.counters.rows()
+        if not len(rows):
+            rows = np.zeros((1, self.n_counters), dtype=np.int64)
+
+        windows, series = {}, []
+        for ring in RINGS:
+            buckets = self._live_buckets(rows, ring, now)
+            windows[ring.window] = self._window_report(buckets.sum(axis=0), ring)
+            if ring.window == SERIES_RING:
+                # oldest → newest, ending with the current (partial) bucket
+                current = int(now // ring.seconds)
+                order = np.arange(current - ring.buckets + 1, current + 1) % ring.buckets
+                series = buckets[order, CELL_REQUESTS].tolist()
+
+        return {
+            'enabled':             True,
+            'shared':              self.counters.shared,
+            'workers':             self.counters.workers(),
+            'generated_at':        round(now, 3),
+            'confidence_bins':     [f'{i * 100 // CONFIDENCE_BINS}-{(i + 1) * 100 // CONFIDENCE_BINS}%'
+                                    for i in range(CONFIDENCE_BINS)],
+            'windows':             windows,
+            'requests_per_minute': series,
+        }
+
+
+# ── One monitor per process ───────────────────────────────────────────────────
+
+_monitor = {'monitor': None}
+_monitor_lock = threading.Lock()
+
+
+def get_traffic_monitor():
+    """This process's monitor (attached to the shared segment), or None when disabled."""
+    if not TRAFFIC_ANALYTICS_ENABLED:
+        return None
+    with _monitor_lock:
+        if _monitor['monitor'] is None:
+            _monitor['monitor'] = TrafficMonitor()
+        return _monitor['monitor']
+
+
+def record_request(result, mode='basic'):
+    monitor = get_traffic_monitor()
+    if monitor is not None:
+        monitor.record(result.get('class_label'), result.get('confidence'), mode)
+
+
+def traffic_report():
+    monitor = get_traffic_monitor()
+    if monitor is None:
+        return {'enabled': False, 'reason': 'disabled (TRAFFIC_ANALYTICS=0)'}
+    return monitor.report()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Live traffic of the prediction routes (all workers).')
+    parser.add_argument('--reset', action='store_true', help='zero the counters of every worker')
+    args = parser.parse_args(argv)
+
+    monitor = get_traffic_monitor()
+    if monitor is None:
+        print(json.dumps(traffic_report(), indent=2))
+        return
+
+    if args.reset:
+        monitor.counters.reset()
+        print("  Traffic counters reset.")
+        return
+
+    report = monitor.report()
+    print("=" * 55)
+    print(f"  LIVE TRAFFIC — {report['workers']} worker(s)")
+    print("=" * 55)
+    for window, stats in report['windows'].items():
+        mean = f"{stats['mean_confidence']:.1f}%" if stats['mean_confidence'] is not None else '—'
+        print(f"  {window:>4}: {stats['requests']:>7} requests  {stats['per_minute']:>8.2f}/min  "
+              f"basic {stats['modes']['basic']} / advanced {stats['modes']['advanced']}  "
+              f"mean confidence {mean}")
+    day = report['windows']['24h']
+    if day['requests']:
+        print("\n  Predicted classes (24h):")
+        for name, count in sorted(day['classes'].items(), key=lambda item: -item[1]):
+            if count:
+                print(f"    {name:<24} {count:>7}  {count / day['requests']:.1%}")
+    print()
+
+
+if __name__ == '__main__':
+    main()
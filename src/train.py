@@ -4,162 +4,393 @@ train.py
 Trains the machine learning models and saves them to the models/ folder.
 
 What this script does:
-  1. Calls data_preprocessing.py to load and clean the data
-  2. Trains 3 individual ML models (Random Forest, Logistic Regression, Gradient Boosting)
-  3. Combines them into one final Ensemble model using Soft Voting
-  4. Evaluates each model on the test set and prints accuracy
+  1. Calls data_preprocessing.py to load and clean the data (cached on unchanged data)
+  2. Trains the ensemble members picked from the model zoo (src/model_zoo.py;
+     default Random Forest, Logistic Regression, Gradient Boosting)
+  3. Combines the fitted members into one final Ensemble model using Soft
+     Voting (the members are not refitted)
+  4. Evaluates each model on the test set in one pass (each model's
+     probabilities are computed once) and prints accuracy
   5. Saves all model files to the models/ folder
-  6. Saves accuracy numbers to outputs/model_stats.json
+  6. Saves accuracy numbers and a per-member comparison (training time,
+     single-row latency, F1) to outputs/model_stats.json
+
+A full run first fingerprints its inputs (dataset hash, preprocessing
+settings, hyperparameters, library versions). When the saved bundle was
+trained from the same fingerprint its model and stats are reused instead of
+refitting; train(force=True) / python main.py --force always retrains.
+Reuses are logged in models/training_reuse.json, so the live bundle file
+is left untouched.
+
+Incremental mode (train(incremental=True) / python main.py --incremental)
+grows the previous ensemble on rows appended to the CSV since the last run
+instead of refitting from zero. It falls back to a full retrain when the
+file was edited, the schema changed or the new rows drift too far.
 """
 
 import os
 import sys
 import json
 import pickle
+import time
 import hashlib
+import platform
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+import sklearn
+
 # Make sure the project root is on Python's path (needed when running main.py)
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, VotingClassifier
+from sklearn.ensemble import (
+    ExtraTreesClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier,
+    RandomForestClassifier, VotingClassifier,
+)
 from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
-
-from src.data_preprocessing import load_and_preprocess
+from sklearn.preprocessing import LabelEncoder
+from sklearn.utils import Bunch
+from sklearn.metrics import (
+    accuracy_score, f1_score, precision_score, recall_score,
+    precision_recall_fscore_support, confusion_matrix, top_k_accuracy_score,
+)
+
+from src.data_preprocessing import (
+    load_and_preprocess, data_watermark, read_rows_since, dataset_hash,
+    transform_with_fitted, split_indices, TARGET_COL,
+    PREPROCESSING_CONFIG, PREPROCESS_CHUNK_ROWS,
+)
+from src.runtime.export import export_bundle
+from src.drift import build_reference
+from src.vocabulary import bundle_encoders, vocabularies_to_json
+from src.model_zoo import (
+    MODEL_ZOO, DEFAULT_MEMBERS, ENSEMBLE_MEMBERS, MODEL_ZOO_COMPARE, fit_member, single_row_latency_us,
+    training_threads,
+)
 
 # ── Output folder paths ────────────────────────────────────────────────────────
 ROOT_DIR   = os.path.join(os.path.dirname(__file__), '..')
 MODEL_DIR  = os.path.join(ROOT_DIR, 'models')
 OUTPUT_DIR = os.path.join(ROOT_DIR, 'outputs')
+BUNDLE_PATH = os.path.join(MODEL_DIR, 'obesity_model.pkl')
+TUNED_PARAMS_PATH = os.path.join(MODEL_DIR, 'tuned_params.json')
+
+# ── Hyperparameters ───────────────────────────────────────────────────────────
+# Used when models/tuned_params.json (written by `python -m src.tune`) is absent.
+DEFAULT_PARAMS = {
+    **{key: entry['defaults'] for key, entry in MODEL_ZOO.items()},
+    'members': ENSEMBLE_MEMBERS,   # zoo keys of the ensemble members, in voting order
+    'weights': None,               # soft-voting weights for the members; None = equal
+}
+
+# ── Incremental training limits ───────────────────────────────────────────────
+# Full retrain when appended rows exceed this fraction of the base dataset
+INCREMENTAL_MAX_NEW_FRACTION = 0.5
+# Full retrain when any feature mean of the new rows moves more than this
+# many training standard deviations
+INCREMENTAL_DRIFT_THRESHOLD = 0.5
+# Extra gradient boosting stages fitted per incremental round
+INCREMENTAL_GB_STAGES = 20
+# Member types the incremental path knows how to warm-start
+INCREMENTAL_MEMBER_TYPES = (RandomForestClassifier, ExtraTreesClassifier, GradientBoostingClassifier,
+                            HistGradientBoostingClassifier, LogisticRegression)
+
+
+# ── Training result cache ─────────────────────────────────────────────────────
+# Bump when a change to this file alters the model trained from the same inputs
+TRAINING_CODE_VERSION = 1
+# Reuse events kept in the reuse log (oldest dropped first)
+MAX_REUSE_EVENTS = 20
+REUSE_LOG_FILE   = 'training_reuse.json'
+
 
+class FullRetrainRequired(Exception):
+    """Raised by the incremental path when only a full retrain is safe."""
 
-# ── Helper: Evaluate one model ────────────────────────────────────────────────
 
-def evaluate_model(model, X_test, y_test, model_name):
+# ── Evaluation Engine ─────────────────────────────────────────────────────────
+# Each member's predict_proba runs ONCE on the test set. The ensemble vote,
+# every metric, the confusion matrix and top-k accuracy are all derived from
+# those cached probability arrays instead of calling predict() again.
+
+# Top-k accuracies reported for the ensemble
+TOP_K = (2, 3)
+
+
+def soft_vote(probas, weights=None):
+    """Soft-voting average of stacked member probabilities (members × rows × classes)."""
+    return np.average(probas, axis=0, weights=weights)
+
+
+def compute_metrics(y_true, y_pred):
+    """Accuracy, F1, precision and recall (weighted) for one set of predictions."""
+    return {
+        'accuracy':  round(accuracy_score(y_true, y_pred), 4),
+        'f1':        round(f1_score(y_true, y_pred, average='weighted', zero_division=0), 4),
+        'precision': round(precision_score(y_true, y_pred, average='weighted', zero_division=0), 4),
+        'recall':    round(recall_score(y_true, y_pred, average='weighted', zero_division=0), 4),
+    }
+
+
+def evaluate_ensemble(members, ensemble, X_test, y_test, class_names):
     """
-    Run the model on test data and print accuracy, F1, precision, recall.
-    Returns a dictionary with the numbers.
+    Evaluate the members and the soft-voting ensemble in a single pass.
+
+    members — list of (key, display name, fitted model), in ensemble order
+
+    Returns a dict with per-model metrics (keyed like the members plus
+    'ensemble'), per-class precision/recall, the confusion matrix, top-k
+    accuracy and inference timings.
     """
-    y_pred     = model.predict(X_test)
-    accuracy   = accuracy_score(y_test, y_pred)
-    f1         = f1_score(y_test, y_pred, average='weighted', zero_division=0)
-    precision  = precision_score(y_test, y_pred, average='weighted', zero_division=0)
-    recall     = recall_score(y_test, y_pred, average='weighted', zero_division=0)
+    classes = ensemble.classes_
+    probas, timings, results = [], {}, {}
+
+    for key, name, model in members:
+        start = time.perf_counter()
+        proba = model.predict_proba(X_test)
+        elapsed = time.perf_counter() - start
+        probas.append(proba)
+
+        timings[key] = {
+            'batch_ms':   round(elapsed * 1000, 3),
+            'per_row_us': round(elapsed * 1e6 / len(X_test), 3),
+        }
+        results[key] = compute_metrics(y_test, classes[proba.argmax(axis=1)])
+        print(f"  {name:<25}  "
+              f"Accuracy={results[key]['accuracy']*100:.2f}%  "
+              f"F1={results[key]['f1']*100:.2f}%")
+
+    ens_proba = soft_vote(np.stack(probas), ensemble.weights)
+    y_pred    = classes[ens_proba.argmax(axis=1)]
+    results['ensemble'] = compute_metrics(y_test, y_pred)
+    print(f"  {'Ensemble (Voting)':<25}  "
+          f"Accuracy={results['ensemble']['accuracy']*100:.2f}%  "
+          f"F1={results['ensemble']['f1']*100:.2f}%")
+
+    timings['ensemble'] = {
+        'batch_ms':   round(sum(t['batch_ms'] for t in timings.values()), 3),
+        'per_row_us': round(sum(t['per_row_us'] for t in timings.values()), 3),
+    }
 
-    print(f"  {model_name:<25}  "
-          f"Accuracy={accuracy*100:.2f}%  "
-          f"F1={f1*100:.2f}%")
+    precision, recall, f1, support = precision_recall_fscore_support(
+        y_test, y_pred, labels=classes, zero_division=0
+    )
+    per_class = [
+        {
+            'class':     class_names[i],
+            'precision': round(float(precision[i]), 4),
+            'recall':    round(float(recall[i]), 4),
+            'f1':        round(float(f1[i]), 4),
+            'support':   int(support[i]),
+        }
+        for i in range(len(classes))
+    ]
+
+    top_k = {
+        f'top_{k}': round(float(top_k_accuracy_score(y_test, ens_proba, k=k, labels=classes)), 4)
+        for k in TOP_K if k < len(classes)
+    }
 
     return {
-        'accuracy':  round(accuracy,  4),
-        'f1':        round(f1,        4),
-        'precision': round(precision, 4),
-        'recall':    round(recall,    4),
+        'models':           results,
+        'per_class':        per_class,
+        'confusion_matrix': confusion_matrix(y_test, y_pred, labels=classes).tolist(),
+        'top_k_accuracy':   top_k,
+        'inference_ms':     timings,
     }
 
 
 # ── Helper: Save a Python object as a .pkl file ───────────────────────────────
 
 def save_pkl(obj, filename):
-    """Save any Python object to the models/ folder as a .pkl file."""
+    """
+    Save any Python object to the models/ folder as a .pkl file. Written to
+    a temp file and renamed over the old one, so a worker reloading the
+    model never reads a half-written pickle.
+    """
     path = os.path.join(MODEL_DIR, filename)
-    with open(path, 'wb') as f:
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
         pickle.dump(obj, f)
+    os.replace(tmp_path, path)
     print(f"  Saved → models/{filename}")
 
 
-# ── Main Training Function ────────────────────────────────────────────────────
+# ── Helper: Hyperparameters ──────────────────────────────────────────────────
 
-def train():
+def load_params():
     """
-    Full training pipeline.
-    Returns the model bundle (used by Flask app) and the stats dictionary.
+    Hyperparameters for the ensemble members: DEFAULT_PARAMS overridden by
+    the winning config of the last `python -m src.tune` run, if any.
     """
+    params = {key: (dict(value) if isinstance(value, dict) else value)
+              for key, value in DEFAULT_PARAMS.items()}
+    params['members'] = list(DEFAULT_PARAMS['members'])
+    if os.path.exists(TUNED_PARAMS_PATH):
+        with open(TUNED_PARAMS_PATH, 'r') as f:
+            tuned = json.load(f)
+        for key in MODEL_ZOO:
+            params[key].update(tuned.get(key, {}))
+        # the tuner weighs the default members, so its weights only fit those
+        if tuned.get('weights') is not None and params['members'] == DEFAULT_MEMBERS:
+            params['weights'] = list(tuned['weights'])
+    return params
+
+
+# ── Helper: Fit the ensemble members + ensemble ──────────────────────────────
+
+def voting_ensemble(members, weights, y_train):
+    """
+    Soft-voting ensemble over already fitted members. VotingClassifier.fit
+    would clone and refit every member, doubling the training time, so the
+    fitted state is set directly (the labels are already 0..n_classes-1).
+    """
+    ensemble = VotingClassifier(estimators=[(key, model) for key, _, model in members],
+                                voting='soft', weights=weights)
+    ensemble.le_ = LabelEncoder().fit(y_train)
+    ensemble.classes_ = ensemble.le_.classes_
+    ensemble.estimators_ = [model for _, _, model in members]
+    ensemble.named_estimators_ = Bunch(**{key: model for key, _, model in members})
+    return ensemble
 
-    # ── Step 1: Get preprocessed data ─────────────────────────────────────────
-    X_train, X_test, y_train, y_test, info = load_and_preprocess()
 
-    scaler           = info['scaler']
-    feature_encoders = info['feature_encoders']
-    target_encoder   = info['label_encoder']
-    feature_cols     = info['feature_cols']
-    inference_defaults = info.get('inference_defaults', {})
+def fit_models(X_train, y_train, params=None, compare=None, n_jobs=None):
+    """
+    Train the ensemble members (params['members']) and the soft voting ensemble.
+
+    compare=True (default MODEL_ZOO_COMPARE) also fits the other zoo entries
+    for the comparison table; they do not join the ensemble.
+    n_jobs caps the cores each fit may use (None = the zoo's own settings).
+
+    Returns:
+        members    — list of (key, display name, fitted model), in voting order
+        ensemble   — the fitted VotingClassifier
+        fit_seconds — training time per zoo key
+        extras     — (key, name, model) of the comparison-only entries
+    """
+
+    params = params or load_params()
+    compare = MODEL_ZOO_COMPARE if compare is None else compare
 
-    # ── Step 2: Train the 3 base models ───────────────────────────────────────
     print("=" * 55)
     print("  MODEL TRAINING")
     print("=" * 55)
 
-    # Model 1 — Random Forest
-    # Builds 200 decision trees and combines their votes
-    print("\n  Training Random Forest...")
-    rf = RandomForestClassifier(n_estimators=200, random_state=42, n_jobs=-1)
-    rf.fit(X_train, y_train)
-
-    # Model 2 — Logistic Regression
-    # Finds a mathematical line/boundary that separates classes
-    print("  Training Logistic Regression...")
-    lr = LogisticRegression(max_iter=1000, random_state=42)
-    lr.fit(X_train, y_train)
-
-    # Model 3 — Gradient Boosting
-    # Builds trees one after another, each fixing the previous one's mistakes
-    print("  Training Gradient Boosting...")
-    gb = GradientBoostingClassifier(n_estimators=200, random_state=42)
-    gb.fit(X_train, y_train)
-
-    # Model 4 — Ensemble (Soft Voting)
-    # Averages the probability outputs of all 3 models above
-    print("  Training Ensemble (Soft Voting of all 3 models)...")
-    ensemble = VotingClassifier(
-        estimators=[('rf', rf), ('lr', lr), ('gb', gb)],
-        voting='soft'
-    )
-    ensemble.fit(X_train, y_train)
+    members, extras, fit_seconds = [], [], {}
+    keys = list(params['members'])
+    if compare:
+        keys += [key for key in MODEL_ZOO if key not in params['members']]
+    print()
+    for key in keys:
+        name = MODEL_ZOO[key]['name']
+        note = '' if key in params['members'] else '  (comparison only)'
+        print(f"  Training {name}...{note}")
+        model, fit_seconds[key] = fit_member(key, X_train, y_train, params.get(key), n_jobs=n_jobs)
+        (members if key in params['members'] else extras).append((key, name, model))
+
+    # Averages the probability outputs of all members above
+    print(f"  Building Ensemble (Soft Voting of {len(members)} models)...")
+    ensemble = voting_ensemble(members, params['weights'], y_train)
+
+    return members, ensemble, fit_seconds, extras
+
+
+# ── Helper: Evaluate everything and build the stats dictionary ───────────────
+
+def compare_models(members, ensemble, X_test, y_test, results, fit_seconds=None, extras=()):
+    """
+    One row per model for the zoo comparison table: fit time, median
+    single-row predict_proba latency and test-set F1/accuracy.
+    """
+    fit_seconds = fit_seconds or {}
+    rows = []
+    for key, name, model in list(members) + list(extras):
+        metrics = results.get(key) or compute_metrics(
+            y_test, ensemble.classes_[model.predict_proba(X_test).argmax(axis=1)])
+        rows.append({
+            'key':           key,
+            'name':          name,
+            'in_ensemble':   key in results,
+            'train_seconds': round(fit_seconds[key], 3) if key in fit_seconds else None,
+            'single_row_ms': round(single_row_latency_us(model, X_test) / 1000, 3),
+            'f1':            metrics['f1'],
+            'accuracy':      metrics['accuracy'],
+        })
+    member_keys = [key for key, _, _ in members]
+    rows.append({
+        'key':           'ensemble',
+        'name':          'Ensemble (Voting)',
+        'in_ensemble':   True,
+        'train_seconds': (round(sum(fit_seconds[key] for key in member_keys), 3)
+                          if all(key in fit_seconds for key in member_keys) else None),
+        'single_row_ms': round(single_row_latency_us(ensemble, X_test) / 1000, 3),
+        'f1':            results['ensemble']['f1'],
+        'accuracy':      results['ensemble']['accuracy'],
+    })
+    return rows
+
+
+def build_stats(members, ensemble, X_test, y_test, target_encoder,
+                feature_cols, train_size, fit_seconds=None, extras=()):
+    """Evaluate all models on the test set and collect dashboard stats."""
 
-    # ── Step 3: Evaluate all models ────────────────────────────────────────────
     print("\n" + "=" * 55)
     print("  EVALUATION RESULTS (on test set)")
     print("=" * 55)
 
-    rf_stats  = evaluate_model(rf,       X_test, y_test, "Random Forest")
-    lr_stats  = evaluate_model(lr,       X_test, y_test, "Logistic Regression")
-    gb_stats  = evaluate_model(gb,       X_test, y_test, "Gradient Boosting")
-    ens_stats = evaluate_model(ensemble, X_test, y_test, "Ensemble (Voting)")
-
-    # ── Step 3.5: Generate detailed stats for Dashboard ────────────────────────
-    from sklearn.metrics import confusion_matrix
-    import numpy as np
-
-    # Confusion Matrix for Ensemble
-    y_pred_ens = ensemble.predict(X_test)
-    cm = confusion_matrix(y_test, y_pred_ens)
-    
-    # Feature Importance (using Random Forest as representative)
-    importances = rf.feature_importances_
+    evaluation = evaluate_ensemble(members, ensemble, X_test, y_test,
+                                   list(target_encoder.classes_))
+    comparison = compare_models(members, ensemble, X_test, y_test, evaluation['models'],
+                                fit_seconds, extras)
+
+    print(f"\n  {'Model':<25} {'Train s':>8} {'1-row ms':>9} {'F1':>7}")
+    for row in comparison:
+        train_seconds = f"{row['train_seconds']:.2f}" if row['train_seconds'] is not None else '—'
+        print(f"  {row['name']:<25} {train_seconds:>8} {row['single_row_ms']:>9.2f} {row['f1'] * 100:>6.2f}%")
+
+    # Feature Importance (first tree member as representative, e.g. Random Forest)
+    importances = next((model.feature_importances_ for _, _, model in members
+                        if hasattr(model, 'feature_importances_')), np.zeros(len(feature_cols)))
     feature_importance = [
         {'feature': col, 'importance': round(float(imp), 4)}
         for col, imp in zip(feature_cols, importances)
     ]
     feature_importance = sorted(feature_importance, key=lambda x: x['importance'], reverse=True)
 
-    # Collect all stats
-    stats = {
-        'rf':        rf_stats,
-        'lr':        lr_stats,
-        'gb':        gb_stats,
-        'ensemble':  ens_stats,
+    return {
+        **evaluation['models'],
         'class_names':  list(target_encoder.classes_),
         'num_features': len(feature_cols),
-        'train_size':   int(X_train.shape[0]),
+        'train_size':   int(train_size),
         'test_size':    int(X_test.shape[0]),
-        'confusion_matrix': cm.tolist(),
+        'confusion_matrix': evaluation['confusion_matrix'],
+        'per_class':        evaluation['per_class'],
+        'top_k_accuracy':   evaluation['top_k_accuracy'],
+        'inference_ms':     evaluation['inference_ms'],
+        'model_comparison': comparison,
         'feature_importance': feature_importance,
         'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
 
-    # ── Step 4: Save model files ───────────────────────────────────────────────
+
+# ── Helper: Reference sketch for drift monitoring ─────────────────────────────
+
+def training_reference(X_train_scaled, y_train, info):
+    """Histogram sketch of the unscaled training rows (see src/drift.py)."""
+    return build_reference(info['scaler'].inverse_transform(X_train_scaled), y_train,
+                           info['feature_cols'], info['feature_encoders'],
+                           info['label_encoder'].classes_)
+
+
+# ── Helper: Save all model files + stats ─────────────────────────────────────
+
+def save_artifacts(members, ensemble, info, stats, metadata):
+    """
+    Write the individual models, the preprocessor, the Flask bundle and
+    model_stats.json. `metadata` is merged into the bundle metadata.
+    """
+
     print("\n" + "=" * 55)
     print("  SAVING MODEL FILES")
     print("=" * 55)
@@ -167,19 +398,25 @@ def train():
     os.makedirs(MODEL_DIR,  exist_ok=True)
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+    target_encoder     = info['label_encoder']
+    feature_cols       = info['feature_cols']
+    inference_defaults = info.get('inference_defaults', {})
+    vocabularies       = vocabularies_to_json(info['feature_encoders'], target_encoder, TARGET_COL)
+
     # Save each model individually (for easy inspection)
-    save_pkl(rf,       'random_forest.pkl')
-    save_pkl(lr,       'logistic_regression.pkl')
-    save_pkl(gb,       'gradient_boosting.pkl')
+    for key, _, model in members:
+        save_pkl(model, MODEL_ZOO[key]['filename'])
     save_pkl(ensemble, 'ensemble_model.pkl')
 
     # Save preprocessor separately (scaler + encoders + column order)
     preprocessor = {
-        'scaler':           scaler,
-        'feature_encoders': feature_encoders,
+        'scaler':           info['scaler'],
+        'feature_encoders': info['feature_encoders'],
         'label_encoder':    target_encoder,
         'feature_cols':     feature_cols,
         'inference_defaults': inference_defaults,
+        'outlier_bounds':   info.get('outlier_bounds', {}),
+        'vocabularies':     vocabularies,
     }
     save_pkl(preprocessor, 'preprocessor.pkl')
 
@@ -194,21 +431,32 @@ def train():
     # Save the full bundle that the Flask app uses (model + preprocessor together)
     full_bundle = {
         'model':            ensemble,
-        'scaler':           scaler,
+        'scaler':           info['scaler'],
         'label_encoder':    target_encoder,
-        'feature_encoders': feature_encoders,
+        'feature_encoders': info['feature_encoders'],
         'feature_cols':     feature_cols,
         'inference_defaults': inference_defaults,
+        'outlier_bounds':   info.get('outlier_bounds', {}),
+        'vocabularies':     vocabularies,
+        'drift_reference':  info.get('drift_reference'),
         'metadata': {
             'schema_version': 1,
             'model_version': datetime.now().strftime('%Y%m%d_%H%M%S'),
             'created_at': datetime.now().isoformat(timespec='seconds'),
             'schema_hash': schema_hash,
+            **metadata,
         },
         'stats':            stats,
     }
     save_pkl(full_bundle, 'obesity_model.pkl')
 
+    # NumPy-only copy for the sklearn-free runtime (MODEL_RUNTIME=numpy)
+    try:
+        export_bundle(full_bundle, os.path.join(MODEL_DIR, 'obesity_runtime.npz'))
+        print("  Saved → models/obesity_runtime.npz")
+    except ValueError as e:
+        print(f"  Skipped models/obesity_runtime.npz: {e}")
+
     # Save accuracy stats as JSON for the Statistics page
     stats_path = os.path.join(OUTPUT_DIR, 'model_stats.json')
     with open(stats_path, 'w') as f:
@@ -216,9 +464,297 @@ def train():
     print(f"  Saved → outputs/model_stats.json")
 
     print()
+    return full_bundle
+
+
+# ── Incremental Training ──────────────────────────────────────────────────────
+
+def _load_previous_bundle():
+    if not os.path.exists(BUNDLE_PATH):
+        raise FullRetrainRequired('no previous model bundle')
+    with open(BUNDLE_PATH, 'rb') as f:
+        return pickle.load(f)
+
+
+def training_fingerprint(data_hash, params, chunk_rows=None, compare=False):
+    """
+    SHA-256 over everything that determines the trained model: the CSV
+    bytes, the preprocessing settings, the hyperparameters (and whether the
+    zoo comparison ran) and the versions of the libraries that fit and
+    pickle it.
+    """
+    chunk_rows = PREPROCESS_CHUNK_ROWS if chunk_rows is None else chunk_rows
+    payload = json.dumps({
+        'data_sha256':   data_hash,
+        'preprocessing': PREPROCESSING_CONFIG,
+        'chunked':       chunk_rows > 0,
+        'params':        params,
+        'compare_zoo':   bool(compare),
+        'code_version':  TRAINING_CODE_VERSION,
+        'python':        platform.python_version(),
+        'sklearn':       sklearn.__version__,
+        'numpy':         np.__version__,
+        'pandas':        pd.__version__,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def record_reuse(fingerprint):
+    """
+    Append a reuse event to models/training_reuse.json (reset whenever the
+    fingerprint changes) and return the log. The bundle itself is not
+    rewritten: that would make every worker reload it.
+    """
+    path = os.path.join(MODEL_DIR, REUSE_LOG_FILE)
+    try:
+        with open(path) as f:
+            log = json.load(f)
+    except (OSError, ValueError):
+        log = {}
+    if log.get('fingerprint') != fingerprint:
+        log = {'fingerprint': fingerprint, 'reuse_count': 0, 'reuse_events': []}
+
+    log['reuse_count'] += 1
+    now = datetime.now().isoformat(timespec='seconds')
+    log['reuse_events'] = (log['reuse_events'] + [now])[-MAX_REUSE_EVENTS:]
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(log, f, indent=2)
+    os.replace(tmp_path, path)
+    return log
+
+
+def reuse_previous_run(fingerprint):
+    """
+    The saved (bundle, stats) when the bundle was fully trained from this
+    fingerprint, else None. The reuse is recorded in the reuse log.
+    """
+    try:
+        bundle = _load_previous_bundle()
+    except Exception:
+        # missing or unreadable bundle: nothing to reuse
+        return None
+    metadata = bundle.get('metadata') or {}
+    if metadata.get('fingerprint') != fingerprint or not bundle.get('stats'):
+        return None
+
+    log = record_reuse(fingerprint)
+
+    print("=" * 55)
+    print("  TRAINING CACHE HIT")
+    print("=" * 55)
+    print(f"  Fingerprint : {fingerprint[:16]}…")
+    print(f"  Trained at  : {metadata.get('created_at')} (model {metadata.get('model_version')})")
+    print(f"  Reused      : {log['reuse_count']}× — run with --force to retrain")
+
+    stats_path = os.path.join(OUTPUT_DIR, 'model_stats.json')
+    if not os.path.exists(stats_path):
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        with open(stats_path, 'w') as f:
+            json.dump(bundle['stats'], f, indent=2)
+        print(f"  Saved → outputs/model_stats.json")
+    print()
+    return bundle, bundle['stats']
+
+
+def train_incremental(n_jobs=None):
+    """
+    Grow the previous ensemble on rows appended since the last run
+    (n_jobs caps the cores each refit may use, as in fit_models).
+
+    - Random Forest : warm_start adds trees fitted on the new rows
+                      (plus an equal-size replay sample of older rows so
+                      every class is represented)
+    - Gradient Boost: warm_start continues with INCREMENTAL_GB_STAGES stages
+    - Logistic Reg. : warm-started refit on all rows seen so far
+
+    Raises FullRetrainRequired when a full retrain is needed instead.
+    """
+    bundle   = _load_previous_bundle()
+    metadata = bundle.get('metadata') or {}
+    watermark = metadata.get('data_watermark')
+    base      = metadata.get('base_watermark')
+    if not watermark or not base or 'outlier_bounds' not in bundle:
+        raise FullRetrainRequired('previous bundle has no data watermark')
+
+    split = read_rows_since(watermark)
+    if split is None:
+        raise FullRetrainRequired('dataset was modified before the last watermark')
+    df_before, df_new, new_watermark = split
+
+    if new_watermark['columns'] != watermark['columns']:
+        raise FullRetrainRequired('dataset columns changed')
+    if len(df_new) == 0:
+        print("  No new rows since the last run — model is up to date.\n")
+        return bundle, bundle['stats']
+
+    base_rows = base['rows']
+    if len(df_new) > INCREMENTAL_MAX_NEW_FRACTION * base_rows:
+        raise FullRetrainRequired(
+            f'{len(df_new)} new rows exceed {INCREMENTAL_MAX_NEW_FRACTION:.0%} of the base dataset')
+
+    feature_encoders, label_encoder = bundle_encoders(bundle)
+    info = {
+        'scaler':             bundle['scaler'],
+        'feature_encoders':   feature_encoders,
+        'label_encoder':      label_encoder,
+        'feature_cols':       bundle['feature_cols'],
+        'inference_defaults': bundle.get('inference_defaults', {}),
+        'outlier_bounds':     bundle['outlier_bounds'],
+    }
+    scaler = info['scaler']
+
+    try:
+        X_base,  y_base  = transform_with_fitted(df_before.iloc[:base_rows], info)
+        X_prior, y_prior = transform_with_fitted(df_before.iloc[base_rows:], info)
+        X_new,   y_new   = transform_with_fitted(df_new, info)
+    except ValueError as exc:
+        raise FullRetrainRequired(f'schema change: {exc}')
+
+    # Reproduce the original train/test split of the base rows
+    train_idx, test_idx = split_indices(y_base)
+    X_old_train = scaler.transform(np.vstack([X_base[train_idx], X_prior]))
+    y_old_train = np.concatenate([y_base[train_idx], y_prior])
+    X_old_test  = scaler.transform(X_base[test_idx])
+    y_old_test  = y_base[test_idx]
+    X_new       = scaler.transform(X_new)
+
+    drift = float(np.abs(X_new.mean(axis=0)).max())
+    if drift > INCREMENTAL_DRIFT_THRESHOLD:
+        raise FullRetrainRequired(
+            f'feature drift {drift:.2f} SD exceeds {INCREMENTAL_DRIFT_THRESHOLD} SD')
+
+    # Hold out 20% of the new rows so the test set covers them too
+    rng = np.random.RandomState(42)
+    order = rng.permutation(len(y_new))
+    n_test = int(round(len(order) * 0.20))
+    X_new_test,  y_new_test  = X_new[order[:n_test]], y_new[order[:n_test]]
+    X_new_train, y_new_train = X_new[order[n_test:]], y_new[order[n_test:]]
+
+    replay = rng.choice(len(y_old_train), size=min(len(y_new_train), len(y_old_train)), replace=False)
+    X_fit = np.vstack([X_new_train, X_old_train[replay]])
+    y_fit = np.concatenate([y_new_train, y_old_train[replay]])
+
+    ensemble = bundle['model']
+    if set(np.unique(y_fit)) != set(ensemble.classes_):
+        raise FullRetrainRequired('new rows plus replay sample do not cover every class')
+
+    unsupported = [key for key, model in ensemble.named_estimators_.items()
+                   if not isinstance(model, INCREMENTAL_MEMBER_TYPES)]
+    if unsupported:
+        raise FullRetrainRequired(f'no incremental update for ensemble members {unsupported}')
+
+    print("=" * 55)
+    print("  INCREMENTAL TRAINING")
+    print("=" * 55)
+    print(f"  New rows         : {len(y_new)} ({len(y_new_train)} train / {n_test} test)")
+    print(f"  Max feature drift: {drift:.2f} SD")
+
+    previous_params = metadata.get('params') or DEFAULT_PARAMS
+    members = []
+    print()
+    for key, model in ensemble.named_estimators_.items():
+        name = MODEL_ZOO[key]['name'] if key in MODEL_ZOO else key
+        if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+            base_trees = (previous_params.get(key) or {}).get('n_estimators', len(model.estimators_))
+            new_trees = max(1, int(np.ceil(base_trees * len(y_new_train) / max(len(y_old_train), 1))))
+            print(f"  Growing {name} by {new_trees} trees...")
+            model.set_params(warm_start=True, n_estimators=len(model.estimators_) + new_trees)
+            with training_threads(model, n_jobs):
+                model.fit(X_fit, y_fit)
+        elif isinstance(model, GradientBoostingClassifier):
+            print(f"  Continuing {name} for {INCREMENTAL_GB_STAGES} stages...")
+            model.set_params(warm_start=True, n_estimators=model.n_estimators_ + INCREMENTAL_GB_STAGES)
+            with training_threads(model, n_jobs):
+                model.fit(X_fit, y_fit)
+        elif isinstance(model, HistGradientBoostingClassifier):
+            print(f"  Continuing {name} for up to {INCREMENTAL_GB_STAGES} iterations...")
+            model.set_params(warm_start=True, max_iter=model.n_iter_ + INCREMENTAL_GB_STAGES)
+            with training_threads(model, n_jobs):
+                model.fit(X_fit, y_fit)
+        else:
+            print(f"  Refreshing {name}...")
+            model.set_params(warm_start=True)
+            with training_threads(model, n_jobs):
+                model.fit(np.vstack([X_old_train, X_new_train]), np.concatenate([y_old_train, y_new_train]))
+        members.append((key, name, model))
+
+    X_test = np.vstack([X_old_test, X_new_test])
+    y_test = np.concatenate([y_old_test, y_new_test])
+    info['drift_reference'] = training_reference(
+        np.vstack([X_old_train, X_new_train]), np.concatenate([y_old_train, y_new_train]), info)
+    stats = build_stats(members, ensemble, X_test, y_test, info['label_encoder'],
+                        info['feature_cols'], train_size=len(y_old_train) + len(y_new_train))
+
+    full_bundle = save_artifacts(members, ensemble, info, stats, {
+        'training_mode':      'incremental',
+        'incremental_rounds': metadata.get('incremental_rounds', 0) + 1,
+        'params':             metadata.get('params'),
+        'data_watermark':     new_watermark,
+        'base_watermark':     base,
+    })
     return full_bundle, stats
 
 
+# ── Main Training Function ────────────────────────────────────────────────────
+
+def train(use_cache=True, incremental=False, chunk_rows=None, force=False, compare=None, n_jobs=None):
+    """
+    Full training pipeline.
+    Returns (bundle, stats, reused): the model bundle (used by Flask app),
+    the stats dictionary and whether a previous run was reused unchanged.
+
+    use_cache=False forces preprocessing to run even if the dataset is unchanged.
+    incremental=True only fits the rows appended since the last run, falling
+    back to a full retrain when that is not safe.
+    chunk_rows > 0 preprocesses the CSV in streaming chunks (large exports).
+    force=True retrains even when the saved model has the same fingerprint.
+    compare=True also fits the zoo entries outside the ensemble for the
+    comparison table (default MODEL_ZOO_COMPARE).
+    n_jobs caps the cores each fit may use (the app sets it for /train).
+    """
+
+    if incremental:
+        try:
+            bundle, stats = train_incremental(n_jobs=n_jobs)
+            return bundle, stats, False
+        except FullRetrainRequired as reason:
+            print(f"  Full retrain required: {reason}\n")
+
+    watermark = data_watermark()
+    params = load_params()
+    compare = MODEL_ZOO_COMPARE if compare is None else compare
+    fingerprint = training_fingerprint(dataset_hash(), params, chunk_rows, compare)
+    if not force:
+        reused = reuse_previous_run(fingerprint)
+        if reused is not None:
+            return (*reused, True)
+
+    # ── Step 1: Get preprocessed data ─────────────────────────────────────────
+    X_train, X_test, y_train, y_test, info = load_and_preprocess(use_cache=use_cache, chunk_rows=chunk_rows)
+
+    # ── Step 2: Train the ensemble members ────────────────────────────────────
+    members, ensemble, fit_seconds, extras = fit_models(X_train, y_train, params, compare=compare, n_jobs=n_jobs)
+
+    # ── Step 3: Evaluate all models ────────────────────────────────────────────
+    stats = build_stats(members, ensemble, X_test, y_test, info['label_encoder'],
+                        info['feature_cols'], train_size=X_train.shape[0],
+                        fit_seconds=fit_seconds, extras=extras)
+    info['drift_reference'] = training_reference(X_train, y_train, info)
+
+    # ── Step 4: Save model files ───────────────────────────────────────────────
+    full_bundle = save_artifacts(members, ensemble, info, stats, {
+        'training_mode':      'full',
+        'incremental_rounds': 0,
+        'params':             params,
+        'fingerprint':        fingerprint,
+        'data_watermark':     watermark,
+        'base_watermark':     watermark,
+    })
+    return full_bundle, stats, False
+
+
 # ── Standalone run ────────────────────────────────────────────────────────────
 if __name__ == '__main__':
-    train()
+    train(incremental='--incremental' in sys.argv, force='--force' in sys.argv,
+          compare=True if '--compare-zoo' in sys.argv else None)
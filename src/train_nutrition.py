@@ -2,12 +2,17 @@ import pandas as pd
 import numpy as np
 import pickle
 import os
+import sys
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.runtime.export import export_nutrition_bundle
+
 def train_nutrition_model():
     # 1. Load Data
     data_path = 'data/synthetic_nutrition_data.csv'
@@ -56,5 +61,9 @@ def train_nutrition_model():
         pickle.dump(bundle, f)
     print("Saved -> models/nutrition_model.pkl")
 
+    # NumPy-only copy for the sklearn-free runtime (MODEL_RUNTIME=numpy)
+    export_nutrition_bundle(bundle, 'models/nutrition_runtime.npz')
+    print("Saved -> models/nutrition_runtime.npz")
+
 if __name__ == "__main__":
     train_nutrition_model()
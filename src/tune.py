@@ -0,0 +1,291 @@
+"""
+tune.py
+--------
+Hyperparameter search for the ensemble members (RF, LR, GB) and the
+soft-voting weights, using successive halving on a process pool.
+
+How it works:
+  1. Load the preprocessed training data (cached by data_preprocessing.py)
+     and hold out 20% of it as a validation set (the test set is never used)
+  2. Copy the arrays ONCE into shared memory; every worker process attaches
+     to the same read-only buffers instead of receiving a pickled copy per task
+  3. Sample N random member configurations
+  4. Successive halving: fit every surviving config on a small slice of the
+     training rows, keep the best 1/eta by F1, multiply the slice by eta,
+     repeat until the survivors are fitted on all rows
+  5. Each trial builds its members through model_zoo (the production
+     settings, capped to one core while trials share the CPUs) and scores
+     every soft-voting weight combination from the cached member
+     probabilities (no refitting)
+  6. After the search, the finalists are refitted in this process alone,
+     uncapped, and their single-row latency is measured; latency measured
+     while other trials compete for the cores would not match production
+  7. The winner is written to models/tuned_params.json, which train() reads
+
+Objective (higher is better):
+    weighted F1 on the validation set  −  latency_weight × single-row latency (ms)
+
+Run it:
+    python -m src.tune --candidates 27 --workers 4
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+
+from src.data_preprocessing import load_and_preprocess
+from src.model_zoo import DEFAULT_MEMBERS, fit_member, single_row_latency_us
+from src.train import TUNED_PARAMS_PATH, soft_vote
+
+# ── Search space ──────────────────────────────────────────────────────────────
+SEARCH_SPACE = {
+    'rf': {
+        'n_estimators':     [100, 200, 300],
+        'max_depth':        [None, 12, 20],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features':     ['sqrt', 0.5],
+    },
+    'lr': {
+        'C':        [0.1, 1.0, 10.0],
+        'max_iter': [1000],
+    },
+    'gb': {
+        'n_estimators':  [100, 200, 300],
+        'learning_rate': [0.05, 0.1, 0.2],
+        'max_depth':     [2, 3, 4],
+        'subsample':     [0.8, 1.0],
+    },
+}
+
+# Soft-voting weights for DEFAULT_MEMBERS (rf, lr, gb), scored from cached probabilities
+WEIGHT_GRID = [
+    (1, 1, 1), (2, 1, 1), (1, 1, 2), (2, 1, 2),
+    (3, 1, 2), (2, 1, 3), (1, 0, 1), (2, 0, 1), (1, 0, 2),
+]
+
+DEFAULT_LATENCY_WEIGHT = 0.002   # F1 points traded per millisecond of latency
+LATENCY_REPEATS        = 15
+TRIAL_N_JOBS           = 1       # cores per trial while trials run side by side
+
+# Filled in each worker process by _attach_shared()
+_SHARED = {}
+
+
+# ── Shared memory ─────────────────────────────────────────────────────────────
+
+def share_arrays(arrays):
+    """
+    Copy numpy arrays into named shared-memory blocks.
+    Returns the blocks (keep them alive, unlink when done) and a small
+    picklable spec {name: (block_name, shape, dtype)} for the workers.
+    """
+    blocks, spec = [], {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        view[...] = array
+        blocks.append(block)
+        spec[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, spec
+
+
+def _attach_shared(spec):
+    """Process-pool initializer: map the shared blocks as read-only arrays."""
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        view.flags.writeable = False
+        _SHARED[name] = view
+        _SHARED[f'_block_{name}'] = block   # keep the mapping alive
+
+
+# ── One trial (runs in a worker process) ─────────────────────────────────────
+
+def run_trial(config, n_rows):
+    """
+    Fit the members of `config` on the first n_rows training rows and score
+    every WEIGHT_GRID combination on the validation set (F1 only: latency is
+    measured after the search, see finalist_latency_ms).
+    """
+    X_fit = _SHARED['X_fit'][:n_rows]
+    y_fit = _SHARED['y_fit'][:n_rows]
+    X_val = _SHARED['X_val']
+    y_val = _SHARED['y_val']
+
+    models = [fit_member(key, X_fit, y_fit, config[key], n_jobs=TRIAL_N_JOBS)[0]
+              for key in DEFAULT_MEMBERS]
+
+    # Every member must report probabilities for the same classes
+    classes = models[0].classes_
+    probas = np.stack([model.predict_proba(X_val) for model in models])
+
+    best = None
+    for weights in WEIGHT_GRID:
+        y_pred = classes[soft_vote(probas, weights).argmax(axis=1)]
+        f1 = f1_score(y_val, y_pred, average='weighted', zero_division=0)
+        if best is None or f1 > best['f1']:
+            best = {'weights': list(weights), 'f1': float(f1)}
+
+    return {**best, 'config': config, 'n_rows': n_rows}
+
+
+# ── Latency of the finalists (this process only, after the search) ───────────
+
+def finalist_latency_ms(config, X_fit, y_fit, X_val):
+    """
+    Single-row predict_proba latency of the config's members, summed (ms).
+    The members are fitted through model_zoo with the production settings
+    (n_jobs=-1 included) and timed while nothing else runs.
+    """
+    total_us = 0.0
+    for key in DEFAULT_MEMBERS:
+        model, _ = fit_member(key, X_fit, y_fit, config[key])
+        total_us += single_row_latency_us(model, X_val, repeats=LATENCY_REPEATS)
+    return total_us / 1000
+
+
+# ── Search ────────────────────────────────────────────────────────────────────
+
+def sample_configs(n, seed=42, space=None):
+    """Draw n distinct random member configurations from the search space."""
+    space = space or SEARCH_SPACE
+    rng = random.Random(seed)
+    grids = {
+        member: [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+        for member, grid in space.items()
+    }
+    total = 1
+    for options in grids.values():
+        total *= len(options)
+
+    configs, seen = [], set()
+    while len(configs) < min(n, total):
+        config = {member: rng.choice(options) for member, options in grids.items()}
+        key = json.dumps(config, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+
+def successive_halving(X_train, y_train, candidates=27, eta=3, workers=None,
+                       latency_weight=DEFAULT_LATENCY_WEIGHT, seed=42, space=None):
+    """
+    Run the search and return the winning trial result.
+    """
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=0.20, random_state=seed, stratify=y_train
+    )
+    configs = sample_configs(candidates, seed=seed, space=space)
+
+    # Number of halving rounds so that one config is left at the end
+    rounds = max(1, int(np.ceil(np.log(len(configs)) / np.log(eta))) + 1)
+    min_rows = max(len(np.unique(y_fit)) * 10, int(len(y_fit) / eta ** (rounds - 1)))
+
+    blocks, spec = share_arrays({
+        'X_fit': X_fit, 'y_fit': y_fit, 'X_val': X_val, 'y_val': y_val,
+    })
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared,
+                                 initargs=(spec,)) as pool:
+            survivors = configs
+            for rung in range(rounds):
+                n_rows = min(len(y_fit), min_rows * eta ** rung)
+                start = time.perf_counter()
+                results = list(pool.map(run_trial, survivors, [n_rows] * len(survivors)))
+                results.sort(key=lambda r: r['f1'], reverse=True)
+
+                print(f"  Rung {rung + 1}/{rounds}: {len(survivors):>3} configs × "
+                      f"{n_rows:>5} rows  →  best F1 {results[0]['f1'] * 100:.2f}%  "
+                      f"[{time.perf_counter() - start:.1f}s]")
+
+                if n_rows >= len(y_fit) or len(results) == 1:
+                    break
+                survivors = [r['config'] for r in results[:max(1, len(results) // eta)]]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    # ── Objective over the finalists, with latency measured in isolation ──────
+    finalists = results[:max(1, eta)]
+    print(f"\n  Timing {len(finalists)} finalist(s) with the production settings...")
+    for result in finalists:
+        latency_ms = finalist_latency_ms(result['config'], X_fit, y_fit, X_val)
+        result['latency_ms'] = round(latency_ms, 3)
+        result['objective'] = result['f1'] - latency_weight * latency_ms
+        print(f"    F1={result['f1'] * 100:.2f}%  {latency_ms:.2f} ms  →  objective {result['objective']:.4f}")
+    return max(finalists, key=lambda r: r['objective'])
+
+
+def write_tuned_params(best, path=None):
+    """Save the winning config in the format train.load_params() reads."""
+    path = path or TUNED_PARAMS_PATH
+    payload = {
+        'rf':         best['config']['rf'],
+        'lr':         best['config']['lr'],
+        'gb':         best['config']['gb'],
+        'weights':    best['weights'],
+        'f1':         round(best['f1'], 4),
+        'latency_ms': best['latency_ms'],
+        'objective':  round(best['objective'], 4),
+        'tuned_at':   datetime.now().isoformat(timespec='seconds'),
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    return payload
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Successive-halving search for the ensemble members.')
+    parser.add_argument('--candidates', type=int, default=27, help='number of random configs to start with')
+    parser.add_argument('--eta', type=int, default=3, help='keep the best 1/eta configs each round')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--latency-weight', type=float, default=DEFAULT_LATENCY_WEIGHT,
+                        help='F1 penalty per millisecond of single-row latency')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--dry-run', action='store_true', help='print the winner without saving it')
+    args = parser.parse_args(argv)
+
+    X_train, _, y_train, _, _ = load_and_preprocess()
+
+    print("=" * 55)
+    print("  HYPERPARAMETER SEARCH (successive halving)")
+    print("=" * 55)
+    best = successive_halving(X_train, y_train, candidates=args.candidates, eta=args.eta,
+                              workers=args.workers, latency_weight=args.latency_weight,
+                              seed=args.seed)
+
+    print()
+    print(f"  Best F1        : {best['f1'] * 100:.2f}%")
+    print(f"  Latency (1 row): {best['latency_ms']:.2f} ms")
+    print(f"  Weights        : {best['weights']}")
+    print(f"  Config         : {json.dumps(best['config'])}")
+
+    if not args.dry_run:
+        write_tuned_params(best)
+        print(f"\n  Saved → models/{os.path.basename(TUNED_PARAMS_PATH)}")
+        print("  Run `python main.py` to train with these settings.")
+    print()
+    return best
+
+
+# ── Standalone run ────────────────────────────────────────────────────────────
+if __name__ == '__main__':
+    main()
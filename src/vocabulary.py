@@ -0,0 +1,135 @@
+"""
+vocabulary.py
+--------------
+Category vocabularies: the text → integer code mapping of every categorical
+column and of the target.
+
+A vocabulary is the sorted list of a column's training values and a value's
+code is its position in that list — exactly the codes LabelEncoder gave, so
+models trained on LabelEncoder codes keep working. Encoding goes through
+pandas categoricals: the typed CSV loader already stores each text column
+as a category (a few distinct values plus integer codes), so fitting only
+sorts the distinct values and encoding remaps codes instead of comparing
+strings row by row.
+
+The vocabularies are stored in the model bundle as plain JSON
+(bundle['vocabularies']) next to the encoder objects, so they can be read
+without unpickling anything and reused for new data.
+
+Values that are not in a vocabulary are handled explicitly:
+  unseen='error'    ValueError naming the column and the values (default)
+  unseen='default'  replaced by the column's most frequent training value
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.runtime.models import VocabularyEncoder
+
+VOCABULARY_VERSION = 1
+UNSEEN_POLICIES    = ('error', 'default')
+
+
+def _as_text(values):
+    """values as a Series of text (kept categorical when it already is)."""
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        if pd.api.types.is_string_dtype(values.cat.categories):
+            return values
+        return values.cat.rename_categories(values.cat.categories.astype(str))
+    return values.astype(str)
+
+
+class Vocabulary(VocabularyEncoder):
+    """
+    Sorted vocabulary of one column. Works wherever a fitted LabelEncoder
+    did (classes_, transform, inverse_transform) and encodes whole columns
+    with codes().
+    """
+
+    def __init__(self, classes, default=None):
+        super().__init__([str(c) for c in classes])
+        self.default = None if default is None else str(default)
+
+    @classmethod
+    def fit(cls, values):
+        """Vocabulary of the values in a column; default = most frequent (ties → smallest)."""
+        counts = _as_text(values).value_counts()
+        counts = counts[counts > 0]       # categoricals also count unused categories
+        if counts.empty:
+            return cls([])
+        default = min(counts.index[counts == counts.max()])
+        return cls(sorted(counts.index), default=default)
+
+    def codes(self, values, unseen='error', column=None):
+        """Integer codes (int64) for a column of values, in one vectorized step."""
+        if unseen not in UNSEEN_POLICIES:
+            raise ValueError(f"unseen must be one of {UNSEEN_POLICIES}, got {unseen!r}")
+        text = _as_text(values)
+        index = pd.Index(self.classes_)
+        if isinstance(text.dtype, pd.CategoricalDtype):
+            # remap the column's own category codes: one lookup per distinct value
+            mapping = np.append(index.get_indexer(text.cat.categories), -1)
+            codes = mapping[text.cat.codes.to_numpy()].astype(np.int64)
+        else:
+            codes = index.get_indexer(text).astype(np.int64)
+        missing = codes < 0
+        if missing.any():
+            if unseen == 'default' and self.default is not None:
+                codes[missing] = self._codes[self.default]
+            else:
+                found = sorted(set(text[missing].astype(str)))
+                raise ValueError(f"Unseen categories in '{column}': {found}")
+        return codes
+
+    def transform(self, values):
+        return self.codes(values)
+
+    def to_json(self):
+        return {'classes': [str(c) for c in self.classes_], 'default': self.default}
+
+    @classmethod
+    def from_json(cls, payload):
+        return cls(payload['classes'], default=payload.get('default'))
+
+
+def fit_vocabularies(df, columns):
+    """One Vocabulary per column of df that is listed in columns."""
+    return {col: Vocabulary.fit(df[col]) for col in columns if col in df.columns}
+
+
+def encode_frame(df, vocabularies, unseen='error'):
+    """df with every vocabulary column replaced by its codes (one new frame)."""
+    codes = {col: vocabulary.codes(df[col], unseen, column=col)
+             for col, vocabulary in vocabularies.items() if col in df.columns}
+    return df.assign(**codes)
+
+
+def as_vocabulary(encoder):
+    """A Vocabulary for a LabelEncoder-like object (older bundles)."""
+    if isinstance(encoder, Vocabulary):
+        return encoder
+    return Vocabulary(encoder.classes_)
+
+
+def vocabularies_to_json(feature_encoders, label_encoder, target_col):
+    """The JSON payload stored as bundle['vocabularies']."""
+    columns = {col: as_vocabulary(encoder).to_json() for col, encoder in feature_encoders.items()}
+    columns[target_col] = as_vocabulary(label_encoder).to_json()
+    return {'version': VOCABULARY_VERSION, 'target': target_col, 'columns': columns}
+
+
+def vocabularies_from_json(payload):
+    """(feature_encoders, label_encoder) rebuilt from a vocabularies payload."""
+    if payload.get('version') != VOCABULARY_VERSION:
+        raise ValueError(f"Unsupported vocabulary version: {payload.get('version')}")
+    vocabularies = {col: Vocabulary.from_json(entry) for col, entry in payload['columns'].items()}
+    label_encoder = vocabularies.pop(payload['target'])
+    return vocabularies, label_encoder
+
+
+def bundle_encoders(bundle):
+    """The bundle's (feature_encoders, label_encoder), from its JSON vocabularies when present."""
+    if bundle.get('vocabularies'):
+        return vocabularies_from_json(bundle['vocabularies'])
+    return bundle['feature_encoders'], bundle['label_encoder']
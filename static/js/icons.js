@@ -0,0 +1,47 @@
+/* ============================================================
+   icons.js — Offline replacement for lucide.createIcons()
+
+   Swaps every <i data-lucide=…> placeholder for an inline <svg> that
+   references the locally built sprite (static/icons/sprite.svg,
+   generated by `python -m src.assets`). Keeps the same API, so
+   existing `lucide.createIcons()` calls keep working.
+   ============================================================ */
+
+(function () {
+  const SVG_NS = 'http://www.w3.org/2000/svg';
+  const spriteUrl = document.currentScript.dataset.sprite;
+
+  // Same defaults the lucide CDN build puts on every icon
+  const DEFAULT_ATTRS = {
+    width: '24',
+    height: '24',
+    viewBox: '0 0 24 24',
+    fill: 'none',
+    stroke: 'currentColor',
+    'stroke-width': '2',
+    'stroke-linecap': 'round',
+    'stroke-linejoin': 'round',
+    'aria-hidden': 'true',
+  };
+
+  function createIcons() {
+    document.querySelectorAll('i[data-lucide]').forEach((el) => {
+      const name = el.getAttribute('data-lucide');
+      const svg = document.createElementNS(SVG_NS, 'svg');
+
+      Object.entries(DEFAULT_ATTRS).forEach(([key, value]) => svg.setAttribute(key, value));
+      Array.from(el.attributes).forEach((attr) => {
+        if (attr.name !== 'class') svg.setAttribute(attr.name, attr.value);
+      });
+      svg.setAttribute('class', `lucide lucide-${name} ${el.getAttribute('class') || ''}`.trim());
+
+      const use = document.createElementNS(SVG_NS, 'use');
+      use.setAttribute('href', `${spriteUrl}#${name}`);
+      svg.appendChild(use);
+
+      el.replaceWith(svg);
+    });
+  }
+
+  window.lucide = { createIcons };
+})();
@@ -0,0 +1,114 @@
+import fcntl
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import app as app_module
+from src.admission import AdmissionPool, ExclusivePool, Rejected
+
+
+class AdmissionPoolTests(unittest.TestCase):
+    def test_full_queue_is_rejected_immediately(self):
+        pool = AdmissionPool('t', max_concurrent=1, max_queue=0, timeout_ms=1000)
+        started = pool.acquire()
+        t0 = time.monotonic()
+        with self.assertRaises(Rejected) as ctx:
+            pool.acquire()
+        self.assertLess(time.monotonic() - t0, 0.1)
+        self.assertEqual(ctx.exception.reason, 'queue full')
+        self.assertGreaterEqual(ctx.exception.retry_after, 1)
+        pool.release(started)
+        pool.release(pool.acquire())
+        self.assertEqual(pool.stats()['rejected_queue_full'], 1)
+
+    def test_waiter_times_out_at_deadline(self):
+        pool = AdmissionPool('t', max_concurrent=1, max_queue=4, timeout_ms=50)
+        pool.acquire()
+        with self.assertRaises(Rejected) as ctx:
+            pool.acquire()
+        self.assertEqual(ctx.exception.reason, 'queue deadline exceeded')
+        self.assertEqual(pool.stats()['queued'], 0)
+
+    def test_waiter_gets_slot_when_released(self):
+        pool = AdmissionPool('t', max_concurrent=1, max_queue=4, timeout_ms=2000)
+        started = pool.acquire()
+        admitted = []
+        waiter = threading.Thread(target=lambda: admitted.append(pool.acquire()))
+        waiter.start()
+        time.sleep(0.05)
+        self.assertEqual(pool.stats()['queued'], 1)
+        pool.release(started)
+        waiter.join(2)
+        self.assertEqual(len(admitted), 1)
+        self.assertEqual(pool.stats()['active'], 1)
+
+
+class ExclusivePoolTests(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.lock_path = os.path.join(tmp_dir, 'train.lock')
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs fork')
+    def test_lock_held_by_another_worker_is_rejected(self):
+        pool = ExclusivePool('train', 1, 0, 0, self.lock_path)
+        ready, done = os.pipe(), os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            other = ExclusivePool('train', 1, 0, 0, self.lock_path)
+            started = other.acquire()
+            os.write(ready[1], b'x')
+            os.read(done[0], 1)
+            other.release(started)
+            os._exit(0)
+        os.read(ready[0], 1)
+        try:
+            with self.assertRaises(Rejected) as ctx:
+                pool.acquire()
+        finally:
+            os.write(done[1], b'x')
+            os.waitpid(pid, 0)
+        self.assertEqual(ctx.exception.reason, 'running in another worker')
+        stats = pool.stats()
+        self.assertEqual((stats['active'], stats['admitted'], stats['rejected_other_worker']), (0, 0, 1))
+
+        pool.release(pool.acquire())
+        fd = os.open(self.lock_path, os.O_RDWR)
+        self.addCleanup(os.close, fd)
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)   # released again
+
+
+class AdmissionRouteTests(unittest.TestCase):
+    def setUp(self):
+        app_module.app.config['TESTING'] = True
+        self.client = app_module.app.test_client()
+
+    def test_busy_train_returns_503_with_retry_after(self):
+        pool = app_module.ADMISSION_POOLS['train']
+        started = pool.acquire()
+        try:
+            response = self.client.post('/train')
+        finally:
+            pool.release(started)
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+        self.assertFalse(response.get_json()['success'])
+
+    def test_get_pages_bypass_admission_and_metrics_are_exported(self):
+        pool = app_module.ADMISSION_POOLS['predict']
+        held = [pool.acquire() for _ in range(pool.max_concurrent)]
+        try:
+            self.assertEqual(self.client.get('/predict').status_code, 200)
+        finally:
+            for started in held:
+                pool.release(started)
+        metrics = self.client.get('/metrics/admission').get_json()
+        self.assertEqual(set(metrics), {'predict', 'advance', 'explain', 'target', 'report', 'train'})
+        self.assertEqual(metrics['train']['max_queue'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import app as app_module
+import src.assets as assets_module
+from src.assets import build_sprite, find_used_icons, hashed_name
+
+
+class AssetPipelineTests(unittest.TestCase):
+    def setUp(self):
+        app_module.app.config['TESTING'] = True
+        self.client = app_module.app.test_client()
+
+    def test_sprite_contains_only_used_icons(self):
+        icons = find_used_icons()
+        self.assertIn('brain', icons)
+        sprite = build_sprite(icons)
+        self.assertEqual(sprite.count('<symbol'), len(icons))
+
+    def test_url_for_uses_manifest_and_assets_are_immutable(self):
+        with tempfile.TemporaryDirectory() as dist_dir:
+            data = b'body { color: red; }' * 50
+            name = hashed_name('css/style.css', data)
+            os.makedirs(os.path.join(dist_dir, 'css'))
+            with open(os.path.join(dist_dir, name), 'wb') as f:
+                f.write(data)
+            with open(os.path.join(dist_dir, name + '.gz'), 'wb') as f:
+                f.write(gzip.compress(data))
+
+            manifest_path = os.path.join(dist_dir, 'manifest.json')
+            with open(manifest_path, 'w') as f:
+                json.dump({'css/style.css': name}, f)
+
+            with patch.object(app_module, 'ASSET_MANIFEST_PATH', manifest_path), \
+                    patch.object(app_module, 'DIST_DIR', dist_dir):
+                page = self.client.get('/learn')
+                self.assertIn(f'/assets/{name}'.encode(), page.data)
+
+                plain = self.client.get(f'/assets/{name}', headers={'Accept-Encoding': 'identity'})
+                self.assertEqual(plain.data, data)
+                self.assertIn('immutable', plain.headers['Cache-Control'])
+                plain.close()
+
+                zipped = self.client.get(f'/assets/{name}', headers={'Accept-Encoding': 'gzip'})
+                self.assertEqual(zipped.headers.get('Content-Encoding'), 'gzip')
+                self.assertEqual(gzip.decompress(zipped.data), data)
+                zipped.close()
+
+
+    def test_rebuilt_manifest_changes_urls_and_etag(self):
+        with tempfile.TemporaryDirectory() as dist_dir:
+            manifest_path = os.path.join(dist_dir, 'manifest.json')
+            with patch.object(app_module, 'ASSET_MANIFEST_PATH', manifest_path):
+                with open(manifest_path, 'w') as f:
+                    json.dump({'css/style.css': 'css/style.aaaaaaaaaa.css'}, f)
+                first = self.client.get('/learn')
+                with open(manifest_path, 'w') as f:
+                    json.dump({'css/style.css': 'css/style.bbbbbbbbbb.css'}, f)
+                os.utime(manifest_path, ns=(0, os.stat(manifest_path).st_mtime_ns + 10 ** 9))
+                second = self.client.get('/learn', headers={'If-None-Match': first.headers['ETag']})
+
+            self.assertEqual(second.status_code, 200)
+            self.assertIn(b'/assets/css/style.bbbbbbbbbb.css', second.data)
+
+    def test_rebuild_keeps_previous_build_only(self):
+        with tempfile.TemporaryDirectory() as root:
+            static_dir, dist_dir = os.path.join(root, 'static'), os.path.join(root, 'static', 'dist')
+            os.makedirs(os.path.join(static_dir, 'css'))
+            with patch.multiple(assets_module, STATIC_DIR=static_dir, DIST_DIR=dist_dir,
+                                MANIFEST_PATH=os.path.join(dist_dir, 'manifest.json'),
+                                SPRITE_PATH=os.path.join(root, 'sprite.svg')), \
+                    patch.object(assets_module, 'find_used_icons', return_value=[]), \
+                    patch.object(assets_module, 'build_image_variants', return_value={}):
+                names = []
+                for version in range(3):
+                    with open(os.path.join(static_dir, 'css', 'app.css'), 'w') as f:
+                        f.write(f'body {{ order: {version}; }}' * 40)
+                    names.append(assets_module.build(verbose=False)['css/app.css'])
+
+            exists = [os.path.exists(os.path.join(dist_dir, name)) for name in names]
+            self.assertEqual(exists, [False, True, True])
+            self.assertFalse(os.path.exists(os.path.join(dist_dir, names[0] + '.gz')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import app as app_module
+from src.audit import AuditLog, query, read_indexes
+
+
+def entry(class_label, **extra):
+    return {'class_label': class_label, 'inputs': {'age': 30}, 'all_probs': {class_label: 90.0}, **extra}
+
+
+class AuditLogTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def make_log(self, **kwargs):
+        audit_log = AuditLog(self.directory, flush_ms=5, fsync='batch', **kwargs)
+        self.addCleanup(audit_log.close)
+        return audit_log
+
+    def test_records_are_batched_and_queryable(self):
+        audit_log = self.make_log(batch_size=64)
+        for i in range(100):
+            audit_log.record(entry('Obesity_Type_I' if i % 4 == 0 else 'Normal_Weight'))
+        audit_log.flush()
+
+        stats = audit_log.stats()
+        self.assertEqual(stats['written'], 100)
+        self.assertLess(stats['batches'], 100)
+        self.assertEqual(len(list(query(class_label='Obesity_Type_I', directory=self.directory))), 25)
+        self.assertEqual(len(list(query(directory=self.directory))), 100)
+
+    def test_rotation_compresses_and_query_skips_by_sidecar(self):
+        audit_log = self.make_log(batch_size=10, max_bytes=2000)
+        for _ in range(60):
+            audit_log.record(entry('Normal_Weight'))
+        audit_log.flush()
+        audit_log.record(entry('Obesity_Type_III'))
+        audit_log.close()
+
+        segments = [index['segment'] for index in read_indexes(self.directory)]
+        self.assertTrue(any(name.endswith('.jsonl.gz') for name in segments))
+        self.assertGreater(audit_log.stats()['rotations'], 0)
+
+        opened = []
+        original_open = open
+
+        def tracking_open(path, *args, **kwargs):
+            opened.append(os.path.basename(str(path)))
+            return original_open(path, *args, **kwargs)
+
+        with patch('builtins.open', tracking_open):
+            matches = list(query(class_label='Obesity_Type_III', directory=self.directory))
+        self.assertEqual(len(matches), 1)
+        data_files = [name for name in opened if name.endswith(('.jsonl', '.jsonl.gz'))]
+        self.assertEqual(len(data_files), 1)
+
+        all_records = list(query(directory=self.directory))
+        self.assertEqual(len(all_records), 61)
+        middle = sorted(r['ts'] for r in all_records)[30]
+        self.assertEqual(len(list(query(since=middle, directory=self.directory))), 31)
+
+    def test_full_queue_applies_backpressure_then_drops(self):
+        release = threading.Event()
+        audit_log = self.make_log(queue_size=2, block_ms=10, batch_size=1)
+        original_write = audit_log._write
+        audit_log._write = lambda records: (release.wait(5), original_write(records))
+
+        accepted = [audit_log.record(entry('Normal_Weight')) for _ in range(6)]
+        self.assertIn(False, accepted)
+        self.assertEqual(audit_log.stats()['dropped'], accepted.count(False))
+        release.set()
+        audit_log.flush()
+        self.assertEqual(audit_log.stats()['written'], accepted.count(True))
+
+    def test_unknown_fsync_policy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            AuditLog(self.directory, fsync='sometimes')
+
+
+class AuditRouteTests(unittest.TestCase):
+    def setUp(self):
+        app_module.app.config['TESTING'] = True
+        self.client = app_module.app.test_client()
+
+    @patch('src.predict.predict')
+    def test_prediction_is_audited(self, mock_predict):
+        mock_predict.return_value = {'class_label': 'Normal_Weight', 'confidence': 91.0, 'bmi': 22.0,
+                                     'all_probs': {'Normal_Weight': 91.0}, 'model_version': 'v1'}
+        audit_log = MagicMock()
+        with patch.object(app_module, 'MODEL_EXISTS', True), \
+                patch.object(app_module, 'get_audit_log', return_value=audit_log):
+            response = self.client.post('/api/explain', json={
+                'age': 30, 'gender': 'Male', 'height': 180, 'weight': 72,
+                'physical_activity': 'Moderate', 'family_history': 'No',
+            })
+        self.assertEqual(response.status_code, 200)
+        record = audit_log.record.call_args.args[0]
+        self.assertEqual(record['endpoint'], 'api_explain')
+        self.assertEqual(record['model_version'], 'v1')
+        self.assertEqual(record['inputs']['weight'], 72)
+        self.assertGreaterEqual(record['latency_ms'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+import numpy as np
+
+import src.data_preprocessing as dp
+
+
+class ChunkedPreprocessingTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_path = os.path.join(self.tmp_dir, 'obesity_dataset.csv')
+        with open(dp.DATA_PATH, 'r') as src:
+            lines = [line for _, line in zip(range(1202), src)]
+
+        # Blank a few cells (numeric, categorical and one target) so the
+        # fill-missing and drop-target steps are exercised too
+        header = lines[0].strip().split(',')
+        for row, col in [(5, 'Age'), (9, 'CAEC'), (40, 'Weight'), (77, 'MTRANS'), (300, 'NObeyesdad')]:
+            cells = lines[row].rstrip('\n').split(',')
+            cells[header.index(col)] = ''
+            lines[row] = ','.join(cells) + '\n'
+        with open(self.data_path, 'w') as dst:
+            dst.writelines(lines)
+
+        self.patch = patch.object(dp, 'DATA_PATH', self.data_path)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_typed_loader_uses_category_and_float32(self):
+        df = dp.read_typed_csv(self.data_path)
+        self.assertEqual(str(df['Gender'].dtype), 'category')
+        self.assertEqual(str(df['NObeyesdad'].dtype), 'category')
+        self.assertEqual(df['Weight'].dtype, np.float32)
+
+    def test_chunked_matches_in_memory_pipeline(self):
+        with redirect_stdout(io.StringIO()), \
+                patch.dict(dp.PREPROCESSING_CONFIG, {'outlier_quantiles': 'exact'}):
+            full = dp.run_pipeline()
+            chunked = dp.run_pipeline_chunked(chunk_rows=97)
+
+        full_info, chunked_info = full[4], chunked[4]
+        self.assertEqual(full_info['feature_cols'], chunked_info['feature_cols'])
+        for col, encoder in full_info['feature_encoders'].items():
+            self.assertEqual(list(encoder.classes_), list(chunked_info['feature_encoders'][col].classes_))
+        self.assertEqual(list(full_info['label_encoder'].classes_), list(chunked_info['label_encoder'].classes_))
+        for col, (lower, upper) in full_info['outlier_bounds'].items():
+            np.testing.assert_allclose(chunked_info['outlier_bounds'][col], (lower, upper), rtol=1e-6)
+        for col, value in full_info['inference_defaults'].items():
+            self.assertAlmostEqual(chunked_info['inference_defaults'][col], value, places=5)
+        self.assertEqual(full[5]['outliers_capped'], chunked[5]['outliers_capped'])
+
+        X_train, X_test, y_train, y_test = chunked[:4]
+        self.assertEqual(X_train.dtype, np.float32)
+        np.testing.assert_array_equal(y_train, full[2])
+        np.testing.assert_array_equal(y_test, full[3])
+        np.testing.assert_allclose(X_train, full[0], atol=1e-4)
+        np.testing.assert_allclose(X_test, full[1], atol=1e-4)
+
+    def test_sketched_caps_skip_the_order_statistic_passes(self):
+        with redirect_stdout(io.StringIO()):
+            data = dp.fill_missing_values(dp.load_data())
+        with redirect_stdout(io.StringIO()), \
+                patch.object(dp, '_streaming_order_stats', side_effect=AssertionError('extra pass')):
+            full = dp.run_pipeline()
+            chunked = dp.run_pipeline_chunked(chunk_rows=97)
+
+        self.assertEqual(chunked[5]['outlier_quantiles']['method'], 'sketch')
+        eps = chunked[5]['outlier_quantiles']['rank_error_bound']
+        for col in dp.NUMERIC_COLS:
+            # caps from any quartiles within the rank error bound
+            q1_low, q1_high, q3_low, q3_high = np.quantile(
+                data[col].to_numpy(np.float64), [0.25 - eps, 0.25 + eps, 0.75 - eps, 0.75 + eps])
+            lowest, _ = dp.iqr_bounds(q1_low, q3_high)
+            highest, _ = dp.iqr_bounds(q1_high, q3_low)
+            _, upper_low = dp.iqr_bounds(q1_high, q3_low)
+            _, upper_high = dp.iqr_bounds(q1_low, q3_high)
+            for result in (full, chunked):
+                lower, upper = result[4]['outlier_bounds'][col]
+                self.assertTrue(lowest - 1e-4 <= lower <= highest + 1e-4, col)
+                self.assertTrue(upper_low - 1e-4 <= upper <= upper_high + 1e-4, col)
+
+    def test_quantile_error_report_is_within_bound(self):
+        with redirect_stdout(io.StringIO()), \
+                patch.object(dp, 'QUANTILE_REPORT_PATH', os.path.join(self.tmp_dir, 'q.json')):
+            for chunk_rows in (0, 97):
+                report = dp.quantile_error_report(chunk_rows=chunk_rows)
+                self.assertTrue(report['within_bound'])
+                self.assertEqual(set(report['columns']), set(dp.NUMERIC_COLS))
+
+
+if __name__ == '__main__':
+    unittest.main()
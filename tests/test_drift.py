@@ -0,0 +1,98 @@
+import os
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+import app as app_module
+from src.drift import DriftMonitor, build_reference, psi
+from src.shm import SharedCounters
+
+FEATURE_COLS = ['Gender', 'Age', 'Weight']
+ENCODERS = {'Gender': SimpleNamespace(classes_=np.array(['Female', 'Male']))}
+CLASSES = ['Normal_Weight', 'Obesity_Type_I', 'Overweight_Level_I']
+
+
+def sample(rng, n, weight_shift=0.0):
+    return np.column_stack([
+        rng.integers(0, 2, n),
+        rng.normal(35, 10, n),
+        rng.normal(80 + weight_shift, 12, n),
+    ])
+
+
+class DriftMonitorTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.reference = build_reference(sample(rng, 4000), rng.integers(0, 3, 4000),
+                                         FEATURE_COLS, ENCODERS, CLASSES)
+        self.rng = rng
+        self.monitor = DriftMonitor(self.reference, FEATURE_COLS, f'test-{uuid.uuid4().hex}')
+        self.addCleanup(self.monitor.counters.unlink)
+
+    def record(self, X, class_index=0):
+        for row in X:
+            self.monitor.record(row, class_index)
+
+    def test_reference_sketch(self):
+        self.assertEqual(set(self.reference['numeric']), {'Age', 'Weight'})
+        self.assertEqual(len(self.reference['categorical']['Gender']['counts']), 2)
+        self.assertEqual(sum(self.reference['numeric']['Weight']['counts']), 4000)
+        self.assertEqual(len(self.reference['numeric']['Age']['edges']), 9)
+
+    def test_same_distribution_is_stable(self):
+        self.record(sample(self.rng, 2000))
+        report = self.monitor.report()
+        self.assertEqual(report['predictions'], 2000)
+        for feature in report['features'].values():
+            self.assertLess(feature['psi'], 0.1)
+            self.assertEqual(feature['status'], 'stable')
+        self.assertEqual(report['drifted'], [])
+
+    def test_shifted_feature_and_class_mix_drift(self):
+        self.record(sample(self.rng, 500, weight_shift=25.0), class_index=1)
+        report = self.monitor.report()
+        self.assertEqual(report['drifted'], ['Weight'])
+        self.assertGreater(report['features']['Weight']['ks'], 0.5)
+        self.assertEqual(report['classes']['status'], 'significant')
+        self.assertEqual(report['classes']['live']['Obesity_Type_I'], 500)
+
+    def test_too_few_predictions_are_not_judged(self):
+        self.record(sample(self.rng, 10, weight_shift=25.0))
+        self.assertEqual(self.monitor.report()['features']['Weight']['status'], 'insufficient_data')
+
+    def test_psi_is_zero_for_identical_counts(self):
+        self.assertAlmostEqual(psi([5, 10, 5], [50, 100, 50]), 0.0)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs fork')
+    def test_counts_are_shared_across_processes(self):
+        counters = SharedCounters(f'obesity-ai-test-{uuid.uuid4().hex[:12]}', 3)
+        self.addCleanup(counters.unlink)
+        counters.add(np.array([0, 1]))
+        pid = os.fork()
+        if pid == 0:
+            counters.add(np.array([0, 2]), amount=5)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(counters.totals().tolist(), [6, 1, 5])
+        self.assertEqual(counters.workers(), 2)
+
+
+class DriftRouteTests(unittest.TestCase):
+    def setUp(self):
+        app_module.app.config['TESTING'] = True
+        self.client = app_module.app.test_client()
+
+    @patch('src.predict.get_drift_report')
+    def test_drift_endpoint(self, mock_report):
+        mock_report.return_value = {'enabled': True, 'predictions': 0}
+        with patch.object(app_module, 'MODEL_EXISTS', True):
+            response = self.client.get('/drift')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['enabled'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, VotingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, confusion_matrix
+
+from src.train import evaluate_ensemble
+
+
+class EvaluationEngineTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(1)
+        X = rng.normal(size=(300, 4))
+        y = (X[:, 0] > 0).astype(int) + (X[:, 1] > 0.5).astype(int)
+        self.X_train, self.X_test = X[:200], X[200:]
+        self.y_train, self.y_test = y[:200], y[200:]
+
+        self.ensemble = VotingClassifier(
+            estimators=[('rf', RandomForestClassifier(n_estimators=10, random_state=0)),
+                        ('lr', LogisticRegression(max_iter=500))],
+            voting='soft',
+            weights=[2, 1],
+        ).fit(self.X_train, self.y_train)
+
+    def test_single_pass_matches_voting_classifier(self):
+        members = [(key, key, model) for key, model in self.ensemble.named_estimators_.items()]
+        with redirect_stdout(io.StringIO()):
+            result = evaluate_ensemble(members, self.ensemble, self.X_test, self.y_test,
+                                       ['a', 'b', 'c'])
+
+        y_pred = self.ensemble.predict(self.X_test)
+        self.assertAlmostEqual(result['models']['ensemble']['accuracy'],
+                               round(accuracy_score(self.y_test, y_pred), 4))
+        self.assertEqual(result['confusion_matrix'],
+                         confusion_matrix(self.y_test, y_pred).tolist())
+        self.assertEqual([row['class'] for row in result['per_class']], ['a', 'b', 'c'])
+        self.assertGreaterEqual(result['top_k_accuracy']['top_2'],
+                                result['models']['ensemble']['accuracy'])
+        self.assertIn('ensemble', result['inference_ms'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from sklearn.ensemble import (
+    GradientBoostingClassifier, HistGradientBoostingClassifier, RandomForestClassifier, VotingClassifier,
+)
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+import app as app_module
+import src.explain as explain_module
+from src.runtime import load_bundle
+from src.runtime.export import export_bundle
+
+
+def make_bundle(n_classes):
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(300, 5))
+    y = np.digitize(X[:, 0] + 0.5 * X[:, 1], np.linspace(-1, 1, n_classes - 1))
+    labels = np.array([f'class_{i}' for i in range(n_classes)])[y]
+    target_encoder = LabelEncoder().fit(labels)
+    scaler = StandardScaler().fit(X)
+    model = VotingClassifier(
+        estimators=[('rf', RandomForestClassifier(n_estimators=15, random_state=0)),
+                    ('lr', LogisticRegression(max_iter=500)),
+                    ('gb', GradientBoostingClassifier(n_estimators=20, random_state=0)),
+                    ('hgb', HistGradientBoostingClassifier(max_iter=20, random_state=0))],
+        voting='soft',
+        weights=[2, 1, 2, 1],
+    ).fit(scaler.transform(X), target_encoder.transform(labels))
+    return {
+        'model': model, 'scaler': scaler, 'label_encoder': target_encoder,
+        'feature_encoders': {}, 'feature_cols': [f'f{i}' for i in range(5)],
+        'metadata': {'schema_version': 1, 'model_version': f'test-{n_classes}'},
+    }, X
+
+
+class ExplainTests(unittest.TestCase):
+    def test_contributions_add_up_to_prediction(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            for n_classes in (2, 4):
+                bundle, X = make_bundle(n_classes)
+                path = os.path.join(tmp_dir, 'runtime.npz')
+                export_bundle(bundle, path)
+                X_scaled = bundle['scaler'].transform(X[:20])
+                expected_proba = bundle['model'].predict_proba(X_scaled)
+
+                for source in (bundle, load_bundle(path)):
+                    explainer = explain_module.EnsembleExplainer(source)
+                    base, contributions = explainer.explain(X_scaled)
+                    self.assertEqual(contributions.shape, (20, 5, n_classes))
+                    self.assertAlmostEqual(base.sum(), 1.0)
+                    np.testing.assert_allclose(base + contributions.sum(axis=1), expected_proba, atol=1e-9)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_ignored_feature_gets_no_credit(self):
+        # f2..f4 are noise; the label depends only on f0 and f1
+        bundle, X = make_bundle(3)
+        explainer = explain_module.EnsembleExplainer(bundle)
+        _, contributions = explainer.explain(bundle['scaler'].transform(X[:50]))
+        importance = np.abs(contributions).mean(axis=(0, 2))
+        self.assertGreater(importance[0], 5 * importance[2:].max())
+
+    def test_explain_row_is_cached_per_bundle(self):
+        bundle, X = make_bundle(3)
+        first = explain_module.explain_row(bundle, X[0], 'class_1')
+        stats = explain_module.get_explain_stats()
+        self.assertIs(explain_module.explain_row(bundle, X[0], 'class_1'), first)
+        self.assertEqual(explain_module.get_explain_stats()['hits'], stats['hits'] + 1)
+
+        magnitudes = [abs(item['contribution']) for item in first['contributions']]
+        self.assertEqual(magnitudes, sorted(magnitudes, reverse=True))
+        self.assertAlmostEqual(first['expected'] + sum(item['contribution'] for item in first['contributions']),
+                               first['prediction'], delta=0.1)
+
+        retrained, _ = make_bundle(3)
+        explain_module.explain_row(retrained, X[0], 'class_1')
+        self.assertEqual(explain_module.get_explain_stats()['cache_size'], 1)
+
+
+class ExplainRouteTests(unittest.TestCase):
+    def setUp(self):
+        app_module.app.config['TESTING'] = True
+        self.client = app_module.app.test_client()
+        audit = patch.object(app_module, 'get_audit_log', return_value=None)
+        audit.start()
+        self.addCleanup(audit.stop)
+
+    @patch('src.predict.predict')
+    def test_api_explain_returns_attributions(self, mock_predict):
+        mock_predict.return_value = {
+            'class_label': 'Normal_Weight', 'confidence': 80.0, 'bmi': 22.5,
+            'all_probs': {'Normal_Weight': 80.0}, 'status': 'success',
+            'explanation': {'expected': 14.3, 'prediction': 80.0, 'contributions': []},
+        }
+        with patch.object(app_module, 'MODEL_EXISTS', True):
+            response = self.client.post('/api/explain', json={
+                'age': 25, 'gender': 'Male', 'height': 175, 'weight': 69,
+                'physical_activity': 'Moderate', 'family_history': 'Yes',
+            })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['explanation']['prediction'], 80.0)
+        self.assertTrue(mock_predict.call_args.kwargs['explain'])
+
+    def test_api_explain_rejects_invalid_input(self):
+        with patch.object(app_module, 'MODEL_EXISTS', True):
+            response = self.client.post('/api/explain', data={'age': '300'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.get_json()['success'])
+
+
+if __name__ == '__main__':
+    unittest.main()
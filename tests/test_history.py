@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import app as app_module
+from src.history import HistoryStore, normalize_patient_id
+
+
+def result(class_label='Overweight_Level_I', bmi=27.0):
+    return {'class_label': class_label, 'bmi': bmi, 'confidence': 88.0, 'model_version': 'v1'}
+
+
+class HistoryStoreTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        self.store = HistoryStore(os.path.join(directory, 'history.db'), pool_size=2)
+
+    def test_wal_mode_and_pooled_connections(self):
+        with self.store.connection() as first:
+            self.assertEqual(first.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        with self.store.connection() as second:
+            self.assertIs(first, second)
+
+    def test_trend_is_downsampled_in_time_buckets(self):
+        rows = [{'user_id': 'P-1', 'ts': 1000.0 + day * 86400, 'endpoint': 'predict_view',
+                 'model_version': 'v1', 'class_label': 'Normal_Weight' if day >= 900 else 'Obesity_Type_I',
+                 'confidence': 90.0, 'bmi': 35.0 - day / 100, 'weight_kg': 100.0 - day / 50,
+                 'calories': 1800.0, 'protein_g': 100.0, 'carbs_g': 200.0, 'fat_g': 60.0}
+                for day in range(1000)]
+        rows.append({**rows[0], 'user_id': 'P-2'})
+        self.store.add_many(rows)
+
+        trend = self.store.trend('P-1', points=10)
+        self.assertEqual(trend['assessments'], 1000)
+        self.assertEqual(len(trend['points']), 10)
+        self.assertEqual(sum(p['assessments'] for p in trend['points']), 1000)
+        self.assertGreater(trend['points'][0]['bmi'], trend['points'][-1]['bmi'])
+        self.assertEqual(trend['points'][-1]['class_label'], 'Normal_Weight')
+
+        window = self.store.trend('P-1', since=1000.0 + 100 * 86400, until=1000.0 + 199 * 86400)
+        self.assertEqual(window['assessments'], 100)
+        self.assertEqual(self.store.trend('P-3')['assessments'], 0)
+
+    def test_add_stores_nutrition_targets(self):
+        self.store.add('P-1', result(), {'daily_calories': 1900, 'protein_g': 110.0}, weight_kg=82.0)
+        point = self.store.trend('P-1')['points'][0]
+        self.assertEqual((point['calories'], point['protein_g'], point['weight_kg']), (1900, 110.0, 82.0))
+
+    def test_patient_id_validation(self):
+        self.assertIsNone(normalize_patient_id('  '))
+        self.assertEqual(normalize_patient_id(' P-1042 '), 'P-1042')
+        with self.assertRaises(ValueError):
+            normalize_patient_id("1; DROP TABLE assessments")
+
+
+class HistoryRouteTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        self.store = HistoryStore(os.path.join(directory, 'history.db'))
+        app_module.app.config['TESTING'] = True
+        self.client = app_module.app.test_client()
+        token = patch.object(app_module, 'HISTORY_API_TOKEN', 's3cret')
+        token.start()
+        self.addCleanup(token.stop)
+        audit = patch.object(app_module, 'get_audit_log', return_value=None)
+        audit.start()
+        self.addCleanup(audit.stop)
+        self.auth = {'Authorization': 'Bearer s3cret'}
+
+    @patch('src.predict.predict')
+    def test_prediction_with_patient_id_is_saved(self, mock_predict):
+        mock_predict.return_value = {**result(), 'all_probs': {'Overweight_Level_I': 88.0}}
+        form = {'age': '40', 'gender': 'Female', 'height': '165', 'weight': '75',
+                'physical_activity': 'Light', 'family_history': 'Yes', 'patient_id': 'P-7',
+                'history_token': 's3cret'}
+        with patch.object(app_module, 'MODEL_EXISTS', True), \
+                patch.object(app_module, 'get_history_store', return_value=self.store):
+            self.assertEqual(self.client.post('/predict', data=form).status_code, 200)
+            self.client.post('/predict', data={**form, 'patient_id': ''})
+            response = self.client.get('/api/history/P-7/trend?points=5', headers=self.auth)
+
+        trend = response.get_json()
+        self.assertEqual(trend['assessments'], 1)
+        self.assertEqual(trend['points'][0]['weight_kg'], 75.0)
+        self.assertIsNotNone(trend['points'][0]['calories'])
+
+    @patch('src.predict.predict')
+    def test_form_without_token_neither_saves_nor_shows_history(self, mock_predict):
+        mock_predict.return_value = {**result(), 'all_probs': {'Overweight_Level_I': 88.0}}
+        self.store.add('P-7', result(bmi=31.4), {'daily_calories': 1900}, weight_kg=82.0)
+        form = {'age': '40', 'gender': 'Female', 'height': '165', 'weight': '75',
+                'physical_activity': 'Light', 'family_history': 'Yes', 'patient_id': 'P-7'}
+        with patch.object(app_module, 'MODEL_EXISTS', True), \
+                patch.object(app_module, 'get_history_store', return_value=self.store):
+            page = self.client.post('/predict', data={**form, 'history_token': 'guess'})
+
+        self.assertEqual(page.status_code, 200)
+        self.assertIn(b'a valid history token is required', page.data)
+        self.assertNotIn(b'BMI 31.4', page.data)
+        self.assertEqual(self.store.trend('P-7')['assessments'], 1)
+
+    def test_trend_rejects_bad_query(self):
+        with patch.object(app_module, 'get_history_store', return_value=self.store):
+            self.assertEqual(self.client.get('/api/history/P-7/trend?since=yesterday',
+                                             headers=self.auth).status_code, 400)
+
+    def test_trend_requires_the_api_token(self):
+        with patch.object(app_module, 'get_history_store', return_value=self.store):
+            self.assertEqual(self.client.get('/api/history/P-7/trend').status_code, 401)
+            wrong = self.client.get('/api/history/P-7/trend', headers={'Authorization': 'Bearer guess'})
+            self.assertEqual(wrong.status_code, 401)
+            self.assertEqual(wrong.headers['WWW-Authenticate'], 'Bearer')
+            with patch.object(app_module, 'HISTORY_API_TOKEN', ''):
+                self.assertEqual(self.client.get('/api/history/P-7/trend', headers=self.auth).status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+import src.data_preprocessing as dp
+import src.train as train_module
+
+ROW = 'Male,30,1.80,90,yes,yes,2,3,Sometimes,no,2,no,1,1,no,Walking,Overweight_Level_II\n'
+
+
+class AppendedRowsTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_path = os.path.join(self.tmp_dir, 'obesity_dataset.csv')
+        with open(dp.DATA_PATH, 'r') as src, open(self.data_path, 'w') as dst:
+            for i, line in enumerate(src):
+                if i > 50:
+                    break
+                dst.write(line)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_appended_rows_are_detected(self):
+        watermark = dp.data_watermark(self.data_path)
+        self.assertEqual(watermark['rows'], 50)
+
+        with open(self.data_path, 'a') as f:
+            f.write(ROW * 3)
+
+        before, appended, new_watermark = dp.read_rows_since(watermark, self.data_path)
+        self.assertEqual(len(before), 50)
+        self.assertEqual(len(appended), 3)
+        self.assertEqual(new_watermark['rows'], 53)
+
+    def test_edited_file_is_not_treated_as_append(self):
+        watermark = dp.data_watermark(self.data_path)
+        with open(self.data_path, 'r') as f:
+            lines = f.readlines()
+        lines[1] = ROW
+        with open(self.data_path, 'w') as f:
+            f.writelines(lines)
+
+        self.assertIsNone(dp.read_rows_since(watermark, self.data_path))
+
+
+class TrainIncrementalTests(unittest.TestCase):
+    """Full train on 400 rows of the dataset, then append to the temp CSV."""
+
+    BASE_ROWS = 400
+
+    @classmethod
+    def setUpClass(cls):
+        with open(dp.DATA_PATH, 'r') as f:
+            cls.header, *cls.rows = f.readlines()
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.data_path = os.path.join(self.tmp_dir, 'obesity_dataset.csv')
+        params_path = os.path.join(self.tmp_dir, 'tuned_params.json')
+        with open(params_path, 'w') as f:
+            json.dump({'rf': {'n_estimators': 20}, 'gb': {'n_estimators': 20}}, f)
+        self.patches = [
+            patch.object(dp, 'DATA_PATH', self.data_path),
+            patch.object(dp, 'REPORT_PATH', os.path.join(self.tmp_dir, 'preprocessing_report.json')),
+            patch.object(train_module, 'MODEL_DIR', self.tmp_dir),
+            patch.object(train_module, 'OUTPUT_DIR', self.tmp_dir),
+            patch.object(train_module, 'BUNDLE_PATH', os.path.join(self.tmp_dir, 'obesity_model.pkl')),
+            patch.object(train_module, 'TUNED_PARAMS_PATH', params_path),
+        ]
+        for p in self.patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+        with open(self.data_path, 'w') as f:
+            f.write(self.header)
+            f.writelines(self.rows[:self.BASE_ROWS])
+        with redirect_stdout(io.StringIO()):
+            self.base, _, _ = train_module.train(use_cache=False, compare=False, force=True)
+
+    def append(self, lines):
+        with open(self.data_path, 'a') as f:
+            f.writelines(lines)
+
+    def edited(self, lines, column, value):
+        index = self.header.strip().split(',').index(column)
+        out = []
+        for line in lines:
+            fields = line.rstrip('\n').split(',')
+            fields[index] = value
+            out.append(','.join(fields) + '\n')
+        return out
+
+    def run_incremental(self):
+        with redirect_stdout(io.StringIO()):
+            return train_module.train_incremental()
+
+    def test_appended_rows_grow_the_ensemble(self):
+        rf_trees = len(self.base['model'].named_estimators_['rf'].estimators_)
+        gb_stages = self.base['model'].named_estimators_['gb'].n_estimators_
+        self.append(self.rows[self.BASE_ROWS:self.BASE_ROWS + 100])
+
+        bundle, stats = self.run_incremental()
+
+        members = bundle['model'].named_estimators_
+        self.assertGreater(len(members['rf'].estimators_), rf_trees)
+        self.assertEqual(members['gb'].n_estimators_, gb_stages + train_module.INCREMENTAL_GB_STAGES)
+        self.assertEqual(bundle['metadata']['training_mode'], 'incremental')
+        self.assertEqual(bundle['metadata']['incremental_rounds'], 1)
+        self.assertEqual(bundle['metadata']['data_watermark']['rows'], self.BASE_ROWS + 100)
+        self.assertEqual(bundle['metadata']['base_watermark'], self.base['metadata']['base_watermark'])
+        self.assertIn('ensemble', stats)
+
+    def test_too_many_new_rows_require_a_full_retrain(self):
+        limit = int(train_module.INCREMENTAL_MAX_NEW_FRACTION * self.BASE_ROWS)
+        self.append(self.rows[self.BASE_ROWS:self.BASE_ROWS + limit + 1])
+        with self.assertRaisesRegex(train_module.FullRetrainRequired, 'of the base dataset'):
+            self.run_incremental()
+
+    def test_drifted_rows_require_a_full_retrain(self):
+        self.append(self.edited(self.rows[self.BASE_ROWS:self.BASE_ROWS + 100], 'Age', '55'))
+        with self.assertRaisesRegex(train_module.FullRetrainRequired, 'feature drift'):
+            self.run_incremental()
+
+    def test_unseen_category_requires_a_full_retrain(self):
+        self.append(self.edited(self.rows[self.BASE_ROWS:self.BASE_ROWS + 20], 'MTRANS', 'Scooter'))
+        with self.assertRaisesRegex(train_module.FullRetrainRequired, 'schema change'):
+            self.run_incremental()
+
+    def test_new_class_requires_a_full_retrain(self):
+        self.append(self.edited(self.rows[self.BASE_ROWS:self.BASE_ROWS + 20], 'NObeyesdad', 'Obesity_Type_IV'))
+        with self.assertRaisesRegex(train_module.FullRetrainRequired, 'schema change'):
+            self.run_incremental()
+
+    def test_edited_dataset_requires_a_full_retrain(self):
+        with open(self.data_path, 'w') as f:
+            f.write(self.header)
+            f.writelines(self.rows[1:self.BASE_ROWS + 1])
+        with self.assertRaisesRegex(train_module.FullRetrainRequired, 'modified'):
+            self.run_incremental()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, VotingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+import src.inference_server as server_module
+import src.predict as predict_module
+from src.inference_server import InferenceClient, InferenceServer, InferenceUnavailable
+
+VOCABULARIES = {
+    'Gender': ['Female', 'Male'],
+    'family_history_with_overweight': ['no', 'yes'],
+    'FAVC': ['no', 'yes'],
+    'CAEC': ['Always', 'Frequently', 'Sometimes', 'no'],
+    'SMOKE': ['no', 'yes'],
+    'SCC': ['no', 'yes'],
+    'CALC': ['Frequently', 'Sometimes', 'no'],
+    'MTRANS': ['Automobile', 'Bike', 'Motorbike', 'Public_Transportation', 'Walking'],
+}
+FEATURE_COLS = ['Gender', 'Age', 'Height', 'Weight', 'family_history_with_overweight', 'FAVC',
+                'FCVC', 'NCP', 'CAEC', 'SMOKE', 'CH2O', 'SCC', 'FAF', 'TUE', 'CALC', 'MTRANS', 'BMI']
+
+
+def make_bundle():
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(120, len(FEATURE_COLS)))
+    labels = np.array(['Normal_Weight', 'Obesity_Type_I', 'Overweight_Level_I'])[
+        (X[:, 3] > 0).astype(int) + (X[:, 3] > 1).astype(int)]
+    target_encoder = LabelEncoder().fit(labels)
+    scaler = StandardScaler().fit(X)
+    model = VotingClassifier(
+        estimators=[('rf', RandomForestClassifier(n_estimators=5, random_state=0)),
+                    ('lr', LogisticRegression(max_iter=300))],
+        voting='soft',
+    ).fit(scaler.transform(X), target_encoder.transform(labels))
+    return {
+        'model': model,
+        'scaler': scaler,
+        'label_encoder': target_encoder,
+        'feature_encoders': {col: LabelEncoder().fit(v) for col, v in VOCABULARIES.items()},
+        'feature_cols': FEATURE_COLS,
+        'inference_defaults': dict(predict_module.LEGACY_DEFAULTS),
+    }
+
+
+class InferenceServerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.tmp_dir, 'inference.sock')
+        self.bundle = make_bundle()
+        self.server = InferenceServer(self.socket_path, load_bundle=lambda: self.bundle,
+                                      load_nutrition=lambda: None, batcher=None)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = InferenceClient(self.socket_path)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_remote_probabilities_match_in_process(self):
+        X = np.random.RandomState(1).normal(size=(4, len(FEATURE_COLS)))
+        tag = self.client.schema()['schema_tag']
+        np.testing.assert_allclose(self.client.predict_proba(X, tag),
+                                   predict_module.predict_proba_rows(self.bundle, X))
+        # Connection is reused for the next call on this thread
+        conn = self.client._local.conn
+        self.client.predict_proba(X[:1], tag)
+        self.assertIs(self.client._local.conn, conn)
+        self.assertIsNone(self.client.nutrition(30, 1, 175, 80, 1.55, 'Normal_Weight'))
+
+    def test_predict_uses_server_schema_without_loading_model(self):
+        with patch.object(predict_module, 'get_client', return_value=self.client), \
+                patch.object(predict_module, 'load_model', side_effect=AssertionError('loaded locally')):
+            remote = predict_module.predict(30, 'Male', 180, 95, 'Light', 'Yes')
+
+        with patch.object(predict_module, 'get_client', return_value=None), \
+                patch.object(predict_module, 'load_model', return_value=self.bundle):
+            local = predict_module.predict(30, 'Male', 180, 95, 'Light', 'Yes')
+        self.assertEqual(remote, local)
+
+    def test_worker_does_not_load_the_model_while_the_server_is_up(self):
+        with patch.object(predict_module, 'get_client', return_value=self.client), \
+                patch.object(server_module, 'get_client', return_value=self.client), \
+                patch.object(predict_module, 'load_model', side_effect=AssertionError('loaded locally')), \
+                patch.object(predict_module, '_model_bundle', None):
+            self.assertTrue(predict_module.get_model_health()[0])
+            self.assertEqual(predict_module.get_model_version(), 'legacy')
+            remote = predict_module.predict(30, 'Male', 180, 95, 'Light', 'Yes', explain=True)
+            from src.memory import component_sizes
+            self.assertNotIn('obesity_bundle', component_sizes())
+
+        with patch.object(predict_module, 'get_client', return_value=None), \
+                patch.object(predict_module, 'load_model', return_value=self.bundle):
+            local = predict_module.predict(30, 'Male', 180, 95, 'Light', 'Yes', explain=True)
+        self.assertEqual(remote['explanation'], local['explanation'])
+
+    def test_stale_schema_is_refetched(self):
+        remote = self.client.remote_bundle()
+        self.bundle['feature_encoders']['MTRANS'] = LabelEncoder().fit(VOCABULARIES['MTRANS'] + ['Scooter'])
+        self.bundle = dict(self.bundle)
+        with patch.object(predict_module, 'get_client', return_value=self.client), \
+                patch.object(predict_module, 'load_model', side_effect=AssertionError('loaded locally')):
+            self.assertEqual(predict_module._inference_bundle()['schema_tag'], remote['schema_tag'])
+            result = predict_module.predict(30, 'Male', 180, 95, 'Light', 'Yes')
+        self.assertEqual(result['status'], 'success')
+        self.assertNotEqual(self.client.schema()['schema_tag'], remote['schema_tag'])
+
+    def test_schema_that_keeps_changing_is_retried_once(self):
+        stale = patch.object(self.client, 'predict_proba', side_effect=server_module.StaleSchema('moved'))
+        with patch.object(predict_module, 'get_client', return_value=self.client), \
+                patch.object(predict_module, 'load_model', side_effect=AssertionError('loaded locally')), \
+                patch.object(predict_module, 'mark_unavailable') as mock_unavailable, \
+                stale as mock_predict_proba:
+            with self.assertRaises(InferenceUnavailable):
+                predict_module.predict(30, 'Male', 180, 95, 'Light', 'Yes')
+            with self.assertRaises(InferenceUnavailable):
+                predict_module.predict_advanced({
+                    'age': '30', 'gender': 'Male', 'height': '180', 'weight': '95',
+                    'physical_activity': 'Light', 'family_history': 'yes', 'favc': 'yes', 'fcvc': '2',
+                    'ncp': '3', 'caec': 'Sometimes', 'smoke': 'no', 'ch2o': '2', 'scc': 'no',
+                    'tue': '1', 'calc': 'no', 'mtrans': 'Walking',
+                })
+        self.assertEqual(mock_predict_proba.call_count, 4)
+        self.assertEqual(mock_unavailable.call_count, 2)
+
+    def test_retrain_with_same_vocabulary_changes_the_tag(self):
+        remote = self.client.remote_bundle()
+        self.bundle = {**self.bundle, 'outlier_bounds': {'Age': (14.0, 40.0)},
+                       'metadata': {'model_version': 'retrained'}}
+        with patch.object(predict_module, 'get_client', return_value=self.client), \
+                patch.object(predict_module, 'load_model', side_effect=AssertionError('loaded locally')):
+            result = predict_module.predict(30, 'Male', 180, 95, 'Light', 'Yes')
+        self.assertEqual(result['model_version'], 'retrained')
+        schema = self.client.schema()
+        self.assertNotEqual(schema['schema_tag'], remote['schema_tag'])
+        self.assertEqual(schema['outlier_bounds'], {'Age': [14.0, 40.0]})
+
+    def test_drift_is_only_recorded_when_asked(self):
+        with patch.object(predict_module, 'get_client', return_value=None), \
+                patch.object(predict_module, 'load_model', return_value=self.bundle), \
+                patch.object(predict_module, 'record_prediction') as mock_record:
+            predict_module.predict(30, 'Male', 180, 95, 'Light', 'Yes')
+            self.assertFalse(mock_record.called)
+            predict_module.predict(30, 'Male', 180, 95, 'Light', 'Yes', record=True)
+        self.assertEqual(mock_record.call_count, 1)
+        self.assertTrue(mock_record.call_args.args[3])     # imputed lifestyle fields
+
+    def test_missing_socket_falls_back_in_process(self):
+        client = InferenceClient(os.path.join(self.tmp_dir, 'missing.sock'))
+        with self.assertRaises(InferenceUnavailable):
+            client.schema()
+
+        with patch.dict(os.environ, {'INFERENCE_SOCKET': client.socket_path}), \
+                patch.object(server_module, '_client_down_until', 0.0), \
+                patch.object(predict_module, 'load_model', return_value=self.bundle), \
+                patch('builtins.print'):
+            result = predict_module.predict(30, 'Male', 180, 95, 'Light', 'Yes')
+            self.assertIsNone(server_module.get_client())
+        self.assertEqual(result['status'], 'success')
+
+
+if __name__ == '__main__':
+    unittest.main()
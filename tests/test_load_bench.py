@@ -0,0 +1,26 @@
+import unittest
+
+import app as app_module
+from bench.load import load_profiles, parse_mix, summarize
+
+
+class LoadHarnessTests(unittest.TestCase):
+    def test_sampled_profiles_pass_form_validation(self):
+        for basic, advanced, obesity_class in load_profiles(limit=200):
+            app_module.parse_prediction_form({k: str(v) for k, v in basic.items()})
+            self.assertTrue(set(basic) <= set(advanced))
+            self.assertTrue(1 <= advanced['ncp'] <= 6)
+
+    def test_summary_percentiles_and_error_rate(self):
+        summary = summarize(list(range(1, 101)), {200: 98, 503: 2}, 2, elapsed=10.0)
+        self.assertEqual(summary['throughput_rps'], 10.0)
+        self.assertEqual(summary['error_rate'], 0.02)
+        self.assertEqual(summary['latency_ms']['max'], 100)
+        self.assertLessEqual(summary['latency_ms']['p95'], summary['latency_ms']['p99'])
+
+    def test_mix_parsing(self):
+        self.assertEqual(parse_mix('predict=3,exercise'), {'predict': 3.0, 'exercise': 1.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from unittest.mock import patch
+
+import pickle
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+import app as app_module
+from src.memory import deep_sizeof, process_memory
+
+
+class MemoryAccountingTests(unittest.TestCase):
+    def test_shared_objects_are_counted_once(self):
+        array = np.zeros(10000)
+        self.assertGreaterEqual(deep_sizeof(array), array.nbytes)
+        single = deep_sizeof({'a': array})
+        self.assertLess(deep_sizeof({'a': array, 'b': array}) - single, 1000)
+
+    def test_tree_buffers_are_included(self):
+        rng = np.random.RandomState(0)
+        tree = DecisionTreeClassifier(random_state=0).fit(rng.normal(size=(500, 5)),
+                                                          rng.randint(0, 3, 500))
+        state = tree.tree_.__getstate__()
+        self.assertGreaterEqual(deep_sizeof(tree), state['nodes'].nbytes + state['values'].nbytes)
+
+    def test_object_arrays_are_walked(self):
+        rng = np.random.RandomState(0)
+        model = GradientBoostingClassifier(n_estimators=20, random_state=0).fit(
+            rng.normal(size=(500, 5)), rng.randint(0, 3, 500))
+        self.assertEqual(model.estimators_.dtype, object)
+        self.assertGreater(deep_sizeof(model), len(pickle.dumps(model)) / 2)
+
+    def test_process_memory_reports_rss_and_pss(self):
+        usage = process_memory()
+        if usage is None:
+            self.skipTest('smaps_rollup not available')
+        self.assertGreater(usage['rss'], 0)
+        self.assertIn('pss', usage)
+
+    def test_endpoint(self):
+        app_module.app.config['TESTING'] = True
+        report = app_module.app.test_client().get('/metrics/memory').get_json()
+        self.assertIn('NUTRITION_PLANS', report['components_kb'])
+        self.assertIn(str(report['process_kb']['self']), report['process_kb']['workers'])
+
+    @patch('src.memory.allocation_burst')
+    def test_endpoint_never_runs_a_burst(self, mock_burst):
+        app_module.app.config['TESTING'] = True
+        with patch.object(app_module, 'MODEL_EXISTS', True):
+            report = app_module.app.test_client().get('/metrics/memory?burst=1000').get_json()
+        self.assertFalse(mock_burst.called)
+        self.assertNotIn('allocation_burst', report)
+
+
+if __name__ == '__main__':
+    unittest.main()
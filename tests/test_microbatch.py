@@ -0,0 +1,56 @@
+import threading
+import unittest
+
+import numpy as np
+
+import app as app_module
+from src.predict import Histogram, MicroBatcher
+
+
+class MicroBatcherTests(unittest.TestCase):
+    def test_concurrent_rows_share_one_call_and_keep_their_order(self):
+        calls = []
+        release = threading.Event()
+
+        def predict_fn(bundle, X):
+            release.wait(1)
+            calls.append(len(X))
+            return X * 2
+
+        batcher = MicroBatcher(predict_fn, max_batch_size=8, max_wait_ms=50)
+        bundle = object()
+        futures = [batcher.submit(bundle, [float(i), 1.0]) for i in range(8)]
+        release.set()
+
+        for i, future in enumerate(futures):
+            np.testing.assert_array_equal(future.result(timeout=5), [2.0 * i, 2.0])
+        self.assertEqual(calls, [8])
+        stats = batcher.stats()
+        self.assertEqual(stats['batch_size']['count'], 1)
+        self.assertEqual(stats['queue_wait_ms']['count'], 8)
+
+    def test_errors_reach_every_caller_in_the_batch(self):
+        def predict_fn(bundle, X):
+            raise RuntimeError('boom')
+
+        batcher = MicroBatcher(predict_fn, max_batch_size=4, max_wait_ms=20)
+        futures = [batcher.submit(object(), [0.0]) for _ in range(2)]
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+
+    def test_histogram_buckets(self):
+        histogram = Histogram([1, 4])
+        for value in (1, 3, 9):
+            histogram.observe(value)
+        self.assertEqual(histogram.snapshot()['buckets'], {'<=1': 1, '<=4': 1, '>4': 1})
+
+    def test_metrics_endpoint(self):
+        app_module.app.config['TESTING'] = True
+        response = app_module.app.test_client().get('/metrics/batching')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('enabled', response.get_json())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+import numpy as np
+from sklearn.ensemble import VotingClassifier
+from sklearn.preprocessing import LabelEncoder
+
+import src.train as train_module
+from src.model_zoo import MODEL_ZOO, build_member, fit_member, parse_members
+
+SMALL_PARAMS = {
+    'rf':  {'n_estimators': 10},
+    'et':  {'n_estimators': 10},
+    'lr':  {'max_iter': 500},
+    'gb':  {'n_estimators': 10},
+    'hgb': {'max_iter': 20, 'learning_rate': 0.1},
+}
+
+
+def make_data(n_classes=3):
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(400, 5))
+    y = np.digitize(X[:, 0] + 0.5 * X[:, 1], np.linspace(-1, 1, n_classes - 1))
+    return X, y
+
+
+class ModelZooTests(unittest.TestCase):
+    def test_parse_members(self):
+        self.assertEqual(parse_members(' RF, hgb ,lr'), ['rf', 'hgb', 'lr'])
+        for value in ('rf,xgb', 'rf,rf', ' , '):
+            with self.assertRaises(ValueError):
+                parse_members(value)
+
+    def test_every_entry_builds_with_its_defaults(self):
+        for key, entry in MODEL_ZOO.items():
+            self.assertIsInstance(build_member(key), entry['estimator'], key)
+
+    def test_capped_fit_keeps_the_production_n_jobs(self):
+        X, y = make_data()
+        capped, _ = fit_member('rf', X, y, SMALL_PARAMS['rf'], n_jobs=1)
+        self.assertEqual(capped.n_jobs, MODEL_ZOO['rf']['fixed']['n_jobs'])
+        reference, _ = fit_member('rf', X, y, SMALL_PARAMS['rf'])
+        np.testing.assert_array_equal(capped.predict_proba(X), reference.predict_proba(X))
+        fit_member('gb', X, y, SMALL_PARAMS['gb'], n_jobs=1)   # no n_jobs parameter: only the thread cap
+
+    def test_members_are_not_refitted_by_the_ensemble(self):
+        X, y = make_data()
+        params = {**SMALL_PARAMS, 'members': ['rf', 'hgb', 'lr'], 'weights': [2, 1, 1]}
+        with redirect_stdout(io.StringIO()):
+            members, ensemble, fit_seconds, extras = train_module.fit_models(X, y, params, compare=False)
+
+        self.assertEqual([key for key, _, _ in members], ['rf', 'hgb', 'lr'])
+        self.assertEqual(extras, [])
+        self.assertIs(ensemble.named_estimators_['hgb'], members[1][2])
+        reference = VotingClassifier([(key, build_member(key, SMALL_PARAMS[key])) for key, _, _ in members],
+                                     voting='soft', weights=[2, 1, 1]).fit(X, y)
+        np.testing.assert_allclose(ensemble.predict_proba(X), reference.predict_proba(X), atol=1e-12)
+        np.testing.assert_array_equal(ensemble.predict(X), reference.predict(X))
+
+    def test_comparison_covers_the_whole_zoo(self):
+        X, y = make_data()
+        params = {**SMALL_PARAMS, 'members': ['rf', 'lr'], 'weights': [1, 1]}
+        target_encoder = LabelEncoder().fit(['a', 'b', 'c'])
+        with redirect_stdout(io.StringIO()):
+            members, ensemble, fit_seconds, extras = train_module.fit_models(X, y, params, compare=True)
+            stats = train_module.build_stats(members, ensemble, X, y, target_encoder,
+                                             [f'f{i}' for i in range(5)], len(X), fit_seconds, extras)
+
+        rows = {row['key']: row for row in stats['model_comparison']}
+        self.assertEqual(set(rows), set(MODEL_ZOO) | {'ensemble'})
+        self.assertEqual({key for key, row in rows.items() if row['in_ensemble']}, {'rf', 'lr', 'ensemble'})
+        for row in rows.values():
+            self.assertGreater(row['single_row_ms'], 0)
+            self.assertGreater(row['train_seconds'], 0)
+            self.assertTrue(0 <= row['f1'] <= 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import gzip
+import json
+import unittest
+from unittest.mock import patch
+
+import app as app_module
+import src.nutrition as nutrition_module
+from src.exercise import EXERCISE_CATALOGUE, get_exercise_plan
+from src.nutrition import NUTRITION_PLANS, get_nutrition_plan
+from src.plans import PlanCatalogue, thaw
+
+
+class PlanCatalogueTests(unittest.TestCase):
+    def test_plans_are_shared_and_read_only(self):
+        plan = get_exercise_plan('Obesity_Type_I')
+        self.assertIs(plan, get_exercise_plan('Obesity_Type_I'))
+        with self.assertRaises(TypeError):
+            plan['goal'] = 'changed'
+        with self.assertRaises(TypeError):
+            plan['exercises'][0]['name'] = 'changed'
+        with self.assertRaises(AttributeError):
+            plan['tips'].append('changed')
+        self.assertIs(get_exercise_plan('unknown'), get_exercise_plan('Normal_Weight'))
+
+    def test_body_and_etag_follow_the_plan(self):
+        source = {'a': {'goal': 'x', 'tips': ['t1']}, 'b': {'goal': 'y', 'tips': []}}
+        catalogue = PlanCatalogue(source, default='a')
+        source['a']['goal'] = 'changed later'
+
+        entry = catalogue.entry('a')
+        self.assertEqual(json.loads(entry.body), {'goal': 'x', 'tips': ['t1']})
+        self.assertEqual(gzip.decompress(entry.body_gz), entry.body)
+        self.assertEqual(thaw(entry.plan), json.loads(entry.body))
+        self.assertNotEqual(entry.etag, catalogue.entry('b').etag)
+        self.assertIs(catalogue.entry('missing'), entry)
+
+    def test_nutrition_plan_is_only_copied_when_personalised(self):
+        self.assertIs(get_nutrition_plan('Obesity_Type_II'), NUTRITION_PLANS['Obesity_Type_II'])
+        ai = {'calories': 1550, 'protein': 120.0, 'carbs': 150.0, 'fat': 50.0, 'is_ai': True}
+        with patch.object(nutrition_module, 'get_nutrition_recommendation', return_value=ai):
+            plan = get_nutrition_plan('Obesity_Type_II', user_profile={'age': 40})
+        self.assertEqual(plan['daily_calories'], 1550)
+        self.assertEqual(NUTRITION_PLANS['Obesity_Type_II']['daily_calories'], 1500)
+
+
+class ExerciseApiTests(unittest.TestCase):
+    def setUp(self):
+        app_module.app.config['TESTING'] = True
+        self.client = app_module.app.test_client()
+
+    def test_serves_prebuilt_json_with_strong_etag(self):
+        entry = EXERCISE_CATALOGUE.entry('Obesity_Type_I')
+        response = self.client.get('/api/exercise?class=Obesity_Type_I')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, entry.body)
+        self.assertEqual(response.headers['ETag'], f'"{entry.etag}"')
+        self.assertEqual(response.get_json()['goal'], get_exercise_plan('Obesity_Type_I')['goal'])
+
+    def test_gzipped_body_has_its_own_etag(self):
+        entry = EXERCISE_CATALOGUE.entry('Obesity_Type_I')
+        response = self.client.get('/api/exercise?class=Obesity_Type_I', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.data, entry.body_gz)
+        self.assertEqual(response.headers['ETag'], f'"{entry.etag_gz}"')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+
+        # the plain variant's ETag does not validate the gzipped one, nor the other way round
+        plain = self.client.get('/api/exercise?class=Obesity_Type_I',
+                                headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'"{entry.etag}"'})
+        self.assertEqual(plain.status_code, 200)
+        gz = self.client.get('/api/exercise?class=Obesity_Type_I', headers={'If-None-Match': f'"{entry.etag_gz}"'})
+        self.assertEqual(gz.status_code, 200)
+
+    def test_matching_etag_returns_304(self):
+        etag = self.client.get('/api/exercise?class=Obesity_Type_I').headers['ETag']
+        cached = self.client.get('/api/exercise?class=Obesity_Type_I', headers={'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.data, b'')
+        other = self.client.get('/api/exercise?class=Normal_Weight', headers={'If-None-Match': etag})
+        self.assertEqual(other.status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+import numpy as np
+
+import src.data_preprocessing as dp
+
+
+class PreprocessingCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_path = os.path.join(self.tmp_dir, 'obesity_dataset.csv')
+        with open(dp.DATA_PATH, 'r') as src, open(self.data_path, 'w') as dst:
+            for i, line in enumerate(src):
+                if i > 400:
+                    break
+                dst.write(line)
+
+        self.patches = [
+            patch.object(dp, 'DATA_PATH', self.data_path),
+            patch.object(dp, 'CACHE_DIR', os.path.join(self.tmp_dir, 'cache')),
+            patch.object(dp, 'REPORT_PATH', os.path.join(self.tmp_dir, 'report.json')),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def _run(self):
+        with redirect_stdout(io.StringIO()):
+            return dp.load_and_preprocess()
+
+    def test_second_run_is_served_from_cache(self):
+        first = self._run()
+        with patch.object(dp, 'load_data', side_effect=AssertionError('cache miss')):
+            second = self._run()
+
+        for a, b in zip(first[:4], second[:4]):
+            np.testing.assert_array_equal(a, b)
+        self.assertEqual(first[4]['feature_cols'], second[4]['feature_cols'])
+
+    def test_changed_csv_invalidates_cache(self):
+        key_before = dp.preprocessing_cache_key(dp.dataset_hash())
+        with open(self.data_path, 'a') as f:
+            f.write('Male,30,1.80,90,yes,yes,2,3,Sometimes,no,2,no,1,1,no,Walking,Overweight_Level_II\n')
+        key_after = dp.preprocessing_cache_key(dp.dataset_hash())
+        self.assertNotEqual(key_before, key_after)
+
+
+if __name__ == '__main__':
+    unittest.main()
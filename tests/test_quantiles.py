@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+from src.predict import cap_features
+from src.quantiles import KLLSketch
+
+
+def rank_error(values, estimate, q):
+    ordered = np.sort(values)
+    low, high = np.searchsorted(ordered, estimate, 'left'), np.searchsorted(ordered, estimate, 'right') - 1
+    target = q * (len(values) - 1)
+    return max(low - target, target - high, 0) / len(values)
+
+
+class KLLSketchTests(unittest.TestCase):
+    def test_small_inputs_are_exact(self):
+        values = np.random.default_rng(0).normal(size=150)
+        sketch = KLLSketch(k=200).update(values)
+        self.assertTrue(sketch.exact)
+        np.testing.assert_allclose(sketch.quantiles([0.25, 0.5, 0.75]), np.quantile(values, [0.25, 0.5, 0.75]))
+
+    def test_rank_error_within_bound_in_bounded_memory(self):
+        values = np.random.default_rng(1).lognormal(3, 0.5, 200_000)
+        sketch = KLLSketch(k=200)
+        for start in range(0, len(values), 5000):
+            sketch.update(values[start:start + 5000])
+        self.assertLess(sketch.size(), 1000)
+        for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+            self.assertLessEqual(rank_error(values, sketch.quantile(q), q), sketch.rank_error())
+
+    def test_merged_sketches_match_one_sketch(self):
+        values = np.random.default_rng(2).uniform(0, 100, 60_000)
+        parts = [KLLSketch(seed=i).update(chunk) for i, chunk in enumerate(np.array_split(values, 6))]
+        merged = parts[0]
+        for part in parts[1:]:
+            merged.merge(part)
+        self.assertEqual(merged.n, len(values))
+        for q in (0.25, 0.75):
+            self.assertLessEqual(rank_error(values, merged.quantile(q), q), merged.rank_error())
+
+    def test_nans_are_ignored(self):
+        sketch = KLLSketch().update([1.0, np.nan, 3.0])
+        self.assertEqual(sketch.n, 2)
+        self.assertEqual(sketch.quantile(0.5), 2.0)
+
+
+class CapFeaturesTests(unittest.TestCase):
+    def test_caps_columns_and_recomputes_bmi(self):
+        bundle = {'feature_cols': ['Age', 'Height', 'Weight', 'BMI'],
+                  'outlier_bounds': {'Age': (10.0, 40.0), 'Weight': (40.0, 150.0)}}
+        row = np.array([61.0, 1.80, 190.0, 190.0 / 1.80 ** 2])
+        capped = cap_features(bundle, row)
+        np.testing.assert_allclose(capped, [40.0, 1.80, 150.0, 150.0 / 1.80 ** 2])
+        self.assertEqual(row[0], 61.0)
+        self.assertEqual(cap_features(bundle, np.vstack([row, row])).shape, (2, 4))
+
+    def test_bundle_without_caps_is_unchanged(self):
+        row = [70.0, 1.7, 120.0, 41.5]
+        np.testing.assert_array_equal(cap_features({'feature_cols': ['Age', 'Height', 'Weight', 'BMI']}, row), row)
+
+
+if __name__ == '__main__':
+    unittest.main()
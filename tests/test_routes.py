@@ -1,3 +1,7 @@
+import gzip
+import json
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 
@@ -8,6 +12,10 @@ class RouteTests(unittest.TestCase):
     def setUp(self):
         app_module.app.config['TESTING'] = True
         self.client = app_module.app.test_client()
+        # Keep test predictions out of the deployment's audit trail.
+        audit = patch.object(app_module, 'get_audit_log', return_value=None)
+        audit.start()
+        self.addCleanup(audit.stop)
 
     def test_predict_invalid_input_shows_validation_error(self):
         with patch.object(app_module, 'MODEL_EXISTS', True):
@@ -102,6 +110,89 @@ class RouteTests(unittest.TestCase):
         self.assertIn(b'Primary Transport (MTRANS)', response.data)
         self.assertIn(b'BMI', response.data)
 
+    def test_statistics_conditional_get_returns_304(self):
+        first = self.client.get('/statistics')
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers.get('ETag')
+        self.assertTrue(etag)
+
+        second = self.client.get('/statistics', headers={'If-None-Match': etag})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b'')
+
+    def test_index_etag_changes_when_stats_change(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            stats_path = os.path.join(tmp_dir, 'model_stats.json')
+            with open(stats_path, 'w') as f:
+                json.dump({'ensemble': {'accuracy': 0.5, 'precision': 0.5, 'recall': 0.5},
+                           'train_size': 10}, f)
+
+            with patch.object(app_module, 'STATS_PATH', stats_path):
+                etag = self.client.get('/').headers['ETag']
+                stats, _, _ = app_module.load_stats()
+                self.assertEqual(stats['train_size'], 10)
+
+                with open(stats_path, 'w') as f:
+                    json.dump({'ensemble': {'accuracy': 0.9, 'precision': 0.9, 'recall': 0.9},
+                               'train_size': 2000}, f)
+                os.utime(stats_path, (1, 1))
+
+                response = self.client.get('/', headers={'If-None-Match': etag})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(app_module.load_stats()[0]['train_size'], 2000)
+
+    def test_base_template_change_changes_page_etag(self):
+        base = os.path.join(app_module.app.root_path, app_module.app.template_folder, 'base.html')
+        etag = self.client.get('/learn').headers['ETag']
+        stat = os.stat(base)
+        self.addCleanup(os.utime, base, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.utime(base, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        with patch.object(app_module, '_templates_version', app_module._scan_templates()):
+            response = self.client.get('/learn', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_fragment_cache_is_bounded_across_template_versions(self):
+        app_module._fragment_cache.clear()
+        self.addCleanup(app_module._fragment_cache.clear)
+        with app_module.app.test_request_context('/'):
+            for i in range(app_module.FRAGMENT_CACHE_MAX_ENTRIES * 2):
+                with patch.object(app_module, 'templates_version', return_value=(f'digest-{i}', 0.0)):
+                    html = app_module.cached_fragment('partials/footer.html')
+                    self.assertIs(app_module.cached_fragment('partials/footer.html'), html)
+
+        self.assertEqual(len(app_module._fragment_cache), app_module.FRAGMENT_CACHE_MAX_ENTRIES)
+        self.assertNotIn(('partials/footer.html', 'digest-0', app_module.asset_manifest()[1]),
+                         app_module._fragment_cache)
+
+    def test_learn_page_is_rendered_once_and_served_gzipped(self):
+        app_module._page_cache.clear()
+        with patch.object(app_module, 'render_template', wraps=app_module.render_template) as render:
+            plain = self.client.get('/learn')
+            zipped = self.client.get('/learn', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(zipped.headers.get('Content-Encoding'), 'gzip')
+        self.assertEqual(gzip.decompress(zipped.data), plain.data)
+
+        # each encoding has its own validator and only revalidates itself
+        self.assertNotEqual(zipped.headers['ETag'], plain.headers['ETag'])
+        self.assertIn('Accept-Encoding', plain.headers['Vary'])
+        swapped = self.client.get('/learn', headers={'If-None-Match': plain.headers['ETag'],
+                                                     'Accept-Encoding': 'gzip'})
+        self.assertEqual(swapped.status_code, 200)
+        cached = self.client.get('/learn', headers={'If-None-Match': zipped.headers['ETag'],
+                                                    'Accept-Encoding': 'gzip'})
+        self.assertEqual(cached.status_code, 304)
+        self.assertIn(b'nav-brand', plain.data)
+
+    def test_dynamic_json_is_compressed_above_threshold(self):
+        response = self.client.get('/api/exercise?class=Obesity_Type_I',
+                                   headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers.get('Content-Encoding'), 'gzip')
+        self.assertIn(b'"goal"', gzip.decompress(response.data))
+
 
 if __name__ == '__main__':
     unittest.main()
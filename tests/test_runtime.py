@@ -0,0 +1,95 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from sklearn.ensemble import (
+    ExtraTreesClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier,
+    RandomForestClassifier, RandomForestRegressor, VotingClassifier,
+)
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+import src.predict as predict_module
+from src.runtime import load_bundle, load_nutrition_bundle
+from src.runtime.export import export_bundle, export_nutrition_bundle
+
+
+def make_bundle(n_classes):
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(300, 5))
+    y = np.digitize(X[:, 0] + 0.5 * X[:, 1], np.linspace(-1, 1, n_classes - 1))
+    labels = np.array([f'class_{i}' for i in range(n_classes)])[y]
+    target_encoder = LabelEncoder().fit(labels)
+    scaler = StandardScaler().fit(X)
+    model = VotingClassifier(
+        estimators=[('rf', RandomForestClassifier(n_estimators=15, random_state=0)),
+                    ('et', ExtraTreesClassifier(n_estimators=10, random_state=0)),
+                    ('lr', LogisticRegression(max_iter=500)),
+                    ('gb', GradientBoostingClassifier(n_estimators=20, random_state=0)),
+                    ('hgb', HistGradientBoostingClassifier(max_iter=30, random_state=0))],
+        voting='soft',
+        weights=[2, 1, 1, 2, 1],
+    ).fit(scaler.transform(X), target_encoder.transform(labels))
+    return {
+        'model': model, 'scaler': scaler, 'label_encoder': target_encoder,
+        'feature_encoders': {'Gender': LabelEncoder().fit(['Female', 'Male'])},
+        'feature_cols': [f'f{i}' for i in range(5)],
+        'inference_defaults': {'f4': 0.5},
+        'outlier_bounds': {'f0': (np.float64(-3.0), np.float64(3.0))},
+        'metadata': {'schema_version': 1, 'model_version': 'test'},
+    }, X
+
+
+class RuntimeTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'runtime.npz')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_ensemble_probabilities_match_sklearn(self):
+        for n_classes in (2, 4):
+            bundle, X = make_bundle(n_classes)
+            export_bundle(bundle, self.path)
+            runtime = load_bundle(self.path)
+
+            expected = bundle['model'].predict_proba(bundle['scaler'].transform(X))
+            actual = runtime['model'].predict_proba(runtime['scaler'].transform(X))
+            np.testing.assert_allclose(actual, expected, atol=1e-12)
+            self.assertEqual(list(runtime['label_encoder'].inverse_transform(runtime['model'].classes_)),
+                             list(bundle['label_encoder'].classes_))
+            self.assertEqual(runtime['feature_encoders']['Gender'].transform(['Male'])[0], 1)
+
+    def test_nutrition_regressor_matches_sklearn(self):
+        rng = np.random.RandomState(1)
+        X = rng.normal(size=(200, 6))
+        y = np.column_stack([X[:, 0] * 100, X[:, 1], X[:, 2] ** 2, X[:, 3]])
+        model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+        export_nutrition_bundle({'model': model, 'label_encoder': LabelEncoder().fit(['a', 'b']),
+                                 'features': list('abcdef')}, self.path)
+        runtime = load_nutrition_bundle(self.path)
+        np.testing.assert_allclose(runtime['model'].predict(X), model.predict(X), atol=1e-9)
+
+    def test_load_model_uses_runtime_when_configured(self):
+        bundle, _ = make_bundle(3)
+        export_bundle(bundle, self.path)
+        with patch.dict(os.environ, {'MODEL_RUNTIME': 'numpy'}), \
+                patch.object(predict_module, 'RUNTIME_MODEL_PATH', self.path), \
+                patch.object(predict_module, '_model_bundle', None):
+            loaded = predict_module.load_model()
+        self.assertEqual(type(loaded['model']).__module__, 'src.runtime.models')
+
+    def test_runtime_package_does_not_import_sklearn(self):
+        code = ('import sys, src.runtime; '
+                'sys.exit(1 if "sklearn" in sys.modules or "pandas" in sys.modules else 0)')
+        root = os.path.join(os.path.dirname(__file__), '..')
+        self.assertEqual(subprocess.run([sys.executable, '-c', code], cwd=root).returncode, 0)
+
+if __name__ == '__main__':
+    unittest.main()
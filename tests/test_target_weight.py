@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import app as app_module
+from src.target_weight import WEIGHT_TOLERANCE_KG, solve_target_weight
+
+FEATURE_COLS = ['Age', 'Height', 'Weight', 'BMI']
+CLASSES = ['Insufficient_Weight', 'Normal_Weight', 'Overweight_Level_I', 'Obesity_Type_I']
+
+
+def bmi_classifier(cuts):
+    """predict_fn stand-in: the class is the BMI band; counts its calls."""
+    calls = []
+
+    def predict_fn(X):
+        calls.append(len(X))
+        labels = np.digitize(X[:, FEATURE_COLS.index('BMI')], cuts)
+        return np.eye(len(CLASSES))[labels], CLASSES
+    return predict_fn, calls
+
+
+class TargetWeightTests(unittest.TestCase):
+    def setUp(self):
+        self.row = np.array([30.0, 1.80, 95.0, 95.0 / 1.80 ** 2])
+
+    def test_transitions_match_band_edges(self):
+        predict_fn, calls = bmi_classifier([18.5, 25.0, 30.0])
+        result = solve_target_weight(self.row, FEATURE_COLS, predict_fn)
+
+        self.assertEqual([t['to_class'] for t in result['transitions']], CLASSES[1:])
+        for transition, cut in zip(result['transitions'], [18.5, 25.0, 30.0]):
+            self.assertAlmostEqual(transition['weight_kg'], cut * 1.80 ** 2, delta=WEIGHT_TOLERANCE_KG)
+        self.assertEqual(len(calls), result['search']['calls'])
+        self.assertLessEqual(len(calls), 3)
+
+        target = result['target']
+        self.assertFalse(target['reached'])
+        self.assertAlmostEqual(target['weight_kg'], 25.0 * 1.80 ** 2, delta=WEIGHT_TOLERANCE_KG)
+        self.assertLess(target['change_kg'], 0)
+
+    def test_bracket_holding_several_boundaries_is_split(self):
+        # Between sweep points BMI 24.5 (Normal) and 25.0 (Obesity) the class goes
+        # Normal → Overweight_Level_I → Normal → Obesity_Type_I
+        def predict_fn(X):
+            bmi = X[:, FEATURE_COLS.index('BMI')]
+            labels = np.array([0, 1, 3])[np.digitize(bmi, [18.5, 24.9])]
+            labels = np.where((bmi >= 24.6) & (bmi < 24.8), 2, labels)
+            return np.eye(len(CLASSES))[labels], CLASSES
+
+        result = solve_target_weight(self.row, FEATURE_COLS, predict_fn)
+        classes = [s['class'] for s in result['segments']]
+        self.assertEqual(classes, ['Insufficient_Weight', 'Normal_Weight', 'Overweight_Level_I',
+                                   'Normal_Weight', 'Obesity_Type_I'])
+        self.assertAlmostEqual(result['transitions'][-1]['bmi'], 24.9, delta=0.05)
+
+    def test_target_reached_and_missing(self):
+        predict_fn, _ = bmi_classifier([18.5, 25.0, 30.0])
+        normal_row = np.array([30.0, 1.80, 70.0, 70.0 / 1.80 ** 2])
+        result = solve_target_weight(normal_row, FEATURE_COLS, predict_fn)
+        self.assertTrue(result['target']['reached'])
+        self.assertEqual(result['target']['change_kg'], 0.0)
+
+        result = solve_target_weight(normal_row, FEATURE_COLS, predict_fn, target='Obesity_Type_III')
+        self.assertIsNone(result['target'])
+
+
+class TargetWeightRouteTests(unittest.TestCase):
+    def setUp(self):
+        app_module.app.config['TESTING'] = True
+        self.client = app_module.app.test_client()
+        audit = patch.object(app_module, 'get_audit_log', return_value=None)
+        audit.start()
+        self.addCleanup(audit.stop)
+
+    @patch('src.predict.predict')
+    def test_api_passes_target_class(self, mock_predict):
+        mock_predict.return_value = {'class_label': 'Obesity_Type_I', 'weight_target': {'target': None}}
+        with patch.object(app_module, 'MODEL_EXISTS', True):
+            response = self.client.post('/api/target-weight', json={
+                'age': 40, 'gender': 'Female', 'height': 165, 'weight': 90,
+                'physical_activity': 'Light', 'family_history': 'Yes', 'target': 'Overweight_Level_I',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_predict.call_args.kwargs['weight_target'], 'Overweight_Level_I')
+
+    def test_api_rejects_unknown_target(self):
+        with patch.object(app_module, 'MODEL_EXISTS', True):
+            response = self.client.post('/api/target-weight', json={'target': 'Very_Fit'})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import unittest
+import uuid
+from unittest.mock import patch
+
+import app as app_module
+from src.traffic import OTHER_CLASS, TrafficMonitor
+
+CLASSES = ['Normal_Weight', 'Obesity_Type_I', 'Overweight_Level_I']
+T0 = 1_700_000_000.0     # a whole number of 15-minute buckets
+
+
+def make_monitor(test):
+    monitor = TrafficMonitor(CLASSES, name=f'obesity-ai-test-{uuid.uuid4().hex[:12]}')
+    test.addCleanup(monitor.counters.unlink)
+    return monitor
+
+
+class TrafficMonitorTests(unittest.TestCase):
+    def setUp(self):
+        self.monitor = make_monitor(self)
+
+    def test_windows_only_count_their_recent_buckets(self):
+        # one prediction every 30 s for 100 minutes
+        for i in range(200):
+            self.monitor.record('Obesity_Type_I', 80.0, now=T0 + i * 30)
+        windows = self.monitor.report(now=T0 + 200 * 30)['windows']
+
+        self.assertEqual(windows['1m']['requests'], 1)
+        self.assertEqual(windows['1h']['requests'], 118)
+        self.assertEqual(windows['24h']['requests'], 200)
+        self.assertAlmostEqual(windows['1h']['per_minute'], round(118 / 60, 2))
+
+    def test_mix_split_and_confidence(self):
+        self.monitor.record('Normal_Weight', 95.0, 'basic', now=T0)
+        self.monitor.record('Normal_Weight', 100.0, 'advanced', now=T0)
+        self.monitor.record('Obesity_Type_I', 42.0, 'advanced', now=T0)
+        self.monitor.record('Not_A_Class', 5.0, 'basic', now=T0)
+        window = self.monitor.report(now=T0 + 1)['windows']['1m']
+
+        self.assertEqual(window['modes'], {'basic': 2, 'advanced': 2})
+        self.assertEqual(window['classes'], {'Normal_Weight': 2, 'Obesity_Type_I': 1,
+                                             'Overweight_Level_I': 0, OTHER_CLASS: 1})
+        self.assertEqual(window['confidence'], [1, 0, 0, 0, 1, 0, 0, 0, 0, 2])
+        self.assertEqual(window['mean_confidence'], 60.5)
+
+    def test_stale_buckets_are_reused(self):
+        self.monitor.record('Normal_Weight', 90.0, now=T0)
+        day_later = T0 + 24 * 3600      # same bucket of every ring, one full lap later
+        self.monitor.record('Obesity_Type_I', 90.0, now=day_later)
+        report = self.monitor.report(now=day_later)
+
+        self.assertEqual(report['windows']['24h']['requests'], 1)
+        self.assertEqual(report['windows']['24h']['classes']['Normal_Weight'], 0)
+        self.assertEqual(report['requests_per_minute'][-1], 1)
+        self.assertEqual(sum(report['requests_per_minute']), 1)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs fork')
+    def test_workers_feed_the_same_windows(self):
+        self.monitor.record('Normal_Weight', 90.0, now=T0)
+        pid = os.fork()
+        if pid == 0:
+            self.monitor.record('Obesity_Type_I', 70.0, 'advanced', now=T0 + 5)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        report = self.monitor.report(now=T0 + 10)
+
+        self.assertEqual(report['workers'], 2)
+        self.assertEqual(report['windows']['1m']['requests'], 2)
+        self.assertEqual(report['windows']['1m']['modes']['advanced'], 1)
+
+
+class TrafficRouteTests(unittest.TestCase):
+    def setUp(self):
+        app_module.app.config['TESTING'] = True
+        self.client = app_module.app.test_client()
+        self.monitor = make_monitor(self)
+        audit = patch.object(app_module, 'get_audit_log', return_value=None)
+        audit.start()
+        self.addCleanup(audit.stop)
+
+    @patch('src.predict.predict')
+    def test_predictions_show_up_in_the_endpoint(self, mock_predict):
+        mock_predict.return_value = {'class_label': 'Obesity_Type_I', 'confidence': 88.0, 'bmi': 31.0,
+                                     'model_version': 'v1', 'all_probs': {'Obesity_Type_I': 88.0}}
+        form = {'age': '40', 'gender': 'Female', 'height': '165', 'weight': '85',
+                'physical_activity': 'Light', 'family_history': 'Yes'}
+        with patch.object(app_module, 'MODEL_EXISTS', True), \
+                patch('src.traffic.get_traffic_monitor', return_value=self.monitor):
+            self.client.post('/predict', data=form)
+            response = self.client.get('/metrics/traffic')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-store', response.headers['Cache-Control'])
+        window = response.get_json()['windows']['1m']
+        self.assertEqual(window['requests'], 1)
+        self.assertEqual(window['modes']['basic'], 1)
+        self.assertEqual(window['classes']['Obesity_Type_I'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
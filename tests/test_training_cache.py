@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+import src.train as train_module
+
+
+class TrainingCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.bundle_path = os.path.join(self.tmp_dir, 'obesity_model.pkl')
+        self.patches = [
+            patch.object(train_module, 'MODEL_DIR', self.tmp_dir),
+            patch.object(train_module, 'OUTPUT_DIR', self.tmp_dir),
+            patch.object(train_module, 'BUNDLE_PATH', self.bundle_path),
+            patch.object(train_module, 'TUNED_PARAMS_PATH', os.path.join(self.tmp_dir, 'none.json')),
+        ]
+        for p in self.patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def save_bundle(self, fingerprint):
+        with open(self.bundle_path, 'wb') as f:
+            pickle.dump({'model': 'ensemble', 'stats': {'ensemble': {'accuracy': 0.9}},
+                         'metadata': {'model_version': 'v1', 'fingerprint': fingerprint}}, f)
+
+    def current_fingerprint(self):
+        return train_module.training_fingerprint(
+            train_module.dataset_hash(), train_module.load_params())
+
+    def test_fingerprint_covers_data_params_and_settings(self):
+        params = train_module.load_params()
+        base = train_module.training_fingerprint('abc', params, chunk_rows=0)
+        self.assertEqual(base, train_module.training_fingerprint('abc', train_module.load_params(), chunk_rows=0))
+        self.assertNotEqual(base, train_module.training_fingerprint('abd', params, chunk_rows=0))
+        self.assertNotEqual(base, train_module.training_fingerprint('abc', {**params, 'weights': [2, 1, 1]}, 0))
+        self.assertNotEqual(base, train_module.training_fingerprint('abc', params, chunk_rows=1000))
+        with patch.dict(train_module.PREPROCESSING_CONFIG, {'outlier_iqr_factor': 3.0}):
+            self.assertNotEqual(base, train_module.training_fingerprint('abc', params, chunk_rows=0))
+
+    def test_matching_run_is_reused_and_recorded(self):
+        self.save_bundle(self.current_fingerprint())
+        with redirect_stdout(io.StringIO()), \
+                patch.object(train_module, 'load_and_preprocess', side_effect=AssertionError('retrained')):
+            mtime = os.stat(self.bundle_path).st_mtime_ns
+            bundle, stats, reused = train_module.train()
+            train_module.train()
+
+        self.assertTrue(reused)
+        self.assertEqual(stats, {'ensemble': {'accuracy': 0.9}})
+        self.assertEqual(os.stat(self.bundle_path).st_mtime_ns, mtime)   # live bundle left alone
+        with open(os.path.join(self.tmp_dir, train_module.REUSE_LOG_FILE)) as f:
+            log = json.load(f)
+        self.assertEqual(log['reuse_count'], 2)
+        self.assertEqual(len(log['reuse_events']), 2)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, 'model_stats.json')))
+
+    def test_force_or_changed_inputs_retrain(self):
+        self.save_bundle(self.current_fingerprint())
+        sentinel = RuntimeError('retrained')
+        with redirect_stdout(io.StringIO()), \
+                patch.object(train_module, 'load_and_preprocess', side_effect=sentinel):
+            with self.assertRaises(RuntimeError):
+                train_module.train(force=True)
+            self.save_bundle('stale')
+            with self.assertRaises(RuntimeError):
+                train_module.train()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+import numpy as np
+
+import src.train as train_module
+from src.tune import DEFAULT_LATENCY_WEIGHT, share_arrays, successive_halving, write_tuned_params
+
+TINY_SPACE = {
+    'rf': {'n_estimators': [5, 10]},
+    'lr': {'max_iter': [200]},
+    'gb': {'n_estimators': [5]},
+}
+
+
+class TuneTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_share_arrays_round_trip(self):
+        array = np.arange(12, dtype=float).reshape(3, 4)
+        blocks, spec = share_arrays({'X': array})
+        try:
+            name, shape, dtype = spec['X']
+            view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=blocks[0].buf)
+            np.testing.assert_array_equal(view, array)
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    def test_search_writes_params_that_train_reads(self):
+        rng = np.random.RandomState(0)
+        X = rng.normal(size=(240, 4))
+        y = (X[:, 0] + X[:, 1] > 0).astype(int) + (X[:, 2] > 1).astype(int)
+
+        with redirect_stdout(io.StringIO()):
+            best = successive_halving(X, y, candidates=2, eta=2, workers=2, space=TINY_SPACE)
+
+        # latency is timed after the search, in this process, and enters the objective
+        self.assertGreater(best['latency_ms'], 0)
+        self.assertAlmostEqual(best['objective'],
+                               best['f1'] - DEFAULT_LATENCY_WEIGHT * best['latency_ms'], places=4)
+
+        path = os.path.join(self.tmp_dir, 'tuned_params.json')
+        write_tuned_params(best, path)
+        with patch.object(train_module, 'TUNED_PARAMS_PATH', path):
+            params = train_module.load_params()
+
+        self.assertEqual(params['rf']['n_estimators'], best['config']['rf']['n_estimators'])
+        self.assertEqual(params['weights'], best['weights'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from src.vocabulary import (
+    Vocabulary, bundle_encoders, encode_frame, fit_vocabularies, vocabularies_to_json,
+)
+
+
+class VocabularyTests(unittest.TestCase):
+    def setUp(self):
+        self.values = ['no', 'Sometimes', 'Always', 'Sometimes', 'Frequently', 'Sometimes', 'no']
+
+    def test_codes_match_label_encoder_for_text_and_categories(self):
+        expected = LabelEncoder().fit_transform(self.values)
+        for values in (pd.Series(self.values), pd.Series(self.values, dtype='category')):
+            vocabulary = Vocabulary.fit(values)
+            self.assertEqual(list(vocabulary.classes_), list(LabelEncoder().fit(self.values).classes_))
+            np.testing.assert_array_equal(vocabulary.codes(values), expected)
+        self.assertEqual(vocabulary.default, 'Sometimes')
+
+    def test_unused_categories_are_not_in_the_vocabulary(self):
+        values = pd.Series(pd.Categorical(['yes', 'yes'], categories=['no', 'yes']))
+        self.assertEqual(list(Vocabulary.fit(values).classes_), ['yes'])
+
+    def test_unseen_values_raise_or_map_to_default(self):
+        vocabulary = Vocabulary.fit(pd.Series(self.values))
+        with self.assertRaisesRegex(ValueError, r"Unseen categories in 'CAEC': \['Never'\]"):
+            vocabulary.codes(['Always', 'Never'], column='CAEC')
+        np.testing.assert_array_equal(vocabulary.codes(['Always', 'Never'], unseen='default'), [0, 2])
+        with self.assertRaises(ValueError):
+            vocabulary.codes(['Always'], unseen='ignore')
+
+    def test_encode_frame_and_json_round_trip(self):
+        df = pd.DataFrame({'CAEC': self.values, 'Gender': ['Male', 'Female'] * 3 + ['Male'],
+                           'Age': np.arange(7.0), 'y': ['a', 'b'] * 3 + ['a']})
+        vocabularies = fit_vocabularies(df, ['CAEC', 'Gender', 'y'])
+        encoded = encode_frame(df, vocabularies)
+        self.assertEqual(list(encoded.columns), list(df.columns))
+        self.assertEqual(list(encoded['Gender']), [1, 0, 1, 0, 1, 0, 1])
+        self.assertEqual(list(encoded['Age']), list(df['Age']))
+
+        label_encoder = vocabularies.pop('y')
+        payload = json.loads(json.dumps(vocabularies_to_json(vocabularies, label_encoder, 'y')))
+        features, target = bundle_encoders({'vocabularies': payload})
+        self.assertEqual(list(target.classes_), ['a', 'b'])
+        self.assertEqual(features['CAEC'].default, 'Sometimes')
+        np.testing.assert_array_equal(features['CAEC'].transform(self.values), encoded['CAEC'])
+
+    def test_legacy_bundle_keeps_its_encoders(self):
+        encoder = LabelEncoder().fit(['Female', 'Male'])
+        bundle = {'feature_encoders': {'Gender': encoder}, 'label_encoder': encoder}
+        self.assertIs(bundle_encoders(bundle)[0]['Gender'], encoder)
+        payload = vocabularies_to_json(bundle['feature_encoders'], encoder, 'y')
+        self.assertEqual(payload['columns']['Gender'], {'classes': ['Female', 'Male'], 'default': None})
+
+
+if __name__ == '__main__':
+    unittest.main()